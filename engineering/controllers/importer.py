@@ -7,7 +7,12 @@ import json
 
 import frappe
 import requests
-from frappe.utils import add_to_date, get_datetime, now, now_datetime
+from frappe.utils import add_days, add_to_date, cint, flt, get_datetime, getdate, now, now_datetime
+
+from engineering.controllers.notifications import (
+    WEARCHECK_SEVERITY_MAP,
+    wearcheck_results_on_update,
+)
 
 
 RESULT_ROW_FIELDS = (
@@ -62,6 +67,44 @@ RESULT_ROW_FIELDS = (
     "pq",
 )
 
+ELEMENT_FIELDS = (
+    "fe",
+    "ag",
+    "al",
+    "ca",
+    "cr",
+    "cu",
+    "mg",
+    "na",
+    "ni",
+    "pb",
+    "si",
+    "sn",
+    "p",
+    "b",
+    "ba",
+    "mo",
+    "v",
+    "zn",
+    "ti",
+)
+
+RESULTS_DOCTYPE = "WearCheck Results"
+
+# Rows prefetched / written per batch (one checksum query and one query
+# per link doctype each).
+IMPORT_BATCH_SIZE = 1000
+WRITE_CHUNK_SIZE = 500
+
+# Streaming fetch: query parameters sent to the WearCheck endpoint, read size
+# and (connect, per-read) timeouts. The paging parameters are only sent when
+# a Page Size is configured (off by default until the endpoint confirms them).
+SINCE_PARAM = "registerdate_from"
+PAGE_PARAM = "page"
+PAGE_SIZE_PARAM = "page_size"
+STREAM_CHUNK_BYTES = 64 * 1024
+FETCH_TIMEOUT = (15, 90)
+
 
 def _norm(value):
     return (value or "").strip()
@@ -115,15 +158,6 @@ def _checksum(row):
     return hashlib.sha1(raw.encode("utf-8")).hexdigest()
 
 
-def _safe_link(doctype, value):
-    value = _norm(value)
-
-    if not value:
-        return None
-
-    return value if frappe.db.exists(doctype, value) else None
-
-
 def _row_from_wearcheck_result(doc):
     return {fieldname: getattr(doc, fieldname, None) for fieldname in RESULT_ROW_FIELDS}
 
@@ -210,6 +244,163 @@ def _set_settings_sync_attempt(success=False, error=None):
     frappe.db.commit()
 
 
+def _prepare_result(row, mapping, links):
+    """
+    Field values for one WearCheck Results row, with links resolved
+    case-insensitively against the prefetched `links` maps and written as
+    the stored names. Returns (values, link_errors).
+    """
+    raw_customer_s = _norm(row.get("customer"))
+    raw_site_s = _norm(row.get("site"))
+    raw_machine_s = _norm(row.get("machine"))
+
+    mapped_company = mapping.get("Company", {}).get(_key(raw_customer_s)) or (raw_customer_s or None)
+    mapped_location = mapping.get("Location", {}).get(_key(raw_site_s)) or (raw_site_s or None)
+    mapped_asset = mapping.get("Asset", {}).get(_key(raw_machine_s)) or (raw_machine_s or None)
+
+    company = links["Company"].get(_norm(mapped_company).casefold())
+    location = links["Location"].get(_norm(mapped_location).casefold())
+    asset = links["Asset"].get(_norm(mapped_asset).casefold())
+
+    values = {
+        "sampno": _to_int(row.get("sampno")),
+        "bottleno": _to_int(row.get("bottleno")),
+        "customer": raw_customer_s,
+        "site": raw_site_s,
+        "machine": raw_machine_s,
+        "raw_company_value": mapped_company or "",
+        "raw_location_value": mapped_location or "",
+        "raw_asset_value": mapped_asset or "",
+        "company": company,
+        "location": location,
+        "asset": asset,
+        "component": row.get("component") or "",
+        "profileid": _to_int(row.get("profileid")),
+        "status": _to_int(row.get("status")),
+        "sampledate": row.get("sampledate") or None,
+        "registerdate": row.get("registerdate") or None,
+        "machread": _to_int(row.get("machread")),
+        "oilread": _to_float(row.get("oilread")),
+        "perwater": _to_float(row.get("perwater")),
+        "fueldilution": _to_float(row.get("fueldilution")),
+        "oilsupplier": row.get("oilsupplier") or "",
+        "oilbrand": row.get("oilbrand") or "",
+        "samp_taker": row.get("samp_taker") or "",
+        "commentstext": row.get("commentstext") or "",
+        "actiontext": row.get("actiontext") or "",
+        "feedbacktext": row.get("feedbacktext") or "",
+        "tan": _to_float(row.get("tan")),
+        "tbn": _to_float(row.get("tbn")),
+        "v40": _to_float(row.get("v40")),
+        "v100": _to_float(row.get("v100")),
+        "oxi": _to_float(row.get("oxi")),
+        "soot": _to_float(row.get("soot")),
+        "iso4": _to_int(row.get("iso4")),
+        "iso6": _to_int(row.get("iso6")),
+        "iso14": _to_int(row.get("iso14")),
+        "pq": _to_int(row.get("pq")),
+    }
+
+    for fieldname in ELEMENT_FIELDS:
+        values[fieldname] = _to_int(row.get(fieldname))
+
+    link_errors = []
+
+    if mapped_company and not company:
+        link_errors.append(f"Could not find Company: {mapped_company}")
+
+    if mapped_location and not location:
+        link_errors.append(f"Could not find Location: {mapped_location}")
+
+    if mapped_asset and not asset:
+        link_errors.append(f"Could not find Asset: {mapped_asset}")
+
+    if link_errors:
+        values.update({
+            "import_failed": 1,
+            "import_status": "Failed",
+            "import_error": " | ".join(link_errors)[:140],
+            "import_error_details": "\n".join(link_errors),
+        })
+    else:
+        values.update({
+            "import_failed": 0,
+            "import_status": "Success",
+            "import_error": "",
+            "import_error_details": "",
+        })
+
+    return values, link_errors
+
+
+def _db_values(values, meta):
+    """Int / Float columns are NOT NULL in MariaDB; store None as 0 like Document.insert does."""
+    out = {}
+
+    for fieldname, value in values.items():
+        df = meta.get_field(fieldname)
+        fieldtype = df.fieldtype if df else None
+
+        if fieldtype in ("Int", "Check"):
+            value = cint(value)
+        elif fieldtype in ("Float", "Currency", "Percent"):
+            value = flt(value)
+
+        out[fieldname] = value
+
+    return out
+
+
+def _existing_names(doctype, values):
+    """{casefolded name: stored name} for the values that exist (the IN match is case-insensitive)."""
+    values = sorted({_norm(value) for value in values if _norm(value)})
+
+    if not values:
+        return {}
+
+    return {
+        name.casefold(): name
+        for name in frappe.get_all(doctype, filters={"name": ["in", values]}, pluck="name")
+    }
+
+
+def _existing_results(names):
+    return {
+        row.name: row
+        for row in frappe.get_all(
+            RESULTS_DOCTYPE,
+            filters={"name": ["in", names]},
+            fields=["name", "checksum", "critical_notification_sent"],
+        )
+    }
+
+
+def _insert_results(rows_by_name):
+    timestamp = now()
+    user = frappe.session.user
+
+    fields = None
+    values = []
+
+    for name, row_values in rows_by_name.items():
+        if fields is None:
+            fields = ["name", "creation", "modified", "owner", "modified_by", "docstatus", "idx", *row_values]
+
+        values.append((name, timestamp, timestamp, user, user, 0, 0, *row_values.values()))
+
+    if values:
+        frappe.db.bulk_insert(RESULTS_DOCTYPE, fields, values, chunk_size=WRITE_CHUNK_SIZE)
+
+
+def _send_result_alerts(names):
+    """WearCheck Results after_insert / on_update hooks are skipped by bulk writes."""
+    for name in names:
+        try:
+            wearcheck_results_on_update(frappe.get_doc(RESULTS_DOCTYPE, name))
+        except Exception:
+            frappe.log_error(frappe.get_traceback(), "WearCheck Alert Email Failed")
+
+
 def sync_wearcheck_rows(rows, force=False):
     """
     Normal scheduled/API import:
@@ -219,9 +410,17 @@ def sync_wearcheck_rows(rows, force=False):
     Manual retry/bulk failed retry:
         force=True
         checksum skip is bypassed so corrected mappings are reapplied.
+
+    Rows are processed in batches: existing checksums and Company / Location /
+    Asset link targets are loaded with one query per batch, unchanged rows are
+    skipped in memory, and new / changed rows are written with bulk_insert /
+    bulk_update.
     """
+    started = now_datetime()
+
     settings = _get_settings()
     mapping = _get_mapping(settings)
+    meta = frappe.get_meta(RESULTS_DOCTYPE)
 
     created = 0
     updated = 0
@@ -229,9 +428,8 @@ def sync_wearcheck_rows(rows, force=False):
     successful = 0
     failed = 0
 
-    batch_size = 200
-    processed_since_commit = 0
-
+    # Last occurrence of a sampno wins, as with the former row-by-row saves.
+    rows_by_name = {}
     for row in rows:
         if not isinstance(row, dict):
             continue
@@ -241,142 +439,79 @@ def sync_wearcheck_rows(rows, force=False):
         if not sampno:
             continue
 
-        name = str(sampno)
+        rows_by_name[str(sampno)] = row
+
+    names = list(rows_by_name)
+
+    for offset in range(0, len(names), IMPORT_BATCH_SIZE):
+        batch_names = names[offset:offset + IMPORT_BATCH_SIZE]
+        existing = _existing_results(batch_names)
 
-        new_checksum = _checksum(row)
-        old_checksum = frappe.db.get_value("WearCheck Results", name, "checksum")
+        pending = {}
+        for name in batch_names:
+            row = rows_by_name[name]
+            new_checksum = _checksum(row)
+            old_checksum = existing[name].checksum if name in existing else None
 
-        if old_checksum and old_checksum == new_checksum and not force:
-            skipped += 1
+            if old_checksum and old_checksum == new_checksum and not force:
+                skipped += 1
+                continue
+
+            pending[name] = (row, new_checksum)
+
+        if not pending:
             continue
 
-        exists = frappe.db.exists("WearCheck Results", name)
-        doc = frappe.get_doc("WearCheck Results", name) if exists else frappe.new_doc("WearCheck Results")
-
-        doc.sampno = sampno
-        doc.bottleno = _to_int(row.get("bottleno"))
-
-        raw_customer = row.get("customer") or ""
-        raw_site = row.get("site") or ""
-        raw_machine = row.get("machine") or ""
-
-        raw_customer_s = _norm(raw_customer)
-        raw_site_s = _norm(raw_site)
-        raw_machine_s = _norm(raw_machine)
-
-        mapped_company = mapping.get("Company", {}).get(_key(raw_customer)) or (raw_customer_s or None)
-        mapped_location = mapping.get("Location", {}).get(_key(raw_site)) or (raw_site_s or None)
-        mapped_asset = mapping.get("Asset", {}).get(_key(raw_machine)) or (raw_machine_s or None)
-
-        doc.customer = raw_customer_s
-        doc.site = raw_site_s
-        doc.machine = raw_machine_s
-
-        doc.raw_company_value = mapped_company or ""
-        doc.raw_location_value = mapped_location or ""
-        doc.raw_asset_value = mapped_asset or ""
-        doc.last_import_attempt = now()
-
-        doc.company = _safe_link("Company", mapped_company)
-        doc.location = _safe_link("Location", mapped_location)
-        doc.asset = _safe_link("Asset", mapped_asset)
-
-        doc.component = row.get("component") or ""
-        doc.profileid = _to_int(row.get("profileid"))
-        doc.status = _to_int(row.get("status"))
-
-        doc.sampledate = row.get("sampledate") or None
-        doc.registerdate = row.get("registerdate") or None
-
-        doc.machread = _to_int(row.get("machread"))
-        doc.oilread = _to_float(row.get("oilread"))
-        doc.perwater = _to_float(row.get("perwater"))
-        doc.fueldilution = _to_float(row.get("fueldilution"))
-
-        doc.oilsupplier = row.get("oilsupplier") or ""
-        doc.oilbrand = row.get("oilbrand") or ""
-        doc.samp_taker = row.get("samp_taker") or ""
-
-        doc.commentstext = row.get("commentstext") or ""
-        doc.actiontext = row.get("actiontext") or ""
-        doc.feedbacktext = row.get("feedbacktext") or ""
-
-        doc.tan = _to_float(row.get("tan"))
-        doc.tbn = _to_float(row.get("tbn"))
-
-        for fieldname in (
-            "fe",
-            "ag",
-            "al",
-            "ca",
-            "cr",
-            "cu",
-            "mg",
-            "na",
-            "ni",
-            "pb",
-            "si",
-            "sn",
-            "p",
-            "b",
-            "ba",
-            "mo",
-            "v",
-            "zn",
-            "ti",
-        ):
-            setattr(doc, fieldname, _to_int(row.get(fieldname)))
-
-        doc.v40 = _to_float(row.get("v40"))
-        doc.v100 = _to_float(row.get("v100"))
-        doc.oxi = _to_float(row.get("oxi"))
-        doc.soot = _to_float(row.get("soot"))
-
-        doc.iso4 = _to_int(row.get("iso4"))
-        doc.iso6 = _to_int(row.get("iso6"))
-        doc.iso14 = _to_int(row.get("iso14"))
-        doc.pq = _to_int(row.get("pq"))
-
-        link_errors = []
-
-        if mapped_company and not doc.company:
-            link_errors.append(f"Could not find Company: {mapped_company}")
-
-        if mapped_location and not doc.location:
-            link_errors.append(f"Could not find Location: {mapped_location}")
-
-        if mapped_asset and not doc.asset:
-            link_errors.append(f"Could not find Asset: {mapped_asset}")
-
-        if link_errors:
-            doc.import_failed = 1
-            doc.import_status = "Failed"
-            doc.import_error = " | ".join(link_errors)[:140]
-            doc.import_error_details = "\n".join(link_errors)
-            failed += 1
-        else:
-            doc.import_failed = 0
-            doc.import_status = "Success"
-            doc.import_error = ""
-            doc.import_error_details = ""
-            successful += 1
-
-        doc.checksum = new_checksum
-
-        if exists:
-            doc.save(ignore_permissions=True)
-            updated += 1
-        else:
-            doc.insert(ignore_permissions=True)
-            created += 1
-
-        processed_since_commit += 1
-
-        if processed_since_commit % batch_size == 0:
-            frappe.db.commit()
+        candidates = {"Company": set(), "Location": set(), "Asset": set()}
+        for row, _ in pending.values():
+            for doctype, raw_field in (("Company", "customer"), ("Location", "site"), ("Asset", "machine")):
+                raw_value = _norm(row.get(raw_field))
+                candidates[doctype].add(mapping.get(doctype, {}).get(_key(raw_value)) or raw_value)
+
+        links = {doctype: _existing_names(doctype, values) for doctype, values in candidates.items()}
+
+        timestamp = now()
+        inserts = {}
+        updates = {}
+        alert_names = []
+
+        for name, (row, new_checksum) in pending.items():
+            values, link_errors = _prepare_result(row, mapping, links)
+            values["last_import_attempt"] = timestamp
+            values["checksum"] = new_checksum
+
+            if link_errors:
+                failed += 1
+            else:
+                successful += 1
+
+                if cint(values.get("status")) in WEARCHECK_SEVERITY_MAP and not (
+                    name in existing and cint(existing[name].critical_notification_sent)
+                ):
+                    alert_names.append(name)
+
+            if name in existing:
+                updates[name] = _db_values(values, meta)
+            else:
+                inserts[name] = _db_values(values, meta)
+
+        _insert_results(inserts)
+
+        if updates:
+            frappe.db.bulk_update(RESULTS_DOCTYPE, updates, chunk_size=WRITE_CHUNK_SIZE)
+
+        created += len(inserts)
+        updated += len(updates)
+
+        frappe.db.commit()
+
+        _send_result_alerts(alert_names)
 
     frappe.db.commit()
 
+    elapsed = max((now_datetime() - started).total_seconds(), 0.001)
+    received = len(rows_by_name)
+
     return {
         "ok": True,
         "count": len(rows),
@@ -386,12 +521,166 @@ def sync_wearcheck_rows(rows, force=False):
         "successful": successful,
         "failed": failed,
         "force": force,
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(received / elapsed, 1),
+        "skip_rate": round(skipped / received * 100, 1) if received else 0.0,
         "ts": now(),
     }
 
 
+def _iter_json_rows(response):
+    """
+    Yield result rows from a streamed response without holding the full body.
+
+    A top-level JSON list is decoded element by element as chunks arrive.
+    Wrapped payloads ({"data": [...]}) cannot be split that way and are
+    decoded once the body is complete.
+    """
+    decoder = json.JSONDecoder()
+    response.encoding = response.encoding or "utf-8"
+    chunks = response.iter_content(chunk_size=STREAM_CHUNK_BYTES, decode_unicode=True)
+
+    buffer = ""
+    for chunk in chunks:
+        buffer += chunk
+        if buffer.strip():
+            break
+
+    buffer = buffer.lstrip()
+
+    if not buffer.startswith("["):
+        rows = json.loads(buffer + "".join(chunks) or "[]")
+
+        if isinstance(rows, dict):
+            rows = rows.get("data") or rows.get("results") or [rows]
+
+        if not isinstance(rows, list):
+            frappe.throw("WearCheck API response must be a list of result rows")
+
+        yield from rows
+        return
+
+    buffer = buffer[1:]
+    pos = 0
+
+    while True:
+        while pos < len(buffer) and buffer[pos] in " \t\r\n,":
+            pos += 1
+
+        if pos >= len(buffer):
+            chunk = next(chunks, None)
+
+            if chunk is None:
+                frappe.throw("WearCheck API response ended before the result list was closed")
+
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        if buffer[pos] == "]":
+            return
+
+        try:
+            row, pos = decoder.raw_decode(buffer, pos)
+        except json.JSONDecodeError:
+            chunk = next(chunks, None)
+
+            if chunk is None:
+                raise
+
+            buffer = buffer[pos:] + chunk
+            pos = 0
+            continue
+
+        yield row
+
+        if pos > STREAM_CHUNK_BYTES:
+            buffer = buffer[pos:]
+            pos = 0
+
+
+def _iter_endpoint_rows(endpoint_url, headers, since=None, page_size=0):
+    """
+    Stream every row of the endpoint, page by page when page_size is set.
+
+    Paging stops on a short page, or when a page starts with the same row as
+    the previous one (an endpoint that ignores the paging parameters).
+    """
+    params = {SINCE_PARAM: str(since)} if since else {}
+    page = 1
+    previous_first = None
+
+    while True:
+        if page_size:
+            params.update({PAGE_PARAM: page, PAGE_SIZE_PARAM: page_size})
+
+        count = 0
+        first = None
+
+        with requests.get(
+            endpoint_url,
+            headers=headers,
+            params=params,
+            stream=True,
+            timeout=FETCH_TIMEOUT,
+        ) as response:
+            response.raise_for_status()
+
+            for row in _iter_json_rows(response):
+                if count == 0:
+                    first = _result_cursor(row)
+
+                    if first == previous_first:
+                        return
+
+                count += 1
+                yield row
+
+        if not page_size or count < page_size:
+            return
+
+        previous_first = first
+        page += 1
+
+
+def _result_cursor(row):
+    if not isinstance(row, dict):
+        return ("", 0)
+
+    return (str(row.get("registerdate") or "")[:10], _to_int(row.get("sampno")) or 0)
+
+
+def _save_high_water_mark(cursor):
+    frappe.db.set_single_value(
+        "API Wearcheck Settings",
+        {
+            "wearcheck_hwm_registerdate": cursor[0] or None,
+            "wearcheck_hwm_sampno": cursor[1],
+        },
+    )
+    frappe.db.commit()
+
+
+def _merge_sync_results(total, result):
+    for fieldname in ("count", "created", "updated", "skipped", "successful", "failed"):
+        total[fieldname] = total.get(fieldname, 0) + result.get(fieldname, 0)
+
+    return total
+
+
 @frappe.whitelist()
 def fetch_and_sync():
+    """
+    Stream new WearCheck results into sync_wearcheck_rows in batches.
+
+    Only results registered on or after (high-water mark - re-sync days) are
+    requested and imported; the overlap lets later edits to recent samples
+    through, and the checksum skip keeps re-sent rows cheap. While the stream
+    arrives in (registerdate, sampno) order the mark is saved after every
+    committed batch, so a failed run resumes from the last batch. Otherwise
+    it is only saved once the whole stream has been imported.
+    """
+    started = now_datetime()
     settings = _get_settings()
 
     if not getattr(settings, "enabled", 1):
@@ -408,18 +697,72 @@ def fetch_and_sync():
     api_key = settings.get_password("api_key") or ""
     headers = {"X-API-Key": api_key} if api_key else {}
 
-    response = requests.get(endpoint_url, headers=headers, timeout=90)
-    response.raise_for_status()
+    high_water_mark = (
+        str(getdate(settings.wearcheck_hwm_registerdate)) if settings.get("wearcheck_hwm_registerdate") else "",
+        cint(settings.get("wearcheck_hwm_sampno")),
+    )
 
-    rows = response.json() or []
+    since = None
+    if high_water_mark[0]:
+        since = str(add_days(high_water_mark[0], -max(cint(settings.get("wearcheck_resync_days")), 0)))
 
-    if isinstance(rows, dict):
-        rows = rows.get("data") or rows.get("results") or [rows]
+    totals = {"batches": 0, "fetched": 0, "older_than_since": 0}
+    batch = []
+    ordered = True
+    previous = None
+    cursor = high_water_mark
 
-    if not isinstance(rows, list):
-        frappe.throw("WearCheck API response must be a list of result rows")
+    def flush():
+        nonlocal batch, cursor
+
+        _merge_sync_results(totals, sync_wearcheck_rows(batch, force=False))
+        totals["batches"] += 1
+        cursor = max([cursor, *(_result_cursor(row) for row in batch)])
+        batch = []
+
+        if ordered:
+            _save_high_water_mark(cursor)
+
+    for row in _iter_endpoint_rows(endpoint_url, headers, since, cint(settings.get("wearcheck_page_size"))):
+        if not isinstance(row, dict):
+            continue
 
-    return sync_wearcheck_rows(rows, force=False)
+        totals["fetched"] += 1
+        key = _result_cursor(row)
+
+        # The endpoint may ignore the since parameter.
+        if since and key[0] and key[0] < since:
+            totals["older_than_since"] += 1
+            continue
+
+        if previous and key < previous:
+            ordered = False
+
+        previous = key
+        batch.append(row)
+
+        if len(batch) >= IMPORT_BATCH_SIZE:
+            flush()
+
+    if batch:
+        flush()
+
+    _save_high_water_mark(cursor)
+
+    elapsed = max((now_datetime() - started).total_seconds(), 0.001)
+    imported = totals.get("count", 0)
+
+    totals.update({
+        "ok": True,
+        "since": since,
+        "high_water_mark": {"registerdate": cursor[0], "sampno": cursor[1]},
+        "elapsed_seconds": round(elapsed, 3),
+        "rows_per_second": round(totals["fetched"] / elapsed, 1),
+        "skip_rate": round(totals.get("skipped", 0) / imported * 100, 1) if imported else 0.0,
+        "ts": now(),
+    })
+
+    return totals
 
 
 def run_scheduled_wearcheck_sync():
@@ -507,45 +850,23 @@ def enqueue_retry_failed_imports():
 
 
 def retry_failed_imports(limit=None):
-    names = frappe.get_all(
+    rows = frappe.get_all(
         "WearCheck Results",
         filters={
             "import_status": "Failed",
         },
-        pluck="name",
+        fields=list(RESULT_ROW_FIELDS),
         limit=limit,
         order_by="modified asc",
     )
 
-    retried = 0
-    fixed = 0
-    still_failed = 0
-
-    for name in names:
-        doc = frappe.get_doc("WearCheck Results", name)
-        row = _row_from_wearcheck_result(doc)
-
-        sync_wearcheck_rows([row], force=True)
-
-        doc.reload()
-
-        retried += 1
-
-        if doc.import_failed:
-            still_failed += 1
-        else:
-            fixed += 1
-
-        if retried % 50 == 0:
-            frappe.db.commit()
-
-    frappe.db.commit()
+    result = sync_wearcheck_rows(rows, force=True)
 
     return {
         "ok": True,
-        "retried": retried,
-        "fixed": fixed,
-        "still_failed": still_failed,
+        "retried": result["successful"] + result["failed"],
+        "fixed": result["successful"],
+        "still_failed": result["failed"],
         "ts": now(),
     }
 
@@ -1,9 +1,13 @@
 # Copyright (c) 2026, buff0k and contributors
 # For license information, please see license.txt
 
+import hashlib
+import json
+
 import frappe
 from frappe.email.doctype.email_account.email_account import EmailAccount
-from frappe.utils import now, now_datetime, cint
+from frappe.email.doctype.email_queue.email_queue import QueueBuilder
+from frappe.utils import now, now_datetime, cint, quoted
 
 
 # ---------------------------------------------------------------------
@@ -60,6 +64,13 @@ OPEN_BREAKDOWN_SITE_RECIPIENTS = {
 # Fallback if a Location name does not match any key above
 OPEN_BREAKDOWN_DEFAULT_RECIPIENTS = ["msani@isambane.co.za"]
 
+OPEN_BREAKDOWN_DOCTYPE = "Plant Breakdown or Maintenance"
+OPEN_BREAKDOWN_DIGEST_TEMPLATE = "engineering/templates/emails/open_breakdowns_digest.html"
+
+# An unchanged open set is not mailed again within this window (one slot).
+OPEN_BREAKDOWN_DIGEST_HASH_KEY = "open_breakdowns_digest_hash"
+OPEN_BREAKDOWN_DIGEST_REPEAT_SEC = 60 * 60 * 6
+
 
 # ---------------------------------------------------------------------
 # WearCheck severity map
@@ -138,126 +149,193 @@ def send_open_breakdowns_digest_hourly_gate():
     return send_open_breakdowns_digest(dry_run=False)
 
 
-def send_open_breakdowns_digest(dry_run: bool = False):
-    """
-    Twice daily digest: send separate emails per Site/Location for Open records.
-    dry_run=True: returns payloads instead of sending.
-    """
+def _recipients_for_location(location_name: str):
+    location_name = (location_name or "").strip()
+    return OPEN_BREAKDOWN_SITE_RECIPIENTS.get(location_name) or OPEN_BREAKDOWN_DEFAULT_RECIPIENTS
 
-    rows = frappe.get_all(
-        "Plant Breakdown or Maintenance",
-        filters={"open_closed": "Open"},
-        fields=["name", "asset_name", "breakdown_start_datetime", "location"],
-        order_by="location asc, breakdown_start_datetime asc",
-        limit_page_length=5000,
+
+def _open_set_hash(rows, recipients):
+    """Fingerprint of one site's open records (and who they go to)."""
+    payload = json.dumps(
+        [
+            [[r["name"], r.get("asset_name"), str(r.get("breakdown_start_datetime") or "")] for r in rows],
+            sorted(recipients),
+        ],
+        separators=(",", ":"),
     )
+    return hashlib.sha1(payload.encode()).hexdigest()
 
-    def _recipients_for_location(location_name: str):
-        location_name = (location_name or "").strip()
-        return OPEN_BREAKDOWN_SITE_RECIPIENTS.get(location_name) or OPEN_BREAKDOWN_DEFAULT_RECIPIENTS
+
+def build_open_breakdowns_digest(rows):
+    """
+    {location: {recipients, subject, message, open_hash}} for the open rows
+    (sorted by location, start). Form URLs are built from one base per
+    doctype instead of per row.
+    """
+    doc_base = frappe.utils.get_url_to_form(OPEN_BREAKDOWN_DOCTYPE, "")
+    asset_base = frappe.utils.get_url_to_form("Asset", "")
 
     by_location = {}
 
     for r in rows:
         loc = (r.get("location") or "").strip() or "Unknown"
-        by_location.setdefault(loc, []).append(r)
+        by_location.setdefault(loc, []).append(frappe._dict(
+            r,
+            doc_url=doc_base + quoted(r["name"]),
+            asset_url=asset_base + quoted(r["asset_name"]) if r.get("asset_name") else "",
+        ))
+
+    if not rows:
+        # One "nothing open" mail to the default recipients.
+        by_location["__default__"] = []
 
     payloads = {}
 
-    if not rows:
-        subject = "Open Plant Breakdowns / Maintenance (0)"
-        lines = [
-            "Hi Team",
-            "",
-            "Site: All",
-            "Open Plant Breakdown or Maintenance records: 0",
-            "",
-            "No open records found.",
-        ]
-        message = "<br>".join(lines)
-
-        payloads["__default__"] = {
-            "recipients": OPEN_BREAKDOWN_DEFAULT_RECIPIENTS,
+    for loc, loc_rows in by_location.items():
+        if loc == "__default__":
+            recipients = OPEN_BREAKDOWN_DEFAULT_RECIPIENTS
+            subject = "Open Plant Breakdowns / Maintenance (0)"
+            site_label = "All"
+        else:
+            recipients = _recipients_for_location(loc)
+            subject = f"Open Plant Breakdowns / Maintenance — {loc} ({len(loc_rows)})"
+            site_label = loc
+
+        payloads[loc] = {
+            "recipients": recipients,
             "subject": subject,
-            "message": message,
+            "message": frappe.render_template(
+                OPEN_BREAKDOWN_DIGEST_TEMPLATE,
+                {"location": site_label, "rows": loc_rows},
+            ),
+            "open_hash": _open_set_hash(loc_rows, recipients),
         }
 
-        if dry_run:
-            return payloads
+    return payloads
+
+
+def _queue_digest_emails(payloads, sender):
+    """
+    Queue every site's mail with one Email Queue and one Email Queue
+    Recipient bulk insert. The MIME message is still built by Frappe's
+    QueueBuilder, exactly as frappe.sendmail would.
+    """
+    queue_columns = set(frappe.get_meta("Email Queue").get_valid_columns())
+    timestamp = now()
+    user = frappe.session.user
+
+    queue_rows = []
+    recipient_rows = []
 
-        email_account = _get_outgoing_email_account(
-            match_by_doctype="Plant Breakdown or Maintenance"
+    for p in payloads.values():
+        builder = QueueBuilder(
+            recipients=p["recipients"],
+            sender=sender,
+            subject=p["subject"],
+            message=p["message"],
+            reference_doctype=OPEN_BREAKDOWN_DOCTYPE,
         )
 
-        if not email_account or not getattr(email_account, "email_id", None):
-            frappe.log_error(
-                "No outgoing Email Account configured/enabled. Skipping Open Breakdown digest.",
-                "Open Breakdown Digest",
-            )
-            return payloads
+        recipients = _dedupe_keep_order(builder.final_recipients())
+        if not recipients:
+            continue
 
-        try:
-            frappe.sendmail(
-                recipients=OPEN_BREAKDOWN_DEFAULT_RECIPIENTS,
-                sender=email_account.email_id,
-                subject=subject,
-                message=message,
-            )
-        except frappe.OutgoingEmailError:
-            frappe.log_error(
-                frappe.get_traceback(),
-                "Open Breakdown Digest OutgoingEmailError",
-            )
+        queue_name = frappe.generate_hash(length=10)
+        data = {
+            key: frappe.as_json(value) if isinstance(value, (dict, list)) else value
+            for key, value in builder.as_dict(include_recipients=False).items()
+            if key in queue_columns
+        }
+        data.update({
+            "name": queue_name,
+            "creation": timestamp,
+            "modified": timestamp,
+            "owner": user,
+            "modified_by": user,
+            "status": "Not Sent",
+        })
+        queue_rows.append(data)
+
+        for idx, recipient in enumerate(recipients, start=1):
+            recipient_rows.append((
+                frappe.generate_hash(length=10),
+                timestamp,
+                timestamp,
+                user,
+                user,
+                queue_name,
+                "Email Queue",
+                "recipients",
+                idx,
+                recipient,
+                "Not Sent",
+            ))
+
+    if not queue_rows:
+        return 0
+
+    fields = sorted({key for data in queue_rows for key in data})
+    frappe.db.bulk_insert(
+        "Email Queue",
+        fields,
+        [tuple(data.get(field) for field in fields) for data in queue_rows],
+    )
+    frappe.db.bulk_insert(
+        "Email Queue Recipient",
+        [
+            "name",
+            "creation",
+            "modified",
+            "owner",
+            "modified_by",
+            "parent",
+            "parenttype",
+            "parentfield",
+            "idx",
+            "recipient",
+            "status",
+        ],
+        recipient_rows,
+    )
 
-        return payloads
+    return len(queue_rows)
 
-    for loc, loc_rows in by_location.items():
-        recipients = _recipients_for_location(loc)
-        subject = f"Open Plant Breakdowns / Maintenance — {loc} ({len(loc_rows)})"
-
-        lines = [
-            "Hi Team",
-            "",
-            f"Site: {loc}",
-            f"Open Plant Breakdown or Maintenance records: {len(loc_rows)}",
-            "",
-            "<b>Open Records</b>",
-            "",
-        ]
-
-        for r in loc_rows:
-            doc_url = frappe.utils.get_url_to_form(
-                "Plant Breakdown or Maintenance",
-                r["name"],
-            )
-            asset_url = (
-                frappe.utils.get_url_to_form("Asset", r["asset_name"])
-                if r.get("asset_name")
-                else ""
-            )
-            asset_link = (
-                f'<a href="{asset_url}">{r["asset_name"]}</a>'
-                if asset_url
-                else (r.get("asset_name") or "")
-            )
-            dt = r.get("breakdown_start_datetime") or ""
-            lines.append(
-                f'• {asset_link} | {dt} | <a href="{doc_url}">{r["name"]}</a>'
-            )
 
-        message = "<br>".join(lines)
+def send_open_breakdowns_digest(dry_run: bool = False, force: bool = False):
+    """
+    Twice daily digest: send separate emails per Site/Location for Open records.
+    dry_run=True: returns payloads instead of sending.
 
-        payloads[loc] = {
-            "recipients": recipients,
-            "subject": subject,
-            "message": message,
-        }
+    A site whose open set (and recipients) has not changed since it was last
+    sent within OPEN_BREAKDOWN_DIGEST_REPEAT_SEC is skipped, so the cron
+    slot and the hourly gate firing together queue one mail, not two.
+    force=True sends every site regardless.
+    """
+    rows = frappe.get_all(
+        OPEN_BREAKDOWN_DOCTYPE,
+        filters={"open_closed": "Open"},
+        fields=["name", "asset_name", "breakdown_start_datetime", "location"],
+        order_by="location asc, breakdown_start_datetime asc",
+        limit_page_length=5000,
+    )
+
+    payloads = build_open_breakdowns_digest(rows)
 
     if dry_run:
         return payloads
 
+    cache = frappe.cache()
+    due = {
+        loc: p
+        for loc, p in payloads.items()
+        if force or cache.get_value(f"{OPEN_BREAKDOWN_DIGEST_HASH_KEY}::{loc}") != p["open_hash"]
+    }
+
+    if not due:
+        return payloads
+
     email_account = _get_outgoing_email_account(
-        match_by_doctype="Plant Breakdown or Maintenance"
+        match_by_doctype=OPEN_BREAKDOWN_DOCTYPE
     )
 
     if not email_account or not getattr(email_account, "email_id", None):
@@ -267,21 +345,21 @@ def send_open_breakdowns_digest(dry_run: bool = False):
         )
         return payloads
 
-    sender = email_account.email_id
+    try:
+        _queue_digest_emails(due, email_account.email_id)
+    except Exception:
+        frappe.log_error(
+            frappe.get_traceback(),
+            "Open Breakdown Digest queueing failed",
+        )
+        return payloads
 
-    for loc, p in payloads.items():
-        try:
-            frappe.sendmail(
-                recipients=p["recipients"],
-                sender=sender,
-                subject=p["subject"],
-                message=p["message"],
-            )
-        except frappe.OutgoingEmailError:
-            frappe.log_error(
-                frappe.get_traceback(),
-                f"Open Breakdown Digest OutgoingEmailError ({loc})",
-            )
+    for loc, p in due.items():
+        cache.set_value(
+            f"{OPEN_BREAKDOWN_DIGEST_HASH_KEY}::{loc}",
+            p["open_hash"],
+            expires_in_sec=OPEN_BREAKDOWN_DIGEST_REPEAT_SEC,
+        )
 
     return payloads
 
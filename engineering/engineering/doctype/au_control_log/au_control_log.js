@@ -1,6 +1,14 @@
 console.log("✅ AU Control Log JS loaded successfully!");
 
 frappe.ui.form.on("AU Control Log", {
+    onload(frm) {
+        // Phase timings streamed by the engine while it runs
+        frappe.realtime.off("au_progress_update");
+        frappe.realtime.on("au_progress_update", function (message) {
+            frappe.show_alert({ message: message, indicator: "blue" }, 7);
+        });
+    },
+
     refresh(frm) {
 
         // 🚀 Run Now (synchronous)
@@ -7,6 +7,10 @@ from frappe.utils import now_datetime
 from engineering.engineering.doctype.availability_and_utilisation.availability_and_utilisation import (
     AvailabilityandUtilisation,
 )
+from engineering.engineering.doctype.availability_and_utilisation.au_telemetry import (
+    RunTelemetry,
+    format_phase,
+)
 
 
 # ================================================================
@@ -41,6 +45,58 @@ def _append_log(doc, message):
         pass
 
 
+# ================================================================
+#        HELPER: Run the engine with per-phase telemetry
+# ================================================================
+
+def _run_engine(doc, run_type):
+    """
+    Run generate_records() with a RunTelemetry. Each finished phase is
+    pushed to the UI and added to the execution log in memory (saved with
+    the run summary, not once per phase).
+    """
+
+    def on_phase(phase):
+        line = f"{now_datetime().strftime('%Y-%m-%d %H:%M:%S')} — {format_phase(phase)}"
+
+        if doc:
+            doc.execution_log = f"{doc.execution_log}\n{line}" if doc.execution_log else line
+
+        print(line)
+
+        frappe.publish_realtime(
+            event="au_progress_update",
+            message=line,
+            user=frappe.session.user
+        )
+
+    telemetry = RunTelemetry(
+        run_type,
+        control_log=doc.name if doc else None,
+        on_phase=on_phase,
+    )
+    msg = AvailabilityandUtilisation.generate_records(telemetry=telemetry)
+
+    return msg, telemetry
+
+
+def _apply_run_summary(doc, msg, telemetry, default_message):
+    """Copy the run counts and phase table onto the control log."""
+    doc.records_created = telemetry.counts["created"]
+    doc.records_updated = telemetry.counts["updated"]
+    doc.records_errors = telemetry.counts["errors"]
+    doc.last_telemetry = telemetry.name
+    doc.phase_summary = "\n".join(
+        telemetry.summary_lines()
+        + [
+            f"Total: {telemetry.queries} queries, "
+            f"{telemetry.wall_seconds:.3f}s wall, {telemetry.cpu_seconds:.3f}s CPU "
+            f"(slowest: {telemetry.slowest_phase or '-'})"
+        ]
+    )
+    doc.last_message = msg or default_message
+
+
 # ================================================================
 #                     MAIN DOC EVENT CLASS
 # ================================================================
@@ -64,54 +120,21 @@ class AUControlLog(Document):
             # Run main engine
             # ----------------------------------------------------------
             _append_log(self, "Executing generate_records()…")
-            msg = AvailabilityandUtilisation.generate_records()
+            msg, telemetry = _run_engine(self, "Manual")
 
             # ----------------------------------------------------------
-            # Extract stats from response message
+            # Counts and phases come from the run telemetry
             # ----------------------------------------------------------
-            import re
-            created = updated = 0
-
-            if msg:
-                c = re.search(r"created\s+(\d+)", msg.lower())
-                u = re.search(r"updated\s+(\d+)", msg.lower())
-                if c: created = int(c.group(1))
-                if u: updated = int(u.group(1))
+            created = telemetry.counts["created"]
+            updated = telemetry.counts["updated"]
+            errors = telemetry.counts["errors"]
 
-            _append_log(self, f"Engine summary: {created} created, {updated} updated")
-
-            # ----------------------------------------------------------
-            # FIXED ERROR LOG HANDLING — works with your schema
-            # ----------------------------------------------------------
-            logs_raw = frappe.get_all(
-                "Error Log",
-                filters={"modified": [">", start_time]},
-                fields=["creation", "method", "error"],
-                order_by="creation desc",
-                limit=50,
-            )
-
-            logs = []
-            for l in logs_raw:
-                subject = l.get("method") or l.get("error") or "(no error text)"
-                logs.append(f"{l.get('creation')} - {subject}")
-
-            errors = len(logs)
-            log_text = "\n".join(logs) if logs else "No errors logged."
-
-            _append_log(self, f"Errors detected: {errors}")
-
-            # ----------------------------------------------------------
-            # Update AU Control Log fields
-            # ----------------------------------------------------------
-            self.records_created = created
-            self.records_updated = updated
-            self.records_errors = errors
-            self.execution_log = self.execution_log + "\n" + log_text if log_text else self.execution_log
-            self.last_message = msg or "Engine completed successfully."
+            _apply_run_summary(self, msg, telemetry, "Engine completed successfully.")
             self.save(ignore_permissions=True)
             frappe.db.commit()
 
+            _append_log(self, f"Engine summary: {created} created, {updated} updated, {errors} errors")
+
             _append_log(self, "Manual run completed successfully.")
             frappe.msgprint(
                 f"✅ Completed — {created} created, {updated} updated, {errors} errors."
@@ -179,42 +202,16 @@ def _background_job_runner(control_name=None):
         if ctrl:
             _append_log(ctrl, "Background job started…")
 
-        msg = AvailabilityandUtilisation.generate_records()
-
-        import re
-        created = updated = 0
-
-        if msg:
-            c = re.search(r"created\s+(\d+)", msg.lower())
-            u = re.search(r"updated\s+(\d+)", msg.lower())
-            if c: created = int(c.group(1))
-            if u: updated = int(u.group(1))
-
-        # -------- FIXED ERROR LOG HANDLING --------
-        logs_raw = frappe.get_all(
-            "Error Log",
-            filters={"modified": [">", start_time]},
-            fields=["creation", "method", "error"],
-            order_by="creation desc",
-            limit=50,
-        )
-
-        logs = []
-        for l in logs_raw:
-            subject = l.get("method") or l.get("error") or "(no error text)"
-            logs.append(f"{l.get('creation')} - {subject}")
+        msg, telemetry = _run_engine(ctrl, "Background")
 
-        errors = len(logs)
-        log_text = "\n".join(logs) if logs else "No errors logged."
+        created = telemetry.counts["created"]
+        updated = telemetry.counts["updated"]
+        errors = telemetry.counts["errors"]
 
         # -------- UPDATE THE CONTROL LOG --------
         if ctrl:
             ctrl.last_run_time = start_time
-            ctrl.records_created = created
-            ctrl.records_updated = updated
-            ctrl.records_errors = errors
-            ctrl.execution_log = (ctrl.execution_log or "") + "\n" + log_text
-            ctrl.last_message = msg or "Background job completed successfully."
+            _apply_run_summary(ctrl, msg, telemetry, "Background job completed successfully.")
             ctrl.save(ignore_permissions=True)
             frappe.db.commit()
 
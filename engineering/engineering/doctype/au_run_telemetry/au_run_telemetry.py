@@ -0,0 +1,21 @@
+# Copyright (c) 2026, BuFf0k and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+from frappe.utils import add_days, now_datetime
+
+
+class AURunTelemetry(Document):
+	@staticmethod
+	def clear_old_logs(days=30):
+		"""Log Settings clean-up (see default_log_clearing_doctypes in hooks)."""
+		names = frappe.get_all(
+			"AU Run Telemetry",
+			filters={"creation": ["<", add_days(now_datetime(), -int(days))]},
+			pluck="name",
+		)
+
+		if names:
+			frappe.db.delete("AU Run Telemetry Phase", {"parent": ["in", names]})
+			frappe.db.delete("AU Run Telemetry", {"name": ["in", names]})
@@ -0,0 +1,13 @@
+# Copyright (c) 2026, BuFf0k and contributors
+# For license information, please see license.txt
+
+import frappe
+from frappe.model.document import Document
+
+
+class AUShiftFact(Document):
+	pass
+
+
+def on_doctype_update():
+	frappe.db.add_index("AU Shift Fact", ["location", "shift_date"])
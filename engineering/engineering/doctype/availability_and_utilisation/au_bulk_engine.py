@@ -0,0 +1,577 @@
+# au_bulk_engine.py
+# Set-based mode for AvailabilityandUtilisation.generate_records.
+#
+# Produces the same field values as the per-document phases 1-8, but:
+#   - loads every existing A&U row for the window in one query
+#   - loads planning, assets, Pre-Use Hours and PBM rows once each
+#     (PBM through the shared downtime_overlap interval index)
+#   - computes all phases in memory
+#   - inserts new rows with bulk_insert and updates only changed columns
+#     with bulk_update
+#   - reports rows, queries and wall / CPU time per phase to au_telemetry
+
+from collections import defaultdict
+from datetime import timedelta
+
+import frappe
+from frappe.utils import (
+    add_days,
+    cint,
+    flt,
+    formatdate,
+    getdate,
+    now,
+    today,
+)
+
+from engineering.engineering.doctype.availability_and_utilisation.availability_and_utilisation import (
+    AU_ASSET_CATEGORIES,
+    _final_shift_values,
+    get_shift_timings,
+)
+from engineering.engineering.doctype.availability_and_utilisation.au_telemetry import (
+    RunTelemetry,
+)
+from engineering.engineering.doctype.availability_and_utilisation.downtime_overlap import (
+    BreakdownIntervalIndex,
+    ExclusionWindowResolver,
+    breakdown_window,
+)
+from engineering.engineering.page.daily_availability_dashboard.dashboard_cache import (
+    invalidate_dashboard_days,
+)
+
+
+AU_DOCTYPE = "Availability and Utilisation"
+
+SHIFT_HOURS_FIELD = {
+    "Day": "shift_day_hours",
+    "Night": "shift_night_hours",
+    "Morning": "shift_morning_hours",
+    "Afternoon": "shift_afternoon_hours",
+}
+
+# Columns written by the engine, grouped by how they are compared.
+FLOAT_FIELDS = (
+    "shift_required_hours",
+    "shift_start_hours",
+    "shift_end_hours",
+    "shift_working_hours",
+    "shift_breakdown_hours",
+    "shift_available_hours",
+    "shift_other_lost_hours",
+    "plant_shift_availability",
+    "plant_shift_utilisation",
+    "shift_available_hours_above_100",
+    "plant_shift_availability_above_100",
+    "available_hours_above_100_capped",
+    "plant_shift_utilisation_above_100",
+)
+INT_FIELDS = ("day_number",)
+DATA_FIELDS = (
+    "asset_category",
+    "pre_use_lookup",
+    "pre_use_link",
+    "pre_use_avail_status",
+    "item_name",
+)
+ENGINE_FIELDS = FLOAT_FIELDS + INT_FIELDS + DATA_FIELDS
+KEY_FIELDS = ("shift_date", "location", "shift", "asset_name", "shift_system")
+
+FLOAT_TOLERANCE = 1e-6
+WRITE_CHUNK_SIZE = 500
+
+
+def _shifts_for_system(shift_system):
+    return ["Day", "Night"] if (shift_system or "").lower() == "2x12hour" else ["Morning", "Afternoon", "Night"]
+
+
+def _au_key(shift_date, location, shift, asset_name):
+    return (str(getdate(shift_date)), location, shift, asset_name)
+
+
+def _has_column(doctype, column):
+    try:
+        return frappe.db.has_column(doctype, column)
+    except Exception:
+        return False
+
+
+def _value_changed(fieldname, old, new):
+    if fieldname in FLOAT_FIELDS:
+        return abs(flt(old) - flt(new)) > FLOAT_TOLERANCE
+    if fieldname in INT_FIELDS:
+        return cint(old) != cint(new)
+    return (old if old not in ("", None) else None) != (new if new not in ("", None) else None)
+
+
+# =============================================================================
+# Loaders (one query each)
+# =============================================================================
+
+def _load_planning(start_date, end_date):
+    """
+    Producing Monthly Production Planning rows for the window, plus a
+    (location, date) -> month_prod_days row map used by Phase 4.
+    """
+    planning_rows = frappe.get_all(
+        "Monthly Production Planning",
+        filters={
+            "site_status": "Producing",
+            "prod_month_start_date": ["<=", end_date],
+            "prod_month_end_date": [">=", start_date],
+        },
+        fields=["name", "location", "prod_month_start_date", "prod_month_end_date", "shift_system"],
+        order_by="prod_month_start_date asc",
+    )
+
+    day_map = {}
+    for planning_row in planning_rows:
+        planning_doc = frappe.get_doc("Monthly Production Planning", planning_row.name)
+        for day in planning_doc.month_prod_days:
+            if not day.shift_start_date:
+                continue
+            day_map.setdefault((planning_row.location, str(getdate(day.shift_start_date))), day)
+
+    return planning_rows, day_map
+
+
+def _load_assets_by_location(locations):
+    if not locations:
+        return {}
+
+    assets = frappe.get_all(
+        "Asset",
+        filters={
+            "location": ["in", list(locations)],
+            "asset_category": ["in", AU_ASSET_CATEGORIES],
+            "docstatus": 1,
+        },
+        fields=["name", "asset_name", "item_name", "asset_category", "location"],
+    )
+
+    by_location = defaultdict(list)
+    for asset in assets:
+        by_location[asset.location].append(asset)
+    return by_location
+
+
+class AUScope:
+    """
+    Set of (shift_date, location, shift, asset_name) keys to recompute.
+    shift and asset_name may be "*" to match every shift / asset.
+    """
+
+    WILDCARD = "*"
+
+    def __init__(self, keys):
+        self.patterns = defaultdict(set)
+        for shift_date, location, shift, asset_name in keys:
+            self.patterns[(str(getdate(shift_date)), location)].add(
+                (shift or self.WILDCARD, asset_name or self.WILDCARD)
+            )
+
+    def __bool__(self):
+        return bool(self.patterns)
+
+    @property
+    def dates(self):
+        return sorted(getdate(shift_date) for shift_date, _ in self.patterns)
+
+    @property
+    def locations(self):
+        return {location for _, location in self.patterns}
+
+    def matches(self, key):
+        shift_date, location, shift, asset_name = key
+        for pattern_shift, pattern_asset in self.patterns.get((shift_date, location), ()):
+            if pattern_shift in (self.WILDCARD, shift) and pattern_asset in (self.WILDCARD, asset_name):
+                return True
+        return False
+
+
+def _load_existing_rows(start_date, end_date, scope=None):
+    filters = [
+        ["shift_date", ">=", start_date],
+        ["shift_date", "<=", end_date],
+    ]
+    if scope is not None:
+        filters.append(["location", "in", list(scope.locations)])
+
+    rows = frappe.get_all(
+        AU_DOCTYPE,
+        filters=filters,
+        fields=["name", *KEY_FIELDS, *ENGINE_FIELDS],
+        order_by="modified desc",
+    )
+
+    by_key = {}
+    in_scope = []
+    for row in rows:
+        key = _au_key(row.shift_date, row.location, row.shift, row.asset_name)
+        if scope is not None and not scope.matches(key):
+            continue
+        in_scope.append(row)
+        by_key.setdefault(key, row)
+    return in_scope, by_key
+
+
+def _load_item_names(plant_numbers):
+    """Plant No (Asset.asset_name) -> item_name of the first submitted Asset."""
+    if not plant_numbers:
+        return {}
+
+    rows = frappe.get_all(
+        "Asset",
+        filters={"asset_name": ["in", list(plant_numbers)], "docstatus": 1},
+        fields=["asset_name", "item_name"],
+        order_by="creation asc",
+    )
+
+    item_names = {}
+    for row in rows:
+        item_names.setdefault(row.asset_name, row.item_name)
+    return item_names
+
+
+class _PreUseIndex:
+    """Pre-Use Hours parents and their asset rows for the window, loaded once."""
+
+    def __init__(self, start_date, end_date, locations):
+        self.by_lookup = {}
+        self.by_name = {}
+        self.by_key = {}
+        self.rows_by_parent = defaultdict(list)
+
+        if not locations:
+            return
+
+        fields = ["name", "location", "shift_date", "shift"]
+        has_lookup = _has_column("Pre-Use Hours", "avail_util_lookup")
+        if has_lookup:
+            fields.append("avail_util_lookup")
+
+        parents = frappe.get_all(
+            "Pre-Use Hours",
+            filters=[
+                ["shift_date", ">=", start_date],
+                ["shift_date", "<=", end_date],
+                ["location", "in", list(locations)],
+            ],
+            fields=fields,
+            order_by="creation asc",
+        )
+
+        for parent in parents:
+            self.by_name[parent.name] = parent
+            self.by_key.setdefault((str(getdate(parent.shift_date)), parent.location, parent.shift), parent)
+            if has_lookup and parent.get("avail_util_lookup"):
+                self.by_lookup.setdefault(parent.avail_util_lookup, parent)
+
+        if not parents:
+            return
+
+        child_fields = ["parent", "asset_name", "eng_hrs_start", "eng_hrs_end"]
+        for optional in ("plant_no", "pre_use_avail_status"):
+            if _has_column("Pre-use Assets", optional):
+                child_fields.append(optional)
+
+        child_rows = frappe.db.sql(
+            f"""
+            SELECT {", ".join(f"`{f}`" for f in child_fields)}
+            FROM `tabPre-use Assets`
+            WHERE parent IN %(parents)s
+              AND parenttype = 'Pre-Use Hours'
+            ORDER BY parent, idx
+            """,
+            {"parents": tuple(self.by_name)},
+            as_dict=True,
+        )
+
+        # Plant No fallback: Asset link -> Asset.asset_name, one query.
+        asset_links = {
+            row.asset_name
+            for row in child_rows
+            if row.asset_name and not row.get("plant_no")
+        }
+        plant_no_by_asset = {}
+        if asset_links:
+            plant_no_by_asset = dict(
+                frappe.get_all(
+                    "Asset",
+                    filters={"name": ["in", list(asset_links)]},
+                    fields=["name", "asset_name"],
+                    as_list=True,
+                )
+            )
+
+        for row in child_rows:
+            row.plant_no = row.get("plant_no") or plant_no_by_asset.get(row.asset_name)
+            self.rows_by_parent[row.parent].append(row)
+
+    def resolve(self, location, shift_date, shift, pre_use_lookup):
+        """Same order of preference as _get_preuse_doc_for_au."""
+        if pre_use_lookup and pre_use_lookup in self.by_lookup:
+            return self.by_lookup[pre_use_lookup]
+
+        name_guess = f"{location}-{getdate(shift_date).strftime('%Y-%m-%d')}-{shift}"
+        if name_guess in self.by_name:
+            return self.by_name[name_guess]
+
+        return self.by_key.get((str(getdate(shift_date)), location, shift))
+
+    def matched_row(self, parent_name, plant_no):
+        for row in self.rows_by_parent.get(parent_name, []):
+            if row.plant_no and row.plant_no == plant_no:
+                return row
+        return None
+
+
+# =============================================================================
+# Engine
+# =============================================================================
+
+def run_bulk_generation(start_date=None, end_date=None, dry_run=False, scope=None, telemetry=None):
+    """
+    Set-based equivalent of generate_records phases 1-8 for a date window
+    (defaults to the last 7 days). Returns a stats dict.
+
+    When scope (an AUScope) is given, only keys matching it are loaded,
+    computed and written; the window is narrowed to the scope's dates.
+
+    telemetry (an open au_telemetry.RunTelemetry) receives a phase per
+    step below with its row count.
+    """
+    if telemetry is None:
+        telemetry = RunTelemetry("Bulk")
+
+    current_date = getdate(today())
+    start_date = getdate(start_date) if start_date else current_date - timedelta(days=7)
+    end_date = getdate(end_date) if end_date else current_date
+
+    if scope is not None:
+        scope_dates = [d for d in scope.dates if start_date <= d <= end_date]
+        if not scope_dates:
+            return frappe._dict(start_date=start_date, end_date=end_date, created=0, updated=0, unchanged=0, errors=[])
+        start_date, end_date = scope_dates[0], scope_dates[-1]
+
+    stats = frappe._dict(
+        start_date=start_date,
+        end_date=end_date,
+        created=0,
+        updated=0,
+        unchanged=0,
+        errors=[],
+    )
+
+    telemetry.begin("Load: planning, assets, existing A&U rows")
+    planning_rows, day_map = _load_planning(start_date, end_date)
+    producing_locations = {row.location for row in planning_rows if row.location}
+    if scope is not None:
+        producing_locations &= scope.locations
+    assets_by_location = _load_assets_by_location(producing_locations)
+    existing_rows, existing_by_key = _load_existing_rows(start_date, end_date, scope)
+    telemetry.count(len(existing_rows))
+
+    # ---------------------------------------------------------------------
+    # Phase 1: target keys for producing sites (dedupe overlapping plans)
+    # ---------------------------------------------------------------------
+    telemetry.begin("Phase 1-2: target rows and pre_use_lookup")
+    targets = {}
+    date = start_date
+    while date <= end_date:
+        for planning_row in planning_rows:
+            if not (getdate(planning_row.prod_month_start_date) <= date <= getdate(planning_row.prod_month_end_date)):
+                continue
+
+            shift_system = (planning_row.shift_system or "").strip()
+            for shift in _shifts_for_system(shift_system):
+                for asset in assets_by_location.get(planning_row.location, []):
+                    key = _au_key(date, planning_row.location, shift, asset.asset_name)
+                    if scope is not None and not scope.matches(key):
+                        continue
+                    targets.setdefault(key, (asset, shift_system))
+        date = add_days(date, 1)
+
+    # Working copies: every existing row in the window plus new rows.
+    working = {}
+    for row in existing_rows:
+        working[row.name] = frappe._dict(row)
+
+    new_rows = []
+    target_rows = []
+    for key, (asset, shift_system) in targets.items():
+        existing = existing_by_key.get(key)
+        if existing:
+            row = working[existing.name]
+        else:
+            row = frappe._dict(
+                name=None,
+                shift_date=getdate(key[0]),
+                location=key[1],
+                shift=key[2],
+                asset_name=key[3],
+                shift_system=shift_system,
+                **{field: (0 if field in FLOAT_FIELDS + INT_FIELDS else None) for field in ENGINE_FIELDS},
+            )
+            new_rows.append(row)
+
+        row.day_number = getdate(row.shift_date).day
+        row.asset_category = asset.asset_category
+        row.pre_use_link = None
+        # Phase 2
+        row.pre_use_lookup = f"{row.location}-{formatdate(row.shift_date, 'dd-mm-yyyy')}-{row.shift}"
+        target_rows.append(row)
+
+    telemetry.count(len(target_rows))
+
+    all_rows = list(working.values()) + new_rows
+    all_locations = {row.location for row in all_rows if row.location}
+
+    # ---------------------------------------------------------------------
+    # Phases 3, 5, 6: Pre-Use link, Pre-Use hours, item_name
+    # ---------------------------------------------------------------------
+    telemetry.begin("Phase 3/5/6: Pre-Use link, Pre-Use hours, item_name")
+    telemetry.count(len(target_rows))
+    preuse = _PreUseIndex(start_date, end_date, {row.location for row in target_rows})
+    item_names = _load_item_names({row.asset_name for row in target_rows if row.asset_name})
+
+    for row in target_rows:
+        try:
+            parent = preuse.resolve(row.location, row.shift_date, row.shift, row.pre_use_lookup)
+            if parent:
+                row.pre_use_link = parent.name
+                matched = preuse.matched_row(parent.name, row.asset_name)
+                if matched:
+                    if matched.eng_hrs_start is not None:
+                        row.shift_start_hours = matched.eng_hrs_start
+                    if matched.eng_hrs_end is not None:
+                        row.shift_end_hours = matched.eng_hrs_end
+                    if matched.get("pre_use_avail_status") is not None:
+                        row.pre_use_avail_status = str(matched.pre_use_avail_status)
+                    row.shift_working_hours = max(0, flt(row.shift_end_hours) - flt(row.shift_start_hours))
+
+            if row.asset_name in item_names:
+                row.item_name = item_names[row.asset_name] or None
+        except Exception as e:
+            stats.errors.append(f"Phase 3/5/6 Error for {_au_key(row.shift_date, row.location, row.shift, row.asset_name)}: {e}")
+
+    # ---------------------------------------------------------------------
+    # Phase 4: shift_required_hours for every row in the window
+    # ---------------------------------------------------------------------
+    telemetry.begin("Phase 4: shift_required_hours")
+    telemetry.count(len(all_rows))
+    for row in all_rows:
+        day = day_map.get((row.location, str(getdate(row.shift_date))))
+        if day is not None:
+            fieldname = SHIFT_HOURS_FIELD.get(row.shift)
+            row.shift_required_hours = (day.get(fieldname) if fieldname else 0) or 0
+
+    # ---------------------------------------------------------------------
+    # Phase 7: shift_breakdown_hours for every row in the window
+    # ---------------------------------------------------------------------
+    telemetry.begin("Phase 7: shift_breakdown_hours")
+    telemetry.count(len(all_rows))
+    window_start, window_end = breakdown_window(start_date, end_date)
+    breakdown_index = BreakdownIntervalIndex.load(window_start, window_end, locations=all_locations)
+    exclusion_resolver = ExclusionWindowResolver()
+
+    for row in all_rows:
+        try:
+            shift_start, shift_end = get_shift_timings(row.shift_system, row.shift, str(getdate(row.shift_date)))
+            if not shift_start or not shift_end:
+                raise ValueError(f"Unknown shift timing for {row.shift_system} / {row.shift}")
+
+            group_key = (row.location, row.asset_name)
+            effective_hours = 0.0
+            if breakdown_index.overlapping(group_key, shift_start, shift_end):
+                effective_hours, _, _ = breakdown_index.effective_downtime(
+                    group_key,
+                    shift_start,
+                    shift_end,
+                    exclusion_resolver.windows(row.location, row.shift, shift_start, shift_end),
+                )
+
+            row.shift_breakdown_hours = min(effective_hours, max(flt(row.shift_required_hours), 0))
+        except Exception as e:
+            stats.errors.append(f"Phase 7 Error for doc={row.name or 'new'}, asset_name={row.asset_name}: {e}")
+
+    # ---------------------------------------------------------------------
+    # Phase 8: final fields for producing-site rows
+    # ---------------------------------------------------------------------
+    telemetry.begin("Phase 8: final fields")
+    telemetry.count(len(target_rows))
+    for row in target_rows:
+        row.update(
+            _final_shift_values(
+                flt(row.shift_required_hours),
+                flt(row.shift_breakdown_hours),
+                flt(row.shift_working_hours),
+                row.pre_use_avail_status,
+            )
+        )
+
+    # ---------------------------------------------------------------------
+    # Diff and write
+    # ---------------------------------------------------------------------
+    telemetry.begin("Diff")
+    telemetry.count(len(existing_rows))
+    doc_updates = {}
+    for original in existing_rows:
+        row = working[original.name]
+        changes = {
+            field: row.get(field)
+            for field in ENGINE_FIELDS
+            if _value_changed(field, original.get(field), row.get(field))
+        }
+        if changes:
+            doc_updates[original.name] = changes
+
+    stats.created = len(new_rows)
+    stats.updated = len(doc_updates)
+    stats.unchanged = len(existing_rows) - len(doc_updates)
+    telemetry.set_counts(stats.created, stats.updated, stats.unchanged, len(stats.errors))
+
+    if dry_run:
+        telemetry.end()
+        return stats
+
+    telemetry.begin("Write")
+    telemetry.count(len(new_rows) + len(doc_updates))
+
+    if new_rows:
+        _insert_rows(new_rows)
+
+    if doc_updates:
+        frappe.db.bulk_update(AU_DOCTYPE, doc_updates, chunk_size=WRITE_CHUNK_SIZE)
+
+    # bulk writes skip document hooks; drop cached dashboards for the touched days.
+    invalidate_dashboard_days(
+        {(row.location, row.shift_date) for row in new_rows}
+        | {(working[name].location, working[name].shift_date) for name in doc_updates}
+    )
+    telemetry.end()
+
+    return stats
+
+
+def _insert_rows(rows):
+    timestamp = now()
+    user = frappe.session.user
+    fields = ["creation", "modified", "owner", "modified_by", "docstatus", "idx", *KEY_FIELDS, *ENGINE_FIELDS]
+
+    values = [
+        (
+            timestamp,
+            timestamp,
+            user,
+            user,
+            0,
+            0,
+            *(row.get(field) for field in KEY_FIELDS),
+            *(row.get(field) for field in ENGINE_FIELDS),
+        )
+        for row in rows
+    ]
+
+    frappe.db.bulk_insert(AU_DOCTYPE, fields, values, chunk_size=WRITE_CHUNK_SIZE)
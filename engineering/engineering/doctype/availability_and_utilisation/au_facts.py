@@ -0,0 +1,370 @@
+# au_facts.py
+# Materialised shift-level A&U facts ("AU Shift Fact").
+#
+# One row per (location, shift_date, shift, asset_name) holding the inputs
+# the Availability and Utilisation Engine derives from planning, Pre-Use
+# Hours and PBM. Only inputs are stored: final hours and percentages depend
+# on the report's A & U basis, free hours and Spare/Swing set, so the Engine
+# re-finalises the facts on read exactly as it does a live run.
+#
+# The Engine report (and everything built on it: month-end report and the
+# A&U dashboards) reads settled days from here and only re-derives days the
+# table does not cover. Coverage is all-or-nothing per (location, shift_date):
+# a refresh replaces every row of a day, and invalidation deletes them. A
+# built day that produced no shift rows keeps one marker row (no asset) so
+# the back-fill does not rebuild it on every run.
+#
+# Refresh:
+#   - hourly, after the AU Recompute Queue drains: missing settled days
+#   - daily: the A&U window is rebuilt in full (reconciliation)
+#   - PBM / Pre-Use Hours / Monthly Production Planning hooks invalidate
+#     the affected days through au_recompute
+
+from datetime import timedelta
+
+import frappe
+from frappe.utils import getdate, now, today
+
+
+FACT_DOCTYPE = "AU Shift Fact"
+
+# Days newer than this still move (open breakdowns, late Pre-Use capture)
+# and are always derived live.
+SETTLED_DAYS = 2
+
+# How far back the hourly job back-fills missing days.
+FACT_HORIZON_DAYS = 400
+
+# Reconciled in full by the daily job (matches the A&U generation window).
+RECONCILE_DAYS = 7
+
+# Upper bound of (location, shift_date) days built by one run.
+MAX_DAYS_PER_RUN = 62
+
+WRITE_CHUNK_SIZE = 500
+
+# Derived by get_raw_shift_rows; re-finalised on read so free hours and
+# None percentages behave exactly as in a live run.
+INPUT_FIELDS = (
+    "asset_category",
+    "company",
+    "shift_limit_hours",
+    "saturday_shift_hours",
+    "pre_use_avail_status",
+    "actual_hours",
+    "planned_downtime",
+    "required_hours",
+    "work_hours",
+    "pbm_elapsed_time",
+    "pbm_startup_fatigue_time",
+    "pbm_sunday_time",
+    "pbm_total_downtime",
+)
+
+
+
+def _fact_key(location, shift_date, shift, asset_name):
+    return f"{location}::{getdate(shift_date)}::{shift}::{asset_name}"
+
+
+def _settled_until():
+    return getdate(today()) - timedelta(days=SETTLED_DAYS)
+
+
+def _engine():
+    from engineering.engineering.report.availability_and_utilisation_engine import (
+        availability_and_utilisation_engine as au_engine,
+    )
+
+    return au_engine
+
+
+# =============================================================================
+# Read path (Engine report)
+# =============================================================================
+
+def load_fact_shift_rows(from_date, to_date, assets, spare_assets):
+    """
+    Raw Engine shift rows for the days the fact table fully covers.
+
+    A day counts as covered only when every asset in `assets` at that
+    location has a fact row for it, so an asset moved onto a site after the
+    day was built falls back to the live path. Category, company and the
+    Spare/Swing flag are taken from the current asset list and the report's
+    own Spare/Swing set, as the live path does.
+
+    Returns (rows, {(location, "YYYY-MM-DD")}).
+    """
+    from_date = getdate(from_date)
+    to_date = min(getdate(to_date), _settled_until())
+
+    if not assets or to_date < from_date:
+        return [], set()
+
+    assets_by_key = {(asset.location, asset.asset_name): asset for asset in assets}
+
+    asset_names_by_location = {}
+    for asset in assets:
+        asset_names_by_location.setdefault(asset.location, set()).add(asset.asset_name)
+
+    facts = frappe.db.sql(
+        f"""
+        SELECT
+            location,
+            shift_date,
+            shift,
+            asset_name,
+            {", ".join(INPUT_FIELDS)}
+        FROM `tab{FACT_DOCTYPE}`
+        WHERE location IN %(locations)s
+          AND shift_date BETWEEN %(from_date)s AND %(to_date)s
+        """,
+        {
+            "locations": tuple(asset_names_by_location),
+            "from_date": from_date,
+            "to_date": to_date,
+        },
+        as_dict=True,
+    )
+
+    facts_by_day = {}
+    for fact in facts:
+        facts_by_day.setdefault((fact.location, str(getdate(fact.shift_date))), []).append(fact)
+
+    rows = []
+    covered_days = set()
+
+    for day, day_facts in facts_by_day.items():
+        location = day[0]
+
+        if not asset_names_by_location[location] <= {fact.asset_name for fact in day_facts}:
+            continue
+
+        covered_days.add(day)
+
+        for fact in day_facts:
+            # Empty-day markers have no asset and fall out here.
+            asset = assets_by_key.get((location, fact.asset_name))
+            if not asset:
+                continue
+
+            row = {field: fact.get(field) for field in INPUT_FIELDS}
+            row.update({
+                "asset_category": asset.asset_category,
+                "company": asset.company,
+                "shift_date": getdate(fact.shift_date),
+                "asset_name": fact.asset_name,
+                "shift": fact.shift,
+                "location": location,
+                "pre_use_avail_status": fact.pre_use_avail_status or "",
+                "is_spare_swing_unit": (
+                    1
+                    if asset.name in spare_assets or asset.asset_name in spare_assets
+                    else 0
+                ),
+                "spare_swing_reason": "Spare/Swing unit in Monthly Production Planning",
+                "indent": 3,
+            })
+            rows.append(row)
+
+    return rows, covered_days
+
+
+# =============================================================================
+# Write path
+# =============================================================================
+
+def invalidate_fact_days(days):
+    """Drop the facts of (location, shift_date) days so they are rebuilt."""
+    dates_by_location = {}
+    for location, shift_date in days:
+        if location and shift_date:
+            dates_by_location.setdefault(location, set()).add(getdate(shift_date))
+
+    for location, dates in dates_by_location.items():
+        frappe.db.delete(
+            FACT_DOCTYPE,
+            {
+                "location": location,
+                "shift_date": ["in", sorted(dates)],
+            },
+        )
+
+
+def refresh_fact_days(days):
+    """
+    Rebuild the facts of the given settled (location, shift_date) days
+    from the Engine's live derivation. Returns the number of rows written.
+    """
+    au_engine = _engine()
+    settled_until = _settled_until()
+
+    dates_by_location = {}
+    for location, shift_date in days:
+        shift_date = getdate(shift_date)
+        if location and shift_date <= settled_until:
+            dates_by_location.setdefault(location, set()).add(shift_date)
+
+    written = 0
+
+    for location, dates in dates_by_location.items():
+        from_date, to_date = min(dates), max(dates)
+
+        planning_rows = au_engine.get_planning_rows(from_date, to_date, [location])
+        planning_map = au_engine.build_planning_map(planning_rows) if planning_rows else {}
+        assets = au_engine.get_assets(planning_rows, [], []) if planning_rows else []
+
+        requested = {(location, str(shift_date)) for shift_date in dates}
+        skip_days = {day for day in planning_map if day[0] == location and day not in requested}
+
+        raw_rows = au_engine.get_raw_shift_rows(
+            from_date,
+            to_date,
+            [location],
+            planning_map,
+            assets,
+            set(),  # Spare/Swing is resolved per report range on read
+            skip_days=skip_days,
+        ) if assets else []
+
+        built_days = {(row["location"], str(getdate(row["shift_date"]))) for row in raw_rows}
+
+        invalidate_fact_days(requested)
+        _insert_facts(raw_rows, requested - built_days)
+        written += len(raw_rows)
+
+    return written
+
+
+def _insert_facts(raw_rows, empty_days=()):
+    """Insert the facts of raw_rows plus one marker row per empty day."""
+    if not raw_rows and not empty_days:
+        return
+
+    timestamp = now()
+    user = frappe.session.user
+    fields = [
+        "name",
+        "creation",
+        "modified",
+        "owner",
+        "modified_by",
+        "fact_key",
+        "location",
+        "shift_date",
+        "shift",
+        "asset_name",
+        *INPUT_FIELDS,
+        "refreshed_on",
+    ]
+
+    values = []
+    for raw in raw_rows:
+        key = _fact_key(raw["location"], raw["shift_date"], raw["shift"], raw["asset_name"])
+        values.append((
+            key,
+            timestamp,
+            timestamp,
+            user,
+            user,
+            key,
+            raw["location"],
+            raw["shift_date"],
+            raw["shift"],
+            raw["asset_name"],
+            *(raw.get(field) for field in INPUT_FIELDS),
+            timestamp,
+        ))
+
+    for location, shift_date in empty_days:
+        key = _fact_key(location, shift_date, "", "")
+        values.append((
+            key,
+            timestamp,
+            timestamp,
+            user,
+            user,
+            key,
+            location,
+            getdate(shift_date),
+            "",
+            "",
+            *(None for _ in INPUT_FIELDS),
+            timestamp,
+        ))
+
+    frappe.db.bulk_insert(FACT_DOCTYPE, fields, values, ignore_duplicates=True, chunk_size=WRITE_CHUNK_SIZE)
+
+
+def _planned_days(from_date, to_date):
+    """Planned (location, shift_date) days at locations that have A&U assets."""
+    au_engine = _engine()
+    planning_rows = au_engine.get_planning_rows(from_date, to_date, [])
+    if not planning_rows:
+        return set()
+
+    asset_locations = {asset.location for asset in au_engine.get_assets(planning_rows, [], [])}
+
+    return {
+        (location, shift_date)
+        for location, shift_date in au_engine.build_planning_map(planning_rows)
+        if location in asset_locations and from_date <= getdate(shift_date) <= to_date
+    }
+
+
+def _fact_days(from_date, to_date):
+    return {
+        (row.location, str(getdate(row.shift_date)))
+        for row in frappe.db.sql(
+            f"""
+            SELECT DISTINCT location, shift_date
+            FROM `tab{FACT_DOCTYPE}`
+            WHERE shift_date BETWEEN %(from_date)s AND %(to_date)s
+            """,
+            {"from_date": from_date, "to_date": to_date},
+            as_dict=True,
+        )
+    }
+
+
+def refresh_missing_fact_days(limit=MAX_DAYS_PER_RUN):
+    """
+    Build settled planned days that have no facts yet, newest first. Days
+    already built empty carry a marker row and are not picked up again.
+    """
+    to_date = _settled_until()
+    from_date = to_date - timedelta(days=FACT_HORIZON_DAYS)
+
+    missing = sorted(
+        _planned_days(from_date, to_date) - _fact_days(from_date, to_date),
+        key=lambda day: day[1],
+        reverse=True,
+    )[:limit]
+
+    if not missing:
+        return "No missing AU Shift Fact days."
+
+    written = refresh_fact_days(missing)
+    return f"Built {len(missing)} AU Shift Fact days ({written} rows)."
+
+
+def reconcile_fact_days():
+    """Rebuild every settled day of the A&U window (nightly reconciliation)."""
+    to_date = _settled_until()
+    from_date = getdate(today()) - timedelta(days=RECONCILE_DAYS)
+
+    days = _planned_days(from_date, to_date)
+    written = refresh_fact_days(days) if days else 0
+    return f"Reconciled {len(days)} AU Shift Fact days ({written} rows)."
+
+
+def refresh_au_shift_facts(reconcile=0):
+    """Background entry point (enqueued by the A&U scheduler jobs)."""
+    messages = []
+    if int(reconcile or 0):
+        messages.append(reconcile_fact_days())
+    messages.append(refresh_missing_fact_days())
+
+    message = " ".join(messages)
+    frappe.log_error(message, "Availability & Utilisation - Shift Facts")
+    return message
@@ -0,0 +1,395 @@
+# au_recompute.py
+# Change-driven A&U recomputation.
+#
+# Document hooks (PBM, Pre-Use Hours, Monthly Production Planning) record
+# which (location, shift_date, shift, asset_name) keys are stale in the
+# "AU Recompute Queue" DocType. The hourly job drains the queue through the
+# bulk engine with a matching AUScope, so a quiet hour touches only those
+# keys instead of the whole 7-day fleet window.
+#
+# The same hooks invalidate the affected AU Shift Fact days (au_facts.py)
+# and cached dashboards, without the 7-day clip, since both cover history.
+
+from datetime import timedelta
+
+import frappe
+from frappe.utils import add_days, get_datetime, getdate, now, now_datetime, today
+
+from engineering.engineering.doctype.availability_and_utilisation.au_facts import (
+    invalidate_fact_days,
+    refresh_missing_fact_days,
+)
+from engineering.engineering.doctype.availability_and_utilisation.au_telemetry import (
+    RunTelemetry,
+    save_telemetry,
+)
+from engineering.engineering.page.daily_availability_dashboard.dashboard_cache import (
+    invalidate_dashboard_days,
+)
+
+
+QUEUE_DOCTYPE = "AU Recompute Queue"
+WILDCARD = "*"
+
+# Keys older than this are outside the window generate_records maintains.
+LOOKBACK_DAYS = 7
+
+# Upper bound of keys drained by one job; the remainder waits for the next run.
+MAX_KEYS_PER_RUN = 20000
+
+TOUCH_CHUNK_SIZE = 1000
+
+# Shift changes (both shift systems); the shift that just ended is
+# re-queued once for open breakdowns after each of them.
+SHIFT_CHANGE_HOURS = (6, 14, 18, 22)
+OPEN_BREAKDOWN_SLOT_CACHE_KEY = "au_open_breakdown_refresh_hour"
+
+
+def _window():
+    current_date = getdate(today())
+    return current_date - timedelta(days=LOOKBACK_DAYS), current_date
+
+
+def _recompute_key(location, shift_date, shift, asset_name):
+    return f"{location}::{getdate(shift_date)}::{shift or WILDCARD}::{asset_name or WILDCARD}"
+
+
+def mark_au_dirty(keys, reason=None, source_doctype=None, source_name=None):
+    """
+    Queue (location, shift_date, shift, asset_name) keys for recomputation.
+    shift / asset_name may be "*" or None for "all". Keys outside the A&U
+    window are ignored; duplicates collapse on the unique recompute_key.
+    """
+    start_date, end_date = _window()
+    timestamp = now()
+    user = frappe.session.user
+
+    values = {}
+    for location, shift_date, shift, asset_name in keys:
+        if not location or not shift_date:
+            continue
+        shift_date = getdate(shift_date)
+        if not (start_date <= shift_date <= end_date):
+            continue
+
+        key = _recompute_key(location, shift_date, shift, asset_name)
+        values[key] = (
+            key,
+            timestamp,
+            timestamp,
+            user,
+            user,
+            key,
+            location,
+            shift_date,
+            shift or WILDCARD,
+            asset_name or WILDCARD,
+            (reason or "")[:140],
+            source_doctype,
+            source_name,
+        )
+
+    if not values:
+        return 0
+
+    frappe.db.bulk_insert(
+        QUEUE_DOCTYPE,
+        [
+            "name",
+            "creation",
+            "modified",
+            "owner",
+            "modified_by",
+            "recompute_key",
+            "location",
+            "shift_date",
+            "shift",
+            "asset_name",
+            "reason",
+            "source_doctype",
+            "source_name",
+        ],
+        list(values.values()),
+        ignore_duplicates=True,
+    )
+
+    # A key that is already queued keeps its row; move its modified on so a
+    # run that started before this mark does not drain it.
+    names = list(values)
+    for i in range(0, len(names), TOUCH_CHUNK_SIZE):
+        frappe.db.sql(
+            f"""
+            UPDATE `tab{QUEUE_DOCTYPE}`
+            SET modified = %(timestamp)s, modified_by = %(user)s
+            WHERE name IN %(names)s AND modified < %(timestamp)s
+            """,
+            {"timestamp": timestamp, "user": user, "names": tuple(names[i:i + TOUCH_CHUNK_SIZE])},
+        )
+
+    return len(values)
+
+
+def _date_span(start, end):
+    """Shift dates whose shifts can overlap [start, end] (night shifts start the day before)."""
+    start_date = add_days(getdate(start), -1)
+    end_date = getdate(end)
+    dates = []
+    while start_date <= end_date:
+        dates.append(start_date)
+        start_date = add_days(start_date, 1)
+    return dates
+
+
+def _breakdown_keys(location, asset_name, start, resolved, clip=True):
+    if not location or not asset_name or not start:
+        return []
+
+    start_dt = get_datetime(start)
+    end_dt = get_datetime(resolved) if resolved else now_datetime()
+    window_start, _ = _window()
+
+    # Only the part of the breakdown inside the A&U window matters
+    # (AU Shift Fact invalidation passes clip=False).
+    if clip:
+        start_dt = max(start_dt, get_datetime(f"{add_days(window_start, -1)} 00:00:00"))
+    if end_dt < start_dt:
+        return []
+
+    return [(location, shift_date, WILDCARD, asset_name) for shift_date in _date_span(start_dt, end_dt)]
+
+
+def _invalidate_days(keys):
+    """Drop AU Shift Facts and cached dashboards for the keys' (location, shift_date) days."""
+    days = {(location, shift_date) for location, shift_date, _, _ in keys}
+    invalidate_fact_days(days)
+    invalidate_dashboard_days(days)
+
+
+# =============================================================================
+# Document hooks
+# =============================================================================
+
+def on_breakdown_change(doc, method=None):
+    """Plant Breakdown or Maintenance on_update / on_trash."""
+    try:
+        versions = [doc]
+
+        previous = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+        if previous:
+            versions.append(previous)
+
+        keys = []
+        fact_keys = []
+        for version in versions:
+            args = (
+                version.location,
+                version.asset_name,
+                version.breakdown_start_datetime,
+                version.resolved_datetime,
+            )
+            keys += _breakdown_keys(*args)
+            fact_keys += _breakdown_keys(*args, clip=False)
+
+        mark_au_dirty(keys, f"PBM {method or 'change'}", doc.doctype, doc.name)
+        _invalidate_days(fact_keys)
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "A&U Recompute Queue - PBM hook")
+
+
+def _preuse_keys(preuse_doc):
+    if not preuse_doc or not preuse_doc.get("location") or not preuse_doc.get("shift_date"):
+        return []
+
+    rows = preuse_doc.get("pre_use_assets") or []
+    plant_numbers = {row.get("plant_no") for row in rows if row.get("plant_no")}
+
+    asset_links = [row.get("asset_name") for row in rows if row.get("asset_name") and not row.get("plant_no")]
+    if asset_links:
+        plant_numbers.update(
+            frappe.get_all("Asset", filters={"name": ["in", asset_links]}, pluck="asset_name")
+        )
+
+    return [
+        (preuse_doc.location, preuse_doc.shift_date, preuse_doc.shift, plant_no)
+        for plant_no in plant_numbers
+        if plant_no
+    ]
+
+
+def on_preuse_change(doc, method=None):
+    """Pre-Use Hours on_update / on_trash."""
+    try:
+        keys = _preuse_keys(doc)
+
+        previous = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+        if previous:
+            keys += _preuse_keys(previous)
+
+        mark_au_dirty(keys, f"Pre-Use Hours {method or 'change'}", doc.doctype, doc.name)
+        _invalidate_days(keys)
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "A&U Recompute Queue - Pre-Use hook")
+
+
+def _planning_keys(planning_doc, clip=True):
+    if not planning_doc or not planning_doc.get("location"):
+        return []
+    if not planning_doc.get("prod_month_start_date") or not planning_doc.get("prod_month_end_date"):
+        return []
+
+    start_date = getdate(planning_doc.prod_month_start_date)
+    end_date = getdate(planning_doc.prod_month_end_date)
+
+    if clip:
+        window_start, window_end = _window()
+        start_date = max(start_date, window_start)
+        end_date = min(end_date, window_end)
+
+    keys = []
+    while start_date <= end_date:
+        keys.append((planning_doc.location, start_date, WILDCARD, WILDCARD))
+        start_date = add_days(start_date, 1)
+    return keys
+
+
+def on_planning_change(doc, method=None):
+    """Monthly Production Planning on_update / on_trash."""
+    try:
+        versions = [doc]
+
+        previous = doc.get_doc_before_save() if hasattr(doc, "get_doc_before_save") else None
+        if previous:
+            versions.append(previous)
+
+        keys = []
+        fact_keys = []
+        for version in versions:
+            keys += _planning_keys(version)
+            fact_keys += _planning_keys(version, clip=False)
+
+        mark_au_dirty(keys, f"Planning {method or 'change'}", doc.doctype, doc.name)
+        _invalidate_days(fact_keys)
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "A&U Recompute Queue - Planning hook")
+
+
+# =============================================================================
+# Queue processing
+# =============================================================================
+
+def _shift_slot_start(dt):
+    """Start of the shift slot dt falls in (06:00 / 14:00 / 18:00 / 22:00)."""
+    passed = [hour for hour in SHIFT_CHANGE_HOURS if hour <= dt.hour]
+    if passed:
+        return dt.replace(hour=passed[-1], minute=0, second=0, microsecond=0)
+
+    # Before 06:00 the 22:00 slot of the previous day is still running.
+    return (dt - timedelta(days=1)).replace(hour=SHIFT_CHANGE_HOURS[-1], minute=0, second=0, microsecond=0)
+
+
+def _mark_open_breakdowns():
+    """
+    Open breakdowns grow with now(). Once per clock hour (each hourly gate
+    run), re-queue the shift date of the shift now running for every open
+    breakdown, so its downtime keeps up while the breakdown runs. The first
+    run after a shift change also re-queues the shift that just ended.
+    """
+    current = now_datetime()
+    hour_start = current.replace(minute=0, second=0, microsecond=0)
+    slot_start = _shift_slot_start(current)
+    cache = frappe.cache()
+
+    last_run = cache.get_value(OPEN_BREAKDOWN_SLOT_CACHE_KEY)
+    if last_run == str(hour_start):
+        return 0
+
+    open_rows = frappe.db.sql(
+        """
+        SELECT DISTINCT location, asset_name
+        FROM `tabPlant Breakdown or Maintenance`
+        WHERE open_closed = 'Open'
+            AND IFNULL(exclude_from_au, 0) = 0
+            AND breakdown_start_datetime IS NOT NULL
+        """,
+        as_dict=True,
+    )
+
+    # Shift date = the date the slot starts on (night shifts belong to their start day).
+    shift_dates = {getdate(slot_start)}
+    if not last_run or get_datetime(last_run) < slot_start:
+        shift_dates.add(getdate(slot_start - timedelta(minutes=1)))
+
+    keys = [
+        (row.location, shift_date, WILDCARD, row.asset_name)
+        for row in open_rows
+        for shift_date in shift_dates
+    ]
+
+    marked = mark_au_dirty(keys, "Open breakdown refresh")
+    cache.set_value(OPEN_BREAKDOWN_SLOT_CACHE_KEY, str(hour_start), expires_in_sec=60 * 60 * 24)
+
+    return marked
+
+
+def pending_count():
+    return frappe.db.count(QUEUE_DOCTYPE)
+
+
+def process_recompute_queue():
+    """Drain the queue through the bulk engine, limited to the queued keys."""
+    from engineering.engineering.doctype.availability_and_utilisation.au_bulk_engine import (
+        AUScope,
+        run_bulk_generation,
+    )
+
+    _mark_open_breakdowns()
+
+    # Keys marked (or re-marked) after this instant are kept for the next run.
+    run_start = now()
+
+    queued = frappe.get_all(
+        QUEUE_DOCTYPE,
+        fields=["name", "location", "shift_date", "shift", "asset_name"],
+        order_by="creation asc",
+        limit=MAX_KEYS_PER_RUN,
+    )
+    if not queued:
+        return f"No queued A&U keys. {refresh_missing_fact_days()}"
+
+    scope = AUScope((row.shift_date, row.location, row.shift, row.asset_name) for row in queued)
+    start_date, end_date = _window()
+
+    telemetry = RunTelemetry("Incremental")
+    try:
+        with telemetry:
+            stats = run_bulk_generation(
+                start_date=start_date,
+                end_date=end_date,
+                scope=scope,
+                telemetry=telemetry,
+            )
+    finally:
+        save_telemetry(telemetry)
+
+    # Remove only what was drained; keys queued or re-marked during the run
+    # have a later modified and stay for next time.
+    frappe.db.delete(
+        QUEUE_DOCTYPE,
+        {
+            "name": ["in", [row.name for row in queued]],
+            "modified": ["<=", run_start],
+        },
+    )
+
+    if stats.errors:
+        frappe.log_error("\n".join(stats.errors[:200]), "Phase Update Log - Incremental Errors")
+
+    # Days invalidated by the hooks are rebuilt once they have settled.
+    facts_message = refresh_missing_fact_days()
+
+    return (
+        f"Incremental run over {len(queued)} queued keys: "
+        f"created {stats.created} records. Updated {stats.updated} records. "
+        f"Unchanged {stats.unchanged} records. Errors {len(stats.errors)}. "
+        f"{facts_message}"
+    )
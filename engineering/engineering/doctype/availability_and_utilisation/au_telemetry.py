@@ -0,0 +1,196 @@
+# au_telemetry.py
+# Per-phase instrumentation of A&U engine runs ("AU Run Telemetry").
+#
+# A RunTelemetry is used as a context manager around one engine run. The
+# engine marks phase boundaries with begin(phase) and counts the rows it
+# touches with count(rows); while the run is open every frappe.db.sql
+# statement is counted against the current phase, and each phase records
+# its wall and CPU time.
+#
+# Every finished phase is passed to on_phase (the AU Control Log streams it
+# to the form), and save() writes one compact AU Run Telemetry record with a
+# row per phase, instead of per-record text in the Error Log.
+
+import time
+
+import frappe
+from frappe.utils import now_datetime
+
+
+TELEMETRY_DOCTYPE = "AU Run Telemetry"
+
+
+class RunTelemetry:
+    def __init__(self, run_type, control_log=None, on_phase=None):
+        self.run_type = run_type
+        self.control_log = control_log
+        self.on_phase = on_phase
+
+        self.phases = []
+        self.started_at = None
+        self.completed_at = None
+        self.wall_seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.status = "Completed"
+        self.counts = {"created": 0, "updated": 0, "unchanged": 0, "errors": 0}
+        self.message = None
+        self.name = None
+
+        self._current = None
+        self._queries = 0
+        self._wall_started = None
+        self._cpu_started = None
+        self._original_sql = None
+        self._patched_instance = False
+
+    # ------------------------------------------------------------------
+    # Run
+    # ------------------------------------------------------------------
+    def __enter__(self):
+        self.started_at = now_datetime()
+        self._wall_started = time.perf_counter()
+        self._cpu_started = time.process_time()
+        self._install_query_counter()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.end()
+        self._remove_query_counter()
+        self.completed_at = now_datetime()
+        self.wall_seconds = time.perf_counter() - self._wall_started
+        self.cpu_seconds = time.process_time() - self._cpu_started
+
+        if exc_type is not None:
+            self.status = "Failed"
+            self.message = self.message or str(exc)
+
+        return False
+
+    def _install_query_counter(self):
+        self._original_sql = original_sql = frappe.db.sql
+        self._patched_instance = "sql" not in vars(frappe.db)
+
+        def counted_sql(*args, **kwargs):
+            self._queries += 1
+            return original_sql(*args, **kwargs)
+
+        frappe.db.sql = counted_sql
+
+    def _remove_query_counter(self):
+        if self._original_sql is None:
+            return
+
+        if self._patched_instance:
+            del frappe.db.sql
+        else:
+            frappe.db.sql = self._original_sql
+
+        self._original_sql = None
+
+    # ------------------------------------------------------------------
+    # Phases
+    # ------------------------------------------------------------------
+    def begin(self, phase):
+        """Close the open phase (if any) and start timing the next one."""
+        self.end()
+        self._current = {
+            "phase": phase,
+            "rows_touched": 0,
+            "queries": self._queries,
+            "wall": time.perf_counter(),
+            "cpu": time.process_time(),
+        }
+
+    def count(self, rows=1):
+        if self._current is not None:
+            self._current["rows_touched"] += int(rows or 0)
+
+    def end(self):
+        current, self._current = self._current, None
+
+        if current is None:
+            return
+
+        phase = {
+            "phase": current["phase"],
+            "rows_touched": current["rows_touched"],
+            "queries": self._queries - current["queries"],
+            "wall_seconds": round(time.perf_counter() - current["wall"], 3),
+            "cpu_seconds": round(time.process_time() - current["cpu"], 3),
+        }
+        self.phases.append(phase)
+
+        if self.on_phase:
+            try:
+                self.on_phase(phase)
+            except Exception:
+                # Progress reporting must not fail the run, but keep the trace.
+                frappe.log_error(frappe.get_traceback(), "Availability & Utilisation - Telemetry")
+
+    def set_counts(self, created=0, updated=0, unchanged=0, errors=0):
+        self.counts = {
+            "created": int(created or 0),
+            "updated": int(updated or 0),
+            "unchanged": int(unchanged or 0),
+            "errors": int(errors or 0),
+        }
+
+    # ------------------------------------------------------------------
+    # Output
+    # ------------------------------------------------------------------
+    @property
+    def queries(self):
+        return self._queries
+
+    @property
+    def slowest_phase(self):
+        if not self.phases:
+            return None
+        return max(self.phases, key=lambda phase: phase["wall_seconds"])["phase"]
+
+    def summary_lines(self):
+        return [format_phase(phase) for phase in self.phases]
+
+    def save(self):
+        """Write the AU Run Telemetry record; returns its name."""
+        doc = frappe.get_doc(
+            {
+                "doctype": TELEMETRY_DOCTYPE,
+                "run_type": self.run_type,
+                "status": self.status,
+                "control_log": self.control_log,
+                "started_at": self.started_at,
+                "completed_at": self.completed_at,
+                "wall_seconds": round(self.wall_seconds, 3),
+                "cpu_seconds": round(self.cpu_seconds, 3),
+                "queries": self._queries,
+                "slowest_phase": self.slowest_phase,
+                "records_created": self.counts["created"],
+                "records_updated": self.counts["updated"],
+                "records_unchanged": self.counts["unchanged"],
+                "records_errors": self.counts["errors"],
+                "message": self.message,
+                "phases": self.phases,
+            }
+        )
+        doc.insert(ignore_permissions=True)
+        self.name = doc.name
+        return doc.name
+
+
+def format_phase(phase):
+    return (
+        f"{phase['phase']}: {phase['rows_touched']} rows, "
+        f"{phase['queries']} queries, "
+        f"{phase['wall_seconds']:.3f}s wall, "
+        f"{phase['cpu_seconds']:.3f}s CPU"
+    )
+
+
+def save_telemetry(telemetry):
+    """Save without letting a telemetry failure fail the engine run."""
+    try:
+        return telemetry.save()
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Availability & Utilisation - Telemetry")
+        return None
@@ -17,6 +17,29 @@ from frappe.utils import (
 from datetime import timedelta
 from frappe.model.document import Document
 
+from engineering.engineering.doctype.availability_and_utilisation.au_telemetry import (
+    RunTelemetry,
+    save_telemetry,
+)
+
+
+# Asset categories that receive an A&U record per shift.
+AU_ASSET_CATEGORIES = [
+    "Dozer",
+    "ADT",
+    "Rigid",
+    "Excavator",
+    "Grader",
+    "Service Truck",
+    "TLB",
+    "Water Bowser",
+    "Diesel Bowsers",
+    "Drills",
+]
+
+# PBM rows that started before this moment are not trusted for A&U downtime.
+PBM_TRUST_DATETIME = "2026-01-01 00:00:00"
+
 
 # =============================================================================
 # Helpers (IMPORT-SAFE)
@@ -158,23 +181,21 @@ def _overlap_hours(a_start, a_end, b_start, b_end) -> float:
     return float(time_diff_in_hours(e, s))
 
 
-def _exclusion_windows(
-    location: str,
-    shift: str,
-    shift_start,
-    shift_end,
-):
-    shift_date = getdate(
-        shift_start
-    )
+def _day_type(shift_date) -> str:
+    weekday = getdate(shift_date).weekday()
+
+    if weekday == 5:
+        return "Saturday"
+    if weekday == 6:
+        return "Sunday"
+    return "Weekday"
 
-    if shift_date.weekday() == 5:
-        day_type = "Saturday"
-    elif shift_date.weekday() == 6:
-        day_type = "Sunday"
-    else:
-        day_type = "Weekday"
 
+def _exclusion_configuration(location: str, shift: str, day_type: str, log_missing: bool = True):
+    """
+    Startup/Fatigue configuration for one site, shift and day type.
+    A missing configuration goes to the Error Log unless log_missing is off.
+    """
     configuration_fields = [
         "startup_start",
         "startup_end",
@@ -219,7 +240,7 @@ def _exclusion_windows(
                 legacy_configurations[0]
             )
 
-    if not configuration:
+    if not configuration and log_missing:
         frappe.log_error(
             title=(
                 "Missing Startup and Fatigue "
@@ -230,6 +251,90 @@ def _exclusion_windows(
                 f"{location}-{shift}-{day_type}"
             ),
         )
+
+    return configuration
+
+
+def _prefetch_exclusion_configurations(locations=None):
+    """
+    configuration_cache for _exclusion_windows, filled from one read of
+    Startup and Fatigue spesification with the same rules as
+    _exclusion_configuration. Keys without a configuration are left out so
+    they are still looked up (and logged) on use.
+    """
+    filters = {}
+    if locations:
+        filters["site"] = ["in", list(locations)]
+
+    rows = frappe.get_all(
+        "Startup and Fatigue spesification",
+        filters=filters,
+        fields=[
+            "site",
+            "shift",
+            "day_type",
+            "startup_start",
+            "startup_end",
+            "fatigue_start",
+            "fatigue_end",
+        ],
+    )
+
+    rows_by_site_shift = {}
+    for row in rows:
+        rows_by_site_shift.setdefault((row.site, row.shift), []).append(row)
+
+    configuration_cache = {}
+
+    for (location, shift), site_shift_rows in rows_by_site_shift.items():
+        for day_type in ("Weekday", "Saturday", "Sunday"):
+            configuration = next(
+                (row for row in site_shift_rows if row.day_type == day_type),
+                None,
+            )
+
+            if not configuration and len(site_shift_rows) == 1:
+                configuration = site_shift_rows[0]
+
+            if configuration:
+                configuration_cache[(location, shift, day_type)] = frappe._dict({
+                    "startup_start": configuration.startup_start,
+                    "startup_end": configuration.startup_end,
+                    "fatigue_start": configuration.fatigue_start,
+                    "fatigue_end": configuration.fatigue_end,
+                })
+
+    return configuration_cache
+
+
+def _exclusion_windows(
+    location: str,
+    shift: str,
+    shift_start,
+    shift_end,
+    configuration_cache=None,
+    log_missing=True,
+):
+    """
+    Startup/Fatigue windows clipped to the shift.
+
+    Pass a dict as configuration_cache when calling for many shifts so the
+    configuration is looked up once per (location, shift, day_type).
+    log_missing=False resolves silently (read-only reports).
+    """
+    day_type = _day_type(shift_start)
+
+    if configuration_cache is None:
+        configuration = _exclusion_configuration(location, shift, day_type, log_missing)
+    else:
+        cache_key = (location, shift, day_type)
+        if cache_key not in configuration_cache:
+            configuration_cache[cache_key] = _exclusion_configuration(
+                location, shift, day_type, log_missing
+            )
+        configuration = configuration_cache[cache_key]
+
+    if not configuration:
         return []
 
     def time_text(value):
@@ -352,18 +457,160 @@ def _exclusion_windows(
 
     return windows
 
+def _clipped_downtime(interval_start, interval_end, shift_start, shift_end, excluded_windows):
+    """
+    One breakdown interval inside one shift.
+    Returns (overlap_hours, excluded_hours) with excluded capped at overlap.
+    """
+    interval_start = max(interval_start, shift_start)
+    interval_end = min(interval_end, shift_end)
+
+    if interval_end <= interval_start:
+        return 0.0, 0.0
+
+    interval_hours = _overlap_hours(
+        interval_start,
+        interval_end,
+        shift_start,
+        shift_end,
+    )
+
+    interval_excluded = 0.0
+
+    for window_start, window_end in excluded_windows:
+        interval_excluded += _overlap_hours(
+            interval_start,
+            interval_end,
+            window_start,
+            window_end,
+        )
+
+    return interval_hours, min(interval_excluded, interval_hours)
+
+
+def _final_shift_values(
+    shift_required_hours,
+    shift_breakdown_hours,
+    shift_working_hours,
+    pre_use_avail_status,
+):
+    """Phase 8 calculation: availability / utilisation fields for one shift."""
+    shift_required_hours = shift_required_hours or 0
+    shift_breakdown_hours = shift_breakdown_hours or 0
+    shift_working_hours = shift_working_hours or 0
+
+    if pre_use_avail_status in ("3", "6"):
+        shift_required_hours = 0
+        shift_available_hours = shift_working_hours
+        shift_other_lost_hours = 0
+    else:
+        shift_available_hours = max(shift_required_hours - shift_breakdown_hours, 0)
+        if shift_working_hours > shift_available_hours:
+            shift_other_lost_hours = max(shift_required_hours - shift_working_hours, 0)
+        else:
+            shift_other_lost_hours = max(shift_available_hours - shift_working_hours, 0)
+
+    max_val = max(
+        shift_working_hours,
+        shift_available_hours,
+    )
+
+    plant_shift_utilisation = (
+        (shift_working_hours / shift_available_hours) * 100
+        if shift_available_hours > 0
+        else 0
+    )
+
+    # Existing availability field stays unchanged.
+    if pre_use_avail_status in ("3", "6"):
+        plant_shift_availability = 100
+    else:
+        plant_shift_availability = (
+            (max_val / shift_required_hours) * 100
+            if shift_required_hours > 0
+            else 0
+        )
+
+    # New availability fields may exceed 100%.
+    if pre_use_avail_status in ("3", "6"):
+        plant_shift_availability_above_100 = 100
+    else:
+        plant_shift_availability_above_100 = (
+            (max_val / shift_required_hours) * 100
+            if shift_required_hours > 0
+            else 0
+        )
+
+    available_hours_above_100_capped = (
+        shift_required_hours
+    )
+
+    return {
+        "shift_required_hours": shift_required_hours,
+        "shift_available_hours": shift_available_hours,
+        "shift_other_lost_hours": shift_other_lost_hours,
+        # Existing fields remain capped at 100%.
+        "plant_shift_utilisation": min(plant_shift_utilisation, 100),
+        "plant_shift_availability": min(plant_shift_availability, 100),
+        "shift_available_hours_above_100": max_val,
+        "plant_shift_availability_above_100": plant_shift_availability_above_100,
+        "available_hours_above_100_capped": available_hours_above_100_capped,
+        "plant_shift_utilisation_above_100": (
+            (
+                shift_working_hours
+                / available_hours_above_100_capped
+            )
+            * 100
+            if available_hours_above_100_capped > 0
+            else 0
+        ),
+    }
+
+
 # =============================================================================
 # Main DocType
 # =============================================================================
 
 class AvailabilityandUtilisation(Document):
     @staticmethod
-    def generate_records():
+    def generate_records(mode="bulk", telemetry=None):
+        """
+        Create/update A&U records for the last 7 days.
+
+        mode="bulk"     : set-based engine (au_bulk_engine), writes only changed rows
+        mode="document" : original per-document phases 1-10
+
+        Either way the run is written to an AU Run Telemetry record; pass a
+        RunTelemetry to name the run type or receive phases as they finish.
+        """
         # Prevent execution during migration or app install
         if _safe_flag("in_migrate") or _safe_flag("in_install_app"):
             frappe.logger().info("Skipped generate_records during migrate/install")
             return
 
+        if mode == "bulk":
+            return AvailabilityandUtilisation.generate_records_bulk(telemetry=telemetry)
+
+        if telemetry is None:
+            telemetry = RunTelemetry("Document")
+
+        try:
+            with telemetry:
+                message = AvailabilityandUtilisation._generate_records_document(telemetry)
+        finally:
+            save_telemetry(telemetry)
+
+        return message
+
+    @staticmethod
+    def _generate_records_document(telemetry):
+        """Per-document phases 1-10, reporting each phase to telemetry."""
+        from engineering.engineering.doctype.availability_and_utilisation.downtime_overlap import (
+            BreakdownIntervalIndex,
+            ExclusionWindowResolver,
+            breakdown_window,
+        )
+
         process_started_at = now_datetime()
         created_records = []
         updated_records = []
@@ -378,6 +625,7 @@ class AvailabilityandUtilisation(Document):
         # =============================================================================
         # Phase 1: Create or Update AU docs (last 7 days)
         # =============================================================================
+        telemetry.begin("Phase 1: create / update A&U docs")
         start_date = current_date - timedelta(days=7)
         end_date = current_date
 
@@ -407,21 +655,7 @@ class AvailabilityandUtilisation(Document):
                     "Asset",
                     filters={
                         "location": location,
-                        "asset_category": [
-            "in",
-            [
-                "Dozer",
-                "ADT",
-                "Rigid",
-                "Excavator",
-                "Grader",
-                "Service Truck",
-                "TLB",
-                "Water Bowser",
-                "Diesel Bowsers",
-                "Drills",
-            ],
-        ],
+                        "asset_category": ["in", AU_ASSET_CATEGORIES],
                         "docstatus": 1,
                     },
                     fields=["name", "asset_name", "item_name", "asset_category"],
@@ -455,6 +689,7 @@ class AvailabilityandUtilisation(Document):
                                 doc.db_set("asset_category", asset.asset_category, update_modified=True)
 
                                 updated_records.append(doc.name)
+                                telemetry.count()
                                 append_log(
                                     doc.name,
                                     (
@@ -482,6 +717,7 @@ class AvailabilityandUtilisation(Document):
                                 doc.db_set("asset_category", asset.asset_category, update_modified=True)
 
                                 created_records.append(doc.name)
+                                telemetry.count()
                                 append_log(
                                     doc.name,
                                     (
@@ -503,6 +739,8 @@ class AvailabilityandUtilisation(Document):
         # =============================================================================
         # Phase 2: Update pre_use_lookup field
         # =============================================================================
+        telemetry.begin("Phase 2: pre_use_lookup")
+        telemetry.count(len(created_records) + len(updated_records))
         for doc_name in created_records + updated_records:
             try:
                 doc = frappe.get_doc("Availability and Utilisation", doc_name)
@@ -519,6 +757,8 @@ class AvailabilityandUtilisation(Document):
         # =============================================================================
         # Phase 3: Update pre_use_link using pre_use_lookup (WITH FALLBACKS)
         # =============================================================================
+        telemetry.begin("Phase 3: pre_use_link")
+        telemetry.count(len(created_records) + len(updated_records))
         for doc_name in created_records + updated_records:
             try:
                 doc = frappe.get_doc("Availability and Utilisation", doc_name)
@@ -540,6 +780,7 @@ class AvailabilityandUtilisation(Document):
         # =============================================================================
         # Phase 4: Update shift_required_hours  (LAST 7 DAYS)
         # =============================================================================
+        telemetry.begin("Phase 4: shift_required_hours")
         current_date = getdate(today())
         start_date = current_date - timedelta(days=7)
 
@@ -552,6 +793,8 @@ class AvailabilityandUtilisation(Document):
             fields=["name", "shift_date", "location", "shift"],
         )
 
+        telemetry.count(len(relevant_records))
+
         for record in relevant_records:
             try:
                 doc = frappe.get_doc("Availability and Utilisation", record.name)
@@ -601,6 +844,8 @@ class AvailabilityandUtilisation(Document):
         # =============================================================================
         # Phase 5: Update from Pre-Use Hours (FIXED ASSET MATCHING, NO PRE-USE CHANGES)
         # =============================================================================
+        telemetry.begin("Phase 5: Pre-Use hours")
+        telemetry.count(len(created_records) + len(updated_records))
         for doc_name in created_records + updated_records:
             try:
                 doc = frappe.get_doc("Availability and Utilisation", doc_name)
@@ -656,6 +901,8 @@ class AvailabilityandUtilisation(Document):
         # =============================================================================
         # Phase 6: Update item_name using asset lookup
         # =============================================================================
+        telemetry.begin("Phase 6: item_name")
+        telemetry.count(len(created_records) + len(updated_records))
         for doc_name in created_records + updated_records:
             previous_item_name = None
             try:
@@ -688,6 +935,7 @@ class AvailabilityandUtilisation(Document):
         # =============================================================================
         # Phase 7: Update shift_breakdown_hours directly from PBM
         # =============================================================================
+        telemetry.begin("Phase 7: shift_breakdown_hours")
         current_date = getdate(today())
         start_date = current_date - timedelta(days=7)
 
@@ -709,6 +957,16 @@ class AvailabilityandUtilisation(Document):
             order_by="shift_date asc",
         )
 
+        # All breakdowns for the window in one query, indexed per (location, asset).
+        window_start, window_end = breakdown_window(start_date, current_date)
+        breakdown_index = BreakdownIntervalIndex.load(
+            window_start,
+            window_end,
+            locations={r["location"] for r in parent_records if r["location"]},
+        )
+        exclusion_resolver = ExclusionWindowResolver()
+        telemetry.count(len(parent_records))
+
         for parent_record in parent_records:
             try:
                 shift_start, shift_end = get_shift_timings(
@@ -717,97 +975,19 @@ class AvailabilityandUtilisation(Document):
                     str(parent_record["shift_date"]),
                 )
 
-                breakdown_rows = frappe.db.sql(
-                    """
-                    SELECT
-                        name,
-                        breakdown_start_datetime,
-                        resolved_datetime
-                    FROM `tabPlant Breakdown or Maintenance`
-                    WHERE location = %(location)s
-                      AND asset_name = %(asset_name)s
-                      AND IFNULL(exclude_from_au, 0) = 0
-                      AND breakdown_start_datetime IS NOT NULL
-                      AND breakdown_start_datetime >= %(trust_datetime)s
-                      AND breakdown_start_datetime < %(shift_end)s
-                      AND (
-                            resolved_datetime IS NULL
-                            OR resolved_datetime = ''
-                            OR resolved_datetime > %(shift_start)s
-                      )
-                    ORDER BY breakdown_start_datetime ASC
-                    """,
-                    {
-                        "location": parent_record["location"],
-                        "asset_name": parent_record["asset_name"],
-                        "shift_start": shift_start,
-                        "shift_end": shift_end,
-                        "trust_datetime": "2026-01-01 00:00:00",
-                    },
-                    as_dict=True,
-                )
-
-                excluded_windows = _exclusion_windows(
+                excluded_windows = exclusion_resolver.windows(
                     parent_record["location"],
                     parent_record["shift"],
                     shift_start,
                     shift_end,
                 )
 
-                effective_hours = 0.0
-                excluded_hours = 0.0
-
-                for breakdown in breakdown_rows:
-                    breakdown_start = get_datetime(
-                        breakdown["breakdown_start_datetime"]
-                    )
-
-                    breakdown_end = (
-                        get_datetime(breakdown["resolved_datetime"])
-                        if breakdown.get("resolved_datetime")
-                        else min(now_datetime(), shift_end)
-                    )
-
-                    interval_start = max(
-                        breakdown_start,
-                        shift_start,
-                    )
-
-                    interval_end = min(
-                        breakdown_end,
-                        shift_end,
-                    )
-
-                    if interval_end <= interval_start:
-                        continue
-
-                    interval_hours = _overlap_hours(
-                        interval_start,
-                        interval_end,
-                        shift_start,
-                        shift_end,
-                    )
-
-                    interval_excluded = 0.0
-
-                    for window_start, window_end in excluded_windows:
-                        interval_excluded += _overlap_hours(
-                            interval_start,
-                            interval_end,
-                            window_start,
-                            window_end,
-                        )
-
-                    interval_excluded = min(
-                        interval_excluded,
-                        interval_hours,
-                    )
-
-                    excluded_hours += interval_excluded
-                    effective_hours += max(
-                        interval_hours - interval_excluded,
-                        0,
-                    )
+                effective_hours, excluded_hours, breakdown_count = breakdown_index.effective_downtime(
+                    (parent_record["location"], parent_record["asset_name"]),
+                    shift_start,
+                    shift_end,
+                    excluded_windows,
+                )
 
                 shift_required_hours = max(
                     flt(parent_record["shift_required_hours"]),
@@ -831,7 +1011,7 @@ class AvailabilityandUtilisation(Document):
                     (
                         f"Phase 7: PBM downtime updated for "
                         f"doc={parent_record['name']}. "
-                        f"Breakdowns={len(breakdown_rows)}, "
+                        f"Breakdowns={breakdown_count}, "
                         f"Excluded={excluded_hours:.2f}h, "
                         f"A&U Downtime={shift_breakdown_hours:.3f}h."
                     ),
@@ -860,90 +1040,26 @@ class AvailabilityandUtilisation(Document):
         # =============================================================================
         # Phase 8: Calculate and set final fields
         # =============================================================================
+        telemetry.begin("Phase 8: final fields")
+        telemetry.count(len(created_records) + len(updated_records))
         for doc_name in created_records + updated_records:
             try:
                 doc = frappe.get_doc("Availability and Utilisation", doc_name)
 
-                shift_required_hours = doc.shift_required_hours or 0
                 shift_breakdown_hours = doc.shift_breakdown_hours or 0
                 shift_working_hours = doc.shift_working_hours or 0
 
-                if doc.pre_use_avail_status in ("3", "6"):
-                    shift_required_hours = 0
-                    shift_available_hours = shift_working_hours
-                    shift_other_lost_hours = 0
-                else:
-                    shift_available_hours = max(shift_required_hours - shift_breakdown_hours, 0)
-                    if shift_working_hours > shift_available_hours:
-                        shift_other_lost_hours = max(shift_required_hours - shift_working_hours, 0)
-                    else:
-                        shift_other_lost_hours = max(shift_available_hours - shift_working_hours, 0)
-
-                doc.shift_required_hours = shift_required_hours
-                doc.shift_available_hours = shift_available_hours
-                doc.shift_other_lost_hours = shift_other_lost_hours
-
-                max_val = max(
-                    shift_working_hours,
-                    shift_available_hours,
-                )
-
-                doc.plant_shift_utilisation = (
-                    (shift_working_hours / shift_available_hours) * 100
-                    if shift_available_hours > 0
-                    else 0
-                )
-
-                # Existing availability field stays unchanged.
-                if doc.pre_use_avail_status in ("3", "6"):
-                    doc.plant_shift_availability = 100
-                else:
-                    doc.plant_shift_availability = (
-                        (max_val / shift_required_hours) * 100
-                        if shift_required_hours > 0
-                        else 0
+                doc.update(
+                    _final_shift_values(
+                        doc.shift_required_hours,
+                        shift_breakdown_hours,
+                        shift_working_hours,
+                        doc.pre_use_avail_status,
                     )
-
-                # Existing fields remain capped at 100%.
-                doc.plant_shift_utilisation = min(
-                    doc.plant_shift_utilisation,
-                    100,
-                )
-
-                doc.plant_shift_availability = min(
-                    doc.plant_shift_availability,
-                    100,
-                )
-
-                # New availability fields may exceed 100%.
-                doc.shift_available_hours_above_100 = max_val
-
-                if doc.pre_use_avail_status in ("3", "6"):
-                    doc.plant_shift_availability_above_100 = 100
-                else:
-                    doc.plant_shift_availability_above_100 = (
-                        (max_val / shift_required_hours) * 100
-                        if shift_required_hours > 0
-                        else 0
-                    )
-
-                available_hours_above_100_capped = (
-                    shift_required_hours
-                )
-
-                doc.available_hours_above_100_capped = (
-                    available_hours_above_100_capped
-                )
-
-                doc.plant_shift_utilisation_above_100 = (
-                    (
-                        shift_working_hours
-                        / available_hours_above_100_capped
-                    )
-                    * 100
-                    if available_hours_above_100_capped > 0
-                    else 0
                 )
+                shift_required_hours = doc.shift_required_hours
+                shift_available_hours = doc.shift_available_hours
+                shift_other_lost_hours = doc.shift_other_lost_hours
 
                 doc.save(ignore_permissions=True)
 
@@ -969,8 +1085,16 @@ class AvailabilityandUtilisation(Document):
 
         # =============================================================================
         # Phase 9: Combined Log (Split into 10 parts)
+        # Only records with an error; per-phase timings are in the telemetry.
         # =============================================================================
-        record_keys = list(record_logs.keys())
+        telemetry.begin("Phase 9: error log")
+        error_messages = set(error_records)
+        record_keys = [
+            key
+            for key, messages in record_logs.items()
+            if any(message in error_messages for message in messages)
+        ]
+        telemetry.count(len(record_keys))
         total_logs = len(record_keys)
         max_logs_per_entry = max(1, total_logs // 10)
 
@@ -985,6 +1109,13 @@ class AvailabilityandUtilisation(Document):
         # =============================================================================
         # Phase 10: Summary Log
         # =============================================================================
+        telemetry.end()
+        telemetry.set_counts(
+            created=len(created_records),
+            updated=len(updated_records),
+            errors=len(error_records),
+        )
+
         process_completed_at = now_datetime()
         duration = process_completed_at - process_started_at
 
@@ -998,18 +1129,108 @@ class AvailabilityandUtilisation(Document):
         if error_records:
             success_message += f"Errors encountered: {len(error_records)}. Check log batches for details."
 
+        telemetry.message = success_message
+
         frappe.log_error(message=success_message, title="Availability & Utilisation - Process Completion")
         return success_message
 
+    @staticmethod
+    def generate_records_bulk(start_date=None, end_date=None, dry_run=False, telemetry=None):
+        """
+        Set-based run of phases 1-8; same summary message as the document path.
+
+        Real runs are written to an AU Run Telemetry record; dry runs are not.
+        """
+        from engineering.engineering.doctype.availability_and_utilisation.au_bulk_engine import (
+            run_bulk_generation,
+        )
+
+        if telemetry is None:
+            telemetry = RunTelemetry("Bulk")
+
+        process_started_at = now_datetime()
+        try:
+            with telemetry:
+                stats = run_bulk_generation(
+                    start_date=start_date,
+                    end_date=end_date,
+                    dry_run=dry_run,
+                    telemetry=telemetry,
+                )
+        except Exception:
+            if not dry_run:
+                save_telemetry(telemetry)
+            raise
+
+        process_completed_at = now_datetime()
+        duration = process_completed_at - process_started_at
+
+        if stats.errors:
+            for i in range(0, len(stats.errors), 200):
+                frappe.log_error(
+                    "\n".join(stats.errors[i : i + 200]),
+                    f"Phase Update Log - Bulk Errors {i // 200 + 1}",
+                )
+
+        success_message = (
+            f"Successfully created {stats.created} records. "
+            f"Updated {stats.updated} records. "
+            f"Unchanged {stats.unchanged} records. "
+            f"Started at {process_started_at.strftime('%Y-%m-%d %H:%M:%S')}, "
+            f"completed at {process_completed_at.strftime('%Y-%m-%d %H:%M:%S')}, "
+            f"duration {duration}. "
+        )
+        if dry_run:
+            success_message = "Dry run (nothing written). " + success_message
+        if stats.errors:
+            success_message += f"Errors encountered: {len(stats.errors)}. Check log batches for details."
+
+        telemetry.message = success_message
+
+        if not dry_run:
+            save_telemetry(telemetry)
+            frappe.log_error(message=success_message, title="Availability & Utilisation - Process Completion")
+        return success_message
+
 
 # =============================================================================
 # Whitelisted: Manual trigger
 # =============================================================================
 
 @frappe.whitelist()
-def create_availability_and_utilisation():
+def create_availability_and_utilisation(mode="bulk"):
     """Manual trigger to run generation of records."""
-    return AvailabilityandUtilisation.generate_records()
+    return AvailabilityandUtilisation.generate_records(mode=mode)
+
+
+@frappe.whitelist()
+def profile_generate_records():
+    """
+    Time the per-document path against the bulk path on the same window.
+
+    The document path runs first; the bulk path then runs as a dry run, so
+    its "Updated" count is the number of rows on which the two paths
+    disagree (expected 0).
+    """
+    frappe.only_for("System Manager")
+
+    started = now_datetime()
+    document_message = AvailabilityandUtilisation.generate_records(mode="document")
+    document_seconds = (now_datetime() - started).total_seconds()
+
+    started = now_datetime()
+    bulk_message = AvailabilityandUtilisation.generate_records_bulk(dry_run=True)
+    bulk_seconds = (now_datetime() - started).total_seconds()
+
+    result = {
+        "document_seconds": document_seconds,
+        "bulk_seconds": bulk_seconds,
+        "speedup": round(document_seconds / bulk_seconds, 1) if bulk_seconds else None,
+        "document_message": document_message,
+        "bulk_message": bulk_message,
+    }
+    frappe.log_error(frappe.as_json(result), "Availability & Utilisation - Engine Profile")
+    return result
 
 
 # =============================================================================
@@ -1073,37 +1294,49 @@ def sync_single_au(au_name: str):
 @frappe.whitelist()
 def run_hourly_gate():
     """Hourly scheduler gate.
-    Weekdays: 06:00 and 18:00
-    Weekends: 06:00 and 15:00
+
+    Recomputes only the keys queued in AU Recompute Queue by the PBM,
+    Pre-Use Hours and Monthly Production Planning hooks (plus open
+    breakdowns). The full 7-day rescan runs once a day from run_daily.
     """
-    now = now_datetime()
-    hour = now.hour
-    dow = now.weekday()  # Mon=0 ... Sun=6
+    from engineering.engineering.doctype.availability_and_utilisation.au_recompute import (
+        pending_count,
+    )
 
-    is_weekend = dow in (5, 6)  # Sat/Sun
-    allowed_hours = {6, 15} if is_weekend else {6, 18}
+    now = now_datetime()
 
-    if hour not in allowed_hours:
+    if not pending_count() and not frappe.db.exists(
+        "Plant Breakdown or Maintenance", {"open_closed": "Open"}
+    ):
         return "SKIP"
 
-    # Same enqueue as run_daily
     frappe.enqueue(
-        "engineering.engineering.doctype.availability_and_utilisation.availability_and_utilisation.create_availability_and_utilisation",
+        "engineering.engineering.doctype.availability_and_utilisation.availability_and_utilisation.process_availability_and_utilisation_queue",
         queue="long",
-        job_name=f"Availability & Utilisation Engine (Hourly Gate {now.strftime('%Y-%m-%d %H:%M')})",
+        job_name=f"Availability & Utilisation Engine (Incremental {now.strftime('%Y-%m-%d %H:%M')})",
         timeout=60 * 60,
+        deduplicate=True,
+        job_id="availability_and_utilisation_incremental",
     )
     return "ENQUEUED"
 
 
+@frappe.whitelist()
+def process_availability_and_utilisation_queue():
+    """Recompute the queued A&U keys (see au_recompute.py)."""
+    from engineering.engineering.doctype.availability_and_utilisation.au_recompute import (
+        process_recompute_queue,
+    )
 
+    if _safe_flag("in_migrate") or _safe_flag("in_install_app"):
+        return
 
-
+    return process_recompute_queue()
 
 
 @frappe.whitelist()
 def run_daily():
-    """Scheduled job: enqueue heavy processing on the long queue."""
+    """Scheduled job: enqueue the full 7-day rescan (nightly reconciliation) on the long queue."""
     started_at = now_datetime()
     frappe.log_error(
         f"Scheduled job enqueuing at {started_at.strftime('%Y-%m-%d %H:%M:%S')} for Availability and Utilisation",
@@ -1117,6 +1350,15 @@ def run_daily():
         timeout=60 * 60,
     )
 
+    # Rebuild the settled days of the window in AU Shift Fact and back-fill gaps.
+    frappe.enqueue(
+        "engineering.engineering.doctype.availability_and_utilisation.au_facts.refresh_au_shift_facts",
+        queue="long",
+        job_name="Availability & Utilisation Shift Facts (Scheduled)",
+        timeout=60 * 60,
+        reconcile=1,
+    )
+
     enqueued_at = now_datetime()
     frappe.log_error(
         f"Scheduled job enqueued at {enqueued_at.strftime('%Y-%m-%d %H:%M:%S')} for Availability and Utilisation",
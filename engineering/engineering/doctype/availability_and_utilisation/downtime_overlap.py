@@ -0,0 +1,182 @@
+# downtime_overlap.py
+# Shared PBM downtime-overlap engine.
+#
+# Breakdowns for a window are loaded with ONE query and indexed per
+# (location, asset_name) as intervals sorted by start, with a running
+# maximum of interval ends. A shift query bisects both arrays, so finding
+# the breakdowns that touch a shift is O(log n + k) instead of one SQL
+# round-trip per A&U record.
+#
+# Used by A&U generate_records (Phase 7, both document and bulk mode) and
+# by the Availability and Utilisation Engine report (get_pbm_map), so both
+# apply the same overlap and Startup/Fatigue exclusion rules.
+
+from bisect import bisect_left, bisect_right
+from collections import defaultdict
+from datetime import datetime
+
+import frappe
+from frappe.utils import add_days, get_datetime, getdate, now_datetime
+
+from engineering.engineering.doctype.availability_and_utilisation.availability_and_utilisation import (
+    PBM_TRUST_DATETIME,
+    _clipped_downtime,
+    _exclusion_windows,
+)
+
+
+OPEN_END = datetime.max
+
+
+class ExclusionWindowResolver:
+    """Startup/Fatigue windows with the configuration cached per (location, shift, day_type)."""
+
+    def __init__(self, log_missing=True):
+        # Reports pass log_missing=False; only the A&U engine logs missing configuration.
+        self.configuration_cache = {}
+        self.log_missing = log_missing
+
+    def windows(self, location, shift, shift_start, shift_end):
+        return _exclusion_windows(
+            location,
+            shift,
+            shift_start,
+            shift_end,
+            self.configuration_cache,
+            log_missing=self.log_missing,
+        )
+
+
+class BreakdownIntervalIndex:
+    """Plant Breakdown or Maintenance intervals indexed per (location, asset_name)."""
+
+    def __init__(self, rows, key=None):
+        self.key = key or (lambda row: (row.location, row.asset_name))
+        self.rows = []
+        self._starts = {}
+        self._max_ends = {}
+        self._rows = {}
+
+        grouped = defaultdict(list)
+        for row in rows:
+            start = get_datetime(row.breakdown_start_datetime) if row.breakdown_start_datetime else None
+            if not start:
+                continue
+            row.start_dt = start
+            row.end_dt = get_datetime(row.resolved_datetime) if row.resolved_datetime else None
+            grouped[self.key(row)].append(row)
+            self.rows.append(row)
+
+        self.rows.sort(key=lambda row: row.start_dt)
+
+        for group_key, group_rows in grouped.items():
+            group_rows.sort(key=lambda row: row.start_dt)
+            max_ends = []
+            running = None
+            for row in group_rows:
+                end = row.end_dt or OPEN_END
+                running = end if running is None or end > running else running
+                max_ends.append(running)
+            self._rows[group_key] = group_rows
+            self._starts[group_key] = [row.start_dt for row in group_rows]
+            self._max_ends[group_key] = max_ends
+
+    @classmethod
+    def load(
+        cls,
+        window_start,
+        window_end,
+        locations=None,
+        asset_names=None,
+        trust_datetime=PBM_TRUST_DATETIME,
+        require_reason=False,
+        key=None,
+    ):
+        """One ordered scan of every A&U-relevant breakdown touching [window_start, window_end)."""
+        conditions = [
+            "docstatus < 2",
+            "IFNULL(exclude_from_au, 0) = 0",
+            "breakdown_start_datetime IS NOT NULL",
+            "breakdown_start_datetime < %(window_end)s",
+            "(resolved_datetime IS NULL OR resolved_datetime = '' OR resolved_datetime > %(window_start)s)",
+        ]
+        values = {
+            "window_start": window_start,
+            "window_end": window_end,
+        }
+
+        if trust_datetime:
+            conditions.append("breakdown_start_datetime >= %(trust_datetime)s")
+            values["trust_datetime"] = trust_datetime
+
+        if require_reason:
+            conditions.append("IFNULL(breakdown_reason, '') != ''")
+
+        if locations is not None:
+            if not locations:
+                return cls([], key=key)
+            conditions.append("location IN %(locations)s")
+            values["locations"] = tuple(locations)
+
+        if asset_names is not None:
+            if not asset_names:
+                return cls([], key=key)
+            conditions.append("asset_name IN %(asset_names)s")
+            values["asset_names"] = tuple(asset_names)
+
+        rows = frappe.db.sql(
+            f"""
+            SELECT
+                name,
+                location,
+                asset_name,
+                breakdown_start_datetime,
+                resolved_datetime
+            FROM `tabPlant Breakdown or Maintenance`
+            WHERE {" AND ".join(conditions)}
+            ORDER BY breakdown_start_datetime ASC
+            """,
+            values,
+            as_dict=True,
+        )
+        return cls(rows, key=key)
+
+    def overlapping(self, group_key, start, end):
+        """Breakdowns of one (location, asset_name) with start < end and (open or resolved > start)."""
+        starts = self._starts.get(group_key)
+        if not starts:
+            return []
+
+        hi = bisect_left(starts, end)
+        lo = bisect_right(self._max_ends[group_key], start)
+        return [
+            row
+            for row in self._rows[group_key][lo:hi]
+            if row.end_dt is None or row.end_dt > start
+        ]
+
+    def effective_downtime(self, group_key, shift_start, shift_end, exclusion_windows):
+        """
+        A&U downtime for one shift: overlap of every breakdown with the shift,
+        less Startup/Fatigue windows. Open breakdowns run to min(now, shift_end).
+        Returns (effective_hours, excluded_hours, breakdown_count).
+        """
+        breakdowns = self.overlapping(group_key, shift_start, shift_end)
+        effective_hours = 0.0
+        excluded_hours = 0.0
+
+        for row in breakdowns:
+            end = row.end_dt or min(now_datetime(), shift_end)
+            overlap, excluded = _clipped_downtime(row.start_dt, end, shift_start, shift_end, exclusion_windows)
+            excluded_hours += excluded
+            effective_hours += max(overlap - excluded, 0)
+
+        return effective_hours, excluded_hours, len(breakdowns)
+
+
+def breakdown_window(start_date, end_date):
+    """Datetime range covering every shift that starts between start_date and end_date."""
+    return (
+        get_datetime(f"{getdate(start_date)} 00:00:00"),
+        get_datetime(f"{add_days(getdate(end_date), 2)} 00:00:00"),
+    )
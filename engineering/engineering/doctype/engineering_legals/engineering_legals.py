@@ -4,11 +4,12 @@ import mimetypes
 from typing import Optional
 from urllib.parse import quote
 
-import requests
 import frappe
 from frappe.model.document import Document
 from frappe.utils import now, getdate, cint
 
+from engineering.engineering.doctype.engineering_legals import graph_client, legal_status
+
 
 # Drive Team that will own all Engineering Legals links.
 # This must match the Drive Team "Title" exactly.
@@ -17,6 +18,9 @@ ENGINEERING_DRIVE_TEAM_TITLE = "Engineering Legals"
 
 NEW_SHAREPOINT_ROOT = "Isambane Mining"
 
+# Returned by _graph_request(missing_ok=True) for a 404 (itemNotFound).
+NOT_FOUND = object()
+
 NEW_SHAREPOINT_SITE_MAPPING = {
     "Gwab": "gwab",
     "Klipfontein": "klp",
@@ -490,30 +494,21 @@ def _get_sharepoint_settings() -> dict:
 
 
 def _get_graph_access_token(settings: dict) -> str:
-    token_url = f"https://login.microsoftonline.com/{settings['tenant_id']}/oauth2/v2.0/token"
-
-    response = requests.post(
-        token_url,
-        data={
-            "client_id": settings["client_id"],
-            "client_secret": settings["client_secret"],
-            "scope": "https://graph.microsoft.com/.default",
-            "grant_type": "client_credentials",
-        },
-        timeout=30,
-    )
-
-    if not response.ok:
-        frappe.throw(f"Graph token request failed: {response.status_code} - {response.text}")
+    return graph_client.get_access_token(settings)
 
-    return response.json()["access_token"]
 
-
-def _graph_request(method: str, url: str, token: str, **kwargs):
+def _graph_request(method: str, url: str, token: str, missing_ok: bool = False, **kwargs):
+    """missing_ok returns NOT_FOUND instead of throwing when the item (404) does not exist."""
     headers = kwargs.pop("headers", {}) or {}
     headers["Authorization"] = f"Bearer {token}"
 
-    response = requests.request(method, url, headers=headers, timeout=60, **kwargs)
+    response = graph_client.get_session().request(method, url, headers=headers, timeout=60, **kwargs)
+
+    if response.status_code == 401:
+        # Cached token was revoked or expired early.
+        token = graph_client.get_access_token(_get_sharepoint_settings(), force_refresh=True)
+        headers["Authorization"] = f"Bearer {token}"
+        response = graph_client.get_session().request(method, url, headers=headers, timeout=60, **kwargs)
 
     if not response.ok:
 
@@ -528,6 +523,9 @@ def _graph_request(method: str, url: str, token: str, **kwargs):
                     "text": response.text,
                 }
 
+        if response.status_code == 404 and missing_ok:
+            return NOT_FOUND
+
         frappe.throw(f"Graph request failed: {response.status_code} - {response.text}")
 
     if response.text:
@@ -539,26 +537,11 @@ def _graph_request(method: str, url: str, token: str, **kwargs):
 
 
 def _get_sharepoint_site_id(settings: dict, token: str) -> str:
-    site_path = settings["site_path"].lstrip("/")
-    url = f"https://graph.microsoft.com/v1.0/sites/{settings['hostname']}:/{site_path}"
-    data = _graph_request("GET", url, token)
-    return data["id"]
+    return graph_client.get_site(settings)["id"]
 
 
 def _get_sharepoint_drive_id(settings: dict, site_id: str, token: str) -> str:
-    url = f"https://graph.microsoft.com/v1.0/sites/{site_id}/drives"
-    data = _graph_request("GET", url, token)
-
-    target_name = (settings["drive_name"] or "").strip().lower()
-
-    for row in data.get("value", []):
-        if (row.get("name") or "").strip().lower() == target_name:
-            return row["id"]
-
-    available = ", ".join([row.get("name") or "" for row in data.get("value", [])])
-    frappe.throw(
-        f"SharePoint document library '{settings['drive_name']}' not found. Available: {available}"
-    )
+    return graph_client.get_drive(settings)["id"]
 
 
 def _get_sharepoint_folder_parts(doc: Document, settings: dict) -> list[str]:
@@ -617,36 +600,45 @@ def _get_new_sharepoint_folder_parts(doc: Document) -> Optional[list[str]]:
     ]
 
 def _ensure_sharepoint_folder(drive_id: str, folder_parts: list[str], token: str):
-    parent_item_id = "root"
-
-    for folder_name in folder_parts:
-        encoded_name = quote(folder_name)
-        lookup_url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/items/{parent_item_id}:/{encoded_name}"
+    return graph_client.ensure_folder_path(drive_id, folder_parts, _get_sharepoint_settings())
 
-        response = requests.get(
-            lookup_url,
-            headers={"Authorization": f"Bearer {token}"},
-            timeout=30,
-        )
 
-        if response.status_code == 200:
-            parent_item_id = response.json()["id"]
-            continue
+def _upload_sharepoint_file(
+    drive_id: str,
+    folder_parts: list[str],
+    encoded_filename: str,
+    data: bytes,
+    mime_type: str,
+    token: str,
+):
+    parent_item_id = _ensure_sharepoint_folder(drive_id, folder_parts, token)
 
-        if response.status_code != 404:
-            frappe.throw(f"Graph folder lookup failed: {response.status_code} - {response.text}")
+    result = _graph_request(
+        "PUT",
+        f"https://graph.microsoft.com/v1.0/drives/{drive_id}"
+        f"/items/{parent_item_id}:/{encoded_filename}:/content",
+        token,
+        missing_ok=True,
+        data=data,
+        headers={"Content-Type": mime_type},
+    )
 
-        create_url = f"https://graph.microsoft.com/v1.0/drives/{drive_id}/items/{parent_item_id}/children"
-        payload = {
-            "name": folder_name,
-            "folder": {},
-            "@microsoft.graph.conflictBehavior": "replace",
-        }
-        created = _graph_request("POST", create_url, token, json=payload)
-        parent_item_id = created["id"]
+    if result is not NOT_FOUND:
+        return result
 
-    return parent_item_id
+    # itemNotFound: the cached folder id points at a folder that was moved
+    # or deleted in SharePoint; resolve the path again and retry once.
+    graph_client.forget_folder(drive_id, folder_parts)
+    parent_item_id = _ensure_sharepoint_folder(drive_id, folder_parts, token)
 
+    return _graph_request(
+        "PUT",
+        f"https://graph.microsoft.com/v1.0/drives/{drive_id}"
+        f"/items/{parent_item_id}:/{encoded_filename}:/content",
+        token,
+        data=data,
+        headers={"Content-Type": mime_type},
+    )
 
 def upload_engineering_legals_to_sharepoint(doc: Document, source_file_doc: Optional[Document] = None):
     file_doc = source_file_doc
@@ -688,7 +680,6 @@ def upload_engineering_legals_to_sharepoint(doc: Document, source_file_doc: Opti
     drive_id = _get_sharepoint_drive_id(settings, site_id, token)
 
     folder_parts = _get_sharepoint_folder_parts(doc, settings)
-    parent_item_id = _ensure_sharepoint_folder(drive_id, folder_parts, token)
 
     raw_date = getattr(doc, "start_date", None)
     if raw_date:
@@ -702,45 +693,17 @@ def upload_engineering_legals_to_sharepoint(doc: Document, source_file_doc: Opti
         f"{(doc.fleet_number or 'No Fleet').strip()}-{(doc.sections or 'Unclassified').strip()}-{date_part}{original_ext}"
     )
     encoded_filename = quote(filename)
-
-    upload_url = (
-        f"https://graph.microsoft.com/v1.0/drives/{drive_id}"
-        f"/items/{parent_item_id}:/{encoded_filename}:/content"
-    )
     mime_type = mimetypes.guess_type(filename)[0] or "application/octet-stream"
 
     # Upload to the existing legacy SharePoint folder.
-    _graph_request(
-        "PUT",
-        upload_url,
-        token,
-        data=data,
-        headers={"Content-Type": mime_type},
-    )
+    _upload_sharepoint_file(drive_id, folder_parts, encoded_filename, data, mime_type, token)
 
     # Also upload Gwab and Klipfontein records into the new monthly
     # Isambane Mining folder structure.
     new_folder_parts = _get_new_sharepoint_folder_parts(doc)
 
     if new_folder_parts:
-        new_parent_item_id = _ensure_sharepoint_folder(
-            drive_id,
-            new_folder_parts,
-            token,
-        )
-
-        new_upload_url = (
-            f"https://graph.microsoft.com/v1.0/drives/{drive_id}"
-            f"/items/{new_parent_item_id}:/{encoded_filename}:/content"
-        )
-
-        _graph_request(
-            "PUT",
-            new_upload_url,
-            token,
-            data=data,
-            headers={"Content-Type": mime_type},
-        )
+        _upload_sharepoint_file(drive_id, new_folder_parts, encoded_filename, data, mime_type, token)
 
 
 
@@ -1064,6 +1027,11 @@ def sync_engineering_legals_from_file(file_doc, method=None):
         )
 
 def sync_engineering_legals_from_doc(doc, method=None):
+    # Compliance status for the legal's fleet / section, attached or not.
+    # on_update also fires on insert, so after_insert leaves it to that.
+    if method != "after_insert":
+        legal_status.on_legal_change(doc, method)
+
     try:
         if not getattr(doc, "attach_paper", None):
             return
@@ -1179,4 +1147,4 @@ def on_update(doc, method=None):
     sync_engineering_legals_from_doc(doc, method)
 
 def on_trash(doc, method=None):
-    pass
+    legal_status.on_legal_change(doc, "on_trash")
@@ -0,0 +1,266 @@
+# graph_client.py
+# Shared Microsoft Graph access for the Engineering Legals SharePoint modules.
+#
+#   - one pooled requests.Session per worker process
+#   - the client-credentials token is cached in Redis until shortly before
+#     it expires, so every background job on the bench reuses it
+#   - site / document library lookups and resolved folder path -> item id
+#     mappings are cached in Redis as well
+#
+# A nightly backlog of uploads therefore costs one token request and a few
+# lookups instead of a token, a site and a drive lookup per document.
+
+from __future__ import annotations
+
+import time
+from urllib.parse import quote
+
+import frappe
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+
+CACHE_PREFIX = "engineering_legals_graph"
+
+# Refresh this long before Graph says the token expires.
+TOKEN_EXPIRY_MARGIN_SECONDS = 300
+
+# Site and drive ids only change if the library is recreated.
+LOOKUP_TTL_SECONDS = 24 * 60 * 60
+
+# Folder ids are dropped on a 404 (see forget_folder), so they can live long.
+FOLDER_TTL_SECONDS = 7 * 24 * 60 * 60
+
+POOL_SIZE = 16
+
+_session = None
+_tokens = {}
+
+
+def get_session() -> requests.Session:
+    """Pooled HTTP session shared by every Graph call in this process."""
+    global _session
+
+    if _session is None:
+        retry = Retry(
+            total=3,
+            backoff_factor=1,
+            status_forcelist=(429, 502, 503, 504),
+            # Only idempotent calls are retried; folder creation is not.
+            allowed_methods=frozenset({"GET", "PUT", "DELETE"}),
+            respect_retry_after_header=True,
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=4,
+            pool_maxsize=POOL_SIZE,
+            max_retries=retry,
+        )
+
+        session = requests.Session()
+        session.mount("https://", adapter)
+        _session = session
+
+    return _session
+
+
+def _cache_key(*parts) -> str:
+    return ":".join([CACHE_PREFIX, *[str(part or "") for part in parts]])
+
+
+def _token_key(settings: dict) -> str:
+    return _cache_key("token", settings["tenant_id"], settings["client_id"])
+
+
+def get_access_token(settings: dict, force_refresh: bool = False) -> str:
+    """Client-credentials token, reused until shortly before it expires."""
+    key = _token_key(settings)
+
+    if not force_refresh:
+        token, expires_at = _tokens.get(key) or (None, 0)
+        if token and expires_at > time.time():
+            return token
+
+        cached = frappe.cache().get_value(key)
+        if cached and cached.get("expires_at", 0) > time.time():
+            _tokens[key] = (cached["access_token"], cached["expires_at"])
+            return cached["access_token"]
+
+    response = get_session().post(
+        f"https://login.microsoftonline.com/{settings['tenant_id']}/oauth2/v2.0/token",
+        data={
+            "client_id": settings["client_id"],
+            "client_secret": settings["client_secret"],
+            "scope": "https://graph.microsoft.com/.default",
+            "grant_type": "client_credentials",
+        },
+        timeout=30,
+    )
+
+    if not response.ok:
+        frappe.throw(f"Graph token request failed: {response.status_code} - {response.text}")
+
+    data = response.json()
+    token = data.get("access_token")
+
+    if not token:
+        frappe.throw("Microsoft Graph did not return an access token.")
+
+    lifetime = max(int(data.get("expires_in") or 3600) - TOKEN_EXPIRY_MARGIN_SECONDS, 60)
+    expires_at = time.time() + lifetime
+
+    _tokens[key] = (token, expires_at)
+    frappe.cache().set_value(
+        key,
+        {"access_token": token, "expires_at": expires_at},
+        expires_in_sec=lifetime,
+    )
+
+    return token
+
+
+def request(method: str, url: str, settings: dict, timeout: int = 60, **kwargs) -> requests.Response:
+    """
+    Authorised Graph request on the pooled session.
+
+    A 401 refreshes the cached token once and repeats the call. The response
+    is returned as-is; callers decide which status codes are errors.
+    """
+    headers = dict(kwargs.pop("headers", None) or {})
+
+    headers["Authorization"] = f"Bearer {get_access_token(settings)}"
+    response = get_session().request(method, url, headers=headers, timeout=timeout, **kwargs)
+
+    if response.status_code == 401:
+        headers["Authorization"] = f"Bearer {get_access_token(settings, force_refresh=True)}"
+        response = get_session().request(method, url, headers=headers, timeout=timeout, **kwargs)
+
+    return response
+
+
+def get_site(settings: dict) -> dict:
+    """SharePoint site ({id, name, webUrl}) for hostname + site_path."""
+    site_path = (settings["site_path"] or "").strip("/")
+    key = _cache_key("site", settings["hostname"], site_path)
+
+    site = frappe.cache().get_value(key)
+    if site:
+        return site
+
+    response = request("GET", f"{GRAPH_BASE_URL}/sites/{settings['hostname']}:/{site_path}", settings)
+
+    if not response.ok:
+        frappe.throw(f"Graph site lookup failed: {response.status_code} - {response.text}")
+
+    data = response.json()
+    site = {
+        "id": data["id"],
+        "name": data.get("name"),
+        "webUrl": data.get("webUrl"),
+    }
+
+    frappe.cache().set_value(key, site, expires_in_sec=LOOKUP_TTL_SECONDS)
+    return site
+
+
+def get_drive(settings: dict) -> dict:
+    """Document library ({id, name, webUrl}) named settings["drive_name"]."""
+    site = get_site(settings)
+    target_name = (settings["drive_name"] or "").strip().lower()
+    key = _cache_key("drive", site["id"], target_name)
+
+    drive = frappe.cache().get_value(key)
+    if drive:
+        return drive
+
+    response = request("GET", f"{GRAPH_BASE_URL}/sites/{site['id']}/drives", settings)
+
+    if not response.ok:
+        frappe.throw(f"Graph drive lookup failed: {response.status_code} - {response.text}")
+
+    drives = response.json().get("value", [])
+
+    for row in drives:
+        if (row.get("name") or "").strip().lower() == target_name:
+            drive = {
+                "id": row["id"],
+                "name": row.get("name"),
+                "webUrl": row.get("webUrl"),
+            }
+            frappe.cache().set_value(key, drive, expires_in_sec=LOOKUP_TTL_SECONDS)
+            return drive
+
+    available = ", ".join([row.get("name") or "" for row in drives])
+    frappe.throw(
+        f"SharePoint document library '{settings['drive_name']}' not found. Available: {available}"
+    )
+
+
+def _folder_key(drive_id: str, path: str) -> str:
+    return _cache_key("folder", drive_id, path.strip("/").lower())
+
+
+def get_cached_folder_id(drive_id: str, path: str):
+    return frappe.cache().get_value(_folder_key(drive_id, path))
+
+
+def remember_folder(drive_id: str, path: str, item_id: str):
+    frappe.cache().set_value(_folder_key(drive_id, path), item_id, expires_in_sec=FOLDER_TTL_SECONDS)
+
+
+def forget_folder(drive_id: str, folder_parts: list[str]):
+    """Drop a cached folder and its ancestors, e.g. after a 404 on its id."""
+    for depth in range(1, len(folder_parts) + 1):
+        frappe.cache().delete_value(_folder_key(drive_id, "/".join(folder_parts[:depth])))
+
+
+def ensure_folder_path(drive_id: str, folder_parts: list[str], settings: dict) -> str:
+    """
+    Item id of the folder at folder_parts, creating missing segments.
+
+    Starts from the deepest cached ancestor, so a warm cache costs no
+    Graph calls at all.
+    """
+    parent_item_id = "root"
+    start = 0
+
+    for depth in range(len(folder_parts), 0, -1):
+        cached = get_cached_folder_id(drive_id, "/".join(folder_parts[:depth]))
+        if cached:
+            parent_item_id = cached
+            start = depth
+            break
+
+    for depth in range(start, len(folder_parts)):
+        folder_name = folder_parts[depth]
+        lookup_url = f"{GRAPH_BASE_URL}/drives/{drive_id}/items/{parent_item_id}:/{quote(folder_name)}"
+
+        response = request("GET", lookup_url, settings, timeout=30)
+
+        if response.status_code == 200:
+            parent_item_id = response.json()["id"]
+        elif response.status_code == 404:
+            response = request(
+                "POST",
+                f"{GRAPH_BASE_URL}/drives/{drive_id}/items/{parent_item_id}/children",
+                settings,
+                json={
+                    "name": folder_name,
+                    "folder": {},
+                    "@microsoft.graph.conflictBehavior": "replace",
+                },
+            )
+
+            if not response.ok:
+                frappe.throw(f"Graph folder create failed: {response.status_code} - {response.text}")
+
+            parent_item_id = response.json()["id"]
+        else:
+            frappe.throw(f"Graph folder lookup failed: {response.status_code} - {response.text}")
+
+        remember_folder(drive_id, "/".join(folder_parts[: depth + 1]), parent_item_id)
+
+    return parent_item_id
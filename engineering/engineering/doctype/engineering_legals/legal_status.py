@@ -0,0 +1,379 @@
+# legal_status.py
+# Compliance status per (fleet_number, section) for Engineering Legals.
+#
+# Engineering Legals Status holds one row per fleet and section: the latest
+# legal (start_date desc, expiry_date desc, modified desc), the one before
+# it, the "recently done" flag and the expiry bucket. The rows for a legal's
+# fleet / section are rebuilt from its history whenever the legal is saved
+# or deleted (sync_engineering_legals_from_doc / on_trash), so the legals
+# report, its drill-downs, the monthly summary and the supplier portal read
+# one indexed row per cell instead of regrouping every legal.
+#
+# The bucket depends on the day it is worked out for. refresh_status_buckets
+# moves every row on to today each night; status_bucket() works it out on
+# read for a row that has not been moved on yet.
+
+from collections import defaultdict
+
+import frappe
+from frappe.utils import add_days, getdate, now, today
+
+
+LEGALS_DOCTYPE = "Engineering Legals"
+STATUS_DOCTYPE = "Engineering Legals Status"
+STATUS_WRITE_CHUNK_SIZE = 500
+
+RECENTLY_DONE_EARLY_DAYS = 10
+RECENTLY_DONE_LATE_DAYS = 15
+
+# (upper bound of days left, bucket); below zero is Overdue.
+EXPIRY_BUCKETS = (
+    (7, "0-7 days"),
+    (14, "8-14 days"),
+    (21, "15-21 days"),
+    (28, "22-28 days"),
+)
+
+STATUS_FIELDS = (
+    "site",
+    "latest_legal",
+    "latest_start_date",
+    "latest_expiry_date",
+    "latest_saved_on",
+    "previous_legal",
+    "previous_start_date",
+    "previous_expiry_date",
+    "recently_done",
+    "expiry_bucket",
+    "bucket_date",
+)
+
+
+def expiry_bucket(expiry_date, as_at):
+    if not expiry_date:
+        return ""
+
+    days_left = (getdate(expiry_date) - getdate(as_at)).days
+
+    if days_left < 0:
+        return "Overdue"
+
+    for upper, bucket in EXPIRY_BUCKETS:
+        if days_left <= upper:
+            return bucket
+
+    return ""
+
+
+def is_recently_done(previous_expiry_date, latest_start_date):
+    if not previous_expiry_date or not latest_start_date:
+        return False
+
+    previous_expiry_date = getdate(previous_expiry_date)
+    latest_start_date = getdate(latest_start_date)
+
+    window_start = add_days(previous_expiry_date, -RECENTLY_DONE_EARLY_DAYS)
+    window_end = add_days(previous_expiry_date, RECENTLY_DONE_LATE_DAYS)
+
+    return window_start <= latest_start_date <= window_end
+
+
+def status_values(latest_doc, previous_doc=None, as_at=None):
+    """Status row values for a fleet / section from its two newest legals."""
+    as_at = getdate(as_at or today())
+    previous_doc = previous_doc or {}
+
+    latest_start = latest_doc.get("start_date")
+    latest_expiry = latest_doc.get("expiry_date")
+    previous_expiry = previous_doc.get("expiry_date")
+
+    return frappe._dict(
+        site=latest_doc.get("site"),
+        latest_legal=latest_doc.get("name"),
+        latest_start_date=latest_start,
+        latest_expiry_date=latest_expiry,
+        latest_saved_on=latest_start or (
+            getdate(latest_doc.get("creation")) if latest_doc.get("creation") else None
+        ),
+        previous_legal=previous_doc.get("name"),
+        previous_start_date=previous_doc.get("start_date"),
+        previous_expiry_date=previous_expiry,
+        recently_done=1 if is_recently_done(previous_expiry, latest_start) else 0,
+        expiry_bucket=expiry_bucket(latest_expiry, as_at),
+        bucket_date=as_at,
+    )
+
+
+def status_bucket(row, as_at):
+    """The row's expiry bucket as at as_at (stored value when it is current)."""
+    as_at = getdate(as_at)
+
+    if row.get("bucket_date") and getdate(row.get("bucket_date")) == as_at:
+        return row.get("expiry_bucket") or ""
+
+    return expiry_bucket(row.get("latest_expiry_date"), as_at)
+
+
+def combined_status(row, as_at):
+    """Status text of a status row, e.g. "✅ Recently done | 0-7 days"."""
+    statuses = []
+
+    is_recent = bool(row.get("recently_done"))
+    bucket = status_bucket(row, as_at)
+
+    if is_recent:
+        statuses.append("✅ Recently done")
+
+    if bucket and not (is_recent and bucket == "Overdue"):
+        if bucket == "Overdue":
+            statuses.append("❌ Overdue")
+        else:
+            statuses.append(bucket)
+
+    return " | ".join(statuses) if statuses else "-"
+
+
+def status_key(fleet_number, section):
+    return f"{fleet_number}::{section}"
+
+
+def _clean(value):
+    return (value or "").strip()
+
+
+def _legal_history(fleet_numbers=None, exclude_legal=None):
+    conditions = ["docstatus < 2", "IFNULL(fleet_number, '') != ''"]
+    values = {}
+
+    if fleet_numbers is not None:
+        # Legals may be stored with stray whitespace around the fleet number.
+        conditions.append("TRIM(fleet_number) IN %(fleet_numbers)s")
+        values["fleet_numbers"] = tuple(fleet_numbers)
+
+    if exclude_legal:
+        conditions.append("name != %(exclude_legal)s")
+        values["exclude_legal"] = exclude_legal
+
+    return frappe.db.sql(
+        f"""
+        SELECT
+            name,
+            site,
+            sections,
+            fleet_number,
+            start_date,
+            expiry_date,
+            creation
+        FROM `tab{LEGALS_DOCTYPE}`
+        WHERE {" AND ".join(conditions)}
+        ORDER BY
+            TRIM(fleet_number) ASC,
+            TRIM(sections) ASC,
+            start_date DESC,
+            expiry_date DESC,
+            modified DESC
+        """,
+        values,
+        as_dict=True,
+    )
+
+
+def refresh_legal_status(keys=None, exclude_legal=None):
+    """
+    Rebuild Engineering Legals Status for keys, an iterable of
+    (fleet_number, section) (every fleet and section when None). Keys and
+    legals are matched with surrounding whitespace stripped.
+
+    exclude_legal leaves out a legal that is being deleted. Returns the
+    number of status rows written.
+    """
+    if keys is not None:
+        keys = {(_clean(fleet), _clean(section)) for fleet, section in keys}
+        keys = {key for key in keys if all(key)}
+
+        if not keys:
+            return 0
+
+    history = defaultdict(list)
+
+    for row in _legal_history(
+        fleet_numbers=sorted({fleet for fleet, _ in keys}) if keys is not None else None,
+        exclude_legal=exclude_legal,
+    ):
+        key = (_clean(row.fleet_number), _clean(row.sections))
+
+        if keys is None or key in keys:
+            history[key].append(row)
+
+    if keys is None:
+        frappe.db.delete(STATUS_DOCTYPE)
+    else:
+        frappe.db.delete(
+            STATUS_DOCTYPE,
+            {"name": ["in", [status_key(*key) for key in keys]]},
+        )
+
+    if not history:
+        return 0
+
+    timestamp = now()
+    user = frappe.session.user
+    as_at = getdate(today())
+    fields = [
+        "name",
+        "creation",
+        "modified",
+        "owner",
+        "modified_by",
+        "status_key",
+        "fleet_number",
+        "section",
+        *STATUS_FIELDS,
+        "refreshed_on",
+    ]
+
+    values = []
+    for (fleet_number, section), docs in history.items():
+        row = status_values(docs[0], docs[1] if len(docs) > 1 else None, as_at)
+        name = status_key(fleet_number, section)
+
+        values.append((
+            name,
+            timestamp,
+            timestamp,
+            user,
+            user,
+            name,
+            fleet_number,
+            section,
+            *(row.get(field) for field in STATUS_FIELDS),
+            timestamp,
+        ))
+
+    frappe.db.bulk_insert(
+        STATUS_DOCTYPE,
+        fields,
+        values,
+        chunk_size=STATUS_WRITE_CHUNK_SIZE,
+    )
+
+    return len(values)
+
+
+def _legal_keys(doc):
+    """The legal's fleet / section now plus those the status table holds for it."""
+    keys = {(doc.get("fleet_number"), doc.get("sections"))}
+
+    # Fleet or section edited since the legal was last saved.
+    keys.update(
+        (row.fleet_number, row.section)
+        for row in frappe.get_all(
+            STATUS_DOCTYPE,
+            or_filters={"latest_legal": doc.name, "previous_legal": doc.name},
+            fields=["fleet_number", "section"],
+        )
+    )
+
+    return keys
+
+
+def on_legal_change(doc, method=None):
+    """Engineering Legals after_insert / on_update / on_trash."""
+    try:
+        refresh_legal_status(
+            _legal_keys(doc),
+            exclude_legal=doc.name if method == "on_trash" else None,
+        )
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Engineering Legals Status - Refresh")
+
+
+def refresh_status_buckets():
+    """Nightly: move every status row's expiry bucket on to today."""
+    as_at = getdate(today())
+
+    rows = frappe.get_all(
+        STATUS_DOCTYPE,
+        or_filters=[
+            ["bucket_date", "!=", as_at],
+            ["bucket_date", "is", "not set"],
+        ],
+        fields=["name", "latest_expiry_date", "expiry_bucket"],
+        limit_page_length=0,
+    )
+
+    updates = {
+        row.name: {
+            "expiry_bucket": expiry_bucket(row.latest_expiry_date, as_at),
+            "bucket_date": as_at,
+        }
+        for row in rows
+    }
+
+    if updates:
+        frappe.db.bulk_update(STATUS_DOCTYPE, updates, chunk_size=STATUS_WRITE_CHUNK_SIZE)
+
+    return len(updates)
+
+
+def get_status_rows(
+    fleet_numbers=None,
+    sections=None,
+    from_expiry_date=None,
+    to_expiry_date=None,
+    exclude_sections=None,
+):
+    """
+    Status rows with the latest legal's attach_paper and modified, one per
+    fleet and section. fleet_numbers / sections limit the rows when given.
+    """
+    conditions = []
+    values = {}
+
+    if fleet_numbers is not None:
+        if not fleet_numbers:
+            return []
+        conditions.append("s.fleet_number IN %(fleet_numbers)s")
+        values["fleet_numbers"] = tuple(fleet_numbers)
+
+    if sections:
+        conditions.append("s.section IN %(sections)s")
+        values["sections"] = tuple(sections)
+
+    if exclude_sections:
+        conditions.append("s.section NOT IN %(exclude_sections)s")
+        values["exclude_sections"] = tuple(exclude_sections)
+
+    if from_expiry_date:
+        conditions.append("s.latest_expiry_date >= %(from_expiry_date)s")
+        values["from_expiry_date"] = getdate(from_expiry_date)
+
+    if to_expiry_date:
+        conditions.append("s.latest_expiry_date <= %(to_expiry_date)s")
+        values["to_expiry_date"] = getdate(to_expiry_date)
+
+    where_sql = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+
+    return frappe.db.sql(
+        f"""
+        SELECT
+            s.fleet_number,
+            s.section,
+            {", ".join(f"s.{field}" for field in STATUS_FIELDS)},
+            el.attach_paper,
+            el.modified
+        FROM `tab{STATUS_DOCTYPE}` s
+        LEFT JOIN `tab{LEGALS_DOCTYPE}` el ON el.name = s.latest_legal
+        {where_sql}
+        ORDER BY s.fleet_number ASC, s.section ASC
+        """,
+        values,
+        as_dict=True,
+    )
+
+
+@frappe.whitelist()
+def rebuild_legal_status():
+    """Rebuild Engineering Legals Status from every legal."""
+    frappe.only_for("System Manager")
+    return refresh_legal_status()
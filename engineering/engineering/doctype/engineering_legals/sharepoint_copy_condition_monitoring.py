@@ -1,11 +1,14 @@
 from __future__ import annotations
 
-import time
 from datetime import datetime
 from urllib.parse import quote
 
 import frappe
-import requests
+
+from engineering.engineering.doctype.engineering_legals import (
+    graph_client,
+    sharepoint_copy_engine,
+)
 
 
 GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
@@ -92,33 +95,21 @@ class SharePointClient:
         self.refresh_token()
         self.load_site_and_drive()
 
-    def refresh_token(self):
-        response = requests.post(
-            (
-                "https://login.microsoftonline.com/"
-                f"{self.config['tenant_id']}/oauth2/v2.0/token"
-            ),
-            data={
-                "client_id": self.config["client_id"],
-                "client_secret": self.config["client_secret"],
-                "scope": "https://graph.microsoft.com/.default",
-                "grant_type": "client_credentials",
-            },
-            timeout=30,
+    def refresh_token(self, force_refresh=False):
+        access_token = graph_client.get_access_token(
+            self.config,
+            force_refresh=force_refresh,
         )
 
-        response.raise_for_status()
-
         self.headers = {
-            "Authorization": (
-                "Bearer "
-                + response.json()["access_token"]
-            ),
+            "Authorization": "Bearer " + access_token,
             "Content-Type": "application/json",
         }
 
     def request(self, method, url, **kwargs):
-        response = requests.request(
+        session = graph_client.get_session()
+
+        response = session.request(
             method,
             url,
             headers=self.headers,
@@ -127,9 +118,9 @@ class SharePointClient:
         )
 
         if response.status_code == 401:
-            self.refresh_token()
+            self.refresh_token(force_refresh=True)
 
-            response = requests.request(
+            response = session.request(
                 method,
                 url,
                 headers=self.headers,
@@ -140,40 +131,9 @@ class SharePointClient:
         return response
 
     def load_site_and_drive(self):
-        response = self.request(
-            "GET",
-            (
-                f"{GRAPH_BASE_URL}/sites/"
-                f"{self.config['hostname']}:/{self.config['site_path']}"
-            ),
-        )
-
-        response.raise_for_status()
-        self.site = response.json()
-
-        response = self.request(
-            "GET",
-            f"{GRAPH_BASE_URL}/sites/{self.site['id']}/drives",
-        )
-
-        response.raise_for_status()
-
-        for drive in response.json().get("value", []):
-            drive_name = (drive.get("name") or "").strip()
-
-            if (
-                drive_name.lower()
-                == self.config["drive_name"].lower()
-            ):
-                self.drive = drive
-                self.drive_id = drive["id"]
-                break
-
-        if not self.drive:
-            frappe.throw(
-                "SharePoint document library not found: "
-                + self.config["drive_name"]
-            )
+        self.site = graph_client.get_site(self.config)
+        self.drive = graph_client.get_drive(self.config)
+        self.drive_id = self.drive["id"]
 
     def get_item_by_path(self, path):
         encoded_path = quote(path.strip("/"), safe="/")
@@ -385,130 +345,10 @@ def _ensure_destination_tree(
         )
 
 
-def _copy_folder_contents_recursive(
-    client,
-    source_folder,
-    destination_path,
-    dry_run,
-    results,
-):
-    destination_folder = client.get_item_by_path(
-        destination_path
-    )
-
-    if not destination_folder:
-        frappe.throw(
-            "Destination folder not found: "
-            + destination_path
-        )
-
-    children = client.list_children(
-        source_folder["id"]
-    )
-
-    for child in children:
-        child_name = child.get("name") or "Unnamed"
-
-        destination_item_path = (
-            destination_path.rstrip("/")
-            + "/"
-            + child_name
-        )
-
-        existing = client.get_item_by_path(
-            destination_item_path
-        )
-
-        source_web_url = child.get("webUrl")
-        destination_web_url = (
-            destination_folder.get("webUrl")
-        )
-
-        if existing:
-            results["skipped_existing"].append({
-                "name": child_name,
-                "source": source_web_url,
-                "destination": destination_item_path,
-            })
-
-            print(
-                "SKIP EXISTS:",
-                destination_item_path,
-            )
-            continue
-
-        if child.get("folder"):
-            if dry_run:
-                results["planned"].append({
-                    "type": "folder",
-                    "source": source_web_url,
-                    "destination": destination_item_path,
-                })
-
-                print(
-                    "PLAN FOLDER COPY:",
-                    destination_item_path,
-                )
-                continue
-
-            monitor_url = client.copy_item(
-                child["id"],
-                destination_folder["id"],
-            )
-
-            results["copied"].append({
-                "type": "folder",
-                "name": child_name,
-                "source": source_web_url,
-                "destination": destination_web_url,
-                "monitor_url": monitor_url,
-            })
-
-            print(
-                "COPY QUEUED:",
-                destination_item_path,
-            )
-
-            time.sleep(0.3)
-            continue
-
-        if dry_run:
-            results["planned"].append({
-                "type": "file",
-                "source": source_web_url,
-                "destination": destination_item_path,
-            })
-
-            print(
-                "PLAN FILE COPY:",
-                destination_item_path,
-            )
-            continue
-
-        monitor_url = client.copy_item(
-            child["id"],
-            destination_folder["id"],
-        )
-
-        results["copied"].append({
-            "type": "file",
-            "name": child_name,
-            "source": source_web_url,
-            "destination": destination_web_url,
-            "monitor_url": monitor_url,
-        })
-
-        print(
-            "COPY QUEUED:",
-            destination_item_path,
-        )
-
-        time.sleep(0.3)
-
-
 def copy_old_documents_to_new(
     year=2026,
     dry_run=True,
+    resume=True,
 ):
     """
     Copy documents from the old Engineering Legals paths
@@ -533,6 +373,9 @@ def copy_old_documents_to_new(
             year=2026,
             dry_run=False,
         )
+
+    Copies already queued by an earlier run for the same year are
+    skipped unless resume=False.
     """
 
     if isinstance(dry_run, str):
@@ -543,6 +386,14 @@ def copy_old_documents_to_new(
             "y",
         )
 
+    if isinstance(resume, str):
+        resume = resume.lower() in (
+            "1",
+            "true",
+            "yes",
+            "y",
+        )
+
     year = int(year)
 
     client = SharePointClient(
@@ -552,13 +403,10 @@ def copy_old_documents_to_new(
     results = {
         "year": year,
         "dry_run": dry_run,
-        "source_folders_found": [],
-        "source_folders_missing": [],
-        "planned": [],
-        "copied": [],
-        "skipped_existing": [],
     }
 
+    pairs = []
+
     for month_number in range(1, 8):
         old_month_name = _old_month_folder_name(
             year,
@@ -574,25 +422,6 @@ def copy_old_documents_to_new(
                     f"{old_month_name}"
                 )
 
-                source_folder = client.get_item_by_path(
-                    old_path
-                )
-
-                if not source_folder:
-                    results[
-                        "source_folders_missing"
-                    ].append(old_path)
-
-                    print(
-                        "SOURCE MISSING:",
-                        old_path,
-                    )
-                    continue
-
-                results[
-                    "source_folders_found"
-                ].append(old_path)
-
                 destination_path = _destination_path(
                     year=year,
                     month_number=month_number,
@@ -600,25 +429,27 @@ def copy_old_documents_to_new(
                     old_section=old_section,
                 )
 
-                print()
-                print("SOURCE      :", old_path)
-                print("DESTINATION :", destination_path)
-
-                _ensure_destination_tree(
-                    client=client,
-                    year=year,
-                    month_number=month_number,
-                    old_site=old_site,
-                    old_section=old_section,
-                )
-
-                _copy_folder_contents_recursive(
-                    client=client,
-                    source_folder=source_folder,
-                    destination_path=destination_path,
-                    dry_run=dry_run,
-                    results=results,
-                )
+                pairs.append((
+                    old_path,
+                    destination_path,
+                    {
+                        "client": client,
+                        "year": year,
+                        "month_number": month_number,
+                        "old_site": old_site,
+                        "old_section": old_section,
+                    },
+                ))
+
+    sharepoint_copy_engine.copy_folder_pairs(
+        client=client,
+        pairs=pairs,
+        dry_run=dry_run,
+        results=results,
+        prepare_destination=_ensure_destination_tree,
+        progress_key=f"condition_monitoring:{year}",
+        resume=resume,
+    )
 
     results["source_found_count"] = len(
         results["source_folders_found"]
@@ -640,6 +471,14 @@ def copy_old_documents_to_new(
         results["skipped_existing"]
     )
 
+    results["resumed_count"] = len(
+        results["resumed"]
+    )
+
+    results["failed_count"] = len(
+        results["failed"]
+    )
+
     print()
     print("=== MIGRATION SUMMARY ===")
     print("Dry run:", results["dry_run"])
@@ -663,6 +502,14 @@ def copy_old_documents_to_new(
         "Skipped existing:",
         results["skipped_existing_count"],
     )
+    print(
+        "Already queued (resumed):",
+        results["resumed_count"],
+    )
+    print(
+        "Failed:",
+        results["failed_count"],
+    )
     print("Old source folders were not changed.")
 
     return results
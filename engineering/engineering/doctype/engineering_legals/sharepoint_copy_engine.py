@@ -0,0 +1,529 @@
+# sharepoint_copy_engine.py
+# Bulk folder-to-folder copy used by the old -> new SharePoint migrations
+# (sharepoint_copy_old_to_new, sharepoint_copy_condition_monitoring).
+#
+#   1. list: source folders are found with one $expand=children call per
+#      grandparent (Site/Year); each existing source folder is then listed
+#      once, and each destination folder is read with its children expanded
+#   2. diff: source children are compared with destination children in
+#      memory (names are case-insensitive in SharePoint)
+#   3. copy: copy requests go out as Graph $batch requests of up to
+#      BATCH_SIZE, through a bounded thread pool; throttled sub-requests
+#      are retried in the next round
+#
+# Queued copies are recorded in Redis per progress key, so an interrupted
+# run can be repeated with resume=True without queueing anything twice.
+# A dry-run stops after the diff and makes no per-item calls.
+
+from __future__ import annotations
+
+import time
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import quote
+
+import frappe
+
+from engineering.engineering.doctype.engineering_legals import graph_client
+
+
+GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
+
+# Graph accepts at most 20 requests per $batch.
+BATCH_SIZE = 20
+
+MAX_WORKERS = 4
+
+MAX_ROUNDS = 5
+
+RETRY_STATUSES = (429, 503, 504)
+
+PROGRESS_PREFIX = "engineering_legals_sharepoint_copy"
+
+# Long enough for a migration to be resumed the next day.
+PROGRESS_TTL_SECONDS = 7 * 24 * 60 * 60
+
+
+def _progress_name(progress_key):
+    return f"{PROGRESS_PREFIX}:{progress_key}"
+
+
+def get_progress(progress_key):
+    """{source item id: destination path} of copies already queued."""
+    if not progress_key:
+        return {}
+
+    return {
+        (key.decode() if isinstance(key, bytes) else key): value
+        for key, value in (
+            frappe.cache().hgetall(_progress_name(progress_key)) or {}
+        ).items()
+    }
+
+
+def reset_progress(progress_key):
+    if progress_key:
+        frappe.cache().delete_value(_progress_name(progress_key))
+
+
+def _record_progress(progress_key, operations):
+    if not progress_key or not operations:
+        return
+
+    name = _progress_name(progress_key)
+
+    for operation in operations:
+        frappe.cache().hset(
+            name,
+            operation["source_id"],
+            operation["destination"],
+        )
+
+    frappe.cache().expire(
+        frappe.cache().make_key(name),
+        PROGRESS_TTL_SECONDS,
+    )
+
+
+def _get_folder_with_children(client, path):
+    """(folder, children) for a drive path, or (None, []) when missing."""
+    encoded_path = quote(path.strip("/"), safe="/")
+
+    response = client.request(
+        "GET",
+        (
+            f"{GRAPH_BASE_URL}/drives/{client.drive_id}"
+            f"/root:/{encoded_path}?$expand=children"
+        ),
+    )
+
+    if response.status_code == 404:
+        return None, []
+
+    response.raise_for_status()
+
+    folder = response.json()
+    children = folder.pop("children", None) or []
+
+    # Expanded children are capped; page the rest the normal way.
+    if folder.pop("children@odata.nextLink", None):
+        children = client.list_children(folder["id"])
+
+    return folder, children
+
+
+def _list_source_folders(client, source_paths):
+    """
+    {source path: folder item} for the paths that exist.
+
+    Paths are grouped by grandparent (e.g. Site/Year), which is listed once
+    with its children expanded, so a missing Section/Month costs no request.
+    """
+    paths_by_grandparent = {}
+
+    for path in source_paths:
+        grandparent = path.strip("/").rsplit("/", 2)[0]
+        paths_by_grandparent.setdefault(grandparent, set()).add(path)
+
+    found = {}
+
+    for grandparent, paths in paths_by_grandparent.items():
+        url = (
+            f"{GRAPH_BASE_URL}/drives/{client.drive_id}"
+            f"/root:/{quote(grandparent, safe='/')}:/children"
+            "?$top=200&$expand=children($select=id,name,folder,webUrl)"
+        )
+
+        items_by_path = {}
+        truncated_parents = set()
+
+        while url:
+            response = client.request("GET", url)
+
+            if response.status_code == 404:
+                break
+
+            response.raise_for_status()
+            data = response.json()
+
+            for parent in data.get("value", []):
+                parent_path = f"{grandparent}/{parent.get('name')}".lower()
+
+                for child in parent.get("children") or []:
+                    items_by_path[f"{parent_path}/{child['name']}".lower()] = child
+
+                if parent.get("children@odata.nextLink"):
+                    truncated_parents.add(parent_path)
+
+            url = data.get("@odata.nextLink")
+
+        for path in paths:
+            item = items_by_path.get(path.lower())
+
+            # Parents with more children than one expand returns.
+            if not item and path.rsplit("/", 1)[0].lower() in truncated_parents:
+                item = client.get_item_by_path(path)
+
+            if item and item.get("folder"):
+                found[path] = item
+
+    return found
+
+
+def _plan_operations(
+    client,
+    pairs,
+    source_folders,
+    prepare_destination,
+    dry_run,
+    progress,
+    results,
+):
+    """Diff each source folder against its destination in memory."""
+    destination_names = {}
+    destination_folders = {}
+    operations = []
+
+    for source_path, destination_path, context in pairs:
+        source_folder = source_folders.get(source_path)
+
+        if not source_folder:
+            continue
+
+        if destination_path not in destination_folders:
+            if not dry_run and prepare_destination:
+                prepare_destination(**context)
+
+            folder, children = _get_folder_with_children(
+                client,
+                destination_path,
+            )
+
+            if not folder and not dry_run:
+                frappe.throw(
+                    "Destination folder not found: "
+                    + destination_path
+                )
+
+            destination_folders[destination_path] = folder
+            destination_names[destination_path] = {
+                (child.get("name") or "").lower()
+                for child in children
+            }
+
+        destination_folder = destination_folders[destination_path]
+        existing_names = destination_names[destination_path]
+
+        source_children = client.list_children(
+            source_folder["id"]
+        )
+
+        for child in source_children:
+            child_name = child.get("name") or "Unnamed"
+            item_type = "folder" if child.get("folder") else "file"
+
+            destination_item_path = (
+                destination_path.rstrip("/")
+                + "/"
+                + child_name
+            )
+
+            if child["id"] in progress:
+                results["resumed"].append({
+                    "name": child_name,
+                    "source": child.get("webUrl"),
+                    "destination": destination_item_path,
+                })
+                continue
+
+            if child_name.lower() in existing_names:
+                results["skipped_existing"].append({
+                    "name": child_name,
+                    "source": child.get("webUrl"),
+                    "destination": destination_item_path,
+                })
+
+                print(
+                    "SKIP EXISTS:",
+                    destination_item_path,
+                )
+                continue
+
+            # Two sections can map onto the same destination folder.
+            existing_names.add(child_name.lower())
+
+            operations.append({
+                "type": item_type,
+                "name": child_name,
+                "source_id": child["id"],
+                "source": child.get("webUrl"),
+                "destination": destination_item_path,
+                "destination_folder_id": (
+                    destination_folder["id"]
+                    if destination_folder
+                    else None
+                ),
+                "destination_web_url": (
+                    destination_folder.get("webUrl")
+                    if destination_folder
+                    else None
+                ),
+            })
+
+    return operations
+
+
+def _copy_request(drive_id, request_id, operation):
+    return {
+        "id": str(request_id),
+        "method": "POST",
+        "url": (
+            f"/drives/{drive_id}/items/{operation['source_id']}/copy"
+            "?@microsoft.graph.conflictBehavior=fail"
+        ),
+        "headers": {"Content-Type": "application/json"},
+        "body": {
+            "parentReference": {
+                "driveId": drive_id,
+                "id": operation["destination_folder_id"],
+            }
+        },
+    }
+
+
+def _post_batch(session, headers, drive_id, operations):
+    """
+    Worker: send one $batch and return [(operation, status, sub-response)].
+
+    Runs outside the request context, so it only talks HTTP.
+    """
+    payload = {
+        "requests": [
+            _copy_request(drive_id, index, operation)
+            for index, operation in enumerate(operations)
+        ]
+    }
+
+    response = session.post(
+        f"{GRAPH_BASE_URL}/$batch",
+        headers=headers,
+        json=payload,
+        timeout=120,
+    )
+
+    if not response.ok:
+        return [
+            (operation, response.status_code, {"body": response.text})
+            for operation in operations
+        ]
+
+    by_id = {
+        row.get("id"): row
+        for row in response.json().get("responses", [])
+    }
+
+    outcome = []
+    for index, operation in enumerate(operations):
+        row = by_id.get(str(index)) or {}
+        outcome.append((operation, int(row.get("status") or 0), row))
+
+    return outcome
+
+
+def _retry_after(rows):
+    delays = []
+
+    for row in rows:
+        headers = row.get("headers") or {}
+        value = headers.get("Retry-After") or headers.get("retry-after")
+
+        try:
+            delays.append(int(value))
+        except (TypeError, ValueError):
+            continue
+
+    return min(max(delays or [5]), 60)
+
+
+def _execute_operations(client, operations, progress_key, results):
+    session = graph_client.get_session()
+    pending = list(operations)
+    unauthorised = False
+
+    for _ in range(MAX_ROUNDS):
+        if not pending:
+            break
+
+        # Reuses the cached token unless Graph rejected it last round.
+        client.refresh_token(force_refresh=unauthorised)
+        unauthorised = False
+
+        headers = dict(client.headers)
+        batches = [
+            pending[index:index + BATCH_SIZE]
+            for index in range(0, len(pending), BATCH_SIZE)
+        ]
+
+        with ThreadPoolExecutor(max_workers=MAX_WORKERS) as executor:
+            outcomes = list(executor.map(
+                lambda batch: _post_batch(
+                    session,
+                    headers,
+                    client.drive_id,
+                    batch,
+                ),
+                batches,
+            ))
+
+        pending = []
+        throttled_rows = []
+
+        for outcome in outcomes:
+            queued = []
+
+            for operation, status, row in outcome:
+                if status in (200, 201, 202):
+                    queued.append(operation)
+
+                    results["copied"].append({
+                        "type": operation["type"],
+                        "name": operation["name"],
+                        "source": operation["source"],
+                        "destination": operation["destination_web_url"],
+                        "monitor_url": (row.get("headers") or {}).get("Location"),
+                    })
+
+                    print(
+                        "COPY QUEUED:",
+                        operation["destination"],
+                    )
+                    continue
+
+                if status == 409:
+                    results["skipped_existing"].append({
+                        "name": operation["name"],
+                        "source": operation["source"],
+                        "destination": operation["destination"],
+                    })
+                    continue
+
+                if status in RETRY_STATUSES or status == 401:
+                    unauthorised = unauthorised or status == 401
+
+                    pending.append(operation)
+                    throttled_rows.append(row)
+                    continue
+
+                results["failed"].append({
+                    "name": operation["name"],
+                    "source": operation["source"],
+                    "destination": operation["destination"],
+                    "status": status,
+                    "error": frappe.as_json(row.get("body")),
+                })
+
+                print(
+                    "COPY FAILED:",
+                    operation["destination"],
+                    status,
+                )
+
+            _record_progress(progress_key, queued)
+
+        if pending:
+            time.sleep(_retry_after(throttled_rows))
+
+    for operation in pending:
+        results["failed"].append({
+            "name": operation["name"],
+            "source": operation["source"],
+            "destination": operation["destination"],
+            "status": "throttled",
+            "error": "Still throttled after retries; run again with resume=True.",
+        })
+
+
+def copy_folder_pairs(
+    client,
+    pairs,
+    dry_run,
+    results,
+    prepare_destination=None,
+    progress_key=None,
+    resume=True,
+):
+    """
+    Copy the children of each source folder into its destination folder.
+
+    pairs: [(source_path, destination_path, context)], where context is
+    passed to prepare_destination(**context) once per destination before
+    it is listed (real runs only).
+
+    Fills results["source_folders_found" / "source_folders_missing" /
+    "planned" / "copied" / "skipped_existing" / "resumed" / "failed"].
+    """
+    for key in (
+        "source_folders_found",
+        "source_folders_missing",
+        "planned",
+        "copied",
+        "skipped_existing",
+        "resumed",
+        "failed",
+    ):
+        results.setdefault(key, [])
+
+    if progress_key and not resume:
+        reset_progress(progress_key)
+
+    progress = get_progress(progress_key) if resume else {}
+
+    source_folders = _list_source_folders(
+        client,
+        [source_path for source_path, _, _ in pairs],
+    )
+
+    for source_path, destination_path, _ in pairs:
+        if source_path in source_folders:
+            results["source_folders_found"].append(source_path)
+            continue
+
+        results["source_folders_missing"].append(source_path)
+
+        print(
+            "SOURCE MISSING:",
+            source_path,
+        )
+
+    operations = _plan_operations(
+        client=client,
+        pairs=pairs,
+        source_folders=source_folders,
+        prepare_destination=prepare_destination,
+        dry_run=dry_run,
+        progress=progress,
+        results=results,
+    )
+
+    if dry_run:
+        for operation in operations:
+            results["planned"].append({
+                "type": operation["type"],
+                "source": operation["source"],
+                "destination": operation["destination"],
+            })
+
+            print(
+                f"PLAN {operation['type'].upper()} COPY:",
+                operation["destination"],
+            )
+
+        return results
+
+    _execute_operations(
+        client=client,
+        operations=operations,
+        progress_key=progress_key,
+        results=results,
+    )
+
+    return results
@@ -4,7 +4,8 @@ from datetime import datetime
 from urllib.parse import quote
 
 import frappe
-import requests
+
+from engineering.engineering.doctype.engineering_legals import graph_client
 
 
 GRAPH_BASE_URL = "https://graph.microsoft.com/v1.0"
@@ -96,37 +97,21 @@ class SharePointClient:
         self.refresh_token()
         self._load_site_and_drive()
 
-    def refresh_token(self):
-        response = requests.post(
-            (
-                "https://login.microsoftonline.com/"
-                f"{self.config['tenant_id']}/oauth2/v2.0/token"
-            ),
-            data={
-                "client_id": self.config["client_id"],
-                "client_secret": self.config["client_secret"],
-                "scope": "https://graph.microsoft.com/.default",
-                "grant_type": "client_credentials",
-            },
-            timeout=30,
+    def refresh_token(self, force_refresh=False):
+        access_token = graph_client.get_access_token(
+            self.config,
+            force_refresh=force_refresh,
         )
 
-        response.raise_for_status()
-
-        access_token = response.json().get("access_token")
-
-        if not access_token:
-            frappe.throw(
-                "Microsoft Graph did not return an access token."
-            )
-
         self.headers = {
             "Authorization": "Bearer " + access_token,
             "Content-Type": "application/json",
         }
 
     def request(self, method, url, **kwargs):
-        response = requests.request(
+        session = graph_client.get_session()
+
+        response = session.request(
             method,
             url,
             headers=self.headers,
@@ -135,9 +120,9 @@ class SharePointClient:
         )
 
         if response.status_code == 401:
-            self.refresh_token()
+            self.refresh_token(force_refresh=True)
 
-            response = requests.request(
+            response = session.request(
                 method,
                 url,
                 headers=self.headers,
@@ -148,53 +133,9 @@ class SharePointClient:
         return response
 
     def _load_site_and_drive(self):
-        response = self.request(
-            "GET",
-            (
-                f"{GRAPH_BASE_URL}/sites/"
-                f"{self.config['hostname']}:/{self.config['site_path']}"
-            ),
-        )
-
-        response.raise_for_status()
-        self.sharepoint_site = response.json()
-
-        response = self.request(
-            "GET",
-            (
-                f"{GRAPH_BASE_URL}/sites/"
-                f"{self.sharepoint_site['id']}/drives"
-            ),
-        )
-
-        response.raise_for_status()
-
-        drives = response.json().get("value", [])
-
-        for drive in drives:
-            current_name = (drive.get("name") or "").strip()
-
-            if (
-                current_name.lower()
-                == self.config["drive_name"].lower()
-            ):
-                self.drive = drive
-                self.drive_id = drive["id"]
-                break
-
-        if not self.drive:
-            available = []
-
-            for drive in drives:
-                if drive.get("name"):
-                    available.append(drive["name"])
-
-            frappe.throw(
-                "SharePoint document library "
-                f"'{self.config['drive_name']}' was not found. "
-                "Available libraries: "
-                + ", ".join(available)
-            )
+        self.sharepoint_site = graph_client.get_site(self.config)
+        self.drive = graph_client.get_drive(self.config)
+        self.drive_id = self.drive["id"]
 
     def get_item_by_path(self, folder_path):
         encoded_path = quote(folder_path, safe="/")
@@ -6,9 +6,9 @@ from datetime import datetime
 from urllib.parse import quote
 
 import frappe
-import requests
 from frappe.utils import get_first_day, getdate, nowdate
 
+from engineering.engineering.doctype.engineering_legals import graph_client
 from engineering.engineering.doctype.engineering_legals.engineering_legals import (
     NEW_SHAREPOINT_ROOT,
     NEW_SHAREPOINT_SECTION_MAPPING,
@@ -158,7 +158,7 @@ def _sharepoint_item_exists(
         f"/root:/{encoded_path}"
     )
 
-    response = requests.get(
+    response = graph_client.get_session().get(
         url,
         headers={
             "Authorization": f"Bearer {token}",
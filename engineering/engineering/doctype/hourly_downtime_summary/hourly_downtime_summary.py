@@ -3,6 +3,7 @@
 
 import frappe
 import json
+import time
 from frappe.model.document import Document
 from frappe.utils import now_datetime
 from datetime import timedelta
@@ -17,6 +18,9 @@ SITE_CHANNELS = {
     "Uitgevallen": "Isambane Mining-uit-hourly-downtime-reporting",
 }
 
+# Site jobs running at once; the sites are spread across this many jobs.
+SITE_JOB_CONCURRENCY = 3
+
 
 class HourlyDowntimeSummary(Document):
     def validate(self):
@@ -42,11 +46,39 @@ def create_koppie_hourly_downtime_summary():
 
 
 def create_all_hourly_downtime_summaries():
+    """
+    Hourly scheduler entry: fan the sites out over SITE_JOB_CONCURRENCY
+    background jobs. The hour slot is fixed here so every site reports the
+    same hour, however late its job starts.
+    """
+    report_date, hour_slot = get_completed_hour_slot()
+    sites = list(SITE_CHANNELS)
+    job_names = []
+
+    for index in range(min(SITE_JOB_CONCURRENCY, len(sites))):
+        job_name = f"hourly_downtime_summary::{report_date}::{hour_slot}::{index}"
+
+        frappe.enqueue(
+            "engineering.engineering.doctype.hourly_downtime_summary.hourly_downtime_summary.create_hourly_downtime_summaries_for_sites",
+            queue="long",
+            job_name=job_name,
+            timeout=1800,
+            sites=sites[index::SITE_JOB_CONCURRENCY],
+            report_date=str(report_date),
+            hour_slot=hour_slot,
+        )
+        job_names.append(job_name)
+
+    return job_names
+
+
+def create_hourly_downtime_summaries_for_sites(sites, report_date=None, hour_slot=None):
+    """Background job: build the summaries of a group of sites in turn."""
     created = []
 
-    for site in SITE_CHANNELS:
+    for site in sites:
         try:
-            created.append(create_hourly_downtime_summary(site))
+            created.append(create_hourly_downtime_summary(site, report_date, hour_slot))
         except Exception:
             frappe.log_error(
                 frappe.get_traceback(),
@@ -55,8 +87,12 @@ def create_all_hourly_downtime_summaries():
 
     return created
 
-def create_hourly_downtime_summary(site):
-    report_date, hour_slot = get_completed_hour_slot()
+def create_hourly_downtime_summary(site, report_date=None, hour_slot=None):
+    started = time.monotonic()
+
+    if not report_date or not hour_slot:
+        report_date, hour_slot = get_completed_hour_slot()
+
     channel_id = SITE_CHANNELS.get(site)
 
     if not channel_id:
@@ -88,6 +124,7 @@ def create_hourly_downtime_summary(site):
         "summary_message": summary_message,
         "report_data_json": json.dumps(data, default=str),
         "sent_to_raven": 0,
+        "generation_seconds": round(time.monotonic() - started, 2),
     })
 
     doc.insert(ignore_permissions=True)
@@ -1,10 +1,42 @@
 # Copyright (c) 2025, Isambane Mining (Pty) Ltd
 # For license information, please see license.txt
 
+from contextlib import contextmanager
+
 import frappe
 from frappe.model.document import Document
 from frappe.model.naming import make_autoname
-from frappe.utils import get_datetime
+from frappe.utils import cint, cstr, flt, get_datetime, now
+
+
+HISTORY_DOCTYPE = "Breakdown History"
+
+# Breakdown fields the status 1 / 3 history rows are built from.
+BREAKDOWN_FIELDS = (
+    "name",
+    "breakdown_start_datetime",
+    "resolved_datetime",
+    "breakdown_reason",
+    "resolution_summary",
+    "exclude_from_au",
+    "location",
+    "asset_name",
+    "hours_breakdown_starts",
+    "breakdown_hours",
+)
+
+# Columns an existing history row is kept in step with.
+HISTORY_SYNC_FIELDS = (
+    "update_date_time",
+    "breakdown_reason_updates",
+    "exclude_from_au",
+    "location",
+    "asset_name",
+    "timeclock",
+    "breakdown_resolved",
+)
+
+HISTORY_INSERT_CHUNK_SIZE = 500
 
 
 class PlantBreakdownorMaintenance(Document):
@@ -154,82 +186,231 @@ class PlantBreakdownorMaintenance(Document):
         if not self.breakdown_start_datetime:
             return
 
-        parent_name = self.name  # link to parent breakdown
-
-        # --- START (Status 1) ---
-        start_name = frappe.get_value(
-            "Breakdown History",
-            {"parent_breakdown": parent_name, "breakdown_status": "1"},
-            "name"
-        )
+        pending = frappe.flags.pending_breakdown_history
 
-        if start_name:
-            doc = frappe.get_doc("Breakdown History", start_name)
-            doc.update({
-                "update_date_time": self.breakdown_start_datetime,
-                "breakdown_reason_updates": self.breakdown_reason or "",
-                "exclude_from_au": self.exclude_from_au or 0,
-                "location": self.location,
-                "asset_name": self.asset_name,
-                "timeclock": 0
-            })
-            doc.save(ignore_permissions=True)
-        else:
-            frappe.get_doc({
-                "doctype": "Breakdown History",
-                "parent_breakdown": parent_name,
-                "update_by": frappe.session.user,
-                "update_date_time": self.breakdown_start_datetime,
-                "location": self.location,
-                "asset_name": self.asset_name,
-                "breakdown_status": "1",
-                "breakdown_reason_updates": self.breakdown_reason or "",
-                "breakdown_start_hours": self.hours_breakdown_starts or 0,
-                "timeclock": 0,
-                "breakdown_resolved": 0,
-                "exclude_from_au": self.exclude_from_au or 0
-            }).insert(ignore_permissions=True)
-
-        # --- RESOLVED (Status 3) ---
-        if self.resolved_datetime:
-            resolved_name = frappe.get_value(
-                "Breakdown History",
-                {"parent_breakdown": parent_name, "breakdown_status": "3"},
-                "name"
-            )
+        # Inside deferred_breakdown_history(): synced in one batch at the end.
+        if pending is not None:
+            pending[self.name] = _breakdown_values(self)
+            return
 
-            if resolved_name:
-                doc = frappe.get_doc("Breakdown History", resolved_name)
-                doc.update({
-                    "update_date_time": self.resolved_datetime,
-                    "breakdown_reason_updates": self.resolution_summary or "",
-                    "timeclock": self.breakdown_hours or 0,
-                    "breakdown_resolved": 1,
-                    "exclude_from_au": self.exclude_from_au or 0,
-                    "location": self.location,
-                    "asset_name": self.asset_name
-                })
-                doc.save(ignore_permissions=True)
-            else:
-                frappe.get_doc({
-                    "doctype": "Breakdown History",
-                    "parent_breakdown": parent_name,
-                    "update_by": frappe.session.user,
-                    "update_date_time": self.resolved_datetime,
-                    "location": self.location,
-                    "asset_name": self.asset_name,
-                    "breakdown_status": "3",
-                    "breakdown_reason_updates": self.resolution_summary or "",
-                    "breakdown_start_hours": self.hours_breakdown_starts or 0,
-                    "timeclock": self.breakdown_hours or 0,
-                    "breakdown_resolved": 1,
-                    "exclude_from_au": self.exclude_from_au or 0
-                }).insert(ignore_permissions=True)
+        sync_breakdown_history([self])
 
         # ✅ Confirmation popup in ERPNext UI
         frappe.msgprint(f"✅ Breakdown History updated for {self.name}")
 
 
+# ---------------------------------------------------------------
+# BREAKDOWN HISTORY BULK UPSERT
+# ---------------------------------------------------------------
+
+def _breakdown_values(breakdown):
+    return frappe._dict({field: breakdown.get(field) for field in BREAKDOWN_FIELDS})
+
+
+def _breakdown_hours(start, end):
+    """Same result as calculate_breakdown_hours, without the messages."""
+    if not start or not end:
+        return 0
+
+    start = get_datetime(start)
+    end = get_datetime(end)
+
+    if end < start:
+        return 0
+
+    return round((end - start).total_seconds() / 3600, 2)
+
+
+def _history_rows(breakdown):
+    """{breakdown_status: values} of the history rows a breakdown needs."""
+    if not breakdown.get("breakdown_start_datetime"):
+        return {}
+
+    exclude_from_au = breakdown.get("exclude_from_au") or 0
+
+    rows = {
+        "1": {
+            "update_date_time": breakdown.get("breakdown_start_datetime"),
+            "breakdown_reason_updates": breakdown.get("breakdown_reason") or "",
+            "exclude_from_au": exclude_from_au,
+            "location": breakdown.get("location"),
+            "asset_name": breakdown.get("asset_name"),
+            "timeclock": 0,
+            "breakdown_resolved": 0,
+        }
+    }
+
+    if breakdown.get("resolved_datetime"):
+        rows["3"] = {
+            "update_date_time": breakdown.get("resolved_datetime"),
+            "breakdown_reason_updates": breakdown.get("resolution_summary") or "",
+            "exclude_from_au": exclude_from_au,
+            "location": breakdown.get("location"),
+            "asset_name": breakdown.get("asset_name"),
+            "timeclock": breakdown.get("breakdown_hours") or 0,
+            "breakdown_resolved": 1,
+        }
+
+    return rows
+
+
+def _history_value_changed(fieldname, current, desired):
+    if fieldname == "update_date_time":
+        if not current or not desired:
+            return bool(current) != bool(desired)
+        return get_datetime(current) != get_datetime(desired)
+
+    if fieldname == "timeclock":
+        return flt(current) != flt(desired)
+
+    if fieldname in ("exclude_from_au", "breakdown_resolved"):
+        return cint(current) != cint(desired)
+
+    return cstr(current) != cstr(desired)
+
+
+def sync_breakdown_history(breakdowns):
+    """
+    Upsert the status 1 (start) and status 3 (resolved) Breakdown History
+    rows of many breakdowns.
+
+    breakdowns: Plant Breakdown or Maintenance docs or dicts with
+    BREAKDOWN_FIELDS. Existing rows are read in one query and only changed
+    columns are written; missing rows are bulk inserted.
+    """
+    desired = {}
+
+    for breakdown in breakdowns:
+        for status, values in _history_rows(breakdown).items():
+            desired[(breakdown.get("name"), status)] = (breakdown, values)
+
+    counts = {"inserted": 0, "updated": 0, "unchanged": 0}
+
+    if not desired:
+        return counts
+
+    existing = {}
+
+    for row in frappe.get_all(
+        HISTORY_DOCTYPE,
+        filters={
+            "parent_breakdown": ["in", sorted({name for name, _ in desired})],
+            "breakdown_status": ["in", ["1", "3"]],
+        },
+        fields=["name", "parent_breakdown", "breakdown_status", *HISTORY_SYNC_FIELDS],
+        order_by="modified desc",
+    ):
+        # Same row frappe.get_value would have picked for duplicates.
+        existing.setdefault((row.parent_breakdown, row.breakdown_status), row)
+
+    timestamp = now()
+    user = frappe.session.user
+    new_rows = []
+
+    for (parent_name, status), (breakdown, values) in desired.items():
+        row = existing.get((parent_name, status))
+
+        if row:
+            changed = {
+                fieldname: value
+                for fieldname, value in values.items()
+                if _history_value_changed(fieldname, row.get(fieldname), value)
+            }
+
+            if not changed:
+                counts["unchanged"] += 1
+                continue
+
+            frappe.db.set_value(HISTORY_DOCTYPE, row.name, changed)
+            counts["updated"] += 1
+            continue
+
+        new_rows.append((
+            frappe.generate_hash(length=10),
+            timestamp,
+            timestamp,
+            user,
+            user,
+            parent_name,
+            user,
+            status,
+            breakdown.get("hours_breakdown_starts") or 0,
+            *(values[fieldname] for fieldname in HISTORY_SYNC_FIELDS),
+        ))
+
+    if new_rows:
+        frappe.db.bulk_insert(
+            HISTORY_DOCTYPE,
+            [
+                "name",
+                "creation",
+                "modified",
+                "owner",
+                "modified_by",
+                "parent_breakdown",
+                "update_by",
+                "breakdown_status",
+                "breakdown_start_hours",
+                *HISTORY_SYNC_FIELDS,
+            ],
+            new_rows,
+            chunk_size=HISTORY_INSERT_CHUNK_SIZE,
+        )
+        counts["inserted"] = len(new_rows)
+
+    return counts
+
+
+def sync_breakdown_history_for(breakdown_names):
+    """
+    Batch API: sync the history of saved breakdowns by name, e.g. after an
+    import. Breakdown hours are derived the way on_update derives them.
+    """
+    breakdown_names = [name for name in breakdown_names or [] if name]
+
+    if not breakdown_names:
+        return sync_breakdown_history([])
+
+    breakdowns = frappe.get_all(
+        "Plant Breakdown or Maintenance",
+        filters={"name": ["in", breakdown_names]},
+        fields=list(BREAKDOWN_FIELDS),
+    )
+
+    for breakdown in breakdowns:
+        breakdown.breakdown_hours = (
+            0
+            if breakdown.exclude_from_au
+            else _breakdown_hours(breakdown.breakdown_start_datetime, breakdown.resolved_datetime)
+        )
+
+    return sync_breakdown_history(breakdowns)
+
+
+@contextmanager
+def deferred_breakdown_history():
+    """
+    Collect the Breakdown History syncs of every breakdown saved inside the
+    block and write them with one sync_breakdown_history call on exit:
+
+        with deferred_breakdown_history():
+            for row in rows:
+                frappe.get_doc(row).insert()
+    """
+    outer = frappe.flags.pending_breakdown_history
+    pending = frappe.flags.pending_breakdown_history = {}
+
+    try:
+        yield pending
+    finally:
+        frappe.flags.pending_breakdown_history = outer
+
+    if outer is not None:
+        outer.update(pending)
+    else:
+        sync_breakdown_history(pending.values())
+
+
 # ---------------------------------------------------------------
 # GLOBAL HOOK
 # ---------------------------------------------------------------
@@ -0,0 +1,208 @@
+# schedule_sync.py
+# Diff-based write of generated Service Schedule Child rows.
+#
+# generate_schedule_backend builds the month's rows as plain dicts; the
+# existing child rows are matched on (fleet_number, date) and only the
+# difference is written:
+#
+#   - new keys are inserted with bulk_insert
+#   - matched rows are updated with bulk_update, changed columns only
+#   - keys no longer generated (e.g. an asset left the site) are deleted
+#
+# Values are compared the way the columns store them (Int / Check as int,
+# Date as date, everything else as text), so an unchanged row is never
+# rewritten. snapshot_rows / update_changed_rows do the same for child rows
+# edited in place (set_daily_usage_and_recompute).
+
+import frappe
+from frappe.utils import cint, cstr, getdate, now
+
+
+SCHEDULE_DOCTYPE = "Service Schedule"
+ROW_DOCTYPE = "Service Schedule Child"
+ROW_PARENTFIELD = "service_schedule_child"
+
+INT_FIELDS = (
+    "estimate_hours",
+    "hours_previous_service",
+    "daily_estimated_hours_usage",
+    "planned_hours_next_service_1",
+    "planned_hours_next_service_2",
+    "planned_hours_next_service_3",
+    "oem_booking_date",
+)
+
+DATE_FIELDS = (
+    "date",
+    "date_of_previous_service",
+    "date_of_next_service_1",
+    "date_of_next_service_2",
+    "date_of_next_service_3",
+)
+
+TEXT_FIELDS = (
+    "fleet_number",
+    "asset_category",
+    "model",
+    "start_hours",
+    "last_service_interval",
+    "msr_reference_number",
+    "msr_record_name",
+    "next_service_interval_1",
+    "next_service_interval_2",
+    "next_service_interval_3",
+    "oem_booking_name",
+)
+
+ROW_FIELDS = ("idx",) + DATE_FIELDS + INT_FIELDS + TEXT_FIELDS
+
+WRITE_CHUNK_SIZE = 1000
+
+
+def _normalise(field, value):
+    if field == "idx" or field in INT_FIELDS:
+        return cint(value)
+
+    if field in DATE_FIELDS:
+        return getdate(value) if value else None
+
+    return cstr(value) if value is not None else ""
+
+
+def _row_key(row):
+    return (row.get("fleet_number"), getdate(row.get("date")).isoformat() if row.get("date") else None)
+
+
+def write_schedule_rows(schedule_name, rows):
+    """
+    Make the child table of schedule_name match rows (in order).
+    Returns {"inserted", "updated", "removed", "unchanged"}.
+    """
+    existing = frappe.get_all(
+        ROW_DOCTYPE,
+        filters={
+            "parent": schedule_name,
+            "parenttype": SCHEDULE_DOCTYPE,
+            "parentfield": ROW_PARENTFIELD,
+        },
+        fields=["name", *ROW_FIELDS],
+        order_by="idx asc",
+    )
+
+    existing_by_key = {}
+    removed = []
+
+    for row in existing:
+        key = _row_key(row)
+        if key in existing_by_key:
+            # duplicate (fleet_number, date) rows from older generations
+            removed.append(row.name)
+        else:
+            existing_by_key[key] = row
+
+    new_rows = []
+    updates = {}
+    unchanged = 0
+
+    for idx, row in enumerate(rows, start=1):
+        values = {field: _normalise(field, row.get(field)) for field in ROW_FIELDS if field != "idx"}
+        values["idx"] = idx
+
+        current = existing_by_key.pop(_row_key(values), None)
+
+        if current is None:
+            new_rows.append(values)
+            continue
+
+        changes = {
+            field: value
+            for field, value in values.items()
+            if _normalise(field, current.get(field)) != value
+        }
+
+        if changes:
+            updates[current.name] = changes
+        else:
+            unchanged += 1
+
+    removed.extend(row.name for row in existing_by_key.values())
+
+    if removed:
+        frappe.db.delete(ROW_DOCTYPE, {"name": ["in", removed]})
+
+    if updates:
+        frappe.db.bulk_update(ROW_DOCTYPE, updates, chunk_size=WRITE_CHUNK_SIZE)
+
+    if new_rows:
+        _insert_rows(schedule_name, new_rows)
+
+    return {
+        "inserted": len(new_rows),
+        "updated": len(updates),
+        "removed": len(removed),
+        "unchanged": unchanged,
+    }
+
+
+def snapshot_rows(rows):
+    """{row name: normalised values} of existing child rows, before editing."""
+    return {
+        row.name: {field: _normalise(field, row.get(field)) for field in ROW_FIELDS}
+        for row in rows
+    }
+
+
+def update_changed_rows(rows, before):
+    """Write the columns of rows that differ from their snapshot; returns the row count."""
+    updates = {}
+
+    for row in rows:
+        original = before.get(row.name) or {}
+        values = {field: _normalise(field, row.get(field)) for field in ROW_FIELDS}
+        changes = {
+            field: value
+            for field, value in values.items()
+            if value != original.get(field)
+        }
+        if changes:
+            updates[row.name] = changes
+
+    if updates:
+        frappe.db.bulk_update(ROW_DOCTYPE, updates, chunk_size=WRITE_CHUNK_SIZE)
+
+    return len(updates)
+
+
+def _insert_rows(schedule_name, rows):
+    timestamp = now()
+    user = frappe.session.user
+    fields = [
+        "name",
+        "creation",
+        "modified",
+        "owner",
+        "modified_by",
+        "docstatus",
+        "parent",
+        "parenttype",
+        "parentfield",
+        *ROW_FIELDS,
+    ]
+
+    values = [
+        (
+            frappe.generate_hash(length=10),
+            timestamp,
+            timestamp,
+            user,
+            user,
+            0,
+            schedule_name,
+            SCHEDULE_DOCTYPE,
+            ROW_PARENTFIELD,
+            *(row.get(field) for field in ROW_FIELDS),
+        )
+        for row in rows
+    ]
+
+    frappe.db.bulk_insert(ROW_DOCTYPE, fields, values, chunk_size=WRITE_CHUNK_SIZE)
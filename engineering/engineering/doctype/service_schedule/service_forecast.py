@@ -0,0 +1,239 @@
+# service_forecast.py
+# Service-threshold forecasting for Service Schedule.
+#
+# An asset's estimated hours are held as one curve (a list with one value
+# per day). Every 250-hour threshold the curve crosses is found in a single
+# pass: each day-to-day step (prev, est] is located in the sorted threshold
+# list with bisect, so the cost is one step per day however many thresholds
+# (250 / 500 / 750 / 1000 / 2000) fall inside the month or horizon.
+#
+#   estimate_curve()        Day 1 = start hours; then previous start hours
+#                           (or previous estimate) + daily usage
+#   first_crossings()       first day each threshold is crossed
+#   apply_service_markers() planned / interval / next-service date fields on
+#                           one asset's schedule rows
+#   project_curve()         straight-line curve for a 3- or 6-month horizon
+
+import math
+from bisect import bisect_right
+from datetime import timedelta
+
+from frappe.utils import cint, getdate
+
+
+SERVICE_STEP = 250
+
+# Markers 1-3 on each schedule row.
+MARKER_COUNT = 3
+
+
+def round_to_250(value):
+    v = cint(value) or 0
+    if v <= 0:
+        return 0
+
+    down = int(math.floor(v / 250.0) * 250)
+    up = int(math.ceil(v / 250.0) * 250)
+
+    # if equal distance, choose DOWN (e.g. 2625 -> 2500)
+    if (v - down) <= (up - v):
+        return down
+    return up
+
+
+def ceiling_to_250(value):
+    v = cint(value) or 0
+    if v <= 0:
+        return 0
+    return int(math.ceil(v / 250.0) * 250)
+
+
+def interval_from_planned_hours(planned_hours):
+    """Your rule:
+    2000 interval = even thousands (2000,4000,6000,...)
+    1000 interval = odd thousands  (1000,3000,5000,...)
+    otherwise cycle by remainder in the 1000-block: 250/500/750
+    """
+    h = cint(planned_hours) or 0
+    if h <= 0:
+        return 250
+
+    if h % 2000 == 0:
+        return 2000
+    if h % 1000 == 0:
+        return 1000
+
+    r = h % 1000
+    if r == 250:
+        return 250
+    if r == 500:
+        return 500
+    if r == 750:
+        return 750
+    return 250
+
+
+def adjust_sunday_to_saturday(d, month_start=None):
+    """If d is Sunday, move it back to Saturday. If that moves before month_start, keep original."""
+    if not d:
+        return None
+    dd = getdate(d)
+    if dd.weekday() == 6:  # Sunday
+        sat = dd - timedelta(days=1)
+        if month_start and sat < getdate(month_start):
+            return dd
+        return sat
+    return dd
+
+
+def planned_service_hours(base_hours, count=MARKER_COUNT):
+    """[planned1, planned2, ...] from the hours at the last service."""
+    planned = [round_to_250(base_hours)]
+    while len(planned) < count:
+        planned.append(ceiling_to_250(planned[-1] + SERVICE_STEP))
+    return planned
+
+
+def estimate_curve(start_hours, daily_usage):
+    """
+    start_hours: Pre-Use start hours per day (0 when missing), day 1 first.
+
+    Day 1: Est = Day 1 start_hours
+    Day 2..end:
+      if previous day had start_hours -> Est = prev_start_hours + daily_use
+      else -> Est = prev_estimate + daily_use
+    """
+    daily_usage = float(daily_usage or 0)
+    curve = []
+    prev_start = 0.0
+
+    for start in start_hours:
+        start = float(start or 0)
+
+        if not curve:
+            curve.append(start)
+        elif prev_start > 0:
+            curve.append(prev_start + daily_usage)
+        else:
+            curve.append(curve[-1] + daily_usage)
+
+        prev_start = start
+
+    return curve
+
+
+def first_crossings(curve, thresholds):
+    """
+    {threshold: index} of the first day whose step (previous day's value,
+    this day's value] contains the threshold. Day 1 never counts as a
+    crossing, as in find_threshold_crossing_date.
+    """
+    ordered = sorted({t for t in thresholds if t})
+    found = {}
+
+    for index in range(1, len(curve)):
+        prev_est, est = curve[index - 1], curve[index]
+        if est <= prev_est:
+            continue
+
+        for threshold in ordered[bisect_right(ordered, prev_est):bisect_right(ordered, est)]:
+            found.setdefault(threshold, index)
+
+        if len(found) == len(ordered):
+            break
+
+    return found
+
+
+def apply_service_markers(rows, base_hours, month_start=None):
+    """
+    Set planned hours, intervals and next-service dates (markers 1-3) on
+    one asset's rows (sorted by date, estimate_hours already set).
+    """
+    for r in rows:
+        for n in range(1, MARKER_COUNT + 1):
+            setattr(r, f"date_of_next_service_{n}", None)
+            setattr(r, f"planned_hours_next_service_{n}", None)
+            setattr(r, f"next_service_interval_{n}", "")
+
+    base_hours = cint(base_hours) or 0
+    if not rows or base_hours <= 0:
+        return
+
+    planned = planned_service_hours(base_hours)
+    intervals = [f"{interval_from_planned_hours(p)} Hours" for p in planned]
+    curve = [float(r.get("estimate_hours") or 0) for r in rows]
+
+    # Populate planned hours on EVERY row; intervals once estimate reaches planned
+    for r, est in zip(rows, curve):
+        for n, (p, interval) in enumerate(zip(planned, intervals), start=1):
+            setattr(r, f"planned_hours_next_service_{n}", p)
+            if est >= float(p):
+                setattr(r, f"next_service_interval_{n}", interval)
+
+    crossings = first_crossings(curve, planned)
+    index_by_date = {getdate(r.get("date")): i for i, r in enumerate(rows)}
+
+    for n, (p, interval) in enumerate(zip(planned, intervals), start=1):
+        if p not in crossings:
+            continue
+
+        d = adjust_sunday_to_saturday(rows[crossings[p]].get("date"), month_start=month_start)
+        r = rows[index_by_date[d]] if d in index_by_date else None
+        if r is not None:
+            setattr(r, f"date_of_next_service_{n}", d)
+            setattr(r, f"planned_hours_next_service_{n}", p)
+            setattr(r, f"next_service_interval_{n}", interval)
+
+
+def project_curve(current_hours, daily_usage, days):
+    """Straight-line estimate for day 0..days (no future readings)."""
+    current_hours = float(current_hours or 0)
+    daily_usage = float(daily_usage or 0)
+    return [current_hours + daily_usage * day for day in range(days + 1)]
+
+
+def projected_services(start_date, current_hours, daily_usage, base_hours, days):
+    """
+    Every 250-hour service the straight-line curve reaches within days:
+    [{"date", "planned_hours", "interval", "overdue"}]. Planning starts at
+    the service after the last one (base_hours); when that is already at or
+    below current_hours it is returned once, as overdue. Without a last
+    service (base_hours 0) planning starts above current_hours.
+    """
+    start_date = getdate(start_date)
+    curve = project_curve(current_hours, daily_usage, days)
+
+    if cint(base_hours) > 0:
+        # planned_service_hours()[0] is the service just done.
+        first = planned_service_hours(base_hours, count=2)[1]
+    else:
+        first = ceiling_to_250(curve[0] + 1)
+
+    first = max(first, SERVICE_STEP)
+
+    thresholds = list(range(first, int(curve[-1]) + 1, SERVICE_STEP))
+    crossings = first_crossings(curve, thresholds)
+    due = []
+
+    if thresholds and thresholds[0] <= curve[0]:
+        due.append({
+            "date": start_date,
+            "planned_hours": thresholds[0],
+            "interval": f"{interval_from_planned_hours(thresholds[0])} Hours",
+            "overdue": 1,
+        })
+
+    for threshold in thresholds:
+        if threshold not in crossings:
+            continue
+
+        d = start_date + timedelta(days=crossings[threshold])
+        due.append({
+            "date": adjust_sunday_to_saturday(d, month_start=start_date),
+            "planned_hours": threshold,
+            "interval": f"{interval_from_planned_hours(threshold)} Hours",
+            "overdue": 0,
+        })
+
+    return due
@@ -1,11 +1,27 @@
 import frappe
 from frappe.model.document import Document
-from frappe.utils import getdate, nowdate, cint, add_months
+from frappe.utils import getdate, nowdate, cint, add_months, now_datetime
 import calendar
-import math
 import re
+import time
 from datetime import timedelta
 
+from engineering.engineering.doctype.service_schedule.schedule_sync import (
+    snapshot_rows,
+    update_changed_rows,
+    write_schedule_rows,
+)
+from engineering.engineering.doctype.service_schedule.service_forecast import (
+    apply_service_markers,
+    estimate_curve,
+    first_crossings,
+    projected_services,
+)
+from engineering.engineering.doctype.service_schedule.usage_engine import UsageWindow
+
+# Asset categories that get a Service Schedule row per day.
+SCHEDULE_ASSET_CATEGORIES = ["ADT", "Diesel Bowsers", "Excavator", "Dozer", "Service Truck"]
+
 class ServiceSchedule(Document):
     pass
 
@@ -17,15 +33,27 @@ def clamp_daily_usage(val, min_val=0.0, max_val=24.0):
     return max(float(min_val), min(v, float(max_val)))
 
 
+# Nightly update: schedules run one at a time per lane, in this many lanes.
+MAX_PARALLEL_SCHEDULE_JOBS = 3
+
+
 @frappe.whitelist()
-def queue_service_schedule_update(schedule_name=None, daily_usage_default=15):
+def queue_service_schedule_update(schedule_name=None, daily_usage_default=15, regenerate_existing=0):
     """Scheduler/async entrypoint.
 
-    Exists because hooks/scheduler events reference it.
-    If called without schedule_name (as scheduler often does), it does nothing
-    to avoid overwriting user-edited schedules.
+    With schedule_name, queues a regeneration of that schedule.
+    Without it (as the 01:00 scheduler calls it), it does nothing to avoid
+    overwriting user-edited schedules, unless regenerate_existing is set:
+    then every schedule of the current month is queued as its own job, at
+    most MAX_PARALLEL_SCHEDULE_JOBS at a time, keeping the daily usage
+    users set on the board.
     """
+    daily_usage_default = clamp_daily_usage(daily_usage_default or 15)
+
     if not schedule_name:
+        if cint(regenerate_existing):
+            return queue_nightly_schedule_updates(daily_usage_default)
+
         frappe.logger(__name__).info(
             "queue_service_schedule_update called without schedule_name; skipping."
         )
@@ -36,11 +64,65 @@ def queue_service_schedule_update(schedule_name=None, daily_usage_default=15):
         queue="long",
         timeout=1800,
         schedule_name=schedule_name,
-        daily_usage_default=clamp_daily_usage(daily_usage_default or 15),
+        daily_usage_default=daily_usage_default,
     )
     return {"status": "queued", "schedule_name": schedule_name}
 
 
+def queue_nightly_schedule_updates(daily_usage_default=15):
+    today_date = getdate(nowdate())
+    month_label = f"{calendar.month_name[today_date.month]} {today_date.year}"
+
+    schedule_names = frappe.get_all(
+        "Service Schedule",
+        filters={"month": month_label},
+        pluck="name",
+        order_by="name asc",
+    )
+    if not schedule_names:
+        return {"status": "skipped", "reason": f"no schedules for {month_label}"}
+
+    lanes = [
+        schedule_names[i::MAX_PARALLEL_SCHEDULE_JOBS]
+        for i in range(MAX_PARALLEL_SCHEDULE_JOBS)
+    ]
+
+    for lane in lanes:
+        if lane:
+            _enqueue_schedule_chain(lane, daily_usage_default)
+
+    return {"status": "queued", "month": month_label, "schedules": len(schedule_names)}
+
+
+def _enqueue_schedule_chain(schedule_names, daily_usage_default):
+    frappe.enqueue(
+        "engineering.engineering.doctype.service_schedule.service_schedule.run_schedule_chain",
+        queue="long",
+        timeout=1800,
+        job_name=f"Service Schedule update: {schedule_names[0]}",
+        schedule_names=schedule_names,
+        daily_usage_default=daily_usage_default,
+    )
+
+
+def run_schedule_chain(schedule_names, daily_usage_default=15):
+    """Regenerate the first schedule, then queue the rest of the lane."""
+    schedule_name, remaining = schedule_names[0], schedule_names[1:]
+
+    try:
+        generate_schedule_backend(
+            schedule_name,
+            daily_usage_default=daily_usage_default,
+            keep_daily_usage=1,
+        )
+    except Exception:
+        frappe.db.rollback()
+        frappe.log_error(frappe.get_traceback(), f"Service Schedule update failed: {schedule_name}")
+    finally:
+        if remaining:
+            _enqueue_schedule_chain(remaining, daily_usage_default)
+
+
 def as_date(d):
     return getdate(d) if d else None
 
@@ -70,20 +152,6 @@ def parse_month_bounds(month_label):
     month_end = getdate(f"{year}-{month_index:02d}-{last_day:02d}")
     return year, month_index, month_start, month_end
 
-def round_to_250(value):
-    v = cint(value) or 0
-    if v <= 0:
-        return 0
-
-    down = int(math.floor(v / 250.0) * 250)
-    up = int(math.ceil(v / 250.0) * 250)
-
-    # if equal distance, choose DOWN (e.g. 2625 -> 2500)
-    if (v - down) <= (up - v):
-        return down
-    return up
-
-
 def _extract_interval_number(interval_text):
     """
     "500 Hours" -> 500
@@ -99,58 +167,13 @@ def _fmt_hours(n):
     n = cint(n) or 0
     return f"{n} Hours" if n > 0 else ""
 
-def interval_from_planned_hours(planned_hours):
-    """Your rule:
-    2000 interval = even thousands (2000,4000,6000,...)
-    1000 interval = odd thousands  (1000,3000,5000,...)
-    otherwise cycle by remainder in the 1000-block: 250/500/750
-    """
-    h = cint(planned_hours) or 0
-    if h <= 0:
-        return 250
-
-    if h % 2000 == 0:
-        return 2000
-    if h % 1000 == 0:
-        return 1000
-
-    r = h % 1000
-    if r == 250:
-        return 250
-    if r == 500:
-        return 500
-    if r == 750:
-        return 750
-    return 250
-
-
-def ceiling_to_250(value):
-    v = cint(value) or 0
-    if v <= 0:
-        return 0
-    return int(math.ceil(v / 250.0) * 250)
-
-
-
-def adjust_sunday_to_saturday(d, month_start=None):
-    """If d is Sunday, move it back to Saturday. If that moves before month_start, keep original."""
-    if not d:
-        return None
-    dd = getdate(d)
-    if dd.weekday() == 6:  # Sunday
-        sat = dd - timedelta(days=1)
-        if month_start and sat < getdate(month_start):
-            return dd
-        return sat
-    return dd
-
 def get_assets_for_site(site):
     return frappe.get_all(
         "Asset",
         filters={
             "location": site,
             "docstatus": 1,
-            "asset_category": ["in", ["ADT", "Diesel Bowsers", "Excavator", "Dozer", "Service Truck"]],
+            "asset_category": ["in", SCHEDULE_ASSET_CATEGORIES],
         },
         fields=["name", "asset_category", "item_name", "item_code"],
         order_by="name asc",
@@ -208,39 +231,14 @@ def get_latest_prev_start_hours(asset, month_start):
     Look backwards day by day:
     - Night shift first
     - If no Night, use Day
+
+    Single-asset form of UsageWindow.carry_forward_start_hours; schedule
+    generation loads the whole site at once.
     """
     if not asset or not month_start:
         return 0.0
 
-    cursor = getdate(month_start) - timedelta(days=1)
-    # stop after 3 months back (prevents infinite loop when no history exists)
-    stop_date = getdate(month_start) - timedelta(days=92)
-
-    while True:
-        rows = frappe.db.sql(
-            """
-            SELECT
-                pu.shift,
-                pa.eng_hrs_start
-            FROM `tabPre-Use Hours` pu
-            JOIN `tabPre-use Assets` pa ON pa.parent = pu.name
-            WHERE
-                pa.asset_name = %s
-                AND pu.shift_date = %s
-                AND pa.eng_hrs_start > 0
-            ORDER BY FIELD(pu.shift, 'Night', 'Day')
-            LIMIT 1
-            """,
-            (asset, cursor),
-            as_dict=True,
-        )
-
-        if rows:
-            return float(rows[0].get("eng_hrs_start") or 0)
-
-        cursor = cursor - timedelta(days=1)
-        if cursor < stop_date:
-            return 0.0
+    return UsageWindow.load([asset], month_start).carry_forward_start_hours(asset)
 
 
 def prev_month_label(month_label):
@@ -256,77 +254,16 @@ def get_last_30_day_avg_daily_usage(asset, anchor_date):
     Uses Day-shift Pre-Use Hours (eng_hrs_start) deltas between consecutive days.
     Includes 0 as valid start_hours (but delta requires consecutive days).
     Returns a float clamped to 0..24. Falls back to 15 if insufficient data.
+
+    Single-asset form of UsageWindow.average_daily_usage; schedule
+    generation loads the whole site at once.
     """
     if not asset or not anchor_date:
         return 15.0
 
-    end = getdate(anchor_date)
-    start = end - timedelta(days=29)
-
-    # Pull day-shift pre-use docs for the window
-    pre_use_docs = frappe.get_all(
-        "Pre-Use Hours",
-        filters={
-            "shift_date": ("between", [start, end]),
-            "shift": "Day",
-        },
-        fields=["name", "shift_date"],
-        order_by="shift_date asc",
-    )
-    if not pre_use_docs:
-        return 15.0
-
-    parent_names = [d["name"] for d in pre_use_docs]
-    parent_to_date = {d["name"]: getdate(d["shift_date"]) for d in pre_use_docs}
-    parent_shift = {d["name"]: d.get("shift") for d in pre_use_docs}
-
-    # Pull only this asset's child rows
-    child_rows = frappe.get_all(
-        "Pre-use Assets",
-        filters={
-            "parent": ["in", parent_names],
-            "asset_name": asset
-        },
-        fields=["parent", "eng_hrs_start"],
-    )
-    if not child_rows:
-        return 15.0
-
-    # Build date -> start_hours mapping (one per day)
-    day_map = {}
-    for r in child_rows:
-        dt = parent_to_date.get(r.get("parent"))
-        if not dt:
-            continue
-        try:
-            day_map[dt] = float(r.get("eng_hrs_start") or 0)
-        except Exception:
-            day_map[dt] = 0.0
-
-    # Calculate deltas on consecutive days only
-    dates = sorted(day_map.keys())
-    deltas = []
-    prev_date = None
-    prev_val = None
-
-    for dt in dates:
-        val = day_map.get(dt, 0.0)
-
-        if prev_date is not None and prev_val is not None:
-            if (dt - prev_date).days == 1:
-                delta = val - prev_val
-                # keep non-negative only (ignore resets / bad data)
-                if delta >= 0:
-                    deltas.append(delta)
-
-        prev_date = dt
-        prev_val = val
-
-    if not deltas:
-        return 15.0
-
-    avg = sum(deltas) / float(len(deltas))
-    return int(round(clamp_daily_usage(avg)))
+    anchor_date = getdate(anchor_date)
+    window = UsageWindow.load([asset], anchor_date + timedelta(days=1))
+    return window.average_daily_usage(asset, anchor_date)
 
 
 def get_prev_month_seed(site, month_label, fleet_number):
@@ -374,14 +311,19 @@ def batch_get_oem_bookings(asset_list, month_start, month_end):
 
 def recompute_oem_booking_flags(doc, lookup_start, lookup_end):
     """Stamp doc.service_schedule_child.oem_booking_date based on OEM Booking truth."""
-    asset_list = sorted({r.fleet_number for r in (doc.service_schedule_child or []) if r.fleet_number})
+    apply_oem_booking_flags(doc.service_schedule_child or [], lookup_start, lookup_end)
+
+
+def apply_oem_booking_flags(rows, lookup_start, lookup_end):
+    """Stamp oem_booking_date / oem_booking_name on schedule rows (docs or dicts)."""
+    asset_list = sorted({r.fleet_number for r in rows if r.fleet_number})
     oem_map = batch_get_oem_bookings(asset_list, lookup_start, lookup_end) or {}
 
     # TEMP DEBUG (remove later)
     frappe.logger(__name__).info(f"[OEM DEBUG] assets={len(asset_list)} oem_hits={len(oem_map)}")
     frappe.logger(__name__).info(f"[OEM DEBUG] IS0617 hits: {[k for k in oem_map.keys() if k[0]=='IS0617'][:10]}")
 
-    for r in (doc.service_schedule_child or []):
+    for r in rows:
         if not r.fleet_number or not r.date:
             continue
         d = getdate(r.date)
@@ -467,35 +409,32 @@ def interval_due_at_hours(planned_hours):
 def find_threshold_crossing_date(series, planned_hours):
     """series: list of (date, estimate_hours) sorted asc.
     Returns first date where estimate crosses planned (>= planned and previous < planned).
+    If day 1 is already >= planned, day 1 is not a crossing.
     """
     if not planned_hours:
         return None
-    prev_est = None
+
+    points = []
     for d, est in series:
-        if est is None:
-            continue
         try:
-            est_v = float(est)
+            points.append((d, float(est)))
         except Exception:
             continue
-        
-        # NEW RULE:
-        # A "crossing" only counts when we go from below -> >= planned.
-        # If day 1 is already >= planned, do NOT mark day 1.
-        if prev_est is None:
-            prev_est = est_v
-            continue
 
-        if prev_est < planned_hours <= est_v:
-            return d
-
-        prev_est = est_v
-    return None
+    index = first_crossings([est for _, est in points], [planned_hours]).get(planned_hours)
+    return points[index][0] if index is not None else None
 
 @frappe.whitelist()
-def generate_schedule_backend(schedule_name, daily_usage_default=15):
-    """Populate Service Schedule Child exactly as per Task 1 (based on latest DocTypes)."""
+def generate_schedule_backend(schedule_name, daily_usage_default=15, keep_daily_usage=0):
+    """Populate Service Schedule Child exactly as per Task 1 (based on latest DocTypes).
+
+    Rows are built in memory and written with schedule_sync, which touches
+    only rows that changed. keep_daily_usage keeps each asset's current
+    daily usage (edited in the board) instead of the 30-day average.
+    """
+    started = time.perf_counter()
     doc = frappe.get_doc("Service Schedule", schedule_name)
+    doc.check_permission("write")
 
     if not doc.month or not doc.site:
         frappe.throw("Please select Month and Site before generating the schedule.")
@@ -516,21 +455,30 @@ def generate_schedule_backend(schedule_name, daily_usage_default=15):
     msr_map = batch_get_service_reports(asset_list, month_start, month_end)
     oem_map = batch_get_oem_bookings(asset_list, month_start, month_end) or {}
 
-    # clear
-    doc.set("service_schedule_child", [])
-
-    rows_index = {}   # (asset, date_iso) -> row
-    est_series = {a: [] for a in asset_list}
+    schedule_rows = []
     seed_by_asset = {}
 
     daily_usage_default = clamp_daily_usage(daily_usage_default or 0)
 
-    # We'll compute per-asset default daily usage from last 30 days (rolling window)
-    asset_daily_default = {}
-    anchor = month_start - timedelta(days=1)  # same anchor for all assets
-    for a in assets:
-        asset_name = a["name"]
-        asset_daily_default[asset_name] = get_last_30_day_avg_daily_usage(asset_name, anchor)
+    # Pre-Use readings before the month for every asset, in one query:
+    # per-asset default daily usage (last 30 days) and day 1 carry-forward
+    usage_window = UsageWindow.load(asset_list, month_start)
+    asset_daily_default = {
+        a["name"]: usage_window.average_daily_usage(a["name"])
+        for a in assets
+    }
+
+    if cint(keep_daily_usage):
+        # First stored usage per asset wins; a stored 0 (asset parked) is kept
+        kept_daily_usage = set()
+        for r in (doc.service_schedule_child or []):
+            if (
+                r.fleet_number in asset_daily_default
+                and r.fleet_number not in kept_daily_usage
+                and r.daily_estimated_hours_usage is not None
+            ):
+                asset_daily_default[r.fleet_number] = r.daily_estimated_hours_usage
+                kept_daily_usage.add(r.fleet_number)
 
 
 
@@ -538,10 +486,6 @@ def generate_schedule_backend(schedule_name, daily_usage_default=15):
     for a in assets:
         asset = a["name"]
 
-        prev_estimate = None  # track previous day's estimate per asset
-        prev_start_hours = None  # track previous day's start_hours per asset
-
-
         # per-asset default daily usage (rolling 30 days)
         daily_use_asset = asset_daily_default.get(asset, daily_usage_default)
 
@@ -556,37 +500,17 @@ def generate_schedule_backend(schedule_name, daily_usage_default=15):
         ptr = 0
         latest_within = None
 
-        for d in date_list:
-            d_iso = d.isoformat()
-
-            # start_hours from Day-shift pre-use (or 0)
-            start_hours = start_hours_map.get((d_iso, asset), 0) or 0
-            try:
-                start_hours = float(start_hours)
-            except Exception:
-                start_hours = 0.0
-
-            # Day 1 seed always comes from latest previous Day-shift eng_hrs_start (carry-forward)
-            if d == month_start:
-                start_hours = get_latest_prev_start_hours(asset, month_start)
-
-
-            # RULE:
-            # Day 1: Est = Day 1 start_hours
-            # Day 2..end:
-            #   if previous day had start_hours -> Est = prev_start_hours + daily_use
-            #   else -> Est = prev_estimate + daily_use
-            if d == month_start:
-                estimate_hours = float(start_hours or 0.0)
-            else:
-                if float(prev_start_hours or 0.0) > 0:
-                    estimate_hours = float(prev_start_hours) + float(daily_use_asset)
-                else:
-                    estimate_hours = float(prev_estimate or 0.0) + float(daily_use_asset)
-
-            prev_estimate = float(estimate_hours or 0.0)
-            prev_start_hours = float(start_hours or 0.0)
+        # start_hours from Day-shift pre-use (or 0); Day 1 seed always comes
+        # from latest previous Day-shift eng_hrs_start (carry-forward)
+        start_hours_list = [usage_window.carry_forward_start_hours(asset)] + [
+            float(start_hours_map.get((d.isoformat(), asset), 0) or 0)
+            for d in date_list[1:]
+        ]
+        curve = estimate_curve(start_hours_list, daily_use_asset)
+        asset_rows = []
 
+        for d, start_hours, estimate_hours in zip(date_list, start_hours_list, curve):
+            d_iso = d.isoformat()
 
             # previous service per day (includes day 1)
             while ptr < len(within_rows):
@@ -622,7 +546,7 @@ def generate_schedule_backend(schedule_name, daily_usage_default=15):
 
 
 
-            row = doc.append("service_schedule_child", {
+            row = frappe._dict({
                 "date": d,
                 "fleet_number": asset,
                 "asset_category": a.get("asset_category"),
@@ -640,101 +564,45 @@ def generate_schedule_backend(schedule_name, daily_usage_default=15):
 
             })
 
-            rows_index[(asset, d_iso)] = row
-            est_series[asset].append((d, estimate_hours))
-
-
-
-
-    # Next service markers (1/2/3). Latest JSON has date_of_next_service_1 and _2, but NOT _3.
-    for asset in asset_list:
-
-
-        base_hours = cint((seed_by_asset.get(asset) or {}).get("hours")) or 0
-        if base_hours <= 0:
-            continue
-
-
-        planned1 = round_to_250(base_hours)
-        planned2 = ceiling_to_250(planned1 + 250)
-        planned3 = ceiling_to_250(planned2 + 250)
-
-
-        # Populate planned hours on EVERY row for this asset (child table visibility)
-        for d in date_list:
-            r_all = rows_index.get((asset, d.isoformat()))
-            if not r_all:
-                continue
-
-            r_all.planned_hours_next_service_1 = planned1
-            r_all.planned_hours_next_service_2 = planned2
-            r_all.planned_hours_next_service_3 = planned3
-
-
-            # NEW: populate intervals on every row once estimate reaches planned
-            est = float(r_all.estimate_hours or 0)
-
-            if est >= float(planned1):
-                r_all.next_service_interval_1 = f"{interval_from_planned_hours(planned1)} Hours"
-            if est >= float(planned2):
-                r_all.next_service_interval_2 = f"{interval_from_planned_hours(planned2)} Hours"
-            if est >= float(planned3):
-                r_all.next_service_interval_3 = f"{interval_from_planned_hours(planned3)} Hours"
-
-
-
-        d1 = find_threshold_crossing_date(est_series[asset], planned1)
-        d2 = find_threshold_crossing_date(est_series[asset], planned2)
-        d3 = find_threshold_crossing_date(est_series[asset], planned3)
-
-        d1 = adjust_sunday_to_saturday(d1, month_start=month_start)
-        d2 = adjust_sunday_to_saturday(d2, month_start=month_start)
-        d3 = adjust_sunday_to_saturday(d3, month_start=month_start)
-
-
-
-
-
-
-
+            asset_rows.append(row)
 
-        if d1:
-            r = rows_index.get((asset, d1.isoformat()))
-            if r:
-                r.date_of_next_service_1 = d1
-                r.planned_hours_next_service_1 = planned1
-                r.next_service_interval_1 = f"{interval_from_planned_hours(planned1)} Hours"
+        # Next service markers (1/2/3) from the latest MSR hours
+        apply_service_markers(asset_rows, seed_by_asset[asset]["hours"], month_start=month_start)
+        schedule_rows.extend(asset_rows)
 
 
-        if d2:
-            r = rows_index.get((asset, d2.isoformat()))
-            if r:
-                r.date_of_next_service_2 = d2
-                r.planned_hours_next_service_2 = planned2
-                r.next_service_interval_2 = f"{interval_from_planned_hours(planned2)} Hours"
-
-
-        if d3:
-            r = rows_index.get((asset, d3.isoformat()))
-            if r:
-                r.date_of_next_service_3 = d3
-                r.planned_hours_next_service_3 = planned3
-                r.next_service_interval_3 = f"{interval_from_planned_hours(planned3)} Hours"
-
 
 
     # OEM Booking flags: current + previous month window
     lookup_start = add_months(month_start, -1)
-    recompute_oem_booking_flags(doc, lookup_start, month_end)
-
-    doc.save()
+    apply_oem_booking_flags(schedule_rows, lookup_start, month_end)
+
+    changes = write_schedule_rows(doc.name, schedule_rows)
+    seconds = round(time.perf_counter() - started, 3)
+
+    frappe.db.set_value(
+        "Service Schedule",
+        doc.name,
+        {
+            "last_generated_on": now_datetime(),
+            "generation_seconds": seconds,
+            "rows_inserted": changes["inserted"],
+            "rows_updated": changes["updated"],
+            "rows_removed": changes["removed"],
+            "rows_unchanged": changes["unchanged"],
+        },
+    )
     frappe.db.commit()
-    return {"ok": True, "rows": len(doc.service_schedule_child)}
+    return {"ok": True, "rows": len(schedule_rows), "seconds": seconds, **changes}
 
 @frappe.whitelist()
 def set_daily_usage_and_recompute(schedule_name, fleet_number, daily_usage):
-    """Capture daily usage edits from HTML and recompute estimates + next service markers for that asset."""
+    """Capture daily usage edits from HTML and recompute estimates + next service markers for that asset.
+
+    Only this asset's rows are recomputed, and only the rows that changed are written.
+    """
     doc = frappe.get_doc("Service Schedule", schedule_name)
+    doc.check_permission("write")
     if not doc.month:
         frappe.throw("Month is required.")
     _, _, month_start, month_end = parse_month_bounds(doc.month)
@@ -743,117 +611,83 @@ def set_daily_usage_and_recompute(schedule_name, fleet_number, daily_usage):
 
     rows = [r for r in doc.service_schedule_child if r.fleet_number == fleet_number]
     rows.sort(key=lambda r: getdate(r.date))
+    before = snapshot_rows(rows)
 
-    prev_estimate = None
-    prev_start_hours = None
-    series = []
-    for r in rows:
+    curve = estimate_curve([r.start_hours for r in rows], daily_use)
+    for r, estimate_hours in zip(rows, curve):
         r.daily_estimated_hours_usage = daily_use
-        start_hours = float(r.start_hours or 0)
+        r.estimate_hours = estimate_hours
         # keep MSR link fields stable (never None)
         r.msr_reference_number = str(r.msr_reference_number or "")
         r.msr_record_name = str(r.msr_record_name or "")
 
-        # RULE:
-        # Day 1: Est = Day 1 start_hours
-        # Day 2..end:
-        #   if previous day had start_hours -> Est = prev_start_hours + daily_use
-        #   else -> Est = prev_estimate + daily_use
-        if prev_estimate is None or getdate(r.date) == month_start:
-            r.estimate_hours = start_hours
-        else:
-            if float(prev_start_hours or 0.0) > 0:
-                r.estimate_hours = float(prev_start_hours) + float(daily_use)
-            else:
-                r.estimate_hours = float(prev_estimate) + float(daily_use)
-
-
-        prev_estimate = float(r.estimate_hours or 0.0)
-        prev_start_hours = start_hours
-        series.append((getdate(r.date), float(r.estimate_hours or 0.0)))
-
-        # clear markers
-        r.date_of_next_service_1 = None
-        r.planned_hours_next_service_1 = None
-        r.next_service_interval_1 = ""
-
-        r.date_of_next_service_2 = None
-        r.planned_hours_next_service_2 = None
-        r.next_service_interval_2 = ""
-
-        r.date_of_next_service_3 = None
-        r.planned_hours_next_service_3 = None
-        r.next_service_interval_3 = ""
-
-
-    if rows:
-        # Use the FIRST row where hours_previous_service > 0 (rows already sorted by date)
-        base_hours = 0
-        for r0 in rows:
-            bh = cint(r0.hours_previous_service) or 0
-            if bh > 0:
-                base_hours = bh
-                break
-
-        if base_hours > 0:
-
-            planned1 = round_to_250(base_hours)
-            planned2 = ceiling_to_250(planned1 + 250)
-            planned3 = ceiling_to_250(planned2 + 250)
-
-
-            # Populate planned hours on EVERY row for this fleet (child table visibility)
-            for r in rows:
-                r.planned_hours_next_service_1 = planned1
-                r.planned_hours_next_service_2 = planned2
-                r.planned_hours_next_service_3 = planned3
-
-                # NEW: populate intervals on every row once estimate reaches planned
-                est = float(r.estimate_hours or 0)
-
-                if est >= float(planned1):
-                    r.next_service_interval_1 = f"{interval_from_planned_hours(planned1)} Hours"
-                if est >= float(planned2):
-                    r.next_service_interval_2 = f"{interval_from_planned_hours(planned2)} Hours"
-                if est >= float(planned3):
-                    r.next_service_interval_3 = f"{interval_from_planned_hours(planned3)} Hours"
-
-
-            d1 = adjust_sunday_to_saturday(find_threshold_crossing_date(series, planned1), month_start=month_start)
-            d2 = adjust_sunday_to_saturday(find_threshold_crossing_date(series, planned2), month_start=month_start)
-            d3 = adjust_sunday_to_saturday(find_threshold_crossing_date(series, planned3), month_start=month_start)
-
-
+    # Use the FIRST row where hours_previous_service > 0 (rows already sorted by date)
+    base_hours = next((cint(r.hours_previous_service) for r in rows if cint(r.hours_previous_service) > 0), 0)
+    apply_service_markers(rows, base_hours, month_start=month_start)
 
+    lookup_start = add_months(month_start, -1)
+    apply_oem_booking_flags(rows, lookup_start, month_end)
+
+    updated = update_changed_rows(rows, before)
+    if updated:
+        frappe.db.set_value(
+            "Service Schedule",
+            doc.name,
+            {"modified": now_datetime(), "modified_by": frappe.session.user},
+            update_modified=False,
+        )
 
+    frappe.db.commit()
+    return {"ok": True, "rows": len(rows), "updated": updated}
 
 
-            if d1:
-                for r in rows:
-                    if getdate(r.date) == d1:
-                        r.date_of_next_service_1 = d1
-                        r.planned_hours_next_service_1 = planned1
-                        r.next_service_interval_1 = f"{interval_from_planned_hours(planned1)} Hours"
-                        break
-            if d2:
-                for r in rows:
-                    if getdate(r.date) == d2:
-                        r.date_of_next_service_2 = d2
-                        r.planned_hours_next_service_2 = planned2
-                        r.next_service_interval_2 = f"{interval_from_planned_hours(planned2)} Hours"
-                        break
-            if d3:
-                for r in rows:
-                    if getdate(r.date) == d3:
-                        r.date_of_next_service_3 = d3
-                        r.planned_hours_next_service_3 = planned3
-                        r.next_service_interval_3 = f"{interval_from_planned_hours(planned3)} Hours"
+@frappe.whitelist()
+def project_service_due_dates(site=None, months=3):
+    """
+    Straight-line service forecast for the fleet (or one site) over the
+    next months (3 or 6): every 250-hour service each asset reaches, from
+    its latest Pre-Use start hours, 30-day average usage and last MSR.
+    """
+    months = min(max(cint(months) or 3, 1), 12)
+    start_date = getdate(nowdate())
+    days = (getdate(add_months(start_date, months)) - start_date).days
+
+    filters = {
+        "docstatus": 1,
+        "asset_category": ["in", SCHEDULE_ASSET_CATEGORIES],
+    }
+    if site:
+        filters["location"] = site
+
+    assets = frappe.get_all(
+        "Asset",
+        filters=filters,
+        fields=["name", "location", "asset_category", "item_name", "item_code"],
+        order_by="name asc",
+    )
+    asset_list = [a["name"] for a in assets]
 
-                        break
+    usage_window = UsageWindow.load(asset_list, start_date + timedelta(days=1))
+    msr_map = batch_get_service_reports(asset_list, start_date, start_date)
 
-    lookup_start = add_months(month_start, -1)
-    recompute_oem_booking_flags(doc, lookup_start, month_end)
+    out = []
+    for a in assets:
+        asset = a["name"]
+        msr = msr_map.get(asset) or {}
+        last_service = (msr.get("within") or [None])[-1] or msr.get("before")
+        base_hours = cint(last_service.get("current_hours")) if last_service else 0
+        current_hours = usage_window.carry_forward_start_hours(asset)
+        daily_usage = usage_window.average_daily_usage(asset)
+
+        out.append({
+            "fleet_number": asset,
+            "site": a.get("location"),
+            "asset_category": a.get("asset_category"),
+            "model": a.get("item_name") or a.get("item_code"),
+            "current_hours": current_hours,
+            "daily_usage": daily_usage,
+            "last_service_hours": base_hours,
+            "due": projected_services(start_date, current_hours, daily_usage, base_hours, days),
+        })
 
-    doc.save()
-    frappe.db.commit()
-    return {"ok": True, "rows": len(rows)}
+    return out
@@ -0,0 +1,149 @@
+# usage_engine.py
+# Batched Pre-Use readings for Service Schedule generation.
+#
+# Loads the Pre-Use Hours readings before a schedule month for every asset
+# of the site in one query, grouped into a per-asset series sorted by date.
+# From that series it answers, per asset:
+#
+#   - average_daily_usage(): mean of non-negative day-to-day deltas of
+#     Day-shift eng_hrs_start over the 30 days before the month
+#     (same rule as get_last_30_day_avg_daily_usage)
+#   - carry_forward_start_hours(): latest eng_hrs_start > 0 in the 92 days
+#     before the month, Night before Day on the same date
+#     (same rule as get_latest_prev_start_hours)
+
+from datetime import timedelta
+
+import frappe
+from frappe.utils import getdate
+
+
+DEFAULT_DAILY_USAGE = 15.0
+
+USAGE_WINDOW_DAYS = 30
+
+# get_latest_prev_start_hours stops looking this many days back.
+CARRY_FORWARD_DAYS = 92
+
+# ORDER BY FIELD(shift, 'Night', 'Day'): other shifts sort first.
+SHIFT_PRIORITY = {"Night": 1, "Day": 2}
+
+
+def _asset_key(asset_name):
+    return (asset_name or "").strip().casefold()
+
+
+def _clamp(value, min_val=0.0, max_val=24.0):
+    return max(float(min_val), min(float(value), float(max_val)))
+
+
+def average_daily_usage(readings):
+    """
+    readings: {date: eng_hrs_start} of Day-shift readings.
+    Mean of non-negative deltas between consecutive days, rounded and
+    clamped to 0..24; DEFAULT_DAILY_USAGE when there is no delta.
+    """
+    deltas = []
+    prev_date = None
+    prev_val = None
+
+    for dt in sorted(readings):
+        val = readings[dt]
+
+        if prev_date is not None and (dt - prev_date).days == 1:
+            delta = val - prev_val
+            # keep non-negative only (ignore resets / bad data)
+            if delta >= 0:
+                deltas.append(delta)
+
+        prev_date = dt
+        prev_val = val
+
+    if not deltas:
+        return DEFAULT_DAILY_USAGE
+
+    return int(round(_clamp(sum(deltas) / float(len(deltas)))))
+
+
+class UsageWindow:
+    """Pre-Use readings before month_start for a set of assets."""
+
+    def __init__(self, month_start, series):
+        self.month_start = getdate(month_start)
+        # asset -> [(shift_date, shift, eng_hrs_start)] sorted by date
+        self.series = series
+
+    @classmethod
+    def load(cls, asset_list, month_start):
+        month_start = getdate(month_start)
+        series = {asset: [] for asset in asset_list or []}
+
+        if not series:
+            return cls(month_start, series)
+
+        rows = frappe.db.sql(
+            """
+            SELECT
+                pa.asset_name,
+                pu.shift_date,
+                pu.shift,
+                pa.eng_hrs_start
+            FROM `tabPre-Use Hours` pu
+            JOIN `tabPre-use Assets` pa ON pa.parent = pu.name
+            WHERE
+                pa.asset_name IN %(assets)s
+                AND pu.shift_date BETWEEN %(start)s AND %(end)s
+            ORDER BY pu.shift_date ASC
+            """,
+            {
+                "assets": tuple(series),
+                "start": month_start - timedelta(days=CARRY_FORWARD_DAYS),
+                "end": month_start - timedelta(days=1),
+            },
+            as_dict=True,
+        )
+
+        # The IN match is case- and trailing-space-insensitive; file each
+        # reading under the asset name it was requested as.
+        requested = {_asset_key(asset): asset for asset in series}
+
+        for row in rows:
+            try:
+                hours = float(row.eng_hrs_start or 0)
+            except Exception:
+                hours = 0.0
+
+            asset = requested.get(_asset_key(row.asset_name), row.asset_name)
+            series.setdefault(asset, []).append((getdate(row.shift_date), row.shift, hours))
+
+        return cls(month_start, series)
+
+    def average_daily_usage(self, asset, anchor_date=None):
+        """Average usage over the 30 days ending at anchor_date (day before the month)."""
+        end = getdate(anchor_date) if anchor_date else self.month_start - timedelta(days=1)
+        start = end - timedelta(days=USAGE_WINDOW_DAYS - 1)
+
+        readings = {
+            shift_date: hours
+            for shift_date, shift, hours in self.series.get(asset) or []
+            if shift == "Day" and start <= shift_date <= end
+        }
+
+        if not readings:
+            return DEFAULT_DAILY_USAGE
+
+        return average_daily_usage(readings)
+
+    def carry_forward_start_hours(self, asset):
+        """Latest eng_hrs_start > 0 before the month (0.0 when none)."""
+        best = None
+
+        for shift_date, shift, hours in self.series.get(asset) or []:
+            if hours <= 0:
+                continue
+
+            key = (shift_date, -SHIFT_PRIORITY.get(shift, 0))
+            if best is None or key > best[0]:
+                best = (key, hours)
+
+        return best[1] if best else 0.0
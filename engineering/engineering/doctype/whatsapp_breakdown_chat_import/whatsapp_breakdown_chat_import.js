@@ -4,25 +4,35 @@ frappe.ui.form.on("WhatsApp Breakdown Chat Import", {
             return;
         }
 
+        frappe.realtime.off("whatsapp_chat_import_done");
+        frappe.realtime.on("whatsapp_chat_import_done", function (message) {
+            if (message && !message.failed) {
+                frappe.msgprint(
+                    __("Import completed.<br><br>Total Messages: {0}<br>Logs Created: {1}<br>Duplicates Skipped: {2}<br>Ignored Messages: {3}<br>Needs Review Messages: {4}", [
+                        message.total_messages_found || 0,
+                        message.logs_created || 0,
+                        message.duplicates_skipped || 0,
+                        message.ignored_messages || 0,
+                        message.needs_review_messages || 0
+                    ])
+                );
+            }
+
+            frm.reload_doc();
+        });
+
         frm.add_custom_button(__("Import WhatsApp Chat"), function () {
             frappe.call({
                 method: "engineering.engineering.doctype.whatsapp_breakdown_chat_import.whatsapp_breakdown_chat_import.import_chat",
                 args: {
                     import_name: frm.doc.name
                 },
-                freeze: true,
-                freeze_message: __("Importing WhatsApp chat..."),
                 callback: function (r) {
-                    if (r.message) {
-                        frappe.msgprint(
-                            __("Import completed.<br><br>Total Messages: {0}<br>Logs Created: {1}<br>Duplicates Skipped: {2}<br>Ignored Messages: {3}<br>Needs Review Messages: {4}", [
-                                r.message.total_messages_found || 0,
-                                r.message.logs_created || 0,
-                                r.message.duplicates_skipped || 0,
-                                r.message.ignored_messages || 0,
-                                r.message.needs_review_messages || 0
-                            ])
-                        );
+                    if (r.message && r.message.queued) {
+                        frappe.show_alert({
+                            message: __("WhatsApp chat import queued. Progress is shown while it runs."),
+                            indicator: "blue"
+                        });
                     }
 
                     frm.reload_doc();
@@ -1,18 +1,56 @@
 import os
 import re
 import zipfile
-import tempfile
+from datetime import timedelta
 
 import frappe
 from frappe.model.document import Document
-from frappe.utils import get_datetime, getdate, today
+from frappe.utils import get_datetime, getdate, now, today
 
+from engineering.engineering.doctype.whatsapp_breakdown_message_log.message_classifier import (
+    classify_message,
+    has_plant_number,
+    is_status_report,
+)
 from engineering.engineering.doctype.whatsapp_breakdown_message_log.whatsapp_breakdown_message_log import (
     parse_whatsapp_breakdown_message,
     create_or_update_breakdown,
 )
 
 
+LOG_DOCTYPE = "WhatsApp Breakdown Message Log"
+
+# Message logs written (and committed) per batch.
+IMPORT_BATCH_SIZE = 500
+
+LOG_FIELDS = (
+    "message_datetime",
+    "sender_name",
+    "group_name",
+    "target_site",
+    "target_shift",
+    "raw_message",
+    "source_message_id",
+    "source_chat_import",
+    "detected_plant_no",
+    "detected_action",
+    "detected_start_time",
+    "detected_book_back_time",
+    "detected_hours",
+    "detected_reason",
+    "detected_resolution",
+    "status",
+    "error_message",
+)
+
+WHATSAPP_LINE_PATTERN = re.compile(
+    r"^(?P<date>\d{4}[/-]\d{1,2}[/-]\d{1,2}|\d{1,2}[/-]\d{1,2}[/-]\d{4}),\s*"
+    r"(?P<time>\d{1,2}:\d{2})\s*(?P<ampm>[ap]\.?m\.?)?\s*-\s*"
+    r"(?P<body>.*)$",
+    re.IGNORECASE,
+)
+
+
 class WhatsAppBreakdownChatImport(Document):
     def autoname(self):
         site = self.target_site or self.group_name or "WhatsApp Import"
@@ -63,32 +101,60 @@ def get_file_path(file_url):
     return file_doc.get_full_path()
 
 
-def read_chat_text(file_path):
+def decode_chat_line(raw_line):
+    for encoding in ["utf-8", "cp1252", "latin-1"]:
+        try:
+            return raw_line.decode(encoding)
+        except Exception:
+            continue
+
+    return raw_line.decode("utf-8", errors="ignore")
+
+
+def iter_chat_lines(file_path, progress=None):
+    """
+    Yield the lines of a WhatsApp export (.txt, or the first .txt in a
+    .zip) one at a time, without reading the file into memory.
+
+    progress, when given, is a dict whose "read" / "total" byte counts are
+    kept up to date for progress reporting.
+    """
     if file_path.lower().endswith(".zip"):
         with zipfile.ZipFile(file_path, "r") as z:
-            txt_files = [name for name in z.namelist() if name.lower().endswith(".txt")]
+            txt_files = [info for info in z.infolist() if info.filename.lower().endswith(".txt")]
 
             if not txt_files:
                 frappe.throw("No .txt WhatsApp chat file found inside the zip.")
 
-            with tempfile.TemporaryDirectory() as tmpdir:
-                name = txt_files[0]
-                z.extract(name, tmpdir)
-                extracted_path = os.path.join(tmpdir, name)
+            if progress is not None:
+                progress["total"] = txt_files[0].file_size
 
-                with open(extracted_path, "rb") as f:
-                    raw = f.read()
+            with z.open(txt_files[0], "r") as f:
+                yield from _iter_decoded_lines(f, progress)
     else:
+        if progress is not None:
+            progress["total"] = os.path.getsize(file_path)
+
         with open(file_path, "rb") as f:
-            raw = f.read()
+            yield from _iter_decoded_lines(f, progress)
 
-    for encoding in ["utf-8", "utf-8-sig", "cp1252", "latin-1"]:
-        try:
-            return raw.decode(encoding)
-        except Exception:
-            continue
 
-    return raw.decode("utf-8", errors="ignore")
+def _iter_decoded_lines(f, progress):
+    first = True
+
+    for raw_line in f:
+        if progress is not None:
+            progress["read"] = progress.get("read", 0) + len(raw_line)
+
+        if first:
+            raw_line = raw_line.removeprefix(b"\xef\xbb\xbf")
+            first = False
+
+        yield decode_chat_line(raw_line).rstrip("\r\n")
+
+
+def read_chat_text(file_path):
+    return "\n".join(iter_chat_lines(file_path))
 
 
 def normalize_message_text(text):
@@ -129,26 +195,17 @@ def parse_whatsapp_datetime(date_text, time_text, ampm):
     return get_datetime()
 
 
-def parse_exported_chat(chat_text):
-    chat_text = normalize_message_text(chat_text)
-
-    pattern = re.compile(
-        r"^(?P<date>\d{4}[/-]\d{1,2}[/-]\d{1,2}|\d{1,2}[/-]\d{1,2}[/-]\d{4}),\s*"
-        r"(?P<time>\d{1,2}:\d{2})\s*(?P<ampm>[ap]\.?m\.?)?\s*-\s*"
-        r"(?P<body>.*)$",
-        re.IGNORECASE,
-    )
-
-    messages = []
+def iter_exported_chat(lines):
+    """Yield exported-chat messages lazily from an iterable of lines."""
     current = None
 
-    for line in chat_text.split("\n"):
-        line = line.rstrip()
-        match = pattern.match(line)
+    for line in lines:
+        line = line.replace("\u202f", " ").replace("\xa0", " ").rstrip()
+        match = WHATSAPP_LINE_PATTERN.match(line)
 
         if match:
             if current:
-                messages.append(current)
+                yield current
 
             body = match.group("body") or ""
 
@@ -173,38 +230,20 @@ def parse_exported_chat(chat_text):
                 current["message"] = (current["message"] + "\n" + line).strip()
 
     if current:
-        messages.append(current)
+        yield current
+
 
-    return messages
+def parse_exported_chat(chat_text):
+    chat_text = normalize_message_text(chat_text)
+    return list(iter_exported_chat(chat_text.split("\n")))
 
 
 def contains_plant_number(text):
-    return bool(re.search(r"\b(IS|EX)\s*0*\d{2,4}\b", text or "", re.IGNORECASE))
+    return has_plant_number(text)
 
 
 def is_full_status_report(text):
-    text_lower = (text or "").lower()
-
-    status_markers = [
-        "breakdown reports",
-        "available adt",
-        "available adt's",
-        "available adts",
-        "excavators",
-        "dozers",
-        "water bowsers",
-        "graders",
-    ]
-
-    marker_count = sum(1 for marker in status_markers if marker in text_lower)
-
-    if marker_count >= 2:
-        return True
-
-    if "available" in text_lower and ("✅" in text_lower or "❌" in text_lower):
-        return True
-
-    return False
+    return is_status_report((text or "").lower())
 
 
 def is_system_or_blank_message(message_text):
@@ -231,16 +270,122 @@ def make_unique_source_id(import_name, message_datetime, sender, message):
     return frappe.generate_hash(base, 20)
 
 
+def get_imported_source_ids(import_name, import_from_date, import_to_date):
+    """Source message ids this import already logged in the date range, in one query."""
+    return set(frappe.get_all(
+        LOG_DOCTYPE,
+        filters={
+            "source_chat_import": import_name,
+            "message_datetime": [
+                "between",
+                [
+                    f"{import_from_date} 00:00:00",
+                    f"{import_to_date + timedelta(days=1)} 00:00:00",
+                ],
+            ],
+        },
+        pluck="source_message_id",
+    ))
+
+
+def insert_message_logs(logs):
+    """Bulk-insert prepared message logs (already parsed, as validate would)."""
+    if not logs:
+        return
+
+    timestamp = now()
+    user = frappe.session.user
+    fields = ["name", "creation", "modified", "owner", "modified_by", *LOG_FIELDS]
+
+    values = [
+        (
+            frappe.generate_hash(length=10),
+            timestamp,
+            timestamp,
+            user,
+            user,
+            *(log.get(field) for field in LOG_FIELDS),
+        )
+        for log in logs
+    ]
+
+    frappe.db.bulk_insert(LOG_DOCTYPE, fields, values, chunk_size=IMPORT_BATCH_SIZE)
+
+
+def publish_import_progress(doc, progress, counts):
+    total = progress.get("total") or 0
+    percent = min(progress.get("read", 0) / total * 100, 100) if total else 0
+
+    frappe.publish_progress(
+        percent,
+        title="Importing WhatsApp chat",
+        doctype=doc.doctype,
+        docname=doc.name,
+        description=f"{counts['total']} messages read, {counts['created']} logs created",
+    )
+
+
 @frappe.whitelist()
 def import_chat(import_name):
+    """Queue the import; large exports run far longer than a web request."""
+    doc = frappe.get_doc("WhatsApp Breakdown Chat Import", import_name)
+    doc.check_permission("write")
+
+    get_file_path(doc.chat_file)
+
+    if doc.import_status in ("Queued", "Importing"):
+        frappe.throw(f"This chat is already {doc.import_status.lower()}. Wait for it to finish.")
+
+    doc.db_set("import_status", "Queued")
+
+    frappe.enqueue(
+        "engineering.engineering.doctype.whatsapp_breakdown_chat_import.whatsapp_breakdown_chat_import.run_chat_import",
+        queue="long",
+        job_name=f"whatsapp_chat_import::{import_name}",
+        job_id=f"whatsapp_chat_import::{import_name}",
+        deduplicate=True,
+        timeout=3600,
+        import_name=import_name,
+        user=frappe.session.user,
+    )
+
+    return {"queued": True}
+
+
+def run_chat_import(import_name, user=None):
+    try:
+        result = process_chat_import(import_name)
+    except Exception:
+        frappe.db.rollback()
+        frappe.db.set_value("WhatsApp Breakdown Chat Import", import_name, {
+            "import_status": "Failed",
+            "error_message": frappe.get_traceback()[-1000:],
+        })
+        frappe.db.commit()
+        frappe.log_error(frappe.get_traceback(), f"WhatsApp chat import failed: {import_name}")
+        result = {"failed": True}
+
+    frappe.publish_realtime(
+        "whatsapp_chat_import_done",
+        result,
+        doctype="WhatsApp Breakdown Chat Import",
+        docname=import_name,
+        user=user,
+    )
+
+    return result
+
+
+def process_chat_import(import_name):
     doc = frappe.get_doc("WhatsApp Breakdown Chat Import", import_name)
 
     file_path = get_file_path(doc.chat_file)
-    chat_text = read_chat_text(file_path)
-    parsed_messages = parse_exported_chat(chat_text)
+    progress = {"read": 0, "total": 0}
 
-    total = 0
-    created = 0
+    counts = {
+        "total": 0,
+        "created": 0,
+    }
     duplicates = 0
     ignored = 0
     needs_review = 0
@@ -251,8 +396,29 @@ def import_chat(import_name):
     import_from_date = getdate(doc.import_from_date or "2026-06-01")
     import_to_date = getdate(doc.import_to_date or today())
 
-    for msg in parsed_messages:
-        total += 1
+    seen_source_ids = get_imported_source_ids(doc.name, import_from_date, import_to_date)
+    pending_logs = []
+
+    def flush():
+        insert_message_logs(pending_logs)
+        counts["created"] += len(pending_logs)
+        pending_logs.clear()
+
+        frappe.db.set_value(
+            "WhatsApp Breakdown Chat Import",
+            doc.name,
+            {
+                "import_status": "Importing",
+                "total_messages_found": counts["total"],
+                "logs_created": counts["created"],
+            },
+            update_modified=False,
+        )
+        frappe.db.commit()
+        publish_import_progress(doc, progress, counts)
+
+    for msg in iter_exported_chat(iter_chat_lines(file_path, progress)):
+        counts["total"] += 1
 
         message_text = normalize_message_text(msg.get("message"))
         sender = msg.get("sender") or ""
@@ -274,81 +440,78 @@ def import_chat(import_name):
             message_text,
         )
 
-        if frappe.db.exists(
-            "WhatsApp Breakdown Message Log",
-            {"source_message_id": source_id},
-        ):
+        if source_id in seen_source_ids:
             duplicates += 1
             continue
 
+        # One pass over the text answers the status-report, plant and parse
+        # questions below.
+        classification = classify_message(message_text, doc.group_name)
+
         # Status reports are ignored outright when requested. They must not be
         # parsed into Book Down / Book Back actions or Needs Review records.
-        if doc.skip_status_reports and is_full_status_report(message_text):
+        if doc.skip_status_reports and classification["is_status_report"]:
             skipped_status_reports += 1
             ignored += 1
             continue
 
+        log = frappe.new_doc(LOG_DOCTYPE)
+        log.message_datetime = message_datetime
+        log.sender_name = sender
+        log.group_name = doc.group_name
+        log.target_site = doc.target_site
+        log.raw_message = message_text
+        log.source_message_id = source_id
+        log.source_chat_import = doc.name
+
         # When only plant-related messages are requested, a message without a
         # plant number is an ignored message. Create an Ignored log only when
         # the user has not asked to skip ignored messages.
-        if doc.only_messages_with_plant and not contains_plant_number(message_text):
+        if doc.only_messages_with_plant and not classification["contains_plant_number"]:
             ignored += 1
 
             if doc.skip_ignored_messages:
                 continue
 
-            log = frappe.new_doc("WhatsApp Breakdown Message Log")
-            log.message_datetime = message_datetime
-            log.sender_name = sender
-            log.group_name = doc.group_name
-            log.target_site = doc.target_site
-            log.raw_message = message_text
-            log.source_message_id = source_id
-            log.source_chat_import = doc.name
-            log.detected_action = "Unknown"
-            log.status = "Ignored"
-            log.error_message = "Ignored because no plant number was found."
-            log.insert(ignore_permissions=True)
-
-            created += 1
-            continue
+            # Same result as the individual insert, whose validate re-parsed it.
+            parse_whatsapp_breakdown_message(log, classification)
 
-        log = frappe.new_doc("WhatsApp Breakdown Message Log")
-        log.message_datetime = message_datetime
-        log.sender_name = sender
-        log.group_name = doc.group_name
-        log.target_site = doc.target_site
-        log.raw_message = message_text
-        log.source_message_id = source_id
-        log.source_chat_import = doc.name
+            seen_source_ids.add(source_id)
+            pending_logs.append(log)
+        else:
+            parse_whatsapp_breakdown_message(log, classification)
 
-        parse_whatsapp_breakdown_message(log)
+            if log.status == "Needs Review":
+                needs_review += 1
 
-        if log.status == "Needs Review":
-            needs_review += 1
+                if doc.skip_needs_review_messages:
+                    continue
 
-            if doc.skip_needs_review_messages:
-                continue
+            if log.status == "Ignored":
+                ignored += 1
 
-        if log.status == "Ignored":
-            ignored += 1
+                if doc.skip_ignored_messages:
+                    continue
 
-            if doc.skip_ignored_messages:
+            if log.detected_action == "Book Down" and not doc.import_book_down_messages:
+                skipped_by_action += 1
                 continue
 
-        if log.detected_action == "Book Down" and not doc.import_book_down_messages:
-            skipped_by_action += 1
-            continue
+            if log.detected_action == "Book Back" and not doc.import_book_back_messages:
+                skipped_by_action += 1
+                continue
 
-        if log.detected_action == "Book Back" and not doc.import_book_back_messages:
-            skipped_by_action += 1
-            continue
+            seen_source_ids.add(source_id)
+            pending_logs.append(log)
+
+        if len(pending_logs) >= IMPORT_BATCH_SIZE:
+            flush()
 
-        log.insert(ignore_permissions=True)
-        created += 1
+    flush()
 
-    doc.total_messages_found = total
-    doc.logs_created = created
+    doc.reload()
+    doc.total_messages_found = counts["total"]
+    doc.logs_created = counts["created"]
     doc.duplicates_skipped = duplicates
     doc.ignored_messages = ignored
     doc.needs_review_messages = needs_review
@@ -377,8 +540,8 @@ def import_chat(import_name):
     frappe.db.commit()
 
     return {
-        "total_messages_found": total,
-        "logs_created": created,
+        "total_messages_found": counts["total"],
+        "logs_created": counts["created"],
         "duplicates_skipped": duplicates,
         "ignored_messages": ignored,
         "needs_review_messages": needs_review,
@@ -0,0 +1,400 @@
+# message_classifier.py
+# Single-pass classifier for WhatsApp breakdown messages.
+#
+# Every pattern is compiled once at import. classify_message() lowercases
+# and splits a message once and returns everything the message log and the
+# chat importer need: action, plant numbers, start / book-back times, hours,
+# reason / resolution, review and status-report flags, and the site
+# inferred from the group name.
+#
+# benchmark_classifier() measures the per-message cost over the exported
+# chats attached to WhatsApp Breakdown Chat Import records.
+
+import re
+import time
+
+
+PLANT_PATTERN = re.compile(r"\b(IS|EX)\s*0*(\d{2,4})\b", re.IGNORECASE)
+PLANT_LINE_PATTERN = re.compile(r"(IS|EX)\s*0*\d{2,4}", re.IGNORECASE)
+
+TIME_PATTERN = re.compile(r"(\d{1,2})[:hH]?(\d{2})")
+
+START_PATTERN = re.compile(
+    r"\b(stop|start|stopped|breakdown start|bd start|booked down|book down|down)\b\s*[:@\-]?\s*(\d{1,2}[:hH]?\d{2})",
+    re.IGNORECASE,
+)
+BOOK_BACK_PATTERN = re.compile(
+    r"\b(book\s*back|bookback|booked back|back|return|returned)\b\s*[:@\-]?\s*(\d{1,2}[:hH]?\d{2})",
+    re.IGNORECASE,
+)
+HOURS_PATTERN = re.compile(
+    r"\b(smr|hrs|hours|hour)\b\s*[:\-]?\s*(\d+(?:\.\d+)?)",
+    re.IGNORECASE,
+)
+
+MANUAL_GROUP_PATTERN = re.compile(r"^group name\s*:\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+MANUAL_RAW_PATTERN = re.compile(r"^raw message\s*:\s*(.+)$", re.IGNORECASE | re.MULTILINE)
+
+REASON_PREFIX_PATTERN = re.compile(r"^[:\-\s]+")
+
+# Resolution lines that only repeat the booking itself (matched on lower case).
+RESOLUTION_START_LINE = re.compile(
+    r"^(stop|start|stopped|breakdown start|bd start|booked down|book down|down)\b\s*[:@\-]?\s*\d{1,2}[:hH]?\d{2}"
+)
+RESOLUTION_BOOK_BACK_LINE = re.compile(
+    r"^(please\s+)?(book\s*back|bookback|booked back|back|return|returned)\b"
+)
+RESOLUTION_HOURS_LINE = re.compile(r"^(smr|hrs|hours|hour)\b\s*[:\-]?\s*\d+(?:\.\d+)?\s*$")
+
+STATUS_LINE_PATTERN = re.compile(r"^[✅❌🚫]\s*(is|ex)\s*0*\d{2,4}", re.IGNORECASE)
+
+
+def _phrase_pattern(phrases):
+    return re.compile("|".join(re.escape(phrase) for phrase in phrases))
+
+
+BOOK_BACK_MARKERS = _phrase_pattern([
+    "book back",
+    "bookback",
+    "booked back",
+    "please book back",
+])
+
+BOOK_DOWN_MARKERS = _phrase_pattern([
+    "book down",
+    "bookdown",
+    "booked down",
+    "stop:",
+    "stopped",
+])
+
+REVIEW_PHRASES = _phrase_pattern([
+    "incident report",
+    "waiting for the incident report",
+    "need an incident report",
+    "write the incident report",
+    "standing till tomorrow",
+    "will be standing",
+    "please remove",
+    "pls remove",
+    "remove the comment",
+    "change the comment",
+    "please add",
+    "pls add",
+    "from gwab list",
+    "from the list",
+    "to our list",
+    "please share km",
+    "share km",
+    "km readings",
+    "can we please have hours",
+    "please have hours",
+    "which one",
+    "feedback",
+    "who is attending",
+    "who's attending",
+    "offsite change",
+    "off site change",
+    "no breakdowns",
+    "back to production",
+    "power off",
+    "electricity",
+    "please note",
+    "pls note",
+    "please arrange",
+    "arrange a diesel bowser",
+    "must go to hino",
+    "hino for service",
+    "yes all",
+    "moved this morning",
+    "not on the report",
+])
+
+SHORT_REPLIES = frozenset(["yes", "no", "nope", "thanks", "ps"])
+
+STATUS_REPORT_MARKERS = (
+    "breakdown reports",
+    "available adt",
+    "available adt's",
+    "available adts",
+    "excavators",
+    "dozers",
+    "water bowsers",
+    "graders",
+)
+
+SITE_KEYWORDS = (
+    ("kriel", "Kriel Rehabilitation"),
+    ("krr", "Kriel Rehabilitation"),
+    ("klip", "Klipfontein"),
+    ("gwab", "Gwab"),
+    ("koppie", "Koppie"),
+    ("uit", "Uitgevallen"),
+    ("bank", "Bankfontein"),
+    ("bnk", "Bankfontein"),
+)
+
+# Budget for benchmark_classifier(): mean cost per message.
+MAX_MEAN_MICROSECONDS = 100
+
+
+def parse_time(value):
+    """'7:30', '0730', '7h30' -> '07:30:00'; None when not a valid time."""
+    if not value:
+        return None
+
+    match = TIME_PATTERN.search(str(value).strip().lower().replace(" ", ""))
+    if not match:
+        return None
+
+    hour = int(match.group(1))
+    minute = int(match.group(2))
+
+    if hour > 23 or minute > 59:
+        return None
+
+    return f"{hour:02d}:{minute:02d}:00"
+
+
+def infer_site(group_name):
+    group_name = (group_name or "").lower()
+
+    for keyword, site in SITE_KEYWORDS:
+        if keyword in group_name:
+            return site
+
+    return None
+
+
+def has_plant_number(text):
+    return bool(PLANT_PATTERN.search(text or ""))
+
+
+def is_review_only(lower):
+    """Review-only check on an already lower-cased, stripped message."""
+    # Proper Book Back / Book Down messages are never review-only.
+    if BOOK_BACK_MARKERS.search(lower) or BOOK_DOWN_MARKERS.search(lower):
+        return False
+
+    if REVIEW_PHRASES.search(lower):
+        return True
+
+    if "?" in lower:
+        return True
+
+    if lower in SHORT_REPLIES:
+        return True
+
+    if STATUS_LINE_PATTERN.match(lower):
+        return True
+
+    return False
+
+
+def is_status_report(lower):
+    """Full fleet status report, on an already lower-cased message."""
+    if sum(1 for marker in STATUS_REPORT_MARKERS if marker in lower) >= 2:
+        return True
+
+    return "available" in lower and ("✅" in lower or "❌" in lower)
+
+
+def classify_message(raw_message, group_name=None):
+    """
+    Classify one message. Returns a dict with:
+
+        action, status, error_message, plant_no, plant_numbers,
+        start_time, book_back_time, hours, reason, resolution,
+        site, manual_group_name, contains_plant_number, is_status_report
+    """
+    text = str(raw_message or "").strip()
+
+    result = {
+        "action": None,
+        "status": None,
+        "error_message": None,
+        "plant_no": None,
+        "plant_numbers": [],
+        "start_time": None,
+        "book_back_time": None,
+        "hours": None,
+        "reason": None,
+        "resolution": None,
+        "site": infer_site(group_name),
+        "manual_group_name": None,
+        "contains_plant_number": False,
+        "is_status_report": False,
+    }
+
+    if not text:
+        result["status"] = "Needs Review"
+        result["error_message"] = "Raw Message is empty."
+        return result
+
+    full_lower = text.lower()
+    result["is_status_report"] = is_status_report(full_lower)
+    result["contains_plant_number"] = bool(PLANT_PATTERN.search(text))
+
+    # Manual test format:
+    # Group Name: Kriel Control Room Room
+    # Raw Message: IS570 Faulty emergency stop button
+    if "group name" in full_lower:
+        manual_group_match = MANUAL_GROUP_PATTERN.search(text)
+        if manual_group_match:
+            result["manual_group_name"] = manual_group_match.group(1).strip()
+
+    if "raw message" in full_lower:
+        manual_raw_match = MANUAL_RAW_PATTERN.search(text)
+        if manual_raw_match:
+            text = manual_raw_match.group(1).strip()
+
+    text_lower = text.lower()
+
+    plant_matches = PLANT_PATTERN.findall(text)
+    result["plant_numbers"] = [f"{prefix.upper()}{number}" for prefix, number in plant_matches]
+
+    if not plant_matches:
+        result["action"] = "Unknown"
+        result["status"] = "Needs Review"
+        result["error_message"] = "Could not detect plant number like IS570 or EX230."
+        return result
+
+    result["plant_no"] = result["plant_numbers"][0]
+
+    if is_review_only(text_lower.strip()):
+        result["action"] = "Unknown"
+        result["status"] = "Needs Review"
+        result["error_message"] = "Message mentions a machine, but is not a clear Book Down or Book Back message."
+        return result
+
+    start_match = START_PATTERN.search(text)
+    if start_match:
+        result["start_time"] = parse_time(start_match.group(2))
+
+    book_back_match = BOOK_BACK_PATTERN.search(text)
+    if book_back_match:
+        result["book_back_time"] = parse_time(book_back_match.group(2))
+
+    hours_match = HOURS_PATTERN.search(text)
+    if hours_match:
+        result["hours"] = float(hours_match.group(2))
+
+    if result["book_back_time"] or "book back" in text_lower or "bookback" in text_lower:
+        result["action"] = "Book Back"
+    else:
+        result["action"] = "Book Down"
+
+    if result["action"] == "Book Down":
+        reason = PLANT_PATTERN.sub("", text).strip()
+        reason = REASON_PREFIX_PATTERN.sub("", reason).strip()
+
+        if reason:
+            result["reason"] = reason
+            result["status"] = "Parsed"
+        else:
+            result["status"] = "Needs Review"
+            result["error_message"] = "Book Down detected, but no breakdown reason found."
+
+        return result
+
+    resolution_lines = []
+
+    for line in text.splitlines():
+        line = line.strip()
+        if not line:
+            continue
+
+        line_lower = line.lower()
+
+        if line_lower in ("edited", "(edited)"):
+            continue
+
+        if PLANT_LINE_PATTERN.fullmatch(line):
+            continue
+
+        if RESOLUTION_START_LINE.search(line_lower):
+            continue
+
+        if RESOLUTION_BOOK_BACK_LINE.search(line_lower):
+            continue
+
+        if RESOLUTION_HOURS_LINE.search(line_lower):
+            continue
+
+        resolution_lines.append(line)
+
+    if resolution_lines:
+        result["resolution"] = "\n".join(resolution_lines).strip()
+
+    result["status"] = "Parsed"
+    return result
+
+
+def benchmark_classifier(import_names=None, limit=None, max_mean_microseconds=MAX_MEAN_MICROSECONDS):
+    """
+    Time classify_message() over the chat exports attached to WhatsApp
+    Breakdown Chat Import records (all of them, or import_names).
+
+        bench --site <site> execute engineering.engineering.doctype.whatsapp_breakdown_message_log.message_classifier.benchmark_classifier
+    """
+    import frappe
+
+    from engineering.engineering.doctype.whatsapp_breakdown_chat_import.whatsapp_breakdown_chat_import import (
+        get_file_path,
+        iter_chat_lines,
+        iter_exported_chat,
+        normalize_message_text,
+    )
+
+    filters = {"chat_file": ["is", "set"]}
+    if import_names:
+        filters["name"] = ["in", frappe.parse_json(import_names) if isinstance(import_names, str) else import_names]
+
+    imports = frappe.get_all(
+        "WhatsApp Breakdown Chat Import",
+        filters=filters,
+        fields=["name", "chat_file", "group_name"],
+    )
+
+    timings = []
+    actions = {}
+
+    for chat_import in imports:
+        try:
+            file_path = get_file_path(chat_import.chat_file)
+        except Exception:
+            continue
+
+        for message in iter_exported_chat(iter_chat_lines(file_path)):
+            text = normalize_message_text(message.get("message"))
+
+            started = time.perf_counter_ns()
+            result = classify_message(text, chat_import.group_name)
+            timings.append(time.perf_counter_ns() - started)
+
+            actions[result["action"] or "None"] = actions.get(result["action"] or "None", 0) + 1
+
+            if limit and len(timings) >= int(limit):
+                break
+
+        if limit and len(timings) >= int(limit):
+            break
+
+    if not timings:
+        return {"messages": 0, "imports": len(imports)}
+
+    timings.sort()
+    mean_us = sum(timings) / len(timings) / 1000
+
+    return {
+        "imports": len(imports),
+        "messages": len(timings),
+        "mean_us": round(mean_us, 2),
+        "p50_us": round(timings[len(timings) // 2] / 1000, 2),
+        "p95_us": round(timings[int(len(timings) * 0.95) - 1 if len(timings) > 1 else 0] / 1000, 2),
+        "max_us": round(timings[-1] / 1000, 2),
+        "total_ms": round(sum(timings) / 1_000_000, 2),
+        "actions": actions,
+        "max_mean_us": max_mean_microseconds,
+        "within_budget": mean_us <= float(max_mean_microseconds),
+    }
@@ -1,8 +1,14 @@
-import re
 import frappe
 from frappe.model.document import Document
 from frappe.utils import now_datetime, get_datetime, time_diff_in_hours, add_days
 
+from engineering.engineering.doctype.whatsapp_breakdown_message_log.message_classifier import (
+    classify_message,
+    infer_site,
+    is_review_only,
+    parse_time,
+)
+
 
 class WhatsAppBreakdownMessageLog(Document):
     def validate(self):
@@ -10,26 +16,7 @@ class WhatsAppBreakdownMessageLog(Document):
 
 
 def parse_time_to_erp(value):
-    if not value:
-        return None
-
-    value = str(value).strip().lower()
-    value = value.replace(" ", "")
-
-    match = re.search(r"(\d{1,2})[:hH]?(\d{2})", value)
-    if not match:
-        return None
-
-    hour = int(match.group(1))
-    minute = int(match.group(2))
-
-    if hour < 0 or hour > 23:
-        return None
-
-    if minute < 0 or minute > 59:
-        return None
-
-    return f"{hour:02d}:{minute:02d}:00"
+    return parse_time(value)
 
 
 def clean_line(line):
@@ -37,76 +24,7 @@ def clean_line(line):
 
 
 def is_review_only_message(text):
-    text_lower = (text or "").lower().strip()
-
-    if not text_lower:
-        return True
-
-    # Clear book-back messages must still be processed.
-    if re.search(r"\b(book\s*back|bookback|booked back)\b", text_lower):
-        return False
-
-    # Clear book-down messages must still be processed.
-    if re.search(r"\b(book\s*down|bookdown|booked down)\b", text_lower):
-        return False
-
-    review_phrases = [
-        "incident report",
-        "waiting for the incident report",
-        "need an incident report",
-        "standing till tomorrow",
-        "will be standing",
-        "remove",
-        "add",
-        "add is",
-        "add machine",
-        "add dozer",
-        "from gwab list",
-        "from the list",
-        "to our list",
-        "change the comment",
-        "remove the comment",
-        "please share km",
-        "share km",
-        "km readings",
-        "can we please have hours",
-        "please have hours",
-        "which one",
-        "working ?",
-        "working?",
-        "fixed?",
-        "feedback",
-        "who is attending",
-        "who's attending",
-        "offsite change",
-        "off site change",
-        "no breakdowns",
-        "back to production",
-        "power off",
-        "electricity",
-        "please note",
-        "pls note",
-        "please arrange",
-        "arrange a diesel bowser",
-        "must go to hino",
-        "hino for service",
-    ]
-
-    for phrase in review_phrases:
-        if phrase in text_lower:
-            return True
-
-    # Questions about a machine are review unless they are clear book-back/book-down.
-    if "?" in text_lower:
-        return True
-
-    # Status report style line, for example:
-    # ❌IS0611 *LHS No side mirror*
-    # This is a status/list item, not necessarily a new breakdown booking.
-    if re.search(r"^[✅❌🚫]\s*(is|ex)\s*\d{2,4}", text_lower, re.IGNORECASE):
-        return True
-
-    return False
+    return is_review_only((text or "").lower().strip())
 
 
 def get_shift_from_datetime(dt):
@@ -132,108 +50,16 @@ def combine_date_and_time(base_dt, time_value):
 
 
 def infer_site_from_group(group_name):
-    group_name = (group_name or "").lower()
-
-    site_map = {
-        "kriel": "Kriel Rehabilitation",
-        "krr": "Kriel Rehabilitation",
-        "klip": "Klipfontein",
-        "gwab": "Gwab",
-        "koppie": "Koppie",
-        "uit": "Uitgevallen",
-        "bank": "Bankfontein",
-        "bnk": "Bankfontein",
-    }
-
-    for key, site in site_map.items():
-        if key in group_name:
-            return site
+    return infer_site(group_name)
 
-    return None
 
+def parse_whatsapp_breakdown_message(doc, classification=None):
+    """
+    Fill the detected fields from classify_message().
 
-
-def is_review_only_message(text):
-    text = text or ""
-    lower = text.lower().strip()
-
-    # These are proper Book Back messages. Do not send them to review.
-    if any(x in lower for x in [
-        "book back",
-        "bookback",
-        "booked back",
-        "please book back",
-    ]):
-        return False
-
-    # These are proper Book Down messages. Do not send them to review.
-    if any(x in lower for x in [
-        "book down",
-        "bookdown",
-        "booked down",
-        "stop:",
-        "stopped",
-    ]):
-        return False
-
-    review_phrases = [
-        "incident report",
-        "waiting for the incident report",
-        "need an incident report",
-        "write the incident report",
-        "standing till tomorrow",
-        "will be standing",
-        "please remove",
-        "pls remove",
-        "remove the comment",
-        "change the comment",
-        "please add",
-        "pls add",
-        "from gwab list",
-        "from the list",
-        "to our list",
-        "please share km",
-        "share km",
-        "km readings",
-        "can we please have hours",
-        "please have hours",
-        "which one",
-        "feedback",
-        "who is attending",
-        "who's attending",
-        "offsite change",
-        "off site change",
-        "no breakdowns",
-        "back to production",
-        "power off",
-        "electricity",
-        "please note",
-        "pls note",
-        "please arrange",
-        "arrange a diesel bowser",
-        "must go to hino",
-        "hino for service",
-        "yes all",
-        "moved this morning",
-        "not on the report",
-    ]
-
-    if any(phrase in lower for phrase in review_phrases):
-        return True
-
-    if "?" in lower:
-        return True
-
-    if lower in ["yes", "no", "nope", "thanks", "ps"]:
-        return True
-
-    if re.match(r"^[✅❌🚫]\s*(is|ex)\s*0*\d{2,4}", lower, re.IGNORECASE):
-        return True
-
-    return False
-
-
-def parse_whatsapp_breakdown_message(doc):
+    Callers that already classified the message (the chat importer) pass
+    the result in, so the text is only scanned once.
+    """
     raw_message = clean_line(doc.raw_message)
 
     if not raw_message:
@@ -241,6 +67,9 @@ def parse_whatsapp_breakdown_message(doc):
         doc.error_message = "Raw Message is empty."
         return
 
+    if classification is None:
+        classification = classify_message(raw_message, doc.group_name)
+
     if not doc.message_datetime:
         doc.message_datetime = now_datetime()
 
@@ -248,122 +77,21 @@ def parse_whatsapp_breakdown_message(doc):
         doc.target_shift = get_shift_from_datetime(doc.message_datetime)
 
     if not doc.target_site:
-        doc.target_site = infer_site_from_group(doc.group_name)
-
-    text = raw_message.strip()
-
-    # Allow manual test format:
-    # Group Name: Kriel Control Room Room
-    # Raw Message: IS570 Faulty emergency stop button
-    manual_group_match = re.search(r"^group name\s*:\s*(.+)$", text, re.IGNORECASE | re.MULTILINE)
-    if manual_group_match and not doc.group_name:
-        doc.group_name = manual_group_match.group(1).strip()
-
-    manual_raw_match = re.search(r"^raw message\s*:\s*(.+)$", text, re.IGNORECASE | re.MULTILINE)
-    if manual_raw_match:
-        text = manual_raw_match.group(1).strip()
-
-    text_lower = text.lower()
-
-    doc.detected_plant_no = None
-    doc.detected_action = None
-    doc.detected_start_time = None
-    doc.detected_book_back_time = None
-    doc.detected_hours = None
-    doc.detected_reason = None
-    doc.detected_resolution = None
-    doc.error_message = None
-
-    plant_match = re.search(r"\b(IS|EX)\s*0*(\d{2,4})\b", text, re.IGNORECASE)
-    if plant_match:
-        prefix = plant_match.group(1).upper()
-        number = plant_match.group(2)
-        doc.detected_plant_no = f"{prefix}{number}"
-    else:
-        doc.detected_action = "Unknown"
-        doc.status = "Needs Review"
-        doc.error_message = "Could not detect plant number like IS570 or EX230."
-        return
-
-    if is_review_only_message(text):
-        doc.detected_action = "Unknown"
-        doc.status = "Needs Review"
-        doc.error_message = "Message mentions a machine, but is not a clear Book Down or Book Back message."
-        return
-
-    start_match = re.search(
-        r"\b(stop|start|stopped|breakdown start|bd start|booked down|book down|down)\b\s*[:@\-]?\s*(\d{1,2}[:hH]?\d{2})",
-        text,
-        re.IGNORECASE,
-    )
-    if start_match:
-        doc.detected_start_time = parse_time_to_erp(start_match.group(2))
-
-    book_back_match = re.search(
-        r"\b(book\s*back|bookback|booked back|back|return|returned)\b\s*[:@\-]?\s*(\d{1,2}[:hH]?\d{2})",
-        text,
-        re.IGNORECASE,
-    )
-    if book_back_match:
-        doc.detected_book_back_time = parse_time_to_erp(book_back_match.group(2))
-
-    hours_match = re.search(
-        r"\b(smr|hrs|hours|hour)\b\s*[:\-]?\s*(\d+(?:\.\d+)?)",
-        text,
-        re.IGNORECASE,
-    )
-    if hours_match:
-        doc.detected_hours = float(hours_match.group(2))
-
-    if doc.detected_book_back_time or "book back" in text_lower or "bookback" in text_lower:
-        doc.detected_action = "Book Back"
-    else:
-        doc.detected_action = "Book Down"
-
-    lines = [clean_line(line) for line in text.splitlines() if clean_line(line)]
-
-    if doc.detected_action == "Book Down":
-        reason = re.sub(r"\b(IS|EX)\s*0*\d{2,4}\b", "", text, flags=re.IGNORECASE).strip()
-        reason = re.sub(r"^[:\-\s]+", "", reason).strip()
-
-        if reason:
-            doc.detected_reason = reason
-            doc.status = "Parsed"
-        else:
-            doc.status = "Needs Review"
-            doc.error_message = "Book Down detected, but no breakdown reason found."
-
-    elif doc.detected_action == "Book Back":
-        resolution_lines = []
-
-        for line in lines:
-            line_lower = line.lower()
-
-            if line_lower.strip() in ["edited", "(edited)"]:
-                continue
-
-            if re.fullmatch(r"(IS|EX)\s*0*\d{2,4}", line, flags=re.IGNORECASE):
-                continue
-
-            if re.search(r"^(stop|start|stopped|breakdown start|bd start|booked down|book down|down)\b\s*[:@\-]?\s*\d{1,2}[:hH]?\d{2}", line_lower):
-                continue
-
-            if re.search(r"^(please\s+)?(book\s*back|bookback|booked back|back|return|returned)\b", line_lower):
-                continue
-
-            if re.search(r"^(smr|hrs|hours|hour)\b\s*[:\-]?\s*\d+(?:\.\d+)?\s*$", line_lower):
-                continue
-
-            resolution_lines.append(line)
-
-        if resolution_lines:
-            doc.detected_resolution = "\n".join(resolution_lines).strip()
-
-        doc.status = "Parsed"
-
-    else:
-        doc.status = "Needs Review"
-        doc.error_message = "Could not detect action."
+        doc.target_site = classification["site"]
+
+    # Manual test format ("Group Name: ..." / "Raw Message: ...").
+    if classification["manual_group_name"] and not doc.group_name:
+        doc.group_name = classification["manual_group_name"]
+
+    doc.detected_plant_no = classification["plant_no"]
+    doc.detected_action = classification["action"]
+    doc.detected_start_time = classification["start_time"]
+    doc.detected_book_back_time = classification["book_back_time"]
+    doc.detected_hours = classification["hours"]
+    doc.detected_reason = classification["reason"]
+    doc.detected_resolution = classification["resolution"]
+    doc.error_message = classification["error_message"]
+    doc.status = classification["status"]
 
 
 @frappe.whitelist()
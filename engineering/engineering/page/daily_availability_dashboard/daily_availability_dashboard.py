@@ -6,6 +6,7 @@ from datetime import timedelta
 from engineering.engineering.report.availability_and_utilisation_month_end_report import (
     availability_and_utilisation_month_end_report as month_end,
 )
+from engineering.engineering.page.daily_availability_dashboard import dashboard_cache
 
 
 _ = frappe._
@@ -727,6 +728,45 @@ def fetch_grouped_data(
     return rows
 
 
+def fetch_daily_category_data(
+    location,
+    start_date,
+    end_date,
+    machine_scope=None,
+    au_target_filter=None,
+):
+    frappe.clear_messages()
+
+    rows = month_end.get_daily_category_rows(
+        frappe._dict({
+            "from_date": start_date,
+            "to_date": end_date,
+            "start_date": start_date,
+            "end_date": end_date,
+            "location": location,
+            "site": location,
+            "machine_scope": (
+                machine_scope
+                or "Production + Swing/Spare Machines"
+            ),
+            "au_target_filter": (
+                au_target_filter
+                or "85% A & U"
+            ),
+            "include_excluded_asset_categories": 1,
+        })
+    )
+
+    frappe.clear_messages()
+
+    rows_by_date = {}
+
+    for row in rows or []:
+        rows_by_date.setdefault(get_row_date(row), []).append(row)
+
+    return rows_by_date
+
+
 def to_float(value):
     if value in (None, ""):
         return None
@@ -1644,22 +1684,18 @@ def build_daily_summary_chart_html(location, start_date, end_date, machine_scope
 
     daily_category_values = {}
 
-    for date_value in all_dates:
-        effective_au_target_filter = (
-            au_target_filter
-            or "85% A & U"
-        )
-
-        day_rows = fetch_grouped_data(
-            location,
-            date_value,
-            date_value,
-            machine_scope,
-            effective_au_target_filter,
-        )
+    # One Engine run for the whole range; bars are grouped per shift date.
+    rows_by_date = fetch_daily_category_data(
+        location,
+        all_dates[0],
+        all_dates[-1],
+        machine_scope,
+        au_target_filter or "85% A & U",
+    )
 
+    for date_value in all_dates:
         day_avgs = build_summary_averages_from_source_rows(
-            day_rows
+            rows_by_date.get(date_value) or []
         )
 
         for category in UI_CATEGORIES:
@@ -2732,21 +2768,47 @@ def get_machine_downtime_details(
 
 @frappe.whitelist()
 def download_dashboard_pdf(start_date=None, end_date=None, location=None, site=None, summary_type=None, machine_scope=None, au_target_filter=None):
-    from frappe.utils.pdf import get_pdf
-    from frappe.utils import now_datetime
 
     location = location or site
     summary_type = summary_type or "Average Per Machine"
     machine_scope = machine_scope or "Production + Swing/Spare Machines"
+    au_target_filter = au_target_filter or "85% A & U"
+
+    pdf = dashboard_cache.get_or_build(
+        "pdf",
+        location,
+        start_date,
+        end_date,
+        summary_type,
+        machine_scope,
+        au_target_filter,
+        lambda: build_dashboard_pdf(start_date, end_date, location, summary_type, machine_scope, au_target_filter),
+    )
+
+    safe_location = str(location or "site").replace(" ", "_")
+    safe_summary = str(summary_type or "summary").replace(" ", "_")
+    safe_scope = str(machine_scope or "scope").replace(" ", "_").replace("/", "_")
+    safe_start = str(start_date or "")
+    safe_end = str(end_date or "")
+    timestamp = now_datetime().strftime("%Y%m%d_%H%M%S")
+
+    filename = f"Daily_Availability_Dashboard_{safe_summary}_{safe_scope}_{safe_location}_{safe_start}_to_{safe_end}_{timestamp}.pdf"
+
+    frappe.local.response.filename = filename
+    frappe.local.response.filecontent = pdf
+    frappe.local.response.type = "download"
+
+
+def build_dashboard_pdf(start_date, end_date, location, summary_type, machine_scope, au_target_filter):
+    from frappe.utils.pdf import get_pdf
 
     html = get_dashboard_html(
         start_date=start_date,
         end_date=end_date,
         location=location,
-        site=site,
         summary_type=summary_type,
         machine_scope=machine_scope,
-        au_target_filter=au_target_filter or "85% A & U",
+        au_target_filter=au_target_filter,
     )
 
     engineering_css = get_engineering_css_for_pdf()
@@ -2812,18 +2874,7 @@ def download_dashboard_pdf(start_date=None, end_date=None, location=None, site=N
         },
     )
 
-    safe_location = str(location or "site").replace(" ", "_")
-    safe_summary = str(summary_type or "summary").replace(" ", "_")
-    safe_scope = str(machine_scope or "scope").replace(" ", "_").replace("/", "_")
-    safe_start = str(start_date or "")
-    safe_end = str(end_date or "")
-    timestamp = now_datetime().strftime("%Y%m%d_%H%M%S")
-
-    filename = f"Daily_Availability_Dashboard_{safe_summary}_{safe_scope}_{safe_location}_{safe_start}_to_{safe_end}_{timestamp}.pdf"
-
-    frappe.local.response.filename = filename
-    frappe.local.response.filecontent = pdf
-    frappe.local.response.type = "download"
+    return pdf
 
 
 def build_pdf_dashboard_html(location, start_date, end_date, avgs, machine_series):
@@ -3070,22 +3121,15 @@ def get_daily_availability_dashboard_html(start_date=None, end_date=None, locati
     if not location:
         frappe.throw("Please select Site.")
 
-    columns, data, dashboard_html = execute(
-        frappe._dict({
-            "start_date": start_date,
-            "end_date": end_date,
-            "from_date": start_date,
-            "to_date": end_date,
-            "location": location,
-            "site": location,
-            "summary_type": summary_type,
-            "machine_scope": machine_scope,
-            "au_target_filter": au_target_filter or "85% A & U",
-        })
+    return get_dashboard_html(
+        start_date=start_date,
+        end_date=end_date,
+        location=location,
+        summary_type=summary_type,
+        machine_scope=machine_scope,
+        au_target_filter=au_target_filter,
     )
 
-    return dashboard_html
-
 
 
 @frappe.whitelist()
@@ -3103,24 +3147,38 @@ def get_dashboard_html(start_date=None, end_date=None, location=None, site=None,
     if not location:
         frappe.throw("Please select Site.")
 
-    result = execute(
-        frappe._dict({
-            "start_date": start_date,
-            "end_date": end_date,
-            "from_date": start_date,
-            "to_date": end_date,
-            "location": location,
-            "site": location,
-            "summary_type": summary_type,
-            "machine_scope": machine_scope,
-            "au_target_filter": au_target_filter or "85% A & U",
-        })
-    )
+    au_target_filter = au_target_filter or "85% A & U"
+
+    def build():
+        result = execute(
+            frappe._dict({
+                "start_date": start_date,
+                "end_date": end_date,
+                "from_date": start_date,
+                "to_date": end_date,
+                "location": location,
+                "site": location,
+                "summary_type": summary_type,
+                "machine_scope": machine_scope,
+                "au_target_filter": au_target_filter,
+            })
+        )
+
+        if isinstance(result, (list, tuple)) and len(result) >= 3:
+            return result[2]
 
-    if isinstance(result, (list, tuple)) and len(result) >= 3:
-        return result[2]
+        frappe.throw("Dashboard HTML was not returned by the page.")
 
-    frappe.throw("Dashboard HTML was not returned by the page.")
+    return dashboard_cache.get_or_build(
+        "html",
+        location,
+        start_date,
+        end_date,
+        summary_type,
+        machine_scope,
+        au_target_filter,
+        build,
+    )
 
 
 def get_engineering_css_for_pdf():
@@ -0,0 +1,150 @@
+# dashboard_cache.py
+# Rendered-output cache for the Daily Availability Dashboard.
+#
+# HTML and PDF bytes are cached in Redis per
+# (kind, site, start_date, end_date, summary_type, machine_scope, au_target_filter).
+# Every entry is also recorded in a per-site index with its date range, so a
+# change to A&U, PBM, Pre-Use or planning rows for (site, shift_date) drops only
+# the entries whose range contains that date. The index expires with the
+# longest-lived entry, and entries whose value has expired are pruned when
+# the index is read.
+
+import frappe
+from frappe.utils import getdate, today
+
+
+CACHE_PREFIX = "daily_availability_dashboard"
+
+# Ranges that end before today only change through the invalidation hooks.
+SETTLED_TTL_SECONDS = 12 * 60 * 60
+
+# Ranges that include today also move with open breakdowns.
+LIVE_TTL_SECONDS = 15 * 60
+
+STAT_FIELDS = ("hit", "miss", "invalidated")
+
+
+def _index_name(location):
+    return f"{CACHE_PREFIX}:index:{location}"
+
+
+def _stat_key(field):
+    return frappe.cache().make_key(f"{CACHE_PREFIX}:stats:{field}")
+
+
+def _count(field, amount=1):
+    frappe.cache().incrby(_stat_key(field), amount)
+
+
+def cache_key(kind, location, start_date, end_date, summary_type, machine_scope, au_target_filter):
+    return ":".join(
+        str(part or "")
+        for part in (
+            CACHE_PREFIX,
+            kind,
+            location,
+            getdate(start_date),
+            getdate(end_date),
+            summary_type,
+            machine_scope,
+            au_target_filter,
+        )
+    )
+
+
+def get_or_build(kind, location, start_date, end_date, summary_type, machine_scope, au_target_filter, builder):
+    """Return the cached value for the key, or build, store and index it."""
+    key = cache_key(kind, location, start_date, end_date, summary_type, machine_scope, au_target_filter)
+
+    value = frappe.cache().get_value(key)
+    if value is not None:
+        _count("hit")
+        return value
+
+    _count("miss")
+    value = builder()
+
+    if value is None:
+        return value
+
+    expires_in_sec = (
+        LIVE_TTL_SECONDS
+        if getdate(end_date) >= getdate(today())
+        else SETTLED_TTL_SECONDS
+    )
+
+    frappe.cache().set_value(key, value, expires_in_sec=expires_in_sec)
+    frappe.cache().hset(
+        _index_name(location),
+        key,
+        (str(getdate(start_date)), str(getdate(end_date))),
+    )
+    # No entry outlives SETTLED_TTL_SECONDS, so neither does the index.
+    frappe.cache().expire(frappe.cache().make_key(_index_name(location)), SETTLED_TTL_SECONDS)
+
+    return value
+
+
+def invalidate_dashboard_days(days):
+    """Drop cached dashboards whose range contains any (location, shift_date)."""
+    dates_by_location = {}
+    for location, shift_date in days:
+        if location and shift_date:
+            dates_by_location.setdefault(location, set()).add(str(getdate(shift_date)))
+
+    dropped = 0
+
+    for location, dates in dates_by_location.items():
+        index_name = _index_name(location)
+
+        for key, date_range in (frappe.cache().hgetall(index_name) or {}).items():
+            key = key.decode() if isinstance(key, bytes) else key
+            start_date, end_date = date_range
+
+            if not frappe.cache().exists(key):
+                # The value expired on its own; drop the dead index entry.
+                frappe.cache().hdel(index_name, key)
+                continue
+
+            if not any(start_date <= shift_date <= end_date for shift_date in dates):
+                continue
+
+            frappe.cache().delete_value(key)
+            frappe.cache().hdel(index_name, key)
+            dropped += 1
+
+    if dropped:
+        _count("invalidated", dropped)
+
+    return dropped
+
+
+def on_au_change(doc, method=None):
+    """Availability and Utilisation on_update / on_trash."""
+    try:
+        invalidate_dashboard_days([(doc.location, doc.shift_date)])
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Daily Availability Dashboard - Cache invalidation")
+
+
+@frappe.whitelist()
+def get_dashboard_cache_stats():
+    """Hit / miss / invalidation counters since the last reset."""
+    stats = {}
+    for field in STAT_FIELDS:
+        value = frappe.cache().get(_stat_key(field))
+        stats[field] = int(value or 0)
+
+    lookups = stats["hit"] + stats["miss"]
+    stats["hit_rate"] = round(stats["hit"] / lookups * 100, 1) if lookups else 0.0
+    return stats
+
+
+@frappe.whitelist()
+def reset_dashboard_cache_stats():
+    frappe.only_for("System Manager")
+
+    for field in STAT_FIELDS:
+        frappe.cache().delete(_stat_key(field))
+
+    return get_dashboard_cache_stats()
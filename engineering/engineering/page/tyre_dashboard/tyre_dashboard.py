@@ -7,7 +7,7 @@ from pathlib import Path
 import frappe
 from frappe.utils import add_months, getdate, today
 
-from engineering.tyre_analytics import get_latest_analytics
+from engineering.tyre_analytics import get_analytics_snapshot
 
 
 STANDARD_LAYOUT_IMAGE = (
@@ -22,21 +22,6 @@ MOCK_GRADER_DATA_FILE = (
     Path(__file__).resolve().parents[3]
     / "mock_grader_utilisation.json"
 )
-MODEL_FIELDS = (
-    "custom_vehicle_model",
-    "vehicle_model",
-    "custom_model",
-    "model",
-)
-MAKE_FIELDS = (
-    "custom_vehicle_make",
-    "vehicle_make",
-    "custom_make",
-    "make",
-    "manufacturer",
-    "brand",
-)
-KNOWN_MODELS = ("740GC", "B60E", "B60", "B45E", "B40E", "B40D", "A40G")
 
 
 def _month_start(value):
@@ -53,65 +38,6 @@ def _average(values, precision=1):
     return round(sum(values) / len(values), precision) if values else 0
 
 
-def _first_doc_value(doc, fieldnames):
-    meta = frappe.get_meta(doc.doctype)
-
-    for fieldname in fieldnames:
-        if meta.has_field(fieldname) and doc.get(fieldname):
-            return str(doc.get(fieldname)).strip()
-
-    return ""
-
-
-def _asset_information(asset_name):
-    if not frappe.db.exists("Asset", asset_name):
-        return {"vehicle_make": "", "model": ""}
-
-    asset = frappe.get_doc("Asset", asset_name)
-    item = None
-    vehicle_make = _first_doc_value(asset, MAKE_FIELDS)
-    model = _first_doc_value(asset, MODEL_FIELDS)
-    searchable = [
-        asset.name,
-        asset.get("item_name"),
-        asset.get("item_code"),
-        vehicle_make,
-        model,
-    ]
-
-    if asset.get("item_code") and frappe.db.exists("Item", asset.item_code):
-        item = frappe.get_doc("Item", asset.item_code)
-        vehicle_make = vehicle_make or _first_doc_value(item, MAKE_FIELDS)
-        model = model or _first_doc_value(item, MODEL_FIELDS)
-        searchable.extend(
-            [
-                item.get("item_name"),
-                item.get("item_code"),
-                item.get("description"),
-                vehicle_make,
-                model,
-            ]
-        )
-
-    model_text = "".join(
-        character
-        for character in " ".join(
-            str(value) for value in searchable if value not in (None, "")
-        ).upper()
-        if character.isalnum()
-    )
-
-    for known_model in KNOWN_MODELS:
-        if known_model in model_text:
-            model = known_model
-            break
-
-    if not vehicle_make and str(model).upper().startswith("B"):
-        vehicle_make = "Bell"
-
-    return {"vehicle_make": vehicle_make, "model": model}
-
-
 def _group_average(rows, key_field, value_field):
     grouped = defaultdict(list)
 
@@ -257,7 +183,7 @@ def _urgent_rows(rows):
     ]
 
 
-def _adt_view(rows, fleet_number):
+def _adt_view(snapshot, rows, fleet_number):
     if not fleet_number:
         return {
             "fleet_number": None,
@@ -272,7 +198,7 @@ def _adt_view(rows, fleet_number):
     tyres = [row for row in rows if row.fleet_number == fleet_number]
     positions = {str(row.position or "").upper() for row in tyres}
 
-    asset_information = _asset_information(fleet_number)
+    asset_information = snapshot.asset_information(fleet_number)
 
     model_code = "".join(
         character
@@ -326,10 +252,11 @@ def _adt_view(rows, fleet_number):
 @frappe.whitelist()
 def get_dashboard_data(as_on_date=None, site=None, fleet_number=None):
     anchor_date = getdate(as_on_date or today())
-    all_rows = get_latest_analytics(
+    snapshot = get_analytics_snapshot(
         as_on_date=anchor_date,
         include_mock=True,
     )
+    all_rows = snapshot.rows()
     rows = all_rows
 
     if site:
@@ -370,5 +297,5 @@ def get_dashboard_data(as_on_date=None, site=None, fleet_number=None):
         "urgent_tyres": _urgent_rows(rows),
         # The machine view is intentionally independent of the Site filter.
         # A selected ADT must always show its latest fitted tyres and layout.
-        "adt_view": _adt_view(all_rows, fleet_number),
+        "adt_view": _adt_view(snapshot, all_rows, fleet_number),
     }
@@ -5,7 +5,7 @@ from datetime import date, timedelta
 import frappe
 from frappe.utils import add_months, getdate, today
 
-from engineering.tyre_analytics import get_latest_analytics
+from engineering.tyre_analytics import get_analytics_snapshot
 
 
 STANDARD_LAYOUT_IMAGE = (
@@ -170,10 +170,10 @@ def _adt_view(rows, fleet_number):
 @frappe.whitelist()
 def get_dashboard_data(as_on_date=None, site=None, fleet_number=None):
     anchor_date = getdate(as_on_date or today())
-    rows = get_latest_analytics(
+    rows = get_analytics_snapshot(
         as_on_date=anchor_date,
         include_mock=True,
-    )
+    ).rows()
 
     if site:
         rows = [row for row in rows if row.site == site]
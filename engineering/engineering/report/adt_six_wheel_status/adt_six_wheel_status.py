@@ -2,7 +2,7 @@ import frappe
 from frappe import _
 
 from engineering.tyre_analytics import (
-    get_latest_analytics,
+    get_analytics_snapshot,
     include_mock_value,
 )
 
@@ -28,10 +28,10 @@ def execute(filters=None):
     if not fleet_number:
         return get_columns(), []
 
-    rows = get_latest_analytics(
+    rows = get_analytics_snapshot(
         as_on_date=filters.get("as_on_date"),
         include_mock=include_mock_value(filters),
-    )
+    ).rows()
     rows = [row for row in rows if row.fleet_number == fleet_number]
     rows.sort(
         key=lambda row: (
@@ -254,19 +254,69 @@ def get_data(filters):
     if not assets:
         return []
 
-    preuse_map = get_preuse_map(
+    # Settled days come from the AU Shift Fact table; only days it does
+    # not cover are re-derived from Pre-Use Hours and PBM below.
+    fact_rows = []
+    fact_days = set()
+
+    if not filters.get("skip_fact_table"):
+        from engineering.engineering.doctype.availability_and_utilisation.au_facts import (
+            load_fact_shift_rows,
+        )
+
+        fact_rows, fact_days = load_fact_shift_rows(
+            filters.from_date,
+            filters.to_date,
+            assets,
+            spare_assets,
+        )
+
+    shift_rows = fact_rows + get_raw_shift_rows(
         filters.from_date,
         filters.to_date,
         locations,
+        planning_map,
+        assets,
+        spare_assets,
+        skip_days=fact_days,
     )
 
-    pbm_map = get_pbm_map(
-        filters.from_date,
-        filters.to_date,
-        assets,
-        locations,
+    finalise_shift_rows(
+        shift_rows,
+        planning_map,
+        free_hours,
+    )
+
+    data = build_tree_rows(
+        shift_rows
+    )
+
+    apply_au_percentage_basis(
+        data,
+        filters.get(
+            "au_percentage_basis"
+        ),
     )
 
+    return data
+
+
+def get_raw_shift_rows(
+    from_date,
+    to_date,
+    locations,
+    planning_map,
+    assets,
+    spare_assets,
+    skip_days=None,
+):
+    """
+    Shift rows before Pre-Use validation, free hours and A&U percentages.
+    (location, shift_date) pairs in skip_days are left out, and Pre-Use / PBM
+    are only loaded for the span of the days that remain.
+    """
+    skip_days = skip_days or set()
+
     assets_by_location = defaultdict(list)
 
     for asset in assets:
@@ -274,16 +324,36 @@ def get_data(filters):
             asset.location
         ].append(asset)
 
-    shift_rows = []
+    pending_dates = sorted({
+        getdate(shift_date)
+        for location, shift_date in planning_map
+        if location in assets_by_location
+        and getdate(from_date) <= getdate(shift_date) <= getdate(to_date)
+        and (location, str(getdate(shift_date))) not in skip_days
+    })
+
+    if not pending_dates:
+        return []
 
-    current_date = getdate(
-        filters.from_date
+    preuse_map = get_preuse_map(
+        pending_dates[0],
+        pending_dates[-1],
+        locations,
     )
 
-    end_date = getdate(
-        filters.to_date
+    pbm_map = get_pbm_map(
+        pending_dates[0],
+        pending_dates[-1],
+        assets,
+        locations,
     )
 
+    shift_rows = []
+
+    current_date = pending_dates[0]
+
+    end_date = pending_dates[-1]
+
     while current_date <= end_date:
         date_text = str(current_date)
 
@@ -298,6 +368,9 @@ def get_data(filters):
             if not planning:
                 continue
 
+            if (location, date_text) in skip_days:
+                continue
+
             shifts = get_shifts(
                 planning.get("shift_system")
             )
@@ -443,6 +516,14 @@ def get_data(filters):
             1,
         )
 
+    return shift_rows
+
+
+def finalise_shift_rows(
+    shift_rows,
+    planning_map,
+    free_hours=0,
+):
     mark_invalid_preuse_rows(
         shift_rows
     )
@@ -478,18 +559,8 @@ def get_data(filters):
         validate_au_row(row)
         round_engine_row(row)
 
-    data = build_tree_rows(
-        shift_rows
-    )
-
-    apply_au_percentage_basis(
-        data,
-        filters.get(
-            "au_percentage_basis"
-        ),
-    )
+    return shift_rows
 
-    return data
 
 def apply_au_percentage_basis(
     rows,
@@ -1926,13 +1997,20 @@ def get_pbm_map(
     Performance strategy:
     - Load all relevant A&U shift rows once.
     - Index those rows by asset/location.
-    - Cache Startup/Fatigue configuration by location/shift.
-    - Perform overlap calculations in memory.
+    - Load PBM rows once into the shared downtime_overlap interval index
+      used by A&U Phase 7, and find the breakdowns touching each A&U shift
+      with its bisect overlap query.
+    - Resolve Startup/Fatigue windows through the same engine, so both
+      paths agree.
     """
 
     from engineering.engineering.doctype.availability_and_utilisation import (
         availability_and_utilisation as au,
     )
+    from engineering.engineering.doctype.availability_and_utilisation.downtime_overlap import (
+        BreakdownIntervalIndex,
+        ExclusionWindowResolver,
+    )
 
     report_start = get_datetime(
         f"{from_date} 06:00:00"
@@ -1972,55 +2050,22 @@ def get_pbm_map(
     # Load Plant Breakdown or Maintenance rows once
     # ------------------------------------------------------------------
 
-    conditions = [
-        "IFNULL(asset_name, '') != ''",
-        "IFNULL(breakdown_reason, '') != ''",
-        "IFNULL(exclude_from_au, 0) = 0",
-        "asset_name IN %(asset_names)s",
-        (
-            "breakdown_start_datetime "
-            "< %(report_end)s"
-        ),
-        (
-            "("
-            "resolved_datetime >= %(report_start)s "
-            "OR resolved_datetime IS NULL"
-            ")"
+    breakdown_index = BreakdownIntervalIndex.load(
+        report_start,
+        report_end,
+        locations=locations or None,
+        asset_names=asset_names,
+        trust_datetime=None,
+        require_reason=True,
+        key=lambda row: (
+            normalise_asset_name(
+                row.asset_name
+            ),
+            row.location,
         ),
-    ]
-
-    values = {
-        "asset_names": tuple(asset_names),
-        "report_start": report_start,
-        "report_end": report_end,
-    }
-
-    if locations:
-        conditions.append(
-            "location IN %(locations)s"
-        )
-
-        values["locations"] = tuple(
-            locations
-        )
-
-    rows = frappe.db.sql(
-        f"""
-        SELECT
-            name,
-            asset_name,
-            location,
-            breakdown_start_datetime,
-            resolved_datetime
-        FROM `tabPlant Breakdown or Maintenance`
-        WHERE {" AND ".join(conditions)}
-        ORDER BY breakdown_start_datetime
-        """,
-        values,
-        as_dict=True,
     )
 
-    if not rows:
+    if not breakdown_index.rows:
         return {}
 
     # ------------------------------------------------------------------
@@ -2106,408 +2151,110 @@ def get_pbm_map(
         ).append(au_row)
 
     # ------------------------------------------------------------------
-    # Startup/Fatigue configuration cache.
-    #
-    # _exclusion_windows() previously called frappe.db.get_value()
-    # repeatedly. We intentionally still use frappe.db.get_value here,
-    # but only once per unique location/shift pair so record-selection
-    # behaviour remains consistent.
+    # Startup/Fatigue windows, configuration cached once per
+    # location/shift/day type (shared with A&U Phase 7).
     # ------------------------------------------------------------------
 
-    exclusion_configuration_cache = {}
-
-    def get_exclusion_configuration(
-        location,
-        shift,
-        shift_date,
-    ):
-        day_of_week = getdate(
-            shift_date
-        ).weekday()
-
-        if day_of_week == 5:
-            day_type = "Saturday"
-        elif day_of_week == 6:
-            day_type = "Sunday"
-        else:
-            day_type = "Weekday"
-
-        cache_key = (
-            location,
-            shift,
-            day_type,
-        )
-
-        if cache_key not in exclusion_configuration_cache:
-            configuration_fields = [
-                "startup_start",
-                "startup_end",
-                "fatigue_start",
-                "fatigue_end",
-            ]
-
-            # Prefer an explicit day-specific configuration.
-            configuration = frappe.db.get_value(
-                "Startup and Fatigue spesification",
-                {
-                    "site": location,
-                    "shift": shift,
-                    "day_type": day_type,
-                },
-                configuration_fields,
-                as_dict=True,
-            )
-
-            # Backward compatibility:
-            # if this site/shift has only one configuration,
-            # use it as the generic Weekday/Saturday/Sunday rule.
-            if not configuration:
-                legacy_configurations = frappe.get_all(
-                    "Startup and Fatigue spesification",
-                    filters={
-                        "site": location,
-                        "shift": shift,
-                    },
-                    fields=configuration_fields,
-                    limit=2,
-                )
-
-                if len(legacy_configurations) == 1:
-                    configuration = frappe._dict(
-                        legacy_configurations[0]
-                    )
-
-            exclusion_configuration_cache[
-                cache_key
-            ] = configuration
-
-        return exclusion_configuration_cache[
-            cache_key
-        ]
-
-    def time_text(value):
-        if isinstance(value, timedelta):
-            seconds = (
-                int(value.total_seconds())
-                % 86400
-            )
-
-            hours, remainder = divmod(
-                seconds,
-                3600,
-            )
-
-            minutes, seconds = divmod(
-                remainder,
-                60,
-            )
-
-            return (
-                f"{hours:02d}:"
-                f"{minutes:02d}:"
-                f"{seconds:02d}"
-            )
-
-        return str(value).split(".")[0]
-
-    def get_cached_exclusion_windows(
-        location,
-        shift,
-        shift_start,
-        shift_end,
-    ):
-        configuration = (
-            get_exclusion_configuration(
-                location,
-                shift,
-                shift_start,
-            )
-        )
-
-        if not configuration:
-            return []
-
-        def build_windows(
-            start_time,
-            end_time,
-        ):
-            windows = []
-
-            start_time = time_text(
-                start_time
-            )
-
-            end_time = time_text(
-                end_time
-            )
-
-            base_date = getdate(
-                shift_start
-            )
-
-            for day_offset in (0, 1):
-                window_date = add_days(
-                    base_date,
-                    day_offset,
-                )
-
-                window_start = get_datetime(
-                    f"{window_date} {start_time}"
-                )
-
-                window_end_date = (
-                    window_date
-                )
-
-                if end_time <= start_time:
-                    window_end_date = add_days(
-                        window_date,
-                        1,
-                    )
+    exclusion_resolver = ExclusionWindowResolver(log_missing=False)
 
-                window_end = get_datetime(
-                    f"{window_end_date} {end_time}"
-                )
-
-                if (
-                    window_end <= shift_start
-                    or window_start >= shift_end
-                ):
-                    continue
+    # ------------------------------------------------------------------
+    # Operational segments per breakdown: the breakdown clipped to the
+    # report and split at 06:00.
+    #
+    # Exact duplicate intervals are counted once. Popup
+    # clean_reason_details() presents breakdown timestamps at minute
+    # precision, so segments that only differ by seconds are also
+    # counted once (the first breakdown to reach them owns them).
+    # ------------------------------------------------------------------
 
-                windows.append((
-                    max(
-                        window_start,
-                        shift_start,
-                    ),
-                    min(
-                        window_end,
-                        shift_end,
-                    ),
-                ))
+    interval_owner = {}
+    segment_owner = {}
+    segments_by_breakdown = {}
 
-            return windows
+    def breakdown_segments(row):
+        if row.name in segments_by_breakdown:
+            return segments_by_breakdown[row.name]
 
-        windows = []
+        segments = []
+        segments_by_breakdown[row.name] = segments
 
-        # Preserve original order:
-        # startup first, fatigue second.
-        windows.extend(
-            build_windows(
-                configuration.startup_start,
-                configuration.startup_end,
-            )
+        clipped_start = max(
+            row.start_dt,
+            report_start,
         )
 
-        windows.extend(
-            build_windows(
-                configuration.fatigue_start,
-                configuration.fatigue_end,
-            )
+        clipped_end = min(
+            row.end_dt or report_end,
+            report_end,
         )
 
-        return windows
-
-    # ------------------------------------------------------------------
-    # Same calculation as
-    # get_required_downtime_minutes_for_breakdown(), but against the
-    # already-loaded A&U rows.
-    # ------------------------------------------------------------------
-
-    def calculate_required_downtime(
-        asset_name,
-        location,
-        start_datetime,
-        resolved_datetime,
-    ):
-        if (
-            not start_datetime
-            or not resolved_datetime
-        ):
-            return {}
+        if clipped_end <= clipped_start:
+            return segments
 
-        start_dt = get_datetime(
-            start_datetime
+        asset_name = normalise_asset_name(
+            row.asset_name
         )
 
-        end_dt = get_datetime(
-            resolved_datetime
+        interval_key = (
+            asset_name,
+            row.location,
+            str(clipped_start),
+            str(clipped_end),
         )
 
-        if (
-            not start_dt
-            or not end_dt
-            or end_dt <= start_dt
-        ):
-            return {}
+        if interval_owner.setdefault(interval_key, row.name) != row.name:
+            return segments
 
-        candidate_rows = (
-            au_rows_by_asset_location.get(
-                (
-                    normalise_asset_name(
-                        asset_name
-                    ),
-                    location,
-                ),
-                [],
-            )
+        current_date = getdate(
+            clipped_start
         )
 
-        shift_results = {}
-
-        for au_row in candidate_rows:
-            try:
-                row_date = getdate(
-                    au_row.shift_date
-                )
-
-                if (
-                    row_date
-                    < add_days(
-                        getdate(start_dt),
-                        -1,
-                    )
-                ):
-                    continue
-
-                if (
-                    row_date
-                    > add_days(
-                        getdate(end_dt),
-                        1,
-                    )
-                ):
-                    continue
-
-                required_hours = max(
-                    flt(
-                        au_row.shift_required_hours
-                    ),
-                    0,
-                )
-
-                shift_start, shift_end = (
-                    au.get_shift_timings(
-                        au_row.shift_system,
-                        au_row.shift,
-                        str(
-                            au_row.shift_date
-                        ),
-                    )
-                )
-
-                if (
-                    not shift_start
-                    or not shift_end
-                ):
-                    continue
-
-                shift_overlap_hours = (
-                    au._overlap_hours(
-                        start_dt,
-                        end_dt,
-                        shift_start,
-                        shift_end,
-                    )
-                )
-
-                if shift_overlap_hours <= 0:
-                    continue
-
-                shift_excluded_hours = 0.0
-
-                for (
-                    window_start,
-                    window_end,
-                ) in get_cached_exclusion_windows(
-                    au_row.location,
-                    au_row.shift,
-                    shift_start,
-                    shift_end,
-                ):
-                    shift_excluded_hours += (
-                        au._overlap_hours(
-                            start_dt,
-                            end_dt,
-                            window_start,
-                            window_end,
-                        )
-                    )
+        if clipped_start < get_datetime(f"{current_date} 06:00:00"):
+            current_date = add_days(
+                current_date,
+                -1,
+            )
 
-                shift_excluded_hours = min(
-                    shift_excluded_hours,
-                    shift_overlap_hours,
-                )
+        while True:
+            day_start = get_datetime(
+                f"{current_date} 06:00:00"
+            )
 
-                valid_overlap_hours = max(
-                    (
-                        shift_overlap_hours
-                        - shift_excluded_hours
-                    ),
-                    0,
-                )
+            if day_start >= clipped_end:
+                break
 
-                sunday_hours = 0.0
-                required_downtime_hours = 0.0
-
-                # Match get_required_downtime_minutes_for_breakdown():
-                #
-                # - A shift with zero required hours contributes no
-                #   A&U mechanical downtime.
-                # - If that zero-required shift is Sunday, keep its
-                #   valid overlap in the Sunday bucket.
-                # - Otherwise PBM may never exceed the shift's
-                #   configured Required Hours.
-                if required_hours <= 0:
-                    if (
-                        getdate(
-                            au_row.shift_date
-                        ).weekday() == 6
-                    ):
-                        sunday_hours = (
-                            valid_overlap_hours
-                        )
-                else:
-                    required_downtime_hours = min(
-                        valid_overlap_hours,
-                        required_hours,
-                    )
+            segment_start = max(
+                clipped_start,
+                day_start,
+            )
 
-                shift_key = (
-                    str(au_row.shift_date),
-                    au_row.shift,
-                )
+            segment_end = min(
+                clipped_end,
+                day_start + timedelta(days=1),
+            )
 
-                bucket = shift_results.setdefault(
-                    shift_key,
-                    {
-                        "pbm_elapsed_time": 0.0,
-                        "pbm_startup_fatigue_time": 0.0,
-                        "pbm_sunday_time": 0.0,
-                        "pbm_total_downtime": 0.0,
-                    },
+            if segment_end > segment_start:
+                segment_key = (
+                    asset_name,
+                    row.location,
+                    str(current_date),
+                    str(segment_start)[:16],
+                    str(segment_end)[:16],
                 )
 
-                bucket[
-                    "pbm_elapsed_time"
-                ] += shift_overlap_hours
-
-                bucket[
-                    "pbm_startup_fatigue_time"
-                ] += shift_excluded_hours
-
-                bucket[
-                    "pbm_sunday_time"
-                ] += sunday_hours
-
-                bucket[
-                    "pbm_total_downtime"
-                ] += required_downtime_hours
+                if segment_owner.setdefault(segment_key, row.name) == row.name:
+                    segments.append((
+                        segment_key,
+                        segment_start,
+                        segment_end,
+                    ))
 
-            except Exception:
-                continue
+            current_date = add_days(
+                current_date,
+                1,
+            )
 
-        return shift_results
+        return segments
 
     def round_shift_results_to_minutes(
         shift_results,
@@ -2632,172 +2379,200 @@ def get_pbm_map(
         return rounded_results
 
     # ------------------------------------------------------------------
-    # Build PBM map.
+    # Same calculation as
+    # get_required_downtime_minutes_for_breakdown(), per A&U shift:
+    # the index returns only the breakdowns overlapping the shift.
     # ------------------------------------------------------------------
 
-    pbm_map = {}
+    # {segment_key: {(shift_date, shift): values}}
+    segment_results = {}
 
-    # Exact interval protection.
-    seen_intervals = set()
+    for au_key, candidate_rows in au_rows_by_asset_location.items():
+        for au_row in candidate_rows:
+            try:
+                shift_start, shift_end = (
+                    au.get_shift_timings(
+                        au_row.shift_system,
+                        au_row.shift,
+                        str(
+                            au_row.shift_date
+                        ),
+                    )
+                )
 
-    # Popup clean_reason_details() presents breakdown timestamps at
-    # minute precision. Use the same operational-segment identity here
-    # so records that only differ by seconds are not counted twice.
-    seen_segments = set()
+                if (
+                    not shift_start
+                    or not shift_end
+                ):
+                    continue
 
-    for row in rows:
-        start_dt = get_datetime(
-            row.breakdown_start_datetime
-        )
+                breakdowns = breakdown_index.overlapping(
+                    au_key,
+                    shift_start,
+                    shift_end,
+                )
 
-        end_dt = (
-            get_datetime(
-                row.resolved_datetime
-            )
-            if row.resolved_datetime
-            else report_end
-        )
+                if not breakdowns:
+                    continue
 
-        clipped_start = max(
-            start_dt,
-            report_start,
-        )
+                required_hours = max(
+                    flt(
+                        au_row.shift_required_hours
+                    ),
+                    0,
+                )
 
-        clipped_end = min(
-            end_dt,
-            report_end,
-        )
+                exclusion_windows = exclusion_resolver.windows(
+                    au_row.location,
+                    au_row.shift,
+                    shift_start,
+                    shift_end,
+                )
 
-        if clipped_end <= clipped_start:
-            continue
+                shift_key = (
+                    str(au_row.shift_date),
+                    au_row.shift,
+                )
 
-        interval_key = (
-            normalise_asset_name(
-                row.asset_name
-            ),
-            row.location,
-            str(clipped_start),
-            str(clipped_end),
-        )
+                for row in breakdowns:
+                    for (
+                        segment_key,
+                        segment_start,
+                        segment_end,
+                    ) in breakdown_segments(row):
 
-        if interval_key in seen_intervals:
-            continue
+                        if (
+                            au._overlap_hours(
+                                segment_start,
+                                segment_end,
+                                shift_start,
+                                shift_end,
+                            )
+                            <= 0
+                        ):
+                            continue
 
-        seen_intervals.add(
-            interval_key
-        )
+                        (
+                            shift_overlap_hours,
+                            shift_excluded_hours,
+                        ) = au._clipped_downtime(
+                            segment_start,
+                            segment_end,
+                            shift_start,
+                            shift_end,
+                            exclusion_windows,
+                        )
 
-        current_date = getdate(
-            clipped_start
-        )
+                        valid_overlap_hours = max(
+                            (
+                                shift_overlap_hours
+                                - shift_excluded_hours
+                            ),
+                            0,
+                        )
 
-        current_day_start = get_datetime(
-            f"{current_date} 06:00:00"
-        )
+                        sunday_hours = 0.0
+                        required_downtime_hours = 0.0
+
+                        # Match get_required_downtime_minutes_for_breakdown():
+                        #
+                        # - A shift with zero required hours contributes no
+                        #   A&U mechanical downtime.
+                        # - If that zero-required shift is Sunday, keep its
+                        #   valid overlap in the Sunday bucket.
+                        # - Otherwise PBM may never exceed the shift's
+                        #   configured Required Hours.
+                        if required_hours <= 0:
+                            if (
+                                getdate(
+                                    au_row.shift_date
+                                ).weekday() == 6
+                            ):
+                                sunday_hours = (
+                                    valid_overlap_hours
+                                )
+                        else:
+                            required_downtime_hours = min(
+                                valid_overlap_hours,
+                                required_hours,
+                            )
 
-        if clipped_start < current_day_start:
-            current_date = add_days(
-                current_date,
-                -1,
-            )
+                        bucket = segment_results.setdefault(
+                            segment_key,
+                            {},
+                        ).setdefault(
+                            shift_key,
+                            {
+                                "pbm_elapsed_time": 0.0,
+                                "pbm_startup_fatigue_time": 0.0,
+                                "pbm_sunday_time": 0.0,
+                                "pbm_total_downtime": 0.0,
+                            },
+                        )
 
-        while True:
-            day_start = get_datetime(
-                f"{current_date} 06:00:00"
-            )
+                        bucket[
+                            "pbm_elapsed_time"
+                        ] += shift_overlap_hours
 
-            day_end = (
-                day_start
-                + timedelta(days=1)
-            )
+                        bucket[
+                            "pbm_startup_fatigue_time"
+                        ] += shift_excluded_hours
 
-            if day_start >= clipped_end:
-                break
+                        bucket[
+                            "pbm_sunday_time"
+                        ] += sunday_hours
 
-            segment_start = max(
-                clipped_start,
-                day_start,
-            )
+                        bucket[
+                            "pbm_total_downtime"
+                        ] += required_downtime_hours
 
-            segment_end = min(
-                clipped_end,
-                day_end,
-            )
+            except Exception:
+                continue
 
-            if segment_end > segment_start:
-                segment_key = (
-                    normalise_asset_name(
-                        row.asset_name
-                    ),
-                    row.location,
-                    str(current_date),
-                    str(segment_start)[:16],
-                    str(segment_end)[:16],
-                )
+    # ------------------------------------------------------------------
+    # Build PBM map: each operational segment is rounded to whole
+    # minutes, as the canonical helper does, before it is added.
+    # ------------------------------------------------------------------
 
-                if segment_key in seen_segments:
-                    current_date = add_days(
-                        current_date,
-                        1,
-                    )
-                    continue
+    pbm_map = {}
 
-                seen_segments.add(
-                    segment_key
-                )
+    for segment_key, shift_results in segment_results.items():
+        asset_name, location = segment_key[:2]
 
-                calculated_by_shift = (
-                    round_shift_results_to_minutes(
-                        calculate_required_downtime(
-                            row.asset_name,
-                            row.location,
-                            segment_start,
-                            segment_end,
-                        )
-                    )
-                )
+        for (
+            shift_key,
+            calculated,
+        ) in round_shift_results_to_minutes(shift_results).items():
+            shift_date, shift = shift_key
 
-                for (
-                    shift_key,
-                    calculated,
-                ) in calculated_by_shift.items():
-                    shift_date, shift = shift_key
+            key = (
+                asset_name,
+                shift_date,
+                location,
+                shift,
+            )
 
-                    key = (
-                        normalise_asset_name(
-                            row.asset_name
-                        ),
-                        shift_date,
-                        row.location,
-                        shift,
-                    )
+            bucket = pbm_map.setdefault(
+                key,
+                {
+                    "pbm_elapsed_time": 0.0,
+                    "pbm_startup_fatigue_time": 0.0,
+                    "pbm_sunday_time": 0.0,
+                    "pbm_total_downtime": 0.0,
+                },
+            )
 
-                    bucket = pbm_map.setdefault(
-                        key,
-                        {
-                            "pbm_elapsed_time": 0.0,
-                            "pbm_startup_fatigue_time": 0.0,
-                            "pbm_sunday_time": 0.0,
-                            "pbm_total_downtime": 0.0,
-                        },
+            for fieldname in (
+                "pbm_elapsed_time",
+                "pbm_startup_fatigue_time",
+                "pbm_sunday_time",
+                "pbm_total_downtime",
+            ):
+                bucket[fieldname] += flt(
+                    calculated.get(
+                        fieldname
                     )
-
-                    for fieldname in (
-                        "pbm_elapsed_time",
-                        "pbm_startup_fatigue_time",
-                        "pbm_sunday_time",
-                        "pbm_total_downtime",
-                    ):
-                        bucket[fieldname] += flt(
-                            calculated.get(
-                                fieldname
-                            )
-                        )
-
-            current_date = add_days(
-                current_date,
-                1,
-            )
+                )
 
     # Backward-compatible aliases for historical A&U records
     # whose asset_name contains leading/trailing whitespace.
@@ -599,7 +599,16 @@ def get_required_downtime_minutes_for_breakdown(
     asset_name,
     start_datetime,
     resolved_datetime,
+    au_rows=None,
+    configuration_cache=None,
 ):
+    """
+    A&U-required downtime of one breakdown.
+
+    Callers handling many breakdowns can pass the asset's A&U rows
+    (prefetched, ordered by shift_date / shift) and a shared Startup/Fatigue
+    configuration_cache instead of one query per breakdown.
+    """
     empty_result = {
         "total_minutes": 0,
         "required_downtime_minutes": 0,
@@ -632,39 +641,50 @@ def get_required_downtime_minutes_for_breakdown(
     if not start_dt or not end_dt or end_dt <= start_dt:
         return empty_result
 
-    au_rows = frappe.db.sql(
-        """
-        SELECT
-            name,
-            shift_date,
-            shift,
-            shift_system,
-            location,
-            asset_name,
-            shift_required_hours
-        FROM `tabAvailability and Utilisation`
-        WHERE asset_name = %(asset_name)s
-          AND shift_date >= DATE(%(start_datetime)s) - INTERVAL 1 DAY
-          AND shift_date <= DATE(%(resolved_datetime)s) + INTERVAL 1 DAY
-          AND (%(location)s = '' OR location = %(location)s)
-        ORDER BY
-            shift_date ASC,
-            FIELD(
+    if au_rows is not None:
+        first_date = getdate(start_dt) - timedelta(days=1)
+        last_date = getdate(end_dt) + timedelta(days=1)
+
+        au_rows = [
+            row
+            for row in au_rows
+            if first_date <= getdate(row.shift_date) <= last_date
+            and (not location or row.location == location)
+        ]
+    else:
+        au_rows = frappe.db.sql(
+            """
+            SELECT
+                name,
+                shift_date,
                 shift,
-                'Day',
-                'Morning',
-                'Afternoon',
-                'Night'
-            ) ASC
-        """,
-        {
-            "asset_name": asset_name,
-            "location": location or "",
-            "start_datetime": start_dt,
-            "resolved_datetime": end_dt,
-        },
-        as_dict=True,
-    )
+                shift_system,
+                location,
+                asset_name,
+                shift_required_hours
+            FROM `tabAvailability and Utilisation`
+            WHERE asset_name = %(asset_name)s
+              AND shift_date >= DATE(%(start_datetime)s) - INTERVAL 1 DAY
+              AND shift_date <= DATE(%(resolved_datetime)s) + INTERVAL 1 DAY
+              AND (%(location)s = '' OR location = %(location)s)
+            ORDER BY
+                shift_date ASC,
+                FIELD(
+                    shift,
+                    'Day',
+                    'Morning',
+                    'Afternoon',
+                    'Night'
+                ) ASC
+            """,
+            {
+                "asset_name": asset_name,
+                "location": location or "",
+                "start_datetime": start_dt,
+                "resolved_datetime": end_dt,
+            },
+            as_dict=True,
+        )
 
     raw_overlap_hours = 0.0
     required_downtime_hours = 0.0
@@ -706,6 +726,7 @@ def get_required_downtime_minutes_for_breakdown(
                 row.shift,
                 shift_start,
                 shift_end,
+                configuration_cache,
             ):
                 shift_excluded_hours += au._overlap_hours(
                     start_dt,
@@ -2037,6 +2058,218 @@ def _month_end_direct_rows(filters):
     return output
 
 
+def _month_end_planning_periods(location, from_date, to_date):
+    if not location:
+        return []
+
+    return frappe.get_all(
+        "Monthly Production Planning",
+        filters={
+            "location": location,
+            "prod_month_start_date": ("<=", to_date),
+            "prod_month_end_date": (">=", from_date),
+            "docstatus": ("<", 2),
+        },
+        fields=[
+            "name",
+            "prod_month_start_date",
+            "prod_month_end_date",
+        ],
+    )
+
+
+def get_daily_category_rows(filters):
+    """
+    Per-day category Overall Total rows for a date range from ONE Engine run.
+
+    Each returned row matches the "overall" scope row _month_end_direct_rows
+    would produce for a single-day range (from_date = to_date = shift_date),
+    including the day's Spare/Swing classification, so callers can group
+    by shift_date instead of executing the report once per day.
+    """
+    filters = frappe._dict(filters or {})
+
+    from_date = _month_end_get_filter_value(
+        filters,
+        "from_date",
+        "start_date",
+    )
+
+    selected_to_date = _month_end_get_filter_value(
+        filters,
+        "to_date",
+        "end_date",
+    )
+
+    location = _month_end_get_filter_value(
+        filters,
+        "location",
+        "site",
+        "production_site",
+    )
+
+    if not from_date or not selected_to_date:
+        return []
+
+    from_date = getdate(from_date)
+    to_date = min(
+        getdate(selected_to_date),
+        getdate(nowdate()),
+    )
+
+    if to_date < from_date:
+        return []
+
+    selected_category = _month_end_get_filter_value(
+        filters,
+        "asset_category",
+    )
+
+    machine_scope = (
+        _month_end_get_filter_value(
+            filters,
+            "machine_scope",
+        )
+        or "Include Swing/Spare"
+    )
+
+    percentage_basis = (
+        filters.get("au_target_filter")
+        or filters.get("au_percentage_basis")
+        or "85% A & U"
+    )
+
+    categories = [selected_category] if selected_category else list(MONTH_END_CATEGORIES)
+
+    engine_filters = frappe._dict({
+        "from_date": from_date,
+        "to_date": to_date,
+        "locations": (
+            [location]
+            if location
+            else []
+        ),
+        "assets": [],
+        "companies": [],
+        "free_hours": 0,
+        "production_machines_only": 0,
+        "au_percentage_basis": "100% A & U",
+    })
+
+    engine_data = (
+        au_engine.get_data(
+            engine_filters
+        )
+        or []
+    )
+
+    rows_by_day = {}
+
+    for row in engine_data:
+        if not isinstance(row, dict):
+            continue
+
+        if int(row.get("indent") or 0) != 3 or row.get("is_formula_row"):
+            continue
+
+        category = row.get("asset_category")
+
+        if category not in categories or not row.get("asset_name") or not row.get("shift_date"):
+            continue
+
+        rows_by_day.setdefault(
+            (
+                str(getdate(row.get("shift_date"))),
+                category,
+            ),
+            [],
+        ).append(row)
+
+    # Spare/Swing units come from the planning month(s) covering each day,
+    # so the map is resolved once per distinct set of covering plans.
+    planning_periods = _month_end_planning_periods(
+        location,
+        from_date,
+        to_date,
+    )
+
+    spare_maps = {}
+
+    def spare_map_for(shift_date):
+        day = getdate(shift_date)
+
+        plans = tuple(sorted(
+            plan.name
+            for plan in planning_periods
+            if getdate(plan.prod_month_start_date) <= day <= getdate(plan.prod_month_end_date)
+        ))
+
+        if plans not in spare_maps:
+            spare_maps[plans] = get_spare_swing_asset_map({
+                "from_date": day,
+                "to_date": day,
+                "location": location,
+            })
+
+        return spare_maps[plans]
+
+    output = []
+
+    for shift_date, category in sorted(
+        rows_by_day,
+        key=lambda key: (key[0], _month_end_category_sort(key[1])),
+    ):
+        spare_swing_asset_map = spare_map_for(shift_date)
+        source_rows = []
+
+        for row in rows_by_day[(shift_date, category)]:
+            is_spare = is_spare_swing_asset(row.get("asset_name"), spare_swing_asset_map)
+
+            if machine_scope == "Production Machines" and is_spare:
+                continue
+
+            if machine_scope == "Swing/Spare Machines" and not is_spare:
+                continue
+
+            source_rows.append(row)
+
+        if not source_rows:
+            continue
+
+        au_scope_row = au_engine.build_summary_row(
+            source_rows,
+            indent=0,
+            asset_category=category,
+            location=location,
+        )
+
+        au_engine.apply_au_percentage_basis(
+            [au_scope_row],
+            percentage_basis,
+        )
+
+        day_row = _month_end_calc_row(
+            category,
+            "",
+            au_scope_row.get("required_hours"),
+            au_scope_row.get("work_hours"),
+            au_scope_row.get("utilisation_available_hours"),
+            au_scope_row.get("availability_available_hours"),
+            au_scope_row.get("pbm_total_downtime"),
+        )
+
+        day_row["avail_percent"] = au_scope_row.get("availability_percentage")
+        day_row["util_percent"] = au_scope_row.get("utilisation_percentage")
+        day_row["shift_date"] = shift_date
+        day_row["summary_scope"] = "overall"
+        day_row["summary_label"] = f"{category} - Overall Total"
+        day_row["is_scope_total"] = 1
+
+        output.append(day_row)
+
+    return output
+
+
 def get_data(filters):
     return _month_end_direct_rows(filters)
 
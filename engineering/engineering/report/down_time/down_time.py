@@ -2,6 +2,7 @@
 # For license information, please see license.txt
 
 import base64
+import time
 import frappe
 from frappe import _
 from frappe.utils import getdate, get_datetime, now_datetime, time_diff_in_hours, format_datetime
@@ -17,6 +18,8 @@ from engineering.engineering.report.availability_and_utilisation_month_end_repor
 
 from engineering.engineering.doctype.availability_and_utilisation.availability_and_utilisation import (
     _exclusion_windows,
+    _overlap_hours,
+    _prefetch_exclusion_configurations,
 )
 
 
@@ -239,7 +242,7 @@ def calculate_availability_engine_breakdown_hours(site, plant_no, shift, window_
         excluded_hours = 0.0
 
         for excluded_start, excluded_end in excluded:
-            excluded_hours += overlap_hours(interval_start, interval_end, excluded_start, excluded_end)
+            excluded_hours += _overlap_hours(interval_start, interval_end, excluded_start, excluded_end)
 
         excluded_hours = min(excluded_hours, interval_hours)
         effective_hours += max(interval_hours - excluded_hours, 0.0)
@@ -379,7 +382,67 @@ def get_previous_day_avail_util_summary(report_date, site=None):
     }
 
 
-def get_data(filters):
+def get_au_rows_by_plant(rows, window_end):
+    """
+    Availability and Utilisation shift rows for every (site, plant) in the
+    breakdown rows, loaded with one query and grouped per (site, plant).
+
+    The range covers every breakdown's clipped span (open breakdowns are
+    counted from their start), plus a day either side for night shifts.
+    """
+    if not rows:
+        return {}
+
+    sites = sorted({row.site for row in rows if row.site})
+    plant_nos = sorted({row.plant_no for row in rows if row.plant_no})
+
+    if not sites or not plant_nos:
+        return {}
+
+    first_start = min(
+        max(get_datetime(row.breakdown_start_datetime or row.creation), START_LOOKUP_DATETIME)
+        for row in rows
+    )
+
+    au_rows = frappe.db.sql(
+        """
+        select
+            name,
+            shift_date,
+            shift,
+            shift_system,
+            location,
+            asset_name,
+            shift_required_hours
+        from `tabAvailability and Utilisation`
+        where location in %(sites)s
+            and asset_name in %(plant_nos)s
+            and shift_date >= date(%(from_datetime)s) - interval 1 day
+            and shift_date <= date(%(to_datetime)s) + interval 1 day
+        order by
+            location asc,
+            asset_name asc,
+            shift_date asc,
+            field(shift, 'Day', 'Morning', 'Afternoon', 'Night') asc
+        """,
+        {
+            "sites": tuple(sites),
+            "plant_nos": tuple(plant_nos),
+            "from_datetime": first_start,
+            "to_datetime": window_end,
+        },
+        as_dict=True,
+    )
+
+    au_rows_by_plant = {}
+
+    for au_row in au_rows:
+        au_rows_by_plant.setdefault((au_row.location, au_row.asset_name), []).append(au_row)
+
+    return au_rows_by_plant
+
+
+def get_data(filters, configuration_cache=None):
     report_date = getdate(filters.get("report_date")) if filters.get("report_date") else getdate(now_datetime())
 
     windows = get_report_windows(report_date, filters.get("shift"))
@@ -450,6 +513,11 @@ def get_data(filters):
         as_dict=True,
     )
 
+    au_rows_by_plant = get_au_rows_by_plant(rows, window_end)
+
+    if configuration_cache is None:
+        configuration_cache = {}
+
     data = []
     hours_cache = {}
 
@@ -496,6 +564,8 @@ def get_data(filters):
                     row.plant_no,
                     clipped_start,
                     clipped_end,
+                    au_rows=au_rows_by_plant.get((row.site, row.plant_no), []),
+                    configuration_cache=configuration_cache,
                 )
             )
 
@@ -1312,13 +1382,13 @@ DAILY_DOWNTIME_SITE_CHANNELS = {
     "Uitgevallen": "Isambane Mining-uit-hourly-downtime-reporting",
 }
 
-def build_daily_downtime_message(report_date, site, shift):
+def build_daily_downtime_message(report_date, site, shift, configuration_cache=None):
     data = get_data(frappe._dict({
         "report_date": report_date,
         "site": site,
         "asset_category": "",
         "shift": shift,
-    }))
+    }), configuration_cache)
 
     total_records = len(data)
     total_hours = round(sum(float(row.get("breakdown_hours") or 0) for row in data), 2)
@@ -1366,16 +1436,15 @@ def build_daily_downtime_message(report_date, site, shift):
     return "\n".join(lines), data
 
 
-def create_daily_downtime_summary(site, report_date, shift):
+def create_daily_downtime_summary(site, report_date, shift, configuration_cache=None):
     import json
 
+    started = time.monotonic()
     channel_id = DAILY_DOWNTIME_SITE_CHANNELS.get(site)
 
     if not channel_id:
         frappe.throw(f"No Raven channel configured for site: {site}")
 
-    summary_message, data = build_daily_downtime_message(report_date, site, shift)
-
     existing = frappe.db.exists("Daily Downtime Summary", {
         "site": site,
         "report_date": report_date,
@@ -1385,6 +1454,8 @@ def create_daily_downtime_summary(site, report_date, shift):
     if existing:
         return existing
 
+    summary_message, data = build_daily_downtime_message(report_date, site, shift, configuration_cache)
+
     doc = frappe.get_doc({
         "doctype": "Daily Downtime Summary",
         "site": site,
@@ -1395,6 +1466,7 @@ def create_daily_downtime_summary(site, report_date, shift):
         "summary_message": summary_message,
         "report_data_json": json.dumps(data, default=str),
         "sent_to_raven": 0,
+        "generation_seconds": round(time.monotonic() - started, 2),
     })
 
     doc.insert(ignore_permissions=True)
@@ -1403,7 +1475,17 @@ def create_daily_downtime_summary(site, report_date, shift):
     return doc.name
 
 
+# Site jobs running at once; the sites are spread across this many jobs.
+DAILY_SITE_JOB_CONCURRENCY = 3
+
+
 def create_daily_downtime_summaries(shift):
+    """
+    Fan the sites out over DAILY_SITE_JOB_CONCURRENCY background jobs.
+
+    The report date and the Startup/Fatigue configuration of every site are
+    resolved once here and handed to each job.
+    """
     today = getdate(now_datetime())
 
     if shift == "Night Shift":
@@ -1411,11 +1493,37 @@ def create_daily_downtime_summaries(shift):
     else:
         report_date = today
 
+    sites = list(DAILY_DOWNTIME_SITE_CHANNELS)
+    configuration_cache = _prefetch_exclusion_configurations(sites)
+    job_names = []
+
+    for index in range(min(DAILY_SITE_JOB_CONCURRENCY, len(sites))):
+        job_name = f"daily_downtime_summary::{report_date}::{shift}::{index}"
+
+        frappe.enqueue(
+            "engineering.engineering.report.down_time.down_time.create_daily_downtime_summaries_for_sites",
+            queue="long",
+            job_name=job_name,
+            timeout=3600,
+            sites=sites[index::DAILY_SITE_JOB_CONCURRENCY],
+            report_date=str(report_date),
+            shift=shift,
+            configuration_cache=configuration_cache,
+        )
+        job_names.append(job_name)
+
+    return job_names
+
+
+def create_daily_downtime_summaries_for_sites(sites, report_date, shift, configuration_cache=None):
+    """Background job: build the summaries of a group of sites in turn."""
+    report_date = getdate(report_date)
+    configuration_cache = configuration_cache if configuration_cache is not None else {}
     created = []
 
-    for site in DAILY_DOWNTIME_SITE_CHANNELS:
+    for site in sites:
         try:
-            created.append(create_daily_downtime_summary(site, report_date, shift))
+            created.append(create_daily_downtime_summary(site, report_date, shift, configuration_cache))
         except Exception:
             frappe.log_error(
                 frappe.get_traceback(),
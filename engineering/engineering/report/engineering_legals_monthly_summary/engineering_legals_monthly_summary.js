@@ -38,6 +38,13 @@ frappe.query_reports["Engineering Legals Monthly Summary"] = {
             fieldtype: "Link",
             options: "Location",
         },
+        {
+            fieldname: "period",
+            label: __("Period"),
+            fieldtype: "Select",
+            options: ["Monthly", "Yearly"],
+            default: "Monthly",
+        },
     ],
 
     onload(report) {
@@ -7,6 +7,8 @@ import frappe
 from frappe import _
 from frappe.utils import getdate
 
+from engineering.engineering.doctype.engineering_legals import legal_status
+
 
 MONTHS = {
     "Jan": 1,
@@ -121,6 +123,14 @@ CATEGORY_CONFIG = [
 ]
 
 
+# section -> categories it counts towards (a section may feed several).
+SECTION_CATEGORIES = {}
+
+for _config in CATEGORY_CONFIG:
+    for _section in _config["sections"]:
+        SECTION_CATEGORIES.setdefault(_section, []).append(_config)
+
+
 def execute(filters=None):
     filters = frappe._dict(filters or {})
 
@@ -129,84 +139,27 @@ def execute(filters=None):
     month_number = MONTHS.get(month_name)
     site = (filters.get("site") or "").strip()
 
+    if filters.get("period") == "Yearly":
+        return execute_yearly(year, site)
+
     if not month_number:
         frappe.throw(_("Please select a valid month."))
 
-    month_start = date(year, month_number, 1)
-    month_end = date(
-        year,
-        month_number,
-        calendar.monthrange(year, month_number)[1],
-    )
-
     columns = get_columns()
     legal_records = get_legal_records(site)
+    buckets = bucket_legal_records(legal_records, year, [month_number])
 
     data = []
     total = 0
 
     for config in CATEGORY_CONFIG:
-        matching_records = []
-
-        for record in legal_records:
-            section = (record.sections or "").strip()
-
-            if section not in config["sections"]:
-                continue
-
-            if config["mode"] == "active_until_expiry":
-                if is_active_during_month(
-                    record,
-                    month_start,
-                    month_end,
-                ):
-                    matching_records.append(record)
-
-            elif config["mode"] == "saved_in_month":
-                if is_saved_in_month(
-                    record,
-                    month_start,
-                    month_end,
-                ):
-                    matching_records.append(record)
-
-        completed = len(matching_records)
-
-        drill_count = sum(
-            1
-            for record in matching_records
-            if (getattr(record, "asset_category", "") or "")
-            .strip()
-            .upper() == "DRILLS"
-        )
-
-        tmm_count = sum(
-            1
-            for record in matching_records
-            if (record.vehicle_type or "").strip().upper() == "TMM"
-            and (getattr(record, "asset_category", "") or "")
-            .strip()
-            .upper() != "DRILLS"
-        )
-
-        ldv_count = sum(
-            1
-            for record in matching_records
-            if (record.vehicle_type or "").strip().upper() == "LDV"
-        )
-
-        record_names = [
-            record.name
-            for record in matching_records
-        ]
+        bucket = buckets[(month_number, config["category"])]
+        completed = bucket.completed
 
         missing_items = []
 
         if config["category"] == "02. Condition Monitoring":
-            active_sections = {
-                (record.sections or "").strip()
-                for record in matching_records
-            }
+            active_sections = bucket.sections
 
             if "Illumination Baseline" not in active_sections:
                 missing_items.append("Illumination Baseline")
@@ -231,12 +184,12 @@ def execute(filters=None):
             "frequency_rule": get_frequency_label(config["mode"]),
             "completed": completed,
             "site": site or "All Sites",
-            "tmm": tmm_count,
-            "ldv": ldv_count,
-            "drills": drill_count,
+            "tmm": bucket.tmm,
+            "ldv": bucket.ldv,
+            "drills": bucket.drills,
             "mode": config["mode"],
             "sections_json": frappe.as_json(config["sections"]),
-            "record_names_json": frappe.as_json(record_names),
+            "record_names_json": frappe.as_json(bucket.record_names),
             "missing_items_json": frappe.as_json(missing_items),
 
             # Every legal category must provide access to its
@@ -312,6 +265,176 @@ def execute(filters=None):
     return columns, data, message, chart, report_summary
 
 
+def execute_yearly(year, site):
+    """All 12 months of one year from a single scan of the legal records."""
+    month_numbers = list(range(1, 13))
+    legal_records = get_legal_records(site)
+    buckets = bucket_legal_records(legal_records, year, month_numbers)
+
+    month_labels = list(MONTHS)
+
+    columns = get_columns()[:2] + [
+        {
+            "label": _(label),
+            "fieldname": label.lower(),
+            "fieldtype": "Int",
+            "width": 70,
+        }
+        for label in month_labels
+    ]
+
+    data = []
+
+    for config in CATEGORY_CONFIG:
+        row = {
+            "category": config["category"],
+            "frequency_rule": get_frequency_label(config["mode"]),
+            "site": site or "All Sites",
+            "mode": config["mode"],
+            "sections_json": frappe.as_json(config["sections"]),
+            "record_names_json": "[]",
+            "missing_items_json": "[]",
+            "view_enabled": 0,
+        }
+
+        for label, number in MONTHS.items():
+            row[label.lower()] = buckets[(number, config["category"])].completed
+
+        data.append(row)
+
+    total_row = {
+        "category": "TOTAL",
+        "frequency_rule": "",
+        "site": site or "All Sites",
+        "is_total": 1,
+        "mode": "",
+        "sections_json": "[]",
+        "record_names_json": "[]",
+        "view_enabled": 0,
+    }
+
+    for label in month_labels:
+        total_row[label.lower()] = sum(row[label.lower()] for row in data)
+
+    data.append(total_row)
+
+    chart = {
+        "data": {
+            "labels": month_labels,
+            "datasets": [
+                {
+                    "name": _("Completed / Active"),
+                    "values": [
+                        total_row[label.lower()]
+                        for label in month_labels
+                    ],
+                }
+            ],
+        },
+        "type": "bar",
+        "height": 300,
+    }
+
+    report_summary = [
+        {
+            "value": str(year),
+            "label": _("Selected Year"),
+            "datatype": "Data",
+            "indicator": "Green",
+        },
+        {
+            "value": site or _("All Sites"),
+            "label": _("Site"),
+            "datatype": "Data",
+            "indicator": "Orange",
+        },
+    ]
+
+    return columns, data, None, chart, report_summary
+
+
+def get_month_bounds(year, month_number):
+    return (
+        date(year, month_number, 1),
+        date(
+            year,
+            month_number,
+            calendar.monthrange(year, month_number)[1],
+        ),
+    )
+
+
+def bucket_legal_records(legal_records, year, month_numbers):
+    """
+    Classify every legal record into all (month, category) buckets in one
+    pass. Each bucket holds completed / tmm / ldv / drills counts, the
+    contributing record names and the set of sections seen.
+    """
+    month_bounds = [
+        (month_number, *get_month_bounds(year, month_number))
+        for month_number in month_numbers
+    ]
+
+    buckets = {
+        (month_number, config["category"]): frappe._dict(
+            completed=0,
+            tmm=0,
+            ldv=0,
+            drills=0,
+            record_names=[],
+            sections=set(),
+        )
+        for month_number in month_numbers
+        for config in CATEGORY_CONFIG
+    }
+
+    for record in legal_records:
+        section = (record.sections or "").strip()
+        configs = SECTION_CATEGORIES.get(section)
+
+        if not configs:
+            continue
+
+        asset_category = (record.asset_category or "").strip().upper()
+        vehicle_type = (record.vehicle_type or "").strip().upper()
+
+        is_drill = asset_category == "DRILLS"
+        is_tmm = vehicle_type == "TMM" and not is_drill
+        is_ldv = vehicle_type == "LDV"
+
+        # Months the record counts in, for each counting mode.
+        months_by_mode = {}
+
+        for config in configs:
+            mode = config["mode"]
+
+            if mode not in months_by_mode:
+                if mode == "active_until_expiry":
+                    check = is_active_during_month
+                elif mode == "saved_in_month":
+                    check = is_saved_in_month
+                else:
+                    check = None
+
+                months_by_mode[mode] = [
+                    month_number
+                    for month_number, month_start, month_end in month_bounds
+                    if check and check(record, month_start, month_end)
+                ]
+
+            for month_number in months_by_mode[mode]:
+                bucket = buckets[(month_number, config["category"])]
+
+                bucket.completed += 1
+                bucket.tmm += is_tmm
+                bucket.ldv += is_ldv
+                bucket.drills += is_drill
+                bucket.record_names.append(record.name)
+                bucket.sections.add(section)
+
+    return buckets
+
+
 def build_machine_plant_list_html(plant_counts, site_label):
     rows = []
 
@@ -585,62 +708,36 @@ def get_columns():
 
 
 def get_legal_records(site=None):
-    filters = {}
+    """Engineering Legals rows with the Asset category joined in."""
+    conditions = ""
+    values = {}
 
     if site:
-        filters["site"] = site
+        conditions = "WHERE el.site = %(site)s"
+        values["site"] = site
 
-    records = frappe.get_all(
-        "Engineering Legals",
-        filters=filters,
-        fields=[
-            "name",
-            "site",
-            "sections",
-            "start_date",
-            "expiry_date",
-            "creation",
-            "vehicle_type",
-            "fleet_number",
-        ],
-        order_by="sections asc, start_date asc",
+    return frappe.db.sql(
+        f"""
+        SELECT
+            el.name,
+            el.site,
+            el.sections,
+            el.start_date,
+            el.expiry_date,
+            el.creation,
+            el.vehicle_type,
+            el.fleet_number,
+            IFNULL(asset.asset_category, '') AS asset_category
+        FROM `tabEngineering Legals` el
+        LEFT JOIN `tabAsset` asset
+            ON asset.name = el.fleet_number
+        {conditions}
+        ORDER BY el.sections ASC, el.start_date ASC
+        """,
+        values,
+        as_dict=True,
     )
 
-    fleet_numbers = list({
-        record.fleet_number
-        for record in records
-        if record.fleet_number
-    })
-
-    asset_category_by_fleet = {}
-
-    if fleet_numbers:
-        asset_rows = frappe.get_all(
-            "Asset",
-            filters={
-                "name": ["in", fleet_numbers],
-            },
-            fields=[
-                "name",
-                "asset_category",
-            ],
-        )
-
-        asset_category_by_fleet = {
-            row.name: row.asset_category
-            for row in asset_rows
-        }
-
-    for record in records:
-        record.asset_category = (
-            asset_category_by_fleet.get(
-                record.fleet_number
-            )
-            or ""
-        )
-
-    return records
-
 
 def is_active_during_month(record, month_start, month_end):
     """
@@ -801,6 +898,35 @@ def get_submitted_machine_rows(machine_type, site=None):
     }
 
 
+def get_status_legal_rows(fleet_numbers):
+    """
+    Latest and previous legal of every fleet / section, read from
+    Engineering Legals Status. For the current month these are the legals
+    that can be active or saved in it, so the full history is not needed.
+    """
+    legal_rows = []
+
+    for row in legal_status.get_status_rows(fleet_numbers=fleet_numbers):
+        legal_rows.append(frappe._dict(
+            fleet_number=row.fleet_number,
+            sections=row.section,
+            start_date=row.latest_start_date,
+            expiry_date=row.latest_expiry_date,
+            creation=row.latest_saved_on,
+        ))
+
+        if row.previous_legal:
+            legal_rows.append(frappe._dict(
+                fleet_number=row.fleet_number,
+                sections=row.section,
+                start_date=row.previous_start_date,
+                expiry_date=row.previous_expiry_date,
+                creation=row.previous_start_date,
+            ))
+
+    return legal_rows
+
+
 @frappe.whitelist()
 def get_machine_legal_status_rows(
     machine_type,
@@ -969,19 +1095,22 @@ def get_machine_legal_status_rows(
     }
 
     if fleet_numbers:
-        legal_rows = frappe.get_all(
-            "Engineering Legals",
-            filters={
-                "fleet_number": ["in", fleet_numbers],
-            },
-            fields=[
-                "fleet_number",
-                "sections",
-                "start_date",
-                "expiry_date",
-                "creation",
-            ],
-        )
+        if month_start <= date.today() <= month_end:
+            legal_rows = get_status_legal_rows(fleet_numbers)
+        else:
+            legal_rows = frappe.get_all(
+                "Engineering Legals",
+                filters={
+                    "fleet_number": ["in", fleet_numbers],
+                },
+                fields=[
+                    "fleet_number",
+                    "sections",
+                    "start_date",
+                    "expiry_date",
+                    "creation",
+                ],
+            )
 
         for legal in legal_rows:
             fleet_number = legal.fleet_number
@@ -75,15 +75,52 @@ frappe.query_reports["Engineering Legals Report"] = {
 
 
     report.page.add_inner_button("Export Filtered Documents", () => {
-      const params = new URLSearchParams({
+      const args = {
         site: frappe.query_report.get_filter_value("site") || "",
         section: frappe.query_report.get_filter_value("section") || "",
         asset: frappe.query_report.get_filter_value("asset") || "",
         from_expiry_date: frappe.query_report.get_filter_value("from_expiry_date") || "",
         to_expiry_date: frappe.query_report.get_filter_value("to_expiry_date") || ""
+      };
+
+      // Large exports are built in the background and sent back as a File.
+      frappe.call({
+        method: "engineering.engineering.report.engineering_legals_report.fetch_second_table.start_documents_export",
+        args,
+        freeze: true,
+        callback: (r) => {
+          const res = (r && r.message) || {};
+
+          if (res.queued) {
+            frappe.show_alert({
+              message: `Exporting ${res.documents} documents in the background. You will be notified when the file is ready.`,
+              indicator: "blue"
+            }, 10);
+            return;
+          }
+
+          const params = new URLSearchParams(args);
+          window.location.href = `/api/method/engineering.engineering.report.engineering_legals_report.fetch_second_table.export_filtered_documents?${params.toString()}`;
+        }
       });
+    });
 
-      window.location.href = `/api/method/engineering.engineering.report.engineering_legals_report.fetch_second_table.export_filtered_documents?${params.toString()}`;
+    frappe.realtime.off("engineering_legals_export_ready");
+    frappe.realtime.on("engineering_legals_export_ready", (res) => {
+      if (!res || res.error) {
+        frappe.msgprint({
+          title: "Export Filtered Documents",
+          message: (res && res.error) || "The document export failed.",
+          indicator: "red"
+        });
+        return;
+      }
+
+      frappe.msgprint({
+        title: "Export Filtered Documents",
+        message: `${res.files_added} files exported. <a href="${encodeURI(res.file_url)}" target="_blank">Download ${frappe.utils.escape_html(res.file_name)}</a>`,
+        indicator: "green"
+      });
     });
 
 
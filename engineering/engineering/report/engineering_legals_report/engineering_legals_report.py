@@ -9,10 +9,7 @@ import frappe
 from frappe.utils import getdate, today
 from collections import defaultdict
 from frappe.query_builder import DocType
-from engineering.engineering.report.engineering_legals_report.fetch_second_table import (
-    _get_expiry_bucket,
-    _build_combined_status,
-)
+from engineering.engineering.doctype.engineering_legals import legal_status
 
 
 EXCLUDED_SITES = ("Duplicate Assets",)
@@ -123,46 +120,21 @@ def _summary_view(as_at, site, section, asset, from_expiry_date=None, to_expiry_
         {"label": "🟦 22–28", "fieldname": "d22_28", "fieldtype": "Int", "width": 95},
     ]
 
-    filters = [["docstatus", "<", 2]]
-
-    if section:
-        filters.append(["sections", "=", section])
-
-    if asset:
-        filters.append(["fleet_number", "=", asset])
-
-    if from_expiry_date:
-        filters.append(["expiry_date", ">=", from_expiry_date])
-
-    if to_expiry_date:
-        filters.append(["expiry_date", "<=", to_expiry_date])
-
-    docs = frappe.get_all(
-        "Engineering Legals",
-        filters=filters,
-        fields=[
-            "name",
-            "site",
-            "sections",
-            "fleet_number",
-            "start_date",
-            "expiry_date",
-            "modified",
-            "attach_paper",
-        ],
-        order_by="sections asc, fleet_number asc, start_date desc, expiry_date desc, modified desc",
-        limit_page_length=0,
+    # One Engineering Legals Status row per Asset+Section: its latest legal.
+    status_rows = legal_status.get_status_rows(
+        fleet_numbers=[asset] if asset else None,
+        sections=[section] if section else None,
+        from_expiry_date=from_expiry_date,
+        to_expiry_date=to_expiry_date,
+        exclude_sections=NO_EXPIRY_SECTIONS,
     )
 
-    asset_site_map = _get_asset_site_map([d.get("fleet_number") for d in docs])
+    asset_site_map = _get_asset_site_map([r.get("fleet_number") for r in status_rows])
 
-    grouped = {}
-    for d in docs:
-        sec = (d.get("sections") or "").strip()
-        fleet = (d.get("fleet_number") or "").strip()
+    latest_rows = []
+    for r in status_rows:
+        fleet = (r.get("fleet_number") or "").strip()
 
-        if sec in NO_EXPIRY_SECTIONS:
-            continue
         if not fleet:
             continue
 
@@ -174,18 +146,7 @@ def _summary_view(as_at, site, section, asset, from_expiry_date=None, to_expiry_
         if site and current_site != site:
             continue
 
-        key = (sec, fleet)
-        existing = grouped.get(key)
-
-        if not existing:
-            grouped[key] = d
-            continue
-
-        existing_expiry = existing.get("expiry_date")
-        new_expiry = d.get("expiry_date")
-
-        if new_expiry and (not existing_expiry or getdate(new_expiry) > getdate(existing_expiry)):
-            grouped[key] = d
+        latest_rows.append(r)
 
     summary = defaultdict(lambda: {
         "section": "",
@@ -196,14 +157,13 @@ def _summary_view(as_at, site, section, asset, from_expiry_date=None, to_expiry_
         "d22_28": 0,
     })
 
-    for (_, _), latest_doc in grouped.items():
-        sec = (latest_doc.get("sections") or "").strip()
-        expiry_date = latest_doc.get("expiry_date")
+    for status_row in latest_rows:
+        sec = (status_row.get("section") or "").strip()
 
-        if not expiry_date:
+        if not status_row.get("latest_expiry_date"):
             continue
 
-        bucket = _get_expiry_bucket(expiry_date, as_at)
+        bucket = legal_status.status_bucket(status_row, as_at)
         row = summary[sec]
         row["section"] = sec
 
@@ -233,85 +193,14 @@ def _assets_view(as_at, site, section, asset, bucket, from_expiry_date=None, to_
         {"label": "Status", "fieldname": "status", "fieldtype": "Data", "width": 180},
     ]
 
-    filters = [["docstatus", "<", 2]]
-    if section:
-        filters.append(["sections", "=", section])
-    if asset:
-        filters.append(["fleet_number", "=", asset])
-
-    if from_expiry_date:
-        filters.append(["expiry_date", ">=", from_expiry_date])
-
-    if to_expiry_date:
-        filters.append(["expiry_date", "<=", to_expiry_date])
-
-
-
-    docs = frappe.get_all(
-        "Engineering Legals",
-        filters=filters,
-        fields=[
-            "name",
-            "site",
-            "sections",
-            "fleet_number",
-            "start_date",
-            "expiry_date",
-            "modified",
-            "attach_paper",
-        ],
-        order_by="site asc, sections asc, fleet_number asc, start_date desc, expiry_date desc, modified desc",
-        limit_page_length=0,
+    status_rows = legal_status.get_status_rows(
+        fleet_numbers=[asset] if asset else None,
+        sections=[section] if section else None,
+        from_expiry_date=from_expiry_date,
+        to_expiry_date=to_expiry_date,
+        exclude_sections=NO_EXPIRY_SECTIONS,
     )
 
-    def get_expiry_bucket(expiry_date):
-        if not expiry_date:
-            return ""
-
-        days_left = (getdate(expiry_date) - as_at).days
-
-        if days_left < 0:
-            return "Overdue"
-        if days_left <= 7:
-            return "0-7 days"
-        if days_left <= 14:
-            return "8-14 days"
-        if days_left <= 21:
-            return "15-21 days"
-        if days_left <= 28:
-            return "22-28 days"
-        return ""
-
-    def is_recently_done(previous_expiry_date, latest_start_date):
-        if not previous_expiry_date or not latest_start_date:
-            return False
-
-        previous_expiry_date = getdate(previous_expiry_date)
-        latest_start_date = getdate(latest_start_date)
-
-        window_start = frappe.utils.add_days(previous_expiry_date, -10)
-        window_end = frappe.utils.add_days(previous_expiry_date, 15)
-
-        return window_start <= latest_start_date <= window_end
-
-    def build_combined_status(latest_doc, previous_doc):
-        statuses = []
-
-        prev_expiry = previous_doc.get("expiry_date") if previous_doc else None
-        latest_start = latest_doc.get("start_date")
-        latest_expiry = latest_doc.get("expiry_date")
-
-        is_recent = is_recently_done(prev_expiry, latest_start)
-        expiry_bucket = get_expiry_bucket(latest_expiry)
-
-        if is_recent:
-            statuses.append("Recently done")
-
-        if expiry_bucket and not (is_recent and expiry_bucket == "Overdue"):
-            statuses.append(expiry_bucket)
-
-        return " | ".join(statuses) if statuses else "-"
-
     def bucket_matches(expiry_bucket_value):
         if bucket == "overdue":
             return expiry_bucket_value == "Overdue"
@@ -325,16 +214,14 @@ def _assets_view(as_at, site, section, asset, bucket, from_expiry_date=None, to_
             return expiry_bucket_value == "22-28 days"
         return False
 
-    asset_site_map = _get_asset_site_map([d.get("fleet_number") for d in docs])
+    asset_site_map = _get_asset_site_map([r.get("fleet_number") for r in status_rows])
 
-    grouped = defaultdict(list)
-    for d in docs:
-        sec = (d.get("sections") or "").strip()
-        fleet = (d.get("fleet_number") or "").strip()
+    data = []
+    for r in status_rows:
+        fleet = (r.get("fleet_number") or "").strip()
+        expiry_date = r.get("latest_expiry_date")
 
-        if sec in NO_EXPIRY_SECTIONS:
-            continue
-        if not fleet:
+        if not fleet or not expiry_date:
             continue
 
         current_site = (asset_site_map.get(fleet) or "").strip()
@@ -345,47 +232,17 @@ def _assets_view(as_at, site, section, asset, bucket, from_expiry_date=None, to_
         if site and current_site != site:
             continue
 
-        key = (
-            current_site,
-            sec,
-            fleet,
-        )
-        grouped[key].append(d)
-
-    data = []
-    for (_, sec, fleet), group_docs in grouped.items():
-        latest_doc = None
-
-        for doc in group_docs:
-            doc_expiry = doc.get("expiry_date")
-            if not doc_expiry:
-                continue
-
-            if not latest_doc:
-                latest_doc = doc
-                continue
-
-            latest_expiry = latest_doc.get("expiry_date")
-            if getdate(doc_expiry) > getdate(latest_expiry):
-                latest_doc = doc
-
-        if not latest_doc:
+        status = legal_status.status_bucket(r, as_at)
+        if not bucket_matches(status):
             continue
 
-        status = get_expiry_bucket(latest_doc.get("expiry_date"))
-
-        expiry_bucket_value = get_expiry_bucket(latest_doc.get("expiry_date"))
-        if not bucket_matches(expiry_bucket_value):
-            continue
-
-        expiry_date = latest_doc.get("expiry_date")
-        days_left = (getdate(expiry_date) - as_at).days if expiry_date else None
+        days_left = (getdate(expiry_date) - as_at).days
 
         data.append({
-            "asset": latest_doc.get("fleet_number"),
-            "site": asset_site_map.get(latest_doc.get("fleet_number")) or "",
-            "section": latest_doc.get("sections"),
-            "start_date": latest_doc.get("start_date"),
+            "asset": fleet,
+            "site": current_site,
+            "section": r.get("section"),
+            "start_date": r.get("latest_start_date"),
             "expiry_date": expiry_date,
             "days_left": days_left,
             "status": status,
@@ -2,6 +2,7 @@ import csv
 import io
 import os
 import re
+import shutil
 import zipfile
 
 import frappe
@@ -12,6 +13,8 @@ EXCLUDED_SITES = ("Duplicate Assets",)
 from collections import defaultdict
 from urllib.parse import quote
 
+from engineering.engineering.doctype.engineering_legals import legal_status
+
 
 
 
@@ -146,63 +149,15 @@ def get_asset_category_counts(site=None):
 
 
 
-RECENTLY_DONE_EARLY_DAYS = 10
-RECENTLY_DONE_LATE_DAYS = 15
-
-
 def _get_expiry_bucket(expiry_date, as_at):
-    if not expiry_date:
-        return ""
-
-    days_left = (getdate(expiry_date) - as_at).days
-
-    if days_left < 0:
-        return "Overdue"
-    if days_left <= 7:
-        return "0-7 days"
-    if days_left <= 14:
-        return "8-14 days"
-    if days_left <= 21:
-        return "15-21 days"
-    if days_left <= 28:
-        return "22-28 days"
-
-    return ""
-
-
-def _is_recently_done(previous_expiry_date, latest_start_date):
-    if not previous_expiry_date or not latest_start_date:
-        return False
-
-    previous_expiry_date = getdate(previous_expiry_date)
-    latest_start_date = getdate(latest_start_date)
-
-    window_start = add_days(previous_expiry_date, -RECENTLY_DONE_EARLY_DAYS)
-    window_end = add_days(previous_expiry_date, RECENTLY_DONE_LATE_DAYS)
-
-    return window_start <= latest_start_date <= window_end
+    return legal_status.expiry_bucket(expiry_date, as_at)
 
 
 def _build_combined_status(latest_doc, previous_doc, as_at):
-    statuses = []
-
-    prev_expiry = previous_doc.get("expiry_date") if previous_doc else None
-    latest_start = latest_doc.get("start_date")
-    latest_expiry = latest_doc.get("expiry_date")
-
-    is_recent = _is_recently_done(prev_expiry, latest_start)
-    expiry_bucket = _get_expiry_bucket(latest_expiry, as_at)
-
-    if is_recent:
-        statuses.append("✅ Recently done")
-
-    if expiry_bucket and not (is_recent and expiry_bucket == "Overdue"):
-        if expiry_bucket == "Overdue":
-            statuses.append("❌ Overdue")
-        else:
-            statuses.append(expiry_bucket)
-
-    return " | ".join(statuses) if statuses else "-"
+    return legal_status.combined_status(
+        legal_status.status_values(latest_doc, previous_doc, as_at),
+        as_at,
+    )
 
 
 
@@ -292,41 +247,19 @@ def get_category_summary(site=None, asset_category=None, section=None, from_expi
     as_at = getdate(today())
 
     if fleet_numbers and section != "Machine Service Records":
-        legal_filters = [
-            ["docstatus", "<", 2],
-            ["fleet_number", "in", fleet_numbers],
-        ]
-        if section:
-            legal_filters.append(["sections", "=", section])
-
-        if from_expiry_date:
-            legal_filters.append(["expiry_date", ">=", getdate(from_expiry_date)])
-        if to_expiry_date:
-            legal_filters.append(["expiry_date", "<=", getdate(to_expiry_date)])
-
-        docs = frappe.get_all(
-            "Engineering Legals",
-            filters=legal_filters,
-            fields=[
-                "name",
-                "site",
-                "sections",
-                "fleet_number",
-                "start_date",
-                "expiry_date",
-                "modified",
-                "attach_paper",
-            ],
-            order_by="fleet_number asc, sections asc, start_date desc, expiry_date desc, modified desc",
-            limit_page_length=0,
+        # One Engineering Legals Status row per fleet / section.
+        status_rows = legal_status.get_status_rows(
+            fleet_numbers=fleet_numbers,
+            sections=[section] if section else None,
+            from_expiry_date=from_expiry_date,
+            to_expiry_date=to_expiry_date,
         )
 
         asset_site_map = _get_asset_site_map(fleet_numbers)
 
-        grouped = defaultdict(list)
-        for d in docs:
-            fleet = (d.get("fleet_number") or "").strip()
-            sec = (d.get("sections") or "").strip()
+        for row in status_rows:
+            fleet = (row.get("fleet_number") or "").strip()
+            sec = (row.get("section") or "").strip()
             current_site = (asset_site_map.get(fleet) or "").strip()
 
             if not fleet:
@@ -336,25 +269,17 @@ def get_category_summary(site=None, asset_category=None, section=None, from_expi
             if site and current_site != site:
                 continue
 
-            key = (current_site, fleet, sec)
-            grouped[key].append(d)
-
-        for key, group_docs in grouped.items():
-            current_site, fleet, sec = key
-            latest_doc = group_docs[0]
-            previous_doc = group_docs[1] if len(group_docs) > 1 else None
-
             out.append({
-                "name": latest_doc.get("name"),
+                "name": row.get("latest_legal"),
                 "site": current_site,
                 "section": sec,
                 "fleet_number": fleet,
-                "start_date": latest_doc.get("start_date"),
-                "expiry_date": latest_doc.get("expiry_date"),
-                "modified": latest_doc.get("modified"),
-                "attach_paper": latest_doc.get("attach_paper"),
-                "record_url": f"/app/engineering-legals/{quote(latest_doc.get('name') or '')}",
-                "status": _build_combined_status(latest_doc, previous_doc, as_at),
+                "start_date": row.get("latest_start_date"),
+                "expiry_date": row.get("latest_expiry_date"),
+                "modified": row.get("modified"),
+                "attach_paper": row.get("attach_paper"),
+                "record_url": f"/app/engineering-legals/{quote(row.get('latest_legal') or '')}",
+                "status": legal_status.combined_status(row, as_at),
             })
 
     if not section or section == "Machine Service Records":
@@ -785,6 +710,79 @@ def _get_file_doc_from_url(file_url):
     return None
 
 
+# Exports with more documents than this are built by a background job.
+EXPORT_BACKGROUND_ROWS = 250
+
+# Read attachments in chunks of this size instead of loading them whole.
+EXPORT_CHUNK_SIZE = 1024 * 1024
+
+# Already compressed formats are stored as-is rather than deflated again.
+STORED_EXTENSIONS = {
+    ".pdf",
+    ".jpg",
+    ".jpeg",
+    ".png",
+    ".gif",
+    ".webp",
+    ".heic",
+    ".zip",
+    ".gz",
+    ".7z",
+    ".rar",
+    ".docx",
+    ".xlsx",
+    ".pptx",
+    ".mp4",
+}
+
+EXPORT_MANIFEST_FIELDS = [
+    "record_type",
+    "record_name",
+    "site",
+    "fleet_number",
+    "section",
+    "start_date",
+    "expiry_date",
+    "modified",
+    "source_file",
+    "exported_file",
+    "status",
+]
+
+
+def _write_file_to_zip(zip_file, zip_path, file_doc):
+    """Copy one attachment into the archive in chunks; False if unreadable."""
+    compress_type = (
+        zipfile.ZIP_STORED
+        if os.path.splitext(zip_path)[1].lower() in STORED_EXTENSIONS
+        else zipfile.ZIP_DEFLATED
+    )
+
+    file_path = None
+    if not (file_doc.file_url or "").startswith(("http://", "https://")):
+        file_path = file_doc.get_full_path()
+
+    if file_path and os.path.isfile(file_path):
+        zip_info = zipfile.ZipInfo.from_file(file_path, zip_path)
+        zip_info.compress_type = compress_type
+
+        with open(file_path, "rb") as source, zip_file.open(zip_info, "w", force_zip64=True) as target:
+            shutil.copyfileobj(source, target, EXPORT_CHUNK_SIZE)
+
+        return True
+
+    # Remote files (or files missing from disk) go through File.get_content.
+    content = file_doc.get_content()
+    if content is None:
+        return False
+
+    if isinstance(content, str):
+        content = content.encode("utf-8")
+
+    zip_file.writestr(zip_path, content, compress_type=compress_type)
+    return True
+
+
 def _add_file_to_zip(zip_file, row, manifest_rows, used_paths):
     file_url = (row.get("attach_paper") or "").strip()
 
@@ -813,15 +811,6 @@ def _add_file_to_zip(zip_file, row, manifest_rows, used_paths):
         manifest_rows.append(manifest_row)
         return 0
 
-    content = file_doc.get_content()
-    if content is None:
-        manifest_row["status"] = "File content not readable"
-        manifest_rows.append(manifest_row)
-        return 0
-
-    if isinstance(content, str):
-        content = content.encode("utf-8")
-
     original_filename = _safe_export_name(file_doc.file_name or os.path.basename(file_url), "document.pdf")
     site = _safe_export_name(row.get("site"), "Unknown Site")
     fleet = _safe_export_name(row.get("fleet_number"), "No Fleet")
@@ -837,8 +826,12 @@ def _add_file_to_zip(zip_file, row, manifest_rows, used_paths):
         zip_path = f"{base} ({counter}){ext}"
         counter += 1
 
+    if not _write_file_to_zip(zip_file, zip_path, file_doc):
+        manifest_row["status"] = "File content not readable"
+        manifest_rows.append(manifest_row)
+        return 0
+
     used_paths.add(zip_path)
-    zip_file.writestr(zip_path, content)
 
     manifest_row["exported_file"] = zip_path
     manifest_row["status"] = "Exported"
@@ -846,8 +839,7 @@ def _add_file_to_zip(zip_file, row, manifest_rows, used_paths):
     return 1
 
 
-@frappe.whitelist()
-def export_filtered_documents(site=None, section=None, asset=None, from_expiry_date=None, to_expiry_date=None):
+def _get_export_rows(site=None, section=None, asset=None, from_expiry_date=None, to_expiry_date=None):
     legal_rows = []
 
     if section != "Machine Service Records":
@@ -919,44 +911,136 @@ def export_filtered_documents(site=None, section=None, asset=None, from_expiry_d
             row["expiry_date"] = None
             row["attach_paper"] = row.get("attach")
 
-    rows = list(legal_rows) + list(msr_rows)
+    return list(legal_rows) + list(msr_rows)
 
-    if not rows:
-        frappe.throw("No documents found for the selected filters.")
 
-    zip_buffer = io.BytesIO()
+def _write_documents_zip(target, rows):
+    """Write the archive for rows to target (a path or binary file); returns files added."""
     manifest_rows = []
     used_paths = set()
     files_added = 0
 
-    with zipfile.ZipFile(zip_buffer, "w", zipfile.ZIP_DEFLATED) as zip_file:
+    with zipfile.ZipFile(target, "w", zipfile.ZIP_DEFLATED, allowZip64=True) as zip_file:
         for row in rows:
             files_added += _add_file_to_zip(zip_file, row, manifest_rows, used_paths)
 
         manifest_buffer = io.StringIO()
-        fieldnames = [
-            "record_type",
-            "record_name",
-            "site",
-            "fleet_number",
-            "section",
-            "start_date",
-            "expiry_date",
-            "modified",
-            "source_file",
-            "exported_file",
-            "status",
-        ]
-        writer = csv.DictWriter(manifest_buffer, fieldnames=fieldnames)
+        writer = csv.DictWriter(manifest_buffer, fieldnames=EXPORT_MANIFEST_FIELDS)
         writer.writeheader()
         writer.writerows(manifest_rows)
 
         zip_file.writestr("Export Manifest.csv", manifest_buffer.getvalue())
 
-    if files_added == 0:
-        frappe.throw("No attached files could be exported. Check the Export Manifest rules/attachments.")
+    return files_added
 
+
+def _export_file_name(suffix=""):
     timestamp = now_datetime().strftime("%Y%m%d_%H%M%S")
-    frappe.local.response.filename = f"Engineering_Legals_Export_{timestamp}.zip"
-    frappe.local.response.filecontent = zip_buffer.getvalue()
-    frappe.local.response.type = "download"    
\ No newline at end of file
+    return f"Engineering_Legals_Export_{timestamp}{suffix}.zip"
+
+
+@frappe.whitelist()
+def start_documents_export(site=None, section=None, asset=None, from_expiry_date=None, to_expiry_date=None):
+    """
+    Small exports download directly (export_filtered_documents); larger ones
+    are queued and the user is sent the File when it is ready.
+    """
+    rows = _get_export_rows(site, section, asset, from_expiry_date, to_expiry_date)
+
+    if not rows:
+        frappe.throw("No documents found for the selected filters.")
+
+    if len(rows) <= EXPORT_BACKGROUND_ROWS:
+        return {"queued": False, "documents": len(rows)}
+
+    frappe.enqueue(
+        "engineering.engineering.report.engineering_legals_report.fetch_second_table.run_documents_export",
+        queue="long",
+        timeout=3600,
+        site=site,
+        section=section,
+        asset=asset,
+        from_expiry_date=from_expiry_date,
+        to_expiry_date=to_expiry_date,
+        user=frappe.session.user,
+    )
+
+    return {"queued": True, "documents": len(rows)}
+
+
+def _save_documents_export(rows):
+    """
+    Write the archive for rows straight into private files and attach it to
+    the report. Returns (file_doc, files_added); file_doc is None when no
+    attachment could be exported.
+    """
+    file_name = _export_file_name(f"_{frappe.generate_hash(length=6)}")
+    file_path = frappe.get_site_path("private", "files", file_name)
+
+    try:
+        files_added = _write_documents_zip(file_path, rows)
+
+        if files_added == 0:
+            os.remove(file_path)
+            return None, 0
+
+        file_doc = frappe.get_doc({
+            "doctype": "File",
+            "file_name": file_name,
+            "file_url": f"/private/files/{file_name}",
+            "is_private": 1,
+            "attached_to_doctype": "Report",
+            "attached_to_name": "Engineering Legals Report",
+        })
+        file_doc.insert(ignore_permissions=True)
+
+    except Exception:
+        if os.path.exists(file_path):
+            os.remove(file_path)
+        raise
+
+    return file_doc, files_added
+
+
+def run_documents_export(site=None, section=None, asset=None, from_expiry_date=None, to_expiry_date=None, user=None):
+    """Background export: the archive is written straight into private files."""
+    try:
+        rows = _get_export_rows(site, section, asset, from_expiry_date, to_expiry_date)
+        file_doc, files_added = _save_documents_export(rows)
+
+        if not file_doc:
+            result = {"error": "No attached files could be exported. Check the Export Manifest rules/attachments."}
+        else:
+            frappe.db.commit()
+
+            result = {
+                "file_url": file_doc.file_url,
+                "file_name": file_doc.file_name,
+                "files_added": files_added,
+            }
+
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Engineering Legals export failed")
+        result = {"error": "The document export failed. See the Error Log for details."}
+
+    frappe.publish_realtime("engineering_legals_export_ready", result, user=user)
+
+    return result
+
+
+@frappe.whitelist()
+def export_filtered_documents(site=None, section=None, asset=None, from_expiry_date=None, to_expiry_date=None):
+    rows = _get_export_rows(site, section, asset, from_expiry_date, to_expiry_date)
+
+    if not rows:
+        frappe.throw("No documents found for the selected filters.")
+
+    # Built on disk like the background export and served as a private
+    # File, so the archive is never held in worker memory.
+    file_doc, _ = _save_documents_export(rows)
+
+    if not file_doc:
+        frappe.throw("No attached files could be exported. Check the Export Manifest rules/attachments.")
+
+    frappe.local.response.type = "redirect"
+    frappe.local.response.location = file_doc.file_url
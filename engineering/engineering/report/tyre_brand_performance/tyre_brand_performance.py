@@ -5,17 +5,17 @@ from frappe import _
 
 from engineering.tyre_analytics import (
     apply_common_filters,
-    get_latest_analytics,
+    get_analytics_snapshot,
     include_mock_value,
 )
 
 
 def execute(filters=None):
     filters = frappe._dict(filters or {})
-    rows = get_latest_analytics(
+    rows = get_analytics_snapshot(
         as_on_date=filters.get("as_on_date"),
         include_mock=include_mock_value(filters),
-    )
+    ).rows()
     rows = apply_common_filters(rows, filters)
     grouped = defaultdict(list)
 
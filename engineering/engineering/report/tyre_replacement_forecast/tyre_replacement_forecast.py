@@ -8,7 +8,7 @@ from frappe.utils import add_months, cint, getdate
 
 from engineering.tyre_analytics import (
     apply_common_filters,
-    get_latest_analytics,
+    get_analytics_snapshot,
     include_mock_value,
 )
 
@@ -29,10 +29,10 @@ def execute(filters=None):
     first_month = _month_start(add_months(anchor_date, 1))
     last_month = _month_end(add_months(first_month, number_of_months - 1))
 
-    rows = get_latest_analytics(
+    rows = get_analytics_snapshot(
         as_on_date=anchor_date,
         include_mock=include_mock_value(filters),
-    )
+    ).rows()
     rows = apply_common_filters(rows, filters)
     grouped = defaultdict(lambda: {"serials": set(), "machines": set()})
 
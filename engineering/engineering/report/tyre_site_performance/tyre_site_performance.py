@@ -4,17 +4,17 @@ import frappe
 from frappe import _
 
 from engineering.tyre_analytics import (
-    get_latest_analytics,
+    get_analytics_snapshot,
     include_mock_value,
 )
 
 
 def execute(filters=None):
     filters = frappe._dict(filters or {})
-    rows = get_latest_analytics(
+    rows = get_analytics_snapshot(
         as_on_date=filters.get("as_on_date"),
         include_mock=include_mock_value(filters),
-    )
+    ).rows()
     grouped = defaultdict(list)
 
     for row in rows:
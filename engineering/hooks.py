@@ -109,6 +109,10 @@ scheduler_events = {
         "0 1 * * *": [
             "engineering.engineering.doctype.service_schedule.service_schedule.queue_service_schedule_update"
         ],
+        # Engineering Legals Status: move expiry buckets on to the new day
+        "10 0 * * *": [
+            "engineering.engineering.doctype.engineering_legals.legal_status.refresh_status_buckets"
+        ],
         "0 2 * * *": [
             "engineering.engineering.doctype.engineering_legals.engineering_legals.queue_unsynced_engineering_legals"
         ],
@@ -126,7 +130,25 @@ doc_events = {
         "after_insert": "engineering.controllers.whatsapp_breakdown_import.whatsapp_message_after_insert",
     },
     "Plant Breakdown or Maintenance": {
-        "on_update": "engineering.engineering.doctype.plant_breakdown_or_maintenance.plant_breakdown_or_maintenance.on_update",
+        "on_update": [
+            "engineering.engineering.doctype.plant_breakdown_or_maintenance.plant_breakdown_or_maintenance.on_update",
+            "engineering.engineering.doctype.availability_and_utilisation.au_recompute.on_breakdown_change",
+        ],
+        "on_trash": "engineering.engineering.doctype.availability_and_utilisation.au_recompute.on_breakdown_change",
+    },
+    # A&U incremental recompute: queue the (site, asset, date, shift) keys these edits affect
+    "Pre-Use Hours": {
+        "on_update": "engineering.engineering.doctype.availability_and_utilisation.au_recompute.on_preuse_change",
+        "on_trash": "engineering.engineering.doctype.availability_and_utilisation.au_recompute.on_preuse_change",
+    },
+    "Monthly Production Planning": {
+        "on_update": "engineering.engineering.doctype.availability_and_utilisation.au_recompute.on_planning_change",
+        "on_trash": "engineering.engineering.doctype.availability_and_utilisation.au_recompute.on_planning_change",
+    },
+    # Daily Availability Dashboard: drop cached HTML/PDF covering the edited shift
+    "Availability and Utilisation": {
+        "on_update": "engineering.engineering.page.daily_availability_dashboard.dashboard_cache.on_au_change",
+        "on_trash": "engineering.engineering.page.daily_availability_dashboard.dashboard_cache.on_au_change",
     },
     "Engineering Legals": {
         "after_insert": "engineering.engineering.doctype.engineering_legals.engineering_legals.sync_engineering_legals_from_doc",
@@ -143,6 +165,11 @@ doc_events = {
     "Component Replacement Report": {
         "on_update": "engineering.controllers.isambane_sample_input.component_replacement_report_on_update"
     },
+    # Tyre analytics: keep Tyre Current State in step with the surveys
+    "Tyre Survey": {
+        "on_update": "engineering.tyre_analytics.on_tyre_survey_change",
+        "on_trash": "engineering.tyre_analytics.on_tyre_survey_change",
+    },
 
 }
 
@@ -152,6 +179,13 @@ doc_events = {
 override_whitelisted_methods = {
 }
 
+# ---------------------------------------------------------------------
+# Log clearing (Log Settings)
+# ---------------------------------------------------------------------
+default_log_clearing_doctypes = {
+    "AU Run Telemetry": 30,
+}
+
 # Engineering Legals monthly SharePoint folders
 scheduler_events = globals().get("scheduler_events", {})
 
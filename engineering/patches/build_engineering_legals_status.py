@@ -0,0 +1,5 @@
+from engineering.engineering.doctype.engineering_legals.legal_status import refresh_legal_status
+
+
+def execute():
+    refresh_legal_status()
@@ -0,0 +1,5 @@
+from engineering.tyre_analytics import refresh_tyre_state
+
+
+def execute():
+    refresh_tyre_state()
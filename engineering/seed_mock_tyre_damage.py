@@ -14,6 +14,8 @@ from pathlib import Path
 import frappe
 from frappe import _
 
+from engineering.tyre_analytics import refresh_tyre_state
+
 
 DATA_FILE = Path(__file__).with_name("mock_grader_utilisation.json")
 MOCK_INSPECTOR = "Mock Survey Generator"
@@ -164,6 +166,10 @@ def seed(dry_run=True):
         )
 
     if not dry_run:
+        # set_value skips the Tyre Survey hooks.
+        if result["damage_rows_added"]:
+            refresh_tyre_state()
+
         frappe.db.commit()
 
     return result
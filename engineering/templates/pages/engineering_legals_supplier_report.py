@@ -5,6 +5,8 @@ from frappe import _
 from frappe.utils import getdate, today
 from erpnext.controllers.website_list_for_contact import get_customers_suppliers
 
+from engineering.engineering.doctype.engineering_legals import legal_status
+
 
 EXCLUDED_SITES = ("Duplicate Assets",)
 
@@ -134,24 +136,14 @@ def _get_sections_options():
     )
 
 
-def _get_expiry_bucket(expiry_date, as_at):
-    if not expiry_date:
-        return ""
-
-    days_left = (getdate(expiry_date) - as_at).days
-
-    if days_left < 0:
-        return "overdue"
-    if days_left <= 7:
-        return "d0_7"
-    if days_left <= 14:
-        return "d8_14"
-    if days_left <= 21:
-        return "d15_21"
-    if days_left <= 28:
-        return "d22_28"
-
-    return ""
+# Engineering Legals Status bucket -> summary column.
+BUCKET_BY_STATUS = {
+    "Overdue": "overdue",
+    "0-7 days": "d0_7",
+    "8-14 days": "d8_14",
+    "15-21 days": "d15_21",
+    "22-28 days": "d22_28",
+}
 
 
 def _bucket_label(bucket):
@@ -223,30 +215,22 @@ def _get_legal_docs(asset_names, filters):
 
 
 def _get_latest_docs(asset_names, filters):
-    docs = _get_legal_docs(asset_names, filters)
-    grouped = {}
-
-    for d in docs:
-        sec = (d.get("sections") or "").strip()
-        fleet = (d.get("fleet_number") or "").strip()
-
-        if not fleet or sec in NO_EXPIRY_SECTIONS:
-            continue
-
-        key = (sec, fleet)
-        existing = grouped.get(key)
-
-        if not existing:
-            grouped[key] = d
-            continue
+    """Latest legal per section / fleet, from Engineering Legals Status."""
+    rows = legal_status.get_status_rows(
+        fleet_numbers=asset_names,
+        sections=[filters["section"]] if filters.get("section") else None,
+        from_expiry_date=filters.get("from_expiry_date"),
+        to_expiry_date=filters.get("to_expiry_date"),
+        exclude_sections=NO_EXPIRY_SECTIONS,
+    )
 
-        old_expiry = existing.get("expiry_date")
-        new_expiry = d.get("expiry_date")
+    if filters.get("asset"):
+        rows = [r for r in rows if r.get("fleet_number") == filters["asset"]]
 
-        if new_expiry and (not old_expiry or getdate(new_expiry) > getdate(old_expiry)):
-            grouped[key] = d
+    if filters.get("site"):
+        rows = [r for r in rows if (r.get("site") or "").strip() == filters["site"]]
 
-    return list(grouped.values())
+    return rows
 
 
 def _get_summary_rows(asset_names, filters):
@@ -264,8 +248,8 @@ def _get_summary_rows(asset_names, filters):
     })
 
     for d in latest_docs:
-        section = (d.get("sections") or "").strip()
-        bucket = _get_expiry_bucket(d.get("expiry_date"), as_at)
+        section = (d.get("section") or "").strip()
+        bucket = BUCKET_BY_STATUS.get(legal_status.status_bucket(d, as_at), "")
 
         if not bucket:
             continue
@@ -275,13 +259,13 @@ def _get_summary_rows(asset_names, filters):
         row[bucket] += 1
 
         row["assets"].append({
-            "name": d.get("name"),
+            "name": d.get("latest_legal"),
             "site": d.get("site"),
             "section": section,
             "fleet_number": d.get("fleet_number"),
-            "start_date": d.get("start_date"),
-            "expiry_date": d.get("expiry_date"),
-            "days_left": _days_left(d.get("expiry_date")),
+            "start_date": d.get("latest_start_date"),
+            "expiry_date": d.get("latest_expiry_date"),
+            "days_left": _days_left(d.get("latest_expiry_date")),
             "bucket": bucket,
             "bucket_label": _bucket_label(bucket),
             "attach_paper": d.get("attach_paper"),
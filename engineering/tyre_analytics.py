@@ -2,18 +2,107 @@
 
 Tyre placement is taken from each survey row. History is matched only by the
 physical tyre serial number, so a tyre may move between ADTs and positions.
+
+The latest and previous reading of every serial is kept in Tyre Current
+State, refreshed for the affected serials whenever a Tyre Survey is saved or
+deleted. get_latest_analytics reads that table (one row per active tyre) and
+only falls back to the full survey history for an as-on date older than the
+newest survey it holds.
+
+get_analytics_snapshot caches that result per (as_on_date, include_mock)
+for SNAPSHOT_TTL_SECONDS, column-wise and with the make / model of every
+ADT it mentions, so the tyre dashboard and the tyre reports share one build.
+Any state refresh drops the cached snapshots.
 """
 
 from collections import defaultdict
 from datetime import timedelta
 
 import frappe
-from frappe.utils import flt, getdate
+from frappe.utils import flt, getdate, now
 
 
 SCRAP_LIMIT_MM = 14.0
 MONTH_DAYS = 30.4375
 
+STATE_DOCTYPE = "Tyre Current State"
+STATE_WRITE_CHUNK_SIZE = 500
+
+# Columns of the latest survey row, as selected by _raw_readings.
+READING_FIELDS = (
+    "survey_item",
+    "survey",
+    "survey_date",
+    "site",
+    "fleet_number",
+    "supplier",
+    "position",
+    "serial_number",
+    "tyre_make",
+    "brand_number",
+    "tyre_size",
+    "tread_pattern",
+    "star_ply_rating",
+    "tra_code",
+    "compound_code",
+    "overall_diameter",
+    "otd",
+    "rtd_1",
+    "rtd_2",
+    "recommended_pressure",
+    "actual_pressure",
+    "condition_notes",
+    "required_action",
+    "damage_category",
+    "repair_count",
+)
+
+# Derived from the latest and previous reading of the serial.
+TREND_FIELDS = (
+    "average_rtd",
+    "rtd_percent",
+    "previous_rtd",
+    "interval_months",
+    "wear_rate",
+    "remaining_months",
+    "replacement_date",
+    "pressure_variance",
+    "pressure_compliant",
+    "low_tread",
+    "damage_incident",
+    "action_required",
+)
+
+SNAPSHOT_CACHE_PREFIX = "tyre_analytics_snapshot"
+SNAPSHOT_TTL_SECONDS = 10 * 60
+
+MODEL_FIELDS = (
+    "custom_vehicle_model",
+    "vehicle_model",
+    "custom_model",
+    "model",
+)
+MAKE_FIELDS = (
+    "custom_vehicle_make",
+    "vehicle_make",
+    "custom_make",
+    "make",
+    "manufacturer",
+    "brand",
+)
+KNOWN_MODELS = ("740GC", "B60E", "B60", "B45E", "B40E", "B40D", "A40G")
+
+# Numeric state columns are NOT NULL in the database.
+NUMERIC_STATE_FIELDS = {
+    "otd",
+    "rtd_1",
+    "rtd_2",
+    "recommended_pressure",
+    "actual_pressure",
+    "repair_count",
+    *TREND_FIELDS,
+} - {"replacement_date"}
+
 
 def _average_rtd(row):
     readings = [
@@ -58,7 +147,7 @@ def _action_required(row):
     return int(bool(action) and action not in {"none", "no action required"})
 
 
-def _raw_readings(as_on_date=None, include_mock=True):
+def _raw_readings(as_on_date=None, include_mock=True, serial_numbers=None, exclude_survey=None):
     survey_meta = frappe.get_meta("Tyre Survey")
     tyres_field = survey_meta.get_field("tyres")
 
@@ -95,6 +184,14 @@ def _raw_readings(as_on_date=None, include_mock=True):
         conditions.append("ts.survey_date <= %(as_on_date)s")
         values["as_on_date"] = getdate(as_on_date)
 
+    if serial_numbers is not None:
+        conditions.append("UPPER(TRIM(tsi.serial_number)) IN %(serial_numbers)s")
+        values["serial_numbers"] = tuple(serial_numbers)
+
+    if exclude_survey:
+        conditions.append("ts.name != %(exclude_survey)s")
+        values["exclude_survey"] = exclude_survey
+
     return frappe.db.sql(
         """
         SELECT
@@ -143,116 +240,479 @@ def _raw_readings(as_on_date=None, include_mock=True):
     )
 
 
+def _serial_analytics(rows):
+    """Latest reading of one serial (rows newest first) and its trend."""
+    current = rows[0]
+    current_date = getdate(current.survey_date)
+    previous = next(
+        (
+            row
+            for row in rows[1:]
+            if getdate(row.survey_date) < current_date
+        ),
+        None,
+    )
+
+    average_rtd = _average_rtd(current)
+    otd = flt(current.otd)
+    rtd_percent = round((average_rtd / otd) * 100, 1) if otd else 0.0
+    previous_rtd = _average_rtd(previous) if previous else 0.0
+    interval_months = 0.0
+    wear_rate = 0.0
+
+    if previous:
+        previous_date = getdate(previous.survey_date)
+        interval_days = max((current_date - previous_date).days, 1)
+        interval_months = interval_days / MONTH_DAYS
+        wear_rate = max(
+            0.0,
+            (previous_rtd - average_rtd) / interval_months,
+        )
+
+    remaining_months = None
+    replacement_date = None
+
+    if average_rtd <= SCRAP_LIMIT_MM:
+        remaining_months = 0.0
+        replacement_date = current_date
+    elif wear_rate > 0:
+        remaining_months = max(
+            0.0,
+            (average_rtd - SCRAP_LIMIT_MM) / wear_rate,
+        )
+        replacement_date = current_date + timedelta(
+            days=round(remaining_months * MONTH_DAYS)
+        )
+
+    pressure_variance = _pressure_variance(current)
+
+    row = frappe._dict(
+        current,
+        average_rtd=average_rtd,
+        rtd_percent=rtd_percent,
+        previous_rtd=previous_rtd,
+        interval_months=round(interval_months, 2),
+        wear_rate=round(wear_rate, 2),
+        remaining_months=(
+            round(remaining_months, 1)
+            if remaining_months is not None
+            else None
+        ),
+        replacement_date=replacement_date,
+        pressure_variance=pressure_variance,
+        pressure_compliant=int(abs(pressure_variance) <= 10),
+        low_tread=int(rtd_percent < 25),
+        damage_incident=_has_damage(current),
+        action_required=_action_required(current),
+    )
+    row.base_urgency_score = _base_urgency_score(row)
+
+    return row, previous
+
+
+def _base_urgency_score(row):
+    """Urgency score without the fleet wear-rate comparison."""
+    score = 0
+
+    if row.rtd_percent < 25:
+        score += 50
+
+    if row.pressure_variance < -10:
+        score += 20
+
+    notes = str(row.condition_notes or "").lower()
+    category = str(row.damage_category or "").lower()
+
+    if "sidewall" in notes or "sidewall" in category:
+        score += 30
+
+    if flt(row.repair_count) >= 2:
+        score += 15
+
+    return score
+
+
+def _apply_urgency(analytics):
+    valid_wear_rates = [row.wear_rate for row in analytics if row.wear_rate > 0]
+    fleet_average_wear = (
+        sum(valid_wear_rates) / len(valid_wear_rates)
+        if valid_wear_rates
+        else 0.0
+    )
+
+    for row in analytics:
+        score = row.pop("base_urgency_score", 0) or 0
+
+        if fleet_average_wear and row.wear_rate > fleet_average_wear:
+            score += 15
+
+        row.urgency_score = score
+        row.urgency_band = urgency_band(score)
+        row.fleet_average_wear = round(fleet_average_wear, 2)
+
+    return analytics
+
+
+def _history_analytics(as_on_date=None, include_mock=True):
+    history = defaultdict(list)
+
+    for row in _raw_readings(as_on_date, include_mock):
+        history[row.serial_number].append(row)
+
+    return [_serial_analytics(rows)[0] for rows in history.values()]
+
+
+def _state_covers(as_on_date=None):
+    """True when Tyre Current State answers for as_on_date."""
+    latest_date, tyres = frappe.db.sql(
+        f"SELECT MAX(survey_date), COUNT(*) FROM `tab{STATE_DOCTYPE}`"
+    )[0]
+
+    if not tyres:
+        return False
+
+    # Every serial's latest survey is on or before the as-on date, so the
+    # state as of that date is the current state.
+    return not as_on_date or getdate(as_on_date) >= getdate(latest_date)
+
+
+def _state_analytics():
+    rows = frappe.get_all(
+        STATE_DOCTYPE,
+        fields=[*READING_FIELDS, *TREND_FIELDS, "base_urgency_score"],
+        order_by="serial_number asc",
+    )
+
+    for row in rows:
+        # Float columns cannot hold "no forecast".
+        if not row.replacement_date:
+            row.remaining_months = None
+
+    return rows
+
+
 def get_latest_analytics(as_on_date=None, include_mock=True):
     """Return the latest condition and previous-survey trend per serial."""
 
+    if _state_covers(as_on_date):
+        analytics = _state_analytics()
+    else:
+        analytics = _history_analytics(as_on_date, include_mock)
+
+    return _apply_urgency(analytics)
+
+
+def _normalise_serial(serial_number):
+    return str(serial_number or "").strip().upper()
+
+
+def refresh_tyre_state(serial_numbers=None, exclude_survey=None):
+    """
+    Recompute Tyre Current State for serial_numbers (every serial when None).
+
+    exclude_survey leaves out a survey that is being deleted. Returns the
+    number of serials written.
+    """
+    if serial_numbers is not None:
+        serial_numbers = sorted(
+            {_normalise_serial(serial) for serial in serial_numbers} - {""}
+        )
+
+        if not serial_numbers:
+            return 0
+
     history = defaultdict(list)
 
-    for row in _raw_readings(as_on_date, include_mock):
+    for row in _raw_readings(
+        serial_numbers=serial_numbers,
+        exclude_survey=exclude_survey,
+    ):
         history[row.serial_number].append(row)
 
-    analytics = []
+    if serial_numbers is None:
+        frappe.db.delete(STATE_DOCTYPE)
+    else:
+        frappe.db.delete(STATE_DOCTYPE, {"name": ["in", serial_numbers]})
+
+    if not history:
+        clear_analytics_snapshots()
+        return 0
+
+    timestamp = now()
+    user = frappe.session.user
+    fields = [
+        "name",
+        "creation",
+        "modified",
+        "owner",
+        "modified_by",
+        *READING_FIELDS,
+        *TREND_FIELDS,
+        "base_urgency_score",
+        "previous_survey",
+        "previous_survey_date",
+        "refreshed_on",
+    ]
 
+    values = []
     for serial_number, rows in history.items():
-        current = rows[0]
-        current_date = getdate(current.survey_date)
-        previous = next(
-            (
-                row
-                for row in rows[1:]
-                if getdate(row.survey_date) < current_date
-            ),
-            None,
+        row, previous = _serial_analytics(rows)
+
+        values.append((
+            serial_number,
+            timestamp,
+            timestamp,
+            user,
+            user,
+            *(_state_value(row, field) for field in READING_FIELDS),
+            *(_state_value(row, field) for field in TREND_FIELDS),
+            row.base_urgency_score,
+            previous.survey if previous else None,
+            previous.survey_date if previous else None,
+            timestamp,
+        ))
+
+    frappe.db.bulk_insert(
+        STATE_DOCTYPE,
+        fields,
+        values,
+        chunk_size=STATE_WRITE_CHUNK_SIZE,
+    )
+    clear_analytics_snapshots()
+
+    return len(values)
+
+
+def _state_value(row, field):
+    value = row.get(field)
+
+    if value is None and field in NUMERIC_STATE_FIELDS:
+        return 0
+
+    return value
+
+
+def _survey_serials(doc):
+    """Serials on the survey now plus those the state holds for it."""
+    serials = {
+        _normalise_serial(row.get("serial_number"))
+        for row in doc.get("tyres") or []
+    }
+
+    # Serials edited or removed since the survey was last saved.
+    serials.update(
+        frappe.get_all(
+            STATE_DOCTYPE,
+            or_filters={"survey": doc.name, "previous_survey": doc.name},
+            pluck="name",
         )
+    )
 
-        average_rtd = _average_rtd(current)
-        otd = flt(current.otd)
-        rtd_percent = round((average_rtd / otd) * 100, 1) if otd else 0.0
-        previous_rtd = _average_rtd(previous) if previous else 0.0
-        interval_months = 0.0
-        wear_rate = 0.0
-
-        if previous:
-            previous_date = getdate(previous.survey_date)
-            interval_days = max((current_date - previous_date).days, 1)
-            interval_months = interval_days / MONTH_DAYS
-            wear_rate = max(
-                0.0,
-                (previous_rtd - average_rtd) / interval_months,
-            )
+    return serials
 
-        remaining_months = None
-        replacement_date = None
 
-        if average_rtd <= SCRAP_LIMIT_MM:
-            remaining_months = 0.0
-            replacement_date = current_date
-        elif wear_rate > 0:
-            remaining_months = max(
-                0.0,
-                (average_rtd - SCRAP_LIMIT_MM) / wear_rate,
-            )
-            replacement_date = current_date + timedelta(
-                days=round(remaining_months * MONTH_DAYS)
+def on_tyre_survey_change(doc, method=None):
+    """Tyre Survey on_update / on_trash."""
+    try:
+        refresh_tyre_state(
+            _survey_serials(doc),
+            exclude_survey=doc.name if method == "on_trash" else None,
+        )
+    except Exception:
+        frappe.log_error(frappe.get_traceback(), "Tyre Current State - Refresh")
+
+
+@frappe.whitelist()
+def rebuild_tyre_state():
+    """Rebuild Tyre Current State from the full survey history."""
+    frappe.only_for("System Manager")
+    return refresh_tyre_state()
+
+
+def _present_fields(doctype, fieldnames):
+    meta = frappe.get_meta(doctype)
+    return [fieldname for fieldname in fieldnames if meta.has_field(fieldname)]
+
+
+def _first_value(row, fieldnames):
+    for fieldname in fieldnames:
+        if row.get(fieldname):
+            return str(row.get(fieldname)).strip()
+
+    return ""
+
+
+def _describe_asset(asset, item):
+    """Vehicle make and model of an ADT from its Asset and Item rows."""
+    vehicle_make = _first_value(asset, MAKE_FIELDS)
+    model = _first_value(asset, MODEL_FIELDS)
+    searchable = [
+        asset.name,
+        asset.get("item_name"),
+        asset.get("item_code"),
+        vehicle_make,
+        model,
+    ]
+
+    if item:
+        vehicle_make = vehicle_make or _first_value(item, MAKE_FIELDS)
+        model = model or _first_value(item, MODEL_FIELDS)
+        searchable.extend(
+            [
+                item.get("item_name"),
+                item.get("item_code"),
+                item.get("description"),
+                vehicle_make,
+                model,
+            ]
+        )
+
+    model_text = "".join(
+        character
+        for character in " ".join(
+            str(value) for value in searchable if value not in (None, "")
+        ).upper()
+        if character.isalnum()
+    )
+
+    for known_model in KNOWN_MODELS:
+        if known_model in model_text:
+            model = known_model
+            break
+
+    if not vehicle_make and str(model).upper().startswith("B"):
+        vehicle_make = "Bell"
+
+    return {"vehicle_make": vehicle_make, "model": model}
+
+
+def get_asset_information(asset_names):
+    """{asset name: {vehicle_make, model}} in two queries."""
+    asset_names = sorted({name for name in asset_names if name})
+
+    if not asset_names:
+        return {}
+
+    asset_make_fields = _present_fields("Asset", MAKE_FIELDS)
+    asset_model_fields = _present_fields("Asset", MODEL_FIELDS)
+    assets = frappe.get_all(
+        "Asset",
+        filters={"name": ["in", asset_names]},
+        fields=list(
+            dict.fromkeys(
+                [
+                    "name",
+                    "item_name",
+                    "item_code",
+                    *asset_make_fields,
+                    *asset_model_fields,
+                ]
             )
+        ),
+    )
 
-        pressure_variance = _pressure_variance(current)
-
-        analytics.append(
-            frappe._dict(
-                current,
-                average_rtd=average_rtd,
-                rtd_percent=rtd_percent,
-                previous_rtd=previous_rtd,
-                interval_months=round(interval_months, 2),
-                wear_rate=round(wear_rate, 2),
-                remaining_months=(
-                    round(remaining_months, 1)
-                    if remaining_months is not None
-                    else None
+    item_codes = sorted({asset.item_code for asset in assets if asset.item_code})
+    items = {}
+
+    if item_codes:
+        item_make_fields = _present_fields("Item", MAKE_FIELDS)
+        item_model_fields = _present_fields("Item", MODEL_FIELDS)
+        items = {
+            item.name: item
+            for item in frappe.get_all(
+                "Item",
+                filters={"name": ["in", item_codes]},
+                fields=list(
+                    dict.fromkeys(
+                        [
+                            "name",
+                            "item_name",
+                            "item_code",
+                            "description",
+                            *item_make_fields,
+                            *item_model_fields,
+                        ]
+                    )
                 ),
-                replacement_date=replacement_date,
-                pressure_variance=pressure_variance,
-                pressure_compliant=int(abs(pressure_variance) <= 10),
-                low_tread=int(rtd_percent < 25),
-                damage_incident=_has_damage(current),
-                action_required=_action_required(current),
             )
+        }
+
+    return {
+        asset.name: _describe_asset(asset, items.get(asset.item_code))
+        for asset in assets
+    }
+
+
+class TyreAnalyticsSnapshot:
+    """Latest analytics for one (as_on_date, include_mock), stored by column."""
+
+    def __init__(self, columns, assets):
+        self.columns = columns
+        self.assets = assets
+
+    @classmethod
+    def build(cls, as_on_date=None, include_mock=True):
+        analytics = get_latest_analytics(as_on_date, include_mock)
+        fields = list(dict.fromkeys(field for row in analytics for field in row))
+
+        return cls(
+            columns={
+                field: [row.get(field) for row in analytics]
+                for field in fields
+            },
+            assets=get_asset_information(row.fleet_number for row in analytics),
         )
 
-    valid_wear_rates = [row.wear_rate for row in analytics if row.wear_rate > 0]
-    fleet_average_wear = (
-        sum(valid_wear_rates) / len(valid_wear_rates)
-        if valid_wear_rates
-        else 0.0
-    )
+    def __len__(self):
+        return len(next(iter(self.columns.values()), []))
 
-    for row in analytics:
-        score = 0
+    def column(self, field):
+        return self.columns.get(field) or [None] * len(self)
 
-        if row.rtd_percent < 25:
-            score += 50
+    def rows(self):
+        """Fresh row dicts; callers may filter, sort and annotate them."""
+        fields = list(self.columns)
+        return [
+            frappe._dict(zip(fields, values))
+            for values in zip(*self.columns.values())
+        ]
 
-        if row.pressure_variance < -10:
-            score += 20
+    def asset_information(self, asset_name):
+        if asset_name not in self.assets:
+            # An ADT without surveyed tyres is not prefetched.
+            self.assets.update(get_asset_information([asset_name]))
 
-        if fleet_average_wear and row.wear_rate > fleet_average_wear:
-            score += 15
+        return self.assets.get(asset_name) or {"vehicle_make": "", "model": ""}
 
-        notes = str(row.condition_notes or "").lower()
-        category = str(row.damage_category or "").lower()
 
-        if "sidewall" in notes or "sidewall" in category:
-            score += 30
+def _snapshot_key(as_on_date, include_mock):
+    return "{0}:{1}:{2}".format(
+        SNAPSHOT_CACHE_PREFIX,
+        getdate(as_on_date) if as_on_date else "latest",
+        int(bool(include_mock)),
+    )
 
-        if flt(row.repair_count) >= 2:
-            score += 15
 
-        row.urgency_score = score
-        row.urgency_band = urgency_band(score)
-        row.fleet_average_wear = round(fleet_average_wear, 2)
+def get_analytics_snapshot(as_on_date=None, include_mock=True):
+    """Cached TyreAnalyticsSnapshot for (as_on_date, include_mock)."""
+    key = _snapshot_key(as_on_date, include_mock)
+    cached = frappe.cache().get_value(key)
 
-    return analytics
+    if cached is not None:
+        return TyreAnalyticsSnapshot(**cached)
+
+    snapshot = TyreAnalyticsSnapshot.build(as_on_date, include_mock)
+    frappe.cache().set_value(
+        key,
+        {"columns": snapshot.columns, "assets": snapshot.assets},
+        expires_in_sec=SNAPSHOT_TTL_SECONDS,
+    )
+
+    return snapshot
+
+
+def clear_analytics_snapshots():
+    frappe.cache().delete_keys(SNAPSHOT_CACHE_PREFIX)
 
 
 def urgency_band(score):